@@ -290,6 +290,7 @@ def deploy_webserver(client, app_name, es_url, db_url, broker_url):
         'SCALE_ALLOWED_HOSTS': 'SCALE_ALLOWED_HOSTS',
         'SCALE_SECRET_KEY': 'SCALE_SECRET_KEY',
         'SCALE_QUEUE_NAME': 'SCALE_QUEUE_NAME',
+        'SCALE_QUEUE_ROUTES': 'SCALE_QUEUE_ROUTES',
         'GEOAXIS_HOST': 'GEOAXIS_HOST',
         'GEOAXIS_KEY': 'GEOAXIS_KEY',
         'GEOAXIS_SECRET': 'GEOAXIS_SECRET'
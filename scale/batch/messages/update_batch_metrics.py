@@ -14,11 +14,13 @@ MAX_NUM = 100
 logger = logging.getLogger(__name__)
 
 
-def create_update_batch_metrics_messages(batch_ids):
+def create_update_batch_metrics_messages(batch_ids, count_jobs=True):
     """Creates messages to update the metrics for the given batches
 
     :param batch_ids: The batch IDs
     :type batch_ids: :func:`list`
+    :param count_jobs: Whether the jobs in the batches should be recounted
+    :type count_jobs: bool
     :return: The list of messages
     :rtype: :func:`list`
     """
@@ -29,9 +31,11 @@ def create_update_batch_metrics_messages(batch_ids):
     for batch_id in batch_ids:
         if not message:
             message = UpdateBatchMetrics()
+            message.count_jobs = count_jobs
         elif not message.can_fit_more():
             messages.append(message)
             message = UpdateBatchMetrics()
+            message.count_jobs = count_jobs
         message.add_batch(batch_id)
     if message:
         messages.append(message)
@@ -51,6 +55,9 @@ class UpdateBatchMetrics(CommandMessage):
 
         self._batch_ids = []
 
+        # Job counts are not recounted when they are maintained incrementally as job statuses change
+        self.count_jobs = True
+
     def add_batch(self, batch_id):
         """Adds the given batch ID to this message
 
@@ -69,11 +76,28 @@ class UpdateBatchMetrics(CommandMessage):
 
         return len(self._batch_ids) < MAX_NUM
 
+    def can_merge(self, other):
+        """See :meth:`messaging.messages.message.CommandMessage.can_merge`
+        """
+
+        if not isinstance(other, UpdateBatchMetrics):
+            return False
+        return len(self._batch_ids) + len(other._batch_ids) <= MAX_NUM
+
+    def merge(self, other):
+        """See :meth:`messaging.messages.message.CommandMessage.merge`
+        """
+
+        for batch_id in other._batch_ids:
+            if batch_id not in self._batch_ids:
+                self.add_batch(batch_id)
+        self.count_jobs = self.count_jobs or other.count_jobs
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
 
-        return {'batch_ids': self._batch_ids}
+        return {'batch_ids': self._batch_ids, 'count_jobs': self.count_jobs}
 
     @staticmethod
     def from_json(json_dict):
@@ -81,6 +105,7 @@ class UpdateBatchMetrics(CommandMessage):
         """
 
         message = UpdateBatchMetrics()
+        message.count_jobs = json_dict.get('count_jobs', True)
         for batch_id in json_dict['batch_ids']:
             message.add_batch(batch_id)
 
@@ -90,5 +115,5 @@ class UpdateBatchMetrics(CommandMessage):
         """See :meth:`messaging.messages.message.CommandMessage.execute`
         """
 
-        Batch.objects.update_batch_metrics(self._batch_ids)
+        Batch.objects.update_batch_metrics(self._batch_ids, count_jobs=self.count_jobs)
         return True
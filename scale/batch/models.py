@@ -455,11 +455,14 @@ class BatchManager(models.Manager):
 
         self.filter(id=batch_id).update(is_superseded=True, superseded=when, last_modified=now())
 
-    def update_batch_metrics(self, batch_ids):
+    def update_batch_metrics(self, batch_ids, count_jobs=True):
         """Updates the metrics for the batches with the given IDs
 
         :param batch_ids: The batch IDs
         :type batch_ids: :func:`list`
+        :param count_jobs: Whether to recount the jobs for the metrics per job name. When the job counts are maintained
+            incrementally only the batch totals (which are summed from the batch recipes) are updated.
+        :type count_jobs: bool
         """
 
         if not batch_ids:
@@ -480,7 +483,8 @@ class BatchManager(models.Manager):
         with connection.cursor() as cursor:
             cursor.execute(qry, [now(), tuple(batch_ids)])
 
-        BatchMetrics.objects.update_batch_metrics_per_job(batch_ids)
+        if count_jobs:
+            BatchMetrics.objects.update_batch_metrics_per_job(batch_ids)
 
     def validate_batch_v6(self, recipe_type, definition, configuration=None):
         """Validates the given recipe type, definition, and configuration for creating a new batch
@@ -700,6 +704,75 @@ class BatchMetricsManager(models.Manager):
 
         return self.filter(batch_id=batch_id)
 
+    def apply_job_status_deltas(self, node_deltas, when):
+        """Applies the given job status count deltas to the metrics per job name. The caller must have obtained model
+        locks on the changed job models in an atomic transaction.
+
+        :param node_deltas: Dict of (batch ID, job name) to a dict of job status to count delta
+        :type node_deltas: dict
+        :param when: The current time
+        :type when: :class:`datetime.datetime`
+        """
+
+        from recipe.models import METRICS_JOB_STATUSES
+
+        if not node_deltas:
+            return
+
+        # Batch metrics models are always locked in order of ascending ID to prevent deadlocks
+        metrics_qry = Q()
+        for batch_id, job_name in node_deltas.keys():
+            metrics_qry |= Q(batch_id=batch_id, job_name=job_name)
+        list(self.select_for_update().filter(metrics_qry).order_by('id').values_list('id', flat=True))
+
+        columns = ['jobs_%s' % status.lower() for status in METRICS_JOB_STATUSES]
+        values = []
+        params = [when]
+        for (batch_id, job_name), deltas in node_deltas.items():
+            values.append('(' + ', '.join(['%s'] * (len(columns) + 2)) + ')')
+            params.extend([batch_id, job_name])
+            params.extend(deltas.get(status, 0) for status in METRICS_JOB_STATUSES)
+        qry = 'UPDATE batch_metrics bm SET last_modified = %s, '
+        qry += ', '.join('%s = bm.%s + d.%s' % (column, column, column) for column in columns)
+        qry += ' FROM (VALUES %s) AS d(batch_id, job_name, %s) ' % (', '.join(values), ', '.join(columns))
+        qry += 'WHERE bm.batch_id = d.batch_id AND bm.job_name = d.job_name'
+        with connection.cursor() as cursor:
+            cursor.execute(qry, params)
+
+    def reconcile_batch_metrics_per_job(self, batch_ids):
+        """Recounts the metrics per job name for the batches with the given IDs and returns any differences in the job
+        counts from the metrics that were previously stored
+
+        :param batch_ids: The batch IDs
+        :type batch_ids: :func:`list`
+        :returns: Dict of (batch ID, job name) to a dict of each job count field that drifted to a tuple of the stored
+            and recounted values
+        :rtype: dict
+        """
+
+        from recipe.models import METRICS_JOB_STATUSES
+
+        drift = {}
+        if not batch_ids:
+            return drift
+
+        fields = ['jobs_total'] + ['jobs_%s' % status.lower() for status in METRICS_JOB_STATUSES]
+        with transaction.atomic():
+            list(self.select_for_update().filter(batch_id__in=batch_ids).order_by('id').values_list('id', flat=True))
+            qry = self.filter(batch_id__in=batch_ids).values_list('batch_id', 'job_name', *fields)
+            before = {values[:2]: values[2:] for values in qry}
+            self.update_batch_metrics_per_job(batch_ids)
+            after = list(qry.all())
+        for values in after:
+            metrics_fields = {}
+            for field, old_value, new_value in zip(fields, before[values[:2]], values[2:]):
+                if old_value != new_value:
+                    metrics_fields[field] = (old_value, new_value)
+            if metrics_fields:
+                drift[values[:2]] = metrics_fields
+
+        return drift
+
     def update_batch_metrics_per_job(self, batch_ids):
         """Updates the metrics per job name for the batches with the given IDs
 
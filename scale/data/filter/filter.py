@@ -13,6 +13,10 @@ logger = logging.getLogger(__name__)
 
 FILE_TYPES = {'filename', 'media-type', 'data-type', 'meta-data'}
 
+# The scale_file column read by each file type filter
+FILE_TYPE_FIELDS = {'filename': 'file_name', 'media-type': 'media_type', 'data-type': 'data_type_tags',
+                    'meta-data': 'meta_data'}
+
 STRING_TYPES = {'string', 'filename', 'media-type', 'data-type'}
 
 STRING_CONDITIONS = {'==', '!=', 'in', 'not in', 'contains'}
@@ -265,6 +269,8 @@ class DataFilter(object):
         self.filter_list = filter_list
         self.all = all
 
+        self._checks = None  # The compiled filter list, see _compile()
+
     def add_filter(self, filter_dict):
         """Adds a filter definition
 
@@ -277,6 +283,21 @@ class DataFilter(object):
         filter_dict = DataFilter.validate_filter(filter_dict)
 
         self.filter_list.append(filter_dict)
+        self._checks = None
+
+    def accept_many(self, datas):
+        """Indicates whether each of the given data passes the filter or not. The filter is compiled once for all of the
+        data and the files referenced by the file type filters are retrieved with a single query.
+
+        :param datas: The data to check against the filter
+        :type datas: [:class:`data.data.data.Data`]
+        :returns: For each data, True if the data is accepted, False if the data is denied
+        :rtype: [bool]
+        """
+
+        checks = self._compile()
+        files = self._get_files(datas)
+        return [self._is_accepted(checks, data, files) for data in datas]
 
     def is_data_accepted(self, data):
         """Indicates whether the given data passes the filter or not
@@ -287,106 +308,7 @@ class DataFilter(object):
         :rtype: bool
         """
 
-        success = True
-        for f in self.filter_list:
-            name = f['name']
-            filter_type = f['type']
-            cond = f['condition']
-            values = f['values']
-            filter_success = False
-            all_fields = False
-            if 'all_fields' in f and f['all_files']:
-                all_fields = True
-            all_files = False
-            if 'all_files' in f and f['all_files']:
-                all_files = True
-            if name in data.values:
-                param = data.values[name]
-                try:
-                    if filter_type in {'filename', 'media-type', 'data-type'}:
-                        if filter_type == 'filename':
-                            file_values = [scale_file.file_name for scale_file in ScaleFile.objects.filter(id__in=param.file_ids)]
-                        elif filter_type == 'media-type':
-                            file_values = [scale_file.media_type for scale_file in ScaleFile.objects.filter(id__in=param.file_ids)]
-                        elif filter_type == 'data-type':
-                            list_of_lists = [scale_file.data_type_tags for scale_file in ScaleFile.objects.filter(id__in=param.file_ids)]
-                            file_values = [item for sublist in list_of_lists for item in sublist]
-                        # attempt to run condition on list, i.e. in case we're checking 'contains'
-                        filter_success |= ALL_CONDITIONS[cond](file_values, values)
-                        file_success = all_files
-                        for value in file_values:
-                            if all_files:
-                                # attempt to run condition on individual items, if any fail we fail the filter
-                                file_success &= ALL_CONDITIONS[cond](value, values)
-                            else:
-                                # attempt to run condition on individual items, if any succeed we pass the filter
-                                file_success |= ALL_CONDITIONS[cond](value, values)
-                        filter_success |= file_success
-                    elif filter_type == 'meta-data':
-                        meta_data_list = [scale_file.meta_data for scale_file in ScaleFile.objects.filter(id__in=param.file_ids)]
-                        if 'fields' in f:
-                            if len(f['fields']) != len(values):
-                                logger.exception('Length of fields (%s) and values (%s) are not equal' % (f['fields'], values))
-                                return False
-                            file_success = all_files
-                            for meta_data in meta_data_list:
-                                field_success = all_fields
-                                for field_path, value in zip(f['fields'], values):
-                                    item = _getNestedDictField(meta_data, field_path)
-                                    if all_fields:
-                                        # attempt to run condition on individual items, if any fail we fail the filter
-                                        field_success &= ALL_CONDITIONS[cond](item, value)
-                                    else:
-                                        # attempt to run condition on individual items, if any succeed we pass the filter
-                                        field_success |= ALL_CONDITIONS[cond](item, value)
-                                if all_files:
-                                    file_success &= field_success
-                                else:
-                                    file_success |= field_success
-                            filter_success |= file_success
-                        else:
-                            filter_success |= ALL_CONDITIONS[cond](meta_data_list, values)
-                            file_success = all_files
-                            for item in meta_data_list:
-                                if all_files:
-                                    # attempt to run condition on individual items, if any fail we fail the filter
-                                    file_success &= ALL_CONDITIONS[cond](item, values)
-                                else:
-                                    # attempt to run condition on individual items, if any succeed we pass the filter
-                                    file_success |= ALL_CONDITIONS[cond](item, values)
-                            filter_success |= file_success
-                    elif filter_type == 'object':
-                        if 'fields' in f:
-                            if len(f['fields']) != len(values):
-                                logger.exception('Length of fields (%s) and values (%s) are not equal' % (f['fields'], values))
-                                return False
-                            field_success = all_fields
-                            for field_path, value in zip(f['fields'], values):
-                                item = _getNestedDictField(param.value, field_path)
-                                if all_fields:
-                                    field_success &= ALL_CONDITIONS[cond](item, values)
-                                else:
-                                    field_success |= ALL_CONDITIONS[cond](item, values)
-                            filter_success |= field_success
-                        else:
-                            filter_success |= ALL_CONDITIONS[cond](param.value, values)
-                    else:
-                        filter_success |= ALL_CONDITIONS[cond](param.value, values)
-                except AttributeError:
-                    logger.error('Attempting to run file filter on json parameter or vice versa')
-                    success = False
-                except KeyError:
-                    logger.error('Condition %s does not exist' % cond)
-                    success = False
-                except ScaleFile.DoesNotExist:
-                    logger.error('Attempting to run file filter on non-existant file(s): %d' % param.file_ids)
-                    success = False
-            if filter_success and not self.all:
-                return True # One filter passed, so return True
-            if not filter_success and self.all:
-                return False # One filter failed, so return False
-            success &= filter_success
-        return success
+        return self.accept_many([data])[0]
 
     def is_filter_equal(self, data_filter):
         """Indicates whether the given data filter is equal to this filter or not
@@ -521,4 +443,193 @@ class DataFilter(object):
 
         ret_val = copy.deepcopy(filter_dict)
         ret_val['values'] = filter_values
-        return ret_val
\ No newline at end of file
+        return ret_val
+
+    def _compile(self):
+        """Compiles the filter list into a list of checks. Each check is a tuple of the parameter name, the condition and
+        a function taking the data value for that parameter and the dict of retrieved files, and returning whether the
+        filter passed. The checks are compiled once and reused until another filter is added.
+
+        :returns: The list of checks
+        :rtype: :func:`list`
+        """
+
+        if self._checks is None:
+            self._checks = [(f['name'], f['condition'], _compile_filter(f)) for f in self.filter_list]
+        return self._checks
+
+    def _get_files(self, datas):
+        """Retrieves the attributes of all files referenced by the file type filters for the given data with a single
+        query
+
+        :param datas: The data to check against the filter
+        :type datas: [:class:`data.data.data.Data`]
+        :returns: The file attributes stored by file ID
+        :rtype: dict
+        """
+
+        file_filters = [f for f in self.filter_list if f['type'] in FILE_TYPES]
+        file_names = {f['name'] for f in file_filters}
+        file_ids = set()
+        for data in datas:
+            for name in file_names:
+                if name in data.values:
+                    file_ids.update(getattr(data.values[name], 'file_ids', []))
+        if not file_ids:
+            return {}
+
+        qry = ScaleFile.objects.filter(id__in=list(file_ids))
+        # Only select the file attributes used by the filters
+        fields = sorted({FILE_TYPE_FIELDS[f['type']] for f in file_filters})
+        qry = qry.values('id', *fields)
+        return {scale_file['id']: scale_file for scale_file in qry}
+
+    def _is_accepted(self, checks, data, files):
+        """Indicates whether the given data passes the compiled filter or not
+
+        :param checks: The compiled checks of the filter
+        :type checks: :func:`list`
+        :param data: The data to check against the filter
+        :type data: :class:`data.data.data.Data`
+        :param files: The file attributes stored by file ID
+        :type files: dict
+        :returns: True if the data is accepted, False if the data is denied
+        :rtype: bool
+        """
+
+        success = True
+        for name, cond, check in checks:
+            filter_success = False
+            if name in data.values:
+                param = data.values[name]
+                try:
+                    filter_success = check(param, files)
+                except _DeniedData:
+                    return False
+                except AttributeError:
+                    logger.error('Attempting to run file filter on json parameter or vice versa')
+                    success = False
+                except KeyError:
+                    logger.error('Condition %s does not exist' % cond)
+                    success = False
+            if filter_success and not self.all:
+                return True # One filter passed, so return True
+            if not filter_success and self.all:
+                return False # One filter failed, so return False
+            success &= filter_success
+        return success
+
+
+class _DeniedData(Exception):
+    """Raised by a compiled filter check to deny the data regardless of the other filters
+    """
+
+    pass
+
+
+def _compile_filter(f):
+    """Compiles the given filter definition into a check function taking the data value for the filter's parameter and
+    the dict of retrieved files, and returning whether the filter passed
+
+    :param f: The filter definition
+    :type f: dict
+    :returns: The check function
+    :rtype: function
+    """
+
+    filter_type = f['type']
+    cond = f['condition']
+    values = f['values']
+    fields = f.get('fields')
+    all_fields = bool(f.get('all_fields'))
+    all_files = bool(f.get('all_files'))
+
+    if cond in ALL_CONDITIONS:
+        cond_func = ALL_CONDITIONS[cond]
+    else:
+        def cond_func(input, values):
+            raise KeyError(cond)
+
+    def get_files(param, files):
+        return [files[file_id] for file_id in param.file_ids if file_id in files]
+
+    def check_fields_length():
+        if len(fields) != len(values):
+            logger.exception('Length of fields (%s) and values (%s) are not equal' % (fields, values))
+            raise _DeniedData()
+
+    if filter_type in {'filename', 'media-type', 'data-type'}:
+        def check_file_values(param, files):
+            scale_files = get_files(param, files)
+            if filter_type == 'filename':
+                file_values = [scale_file['file_name'] for scale_file in scale_files]
+            elif filter_type == 'media-type':
+                file_values = [scale_file['media_type'] for scale_file in scale_files]
+            else:
+                file_values = [item for scale_file in scale_files for item in scale_file['data_type_tags']]
+            # attempt to run condition on list, i.e. in case we're checking 'contains'
+            filter_success = cond_func(file_values, values)
+            file_success = all_files
+            for value in file_values:
+                if all_files:
+                    # attempt to run condition on individual items, if any fail we fail the filter
+                    file_success &= cond_func(value, values)
+                else:
+                    # attempt to run condition on individual items, if any succeed we pass the filter
+                    file_success |= cond_func(value, values)
+            return filter_success | file_success
+        return check_file_values
+
+    if filter_type == 'meta-data' and fields is not None:
+        def check_meta_data_fields(param, files):
+            meta_data_list = [scale_file['meta_data'] for scale_file in get_files(param, files)]
+            check_fields_length()
+            file_success = all_files
+            for meta_data in meta_data_list:
+                field_success = all_fields
+                for field_path, value in zip(fields, values):
+                    item = _getNestedDictField(meta_data, field_path)
+                    if all_fields:
+                        # attempt to run condition on individual items, if any fail we fail the filter
+                        field_success &= cond_func(item, value)
+                    else:
+                        # attempt to run condition on individual items, if any succeed we pass the filter
+                        field_success |= cond_func(item, value)
+                if all_files:
+                    file_success &= field_success
+                else:
+                    file_success |= field_success
+            return file_success
+        return check_meta_data_fields
+
+    if filter_type == 'meta-data':
+        def check_meta_data(param, files):
+            meta_data_list = [scale_file['meta_data'] for scale_file in get_files(param, files)]
+            filter_success = cond_func(meta_data_list, values)
+            file_success = all_files
+            for item in meta_data_list:
+                if all_files:
+                    # attempt to run condition on individual items, if any fail we fail the filter
+                    file_success &= cond_func(item, values)
+                else:
+                    # attempt to run condition on individual items, if any succeed we pass the filter
+                    file_success |= cond_func(item, values)
+            return filter_success | file_success
+        return check_meta_data
+
+    if filter_type == 'object' and fields is not None:
+        def check_object_fields(param, files):
+            check_fields_length()
+            field_success = all_fields
+            for field_path in fields:
+                item = _getNestedDictField(param.value, field_path)
+                if all_fields:
+                    field_success &= cond_func(item, values)
+                else:
+                    field_success |= cond_func(item, values)
+            return field_success
+        return check_object_fields
+
+    def check_value(param, files):
+        return cond_func(param.value, values)
+    return check_value
@@ -2,7 +2,9 @@ from __future__ import unicode_literals
 
 import django
 
+from django.db import connection
 from django.test.testcases import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from data.data.data import Data
 from data.data.value import FileValue, JsonValue
@@ -87,6 +89,64 @@ class TestDataFilter(TestCase):
 
         self.assertTrue(data_filter.is_data_accepted(data))
 
+    def test_accept_many(self):
+        """Tests calling DataFilter.accept_many()"""
+
+        file3 = storage_test_utils.create_file(media_type='text/plain', meta_data={'a': {'b': 'bar'}})
+        data_filter = DataFilter(all=True)
+        data_filter.add_filter({'name': 'input_a', 'type': 'media-type', 'condition': '==', 'values': ['application/json']})
+        data_filter.add_filter({'name': 'input_f', 'type': 'meta-data', 'condition': 'in', 'values': [['foo', 'baz']],
+                                'fields': [['a', 'b']]})
+        data_filter.add_filter({'name': 'input_c', 'type': 'integer', 'condition': '>', 'values': ['0']})
+
+        datas = []
+        for file_a, file_f, value_c in [(self.file1, self.file2, 10), (file3, self.file2, 10),
+                                        (self.file1, file3, 10), (self.file1, self.file2, -1)]:
+            data = Data()
+            data.add_value(FileValue('input_a', [file_a.id]))
+            data.add_value(FileValue('input_f', [file_f.id]))
+            data.add_value(JsonValue('input_c', value_c))
+            datas.append(data)
+
+        # Files for all of the data are retrieved with a single query
+        with self.assertNumQueries(1):
+            results = data_filter.accept_many(datas)
+        self.assertListEqual(results, [True, False, False, False])
+        self.assertListEqual(results, [data_filter.is_data_accepted(data) for data in datas])
+        self.assertListEqual(data_filter.accept_many([]), [])
+
+    def test_accept_many_fields(self):
+        """Tests that DataFilter.accept_many() only selects the file attributes used by the filters"""
+
+        data_filter = DataFilter(all=True)
+        data_filter.add_filter({'name': 'input_a', 'type': 'media-type', 'condition': '==', 'values': ['application/json']})
+        data = Data()
+        data.add_value(FileValue('input_a', [self.file1.id]))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertListEqual(data_filter.accept_many([data]), [True])
+        self.assertEqual(len(queries), 1)
+        self.assertIn('media_type', queries[0]['sql'])
+        self.assertNotIn('meta_data', queries[0]['sql'])
+
+    def test_compile_cached(self):
+        """Tests that the compiled filter is reused until another filter is added"""
+
+        data_filter = DataFilter(all=True)
+        data_filter.add_filter({'name': 'input_c', 'type': 'integer', 'condition': '>', 'values': ['0']})
+        data = Data()
+        data.add_value(JsonValue('input_c', 10))
+        data.add_value(JsonValue('input_d', 10))
+
+        self.assertTrue(data_filter.is_data_accepted(data))
+        checks = data_filter._checks
+        self.assertTrue(data_filter.is_data_accepted(data))
+        self.assertIs(data_filter._checks, checks)
+
+        data_filter.add_filter({'name': 'input_d', 'type': 'integer', 'condition': '<', 'values': ['0']})
+        self.assertFalse(data_filter.is_data_accepted(data))
+        self.assertEqual(len(data_filter._checks), 2)
+
     def test_validate(self):
         """Tests calling DataFilter.validate()"""
 
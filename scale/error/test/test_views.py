@@ -36,6 +36,29 @@ class TestErrorsViewV6(APITestCase):
         result = json.loads(response.content)
         self.assertEqual(len(result['results']), 3)
 
+    def test_list_errors_cursor(self):
+        """Tests paging through the errors with a cursor."""
+
+        url = '/%s/errors/?cursor=&page_size=2&count=exact' % self.api
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+
+        result = json.loads(response.content)
+        self.assertEqual(result['count'], 3)
+        self.assertEqual(len(result['results']), 2)
+        self.assertIsNone(result['previous'])
+        self.assertIn('cursor=', result['next'])
+        ids = [error['id'] for error in result['results']]
+
+        response = self.client.get(result['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+
+        result = json.loads(response.content)
+        self.assertEqual(len(result['results']), 1)
+        self.assertIsNone(result['next'])
+        ids.extend([error['id'] for error in result['results']])
+        self.assertListEqual(ids, list(Error.objects.order_by('last_modified', 'id').values_list('id', flat=True)))
+
     def test_list_errors_filter_time(self):
         url = '/%s/errors/?started=2017-01-01T00:00:00Z&ended=2017-01-02T00:00:00Z' % self.api
         response = self.client.generic('GET', url)
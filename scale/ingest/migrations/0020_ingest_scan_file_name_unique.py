@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.22 on 2026-10-17 12:00
+from __future__ import unicode_literals
+
+from django.db import connection, migrations
+
+
+def remove_duplicate_scan_ingests(apps, schema_editor):
+    # Concurrent runs of a scan, or runs from before scanned ingests were de-duplicated, may have created several
+    # ingests of the same file name. Keep one per scan and file name, preferring one that was ingested and otherwise
+    # the oldest, and move the ingest events of the others onto it before deleting them.
+
+    ranked = 'WITH ranked AS (SELECT id, first_value(id) OVER (PARTITION BY scan_id, file_name '
+    ranked += 'ORDER BY status = \'INGESTED\' DESC, id) AS keep_id FROM ingest WHERE scan_id IS NOT NULL) '
+    update = ranked + 'UPDATE ingest_event e SET ingest_id = r.keep_id FROM ranked r '
+    update += 'WHERE e.ingest_id = r.id AND r.id <> r.keep_id'
+    delete = ranked + 'DELETE FROM ingest i USING ranked r WHERE i.id = r.id AND r.id <> r.keep_id'
+    with connection.cursor() as cursor:
+        cursor.execute(update)
+        cursor.execute(delete)
+        count = cursor.rowcount
+        if count:
+            print('%d duplicate scan ingests removed' % count)
+        # Check the deferred foreign keys now, otherwise the pending trigger events block altering the ingest table
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingest', '0019_filename_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_scan_ingests, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='ingest',
+            unique_together=set([('scan', 'file_name')]),
+        ),
+    ]
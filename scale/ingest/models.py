@@ -12,7 +12,7 @@ from collections import namedtuple
 import django.utils.timezone as timezone
 import django.contrib.postgres.fields
 from django.contrib.postgres.indexes import GinIndex
-from django.db import models, transaction
+from django.db import connection, models, transaction
 from django.db.models import Q
 from django.utils.timezone import now
 
@@ -26,7 +26,7 @@ from ingest.scan.scanners.exceptions import ScanIngestJobAlreadyLaunched
 from ingest.strike.configuration.strike_configuration import StrikeConfiguration
 from ingest.strike.configuration.json.configuration_v6 import StrikeConfigurationV6, convert_strike_config_to_v6_json
 from ingest.strike.configuration.exceptions import InvalidStrikeConfiguration
-from job.models import JobType
+from job.models import Job, JobType, JobTypeRevision
 from job.messages.process_job_input import create_process_job_input_messages
 from job.messages.cancel_jobs import create_cancel_jobs_messages
 from messaging.manager import CommandMessageManager
@@ -113,6 +113,31 @@ class IngestManager(models.Manager):
 
         return ingest
 
+    def bulk_create_scan_ingests(self, ingests):
+        """Inserts the given new ingests from a scan with a single bulk insert, skipping any ingest whose file name
+        already has an ingest for the same scan. The IDs of the inserted ingests are set on their models.
+
+        :param ingests: The new ingest models, which must have unique file names
+        :type ingests: [:class:`ingest.models.Ingest`]
+        :returns: The ingests that were inserted
+        :rtype: [:class:`ingest.models.Ingest`]
+        """
+
+        if not ingests:
+            return []
+
+        # Skip file names that already have an ingest for their scan, using the unique (scan, file_name) index
+        file_names = {}  # {Scan ID: list of file names}
+        for ingest in ingests:
+            file_names.setdefault(ingest.scan_id, []).append(ingest.file_name)
+        existing = set()
+        for scan_id, scan_file_names in file_names.items():
+            qry = self.filter(scan_id=scan_id, file_name__in=scan_file_names).values_list('scan_id', 'file_name')
+            existing.update(qry)
+
+        new_ingests = [ingest for ingest in ingests if (ingest.scan_id, ingest.file_name) not in existing]
+        return self.bulk_create(new_ingests)
+
     def filter_ingests(self, source_file_id=None, started=None, ended=None, statuses=None, scan_ids=None,
                        strike_ids=None, file_name=None, order=None):
         """Returns a query for ingest models that filters on the given fields. The returned query includes the related
@@ -297,11 +322,12 @@ class IngestManager(models.Manager):
         return [self._fill_status(status, time_slots, started, ended) for status, time_slots in groups.iteritems()]
 
     def start_ingest_tasks(self, ingests, scan_id=None, strike_id=None):
-        """Starts a batch of tasks for the given scan in an atomic transaction.
+        """Starts a batch of tasks for the given scan in an atomic transaction. The trigger events, jobs, and queue
+        models for all of the ingests are created in bulk.
 
         One of scan_id or strike_id must be set.
 
-        :param ingests: The ingest models
+        :param ingests: The ingest models, which must already be saved in the database
         :type ingests: [:class:`ingest.models.Ingest`]
         :param scan_id: ID of Scan that generated ingest
         :type scan_id: int
@@ -309,39 +335,51 @@ class IngestManager(models.Manager):
         :type strike_id: int
         """
 
+        if scan_id:
+            trigger_type = 'SCAN_TRANSFER'
+            source = ('scan_id', scan_id)
+        elif strike_id:
+            trigger_type = 'STRIKE_TRANSFER'
+            source = ('strike_id', strike_id)
+        else:
+            raise Exception('One of scan_id or strike_id must be set')
+
+        if not ingests:
+            return
+
         ingest_job_type = Ingest.objects.get_ingest_job_type()
+        job_type_rev = JobTypeRevision.objects.get_revision(ingest_job_type.name, ingest_job_type.version,
+                                                            ingest_job_type.revision_num)
 
+        events = []
         for ingest in ingests:
             logger.debug('Creating ingest task for %s', ingest.file_name)
+            event = TriggerEvent()
+            event.type = trigger_type
+            event.description = {'file_name': ingest.file_name, source[0]: source[1]}
+            event.occurred = ingest.transfer_ended if ingest.transfer_ended else now()
+            events.append(event)
 
-            when = ingest.transfer_ended if ingest.transfer_ended else now()
-            desc = {'file_name': ingest.file_name}
-
-            if scan_id:
-                ingest_id = Ingest.objects.get(scan_id=ingest.scan_id, file_name=ingest.file_name).id
-                desc['scan_id'] = scan_id
-                event = TriggerEvent.objects.create_trigger_event('SCAN_TRANSFER', None, desc, when)
-            elif strike_id:
-                ingest_id = ingest.id
-                desc['strike_id'] = strike_id
-                event = TriggerEvent.objects.create_trigger_event('STRIKE_TRANSFER', None, desc, when)
-            else:
-                raise Exception('One of scan_id or strike_id must be set')
-
-        data = Data()
-        data.add_value(JsonValue('ingest_id', ingest_id))
-        data.add_value(JsonValue('workspace', ingest.workspace.name))
-        if ingest.new_workspace:
-            data.add_value(JsonValue('new_workspace', ingest.new_workspace.name))
-
-        ingest_job = None
         with transaction.atomic():
-            ingest_job = Queue.objects.queue_new_job_v6(ingest_job_type, data, event)
-            ingest.job = ingest_job
-            ingest.status = 'QUEUED'
-            ingest.save()
-
-        logger.debug('Successfully created ingest task for %s', ingest.file_name)
+            TriggerEvent.objects.bulk_create(events)
+
+            jobs = []
+            for ingest, event in zip(ingests, events):
+                data = Data()
+                data.add_value(JsonValue('ingest_id', ingest.id))
+                data.add_value(JsonValue('workspace', ingest.workspace.name))
+                if ingest.new_workspace:
+                    data.add_value(JsonValue('new_workspace', ingest.new_workspace.name))
+                jobs.append(Job.objects.create_job_v6(job_type_rev, event_id=event.id, input_data=data))
+            Job.objects.bulk_create(jobs)
+            Queue.objects.queue_jobs(jobs)
+
+            for ingest, job in zip(ingests, jobs):
+                ingest.job = job
+                ingest.status = 'QUEUED'
+            self._set_ingests_queued(ingests)
+
+        logger.debug('Successfully created %d ingest tasks', len(ingests))
 
     def start_ingest_tasks_cm(self, ingests, scan_id=None, strike_id=None):
         """Starts a batch of tasks for the given scan in an atomic transaction.
@@ -372,6 +410,22 @@ class IngestManager(models.Manager):
             
         logger.debug('Successfully created ingest task for %s', ingest.file_name)
 
+    def _set_ingests_queued(self, ingests):
+        """Sets the given ingests to QUEUED with their jobs in a single update
+
+        :param ingests: The ingest models with their jobs
+        :type ingests: [:class:`ingest.models.Ingest`]
+        """
+
+        params = [now()]
+        for ingest in ingests:
+            params.extend([ingest.id, ingest.job.id])
+        values = ', '.join(['(%s, %s)'] * len(ingests))
+        qry = 'UPDATE ingest SET job_id = d.job_id, status = \'QUEUED\', last_modified = %%s FROM (VALUES %s) '
+        qry += 'AS d(id, job_id) WHERE ingest.id = d.id'
+        with connection.cursor() as cursor:
+            cursor.execute(qry % values, params)
+
     def _group_by_time(self, ingests, use_ingest_time):
         """Groups the given ingests by hourly time slots.
 
@@ -713,6 +767,7 @@ class Ingest(models.Model):
         """meta information for database"""
         db_table = 'ingest'
         indexes = [GinIndex(fields=['file_name'])]
+        unique_together = ('scan', 'file_name')
 
 
 class IngestEventManager(models.Manager):
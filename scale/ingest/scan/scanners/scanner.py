@@ -182,22 +182,21 @@ class Scanner(object):
             logger.debug('No ingests for batch, this will always be the case during a dry-run.')
             return
 
-        # Once all ingest rules have been applied, de-duplicate and then bulk insert
-        ingests = self._deduplicate_ingest_list(self.scan_id, ingests)
+        # Once all ingest rules have been applied, de-duplicate and then bulk insert, skipping files that already have
+        # ingests from a previous run of this scan
+        ingests = self._deduplicate_ingest_list(ingests)
 
         # bulk insert remaining as queued and note detected files in Scan mode
         with transaction.atomic():
-            Ingest.objects.bulk_create(ingests)
+            ingests = Ingest.objects.bulk_create_scan_ingests(ingests)
             Scan.objects.filter(pk=self.scan_id).update(file_count=self._count)
 
         Ingest.objects.start_ingest_tasks(ingests, scan_id=self.scan_id)
 
     @staticmethod
-    def _deduplicate_ingest_list(scan_id, new_ingests):
-        """Check the ingest records to ensure these ingests are not already created by previous scan run
-        
-        :param scan_id: ID of scan to check against
-        :type scan_id: integer
+    def _deduplicate_ingest_list(new_ingests):
+        """Removes ingests with duplicate file names from the given list, keeping the first ingest of each file name
+
         :param new_ingests: List of ingest models to validate for uniqueness
         :type new_ingests: :class:`ingest.models.Ingest`
         :returns: List of deduplicated ingest models
@@ -205,26 +204,16 @@ class Scanner(object):
         """
 
         deduplicate_file_names = set()
-        list_count = len(new_ingests)
-        ingest_file_names = [ingest.file_name for ingest in new_ingests]
-
-        existing_ingests = Ingest.objects.get_ingests_by_scan(scan_id, ingest_file_names)
-        existing_ingest_file_names = [ingest.file_name for ingest in existing_ingests]
-
         deduplicated_ingests = []
         for ingest in new_ingests:
             if ingest.file_name not in deduplicate_file_names:
                 deduplicate_file_names.add(ingest.file_name)
                 deduplicated_ingests.append(ingest)
             else:
-                logging.info('Removed duplicate file_name %s from ingests at file_path %s',
-                             ingest.file_name, ingest.file_path)
-
-        final_ingests = [x for x in deduplicated_ingests if x.file_name not in existing_ingest_file_names]
-
-        logger.info('Removed %i duplicates of pre-existing ingests.', list_count - len(final_ingests))
+                logger.info('Removed duplicate file_name %s from ingests at file_path %s',
+                            ingest.file_name, ingest.file_path)
 
-        return final_ingests
+        return deduplicated_ingests
 
     def _process_ingest(self, file_path, file_size):
         """Processes the ingest file by applying the Scan configuration rules.
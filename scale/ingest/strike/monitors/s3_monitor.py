@@ -11,7 +11,7 @@ from ingest.models import Ingest
 from ingest.strike.monitors.exceptions import (InvalidMonitorConfiguration, S3NoDataNotificationError,
                                                SQSNotificationError)
 from ingest.strike.monitors.monitor import Monitor
-from util.aws import AWSClient, SQSClient
+from util.aws import AWSClient, SQSClient, SQSDeleteBatch
 from util.validation import ValidationWarning
 
 logger = logging.getLogger(__name__)
@@ -83,23 +83,28 @@ class S3Monitor(Monitor):
                                                    wait_time_seconds=self.wait_time,
                                                    visibility_timeout_seconds=self.visibility_timeout)
 
-                for message in messages:
-                    try:
-                        # Perform message extraction and then callback to ingest
-                        self._process_s3_notification(message)
-
-                        # Remove message from queue now that the message is processed
-                        message.delete()
-                    except SQSNotificationError:
-                        logger.exception('Unable to process message. Invalid SQS S3 notification.')
-
-                        if self.sqs_discard_unrecognized:
-                            # Remove message from queue when unrecognized
-                            logger.warning('Removing message that cannot be processed.')
-                            message.delete()
-                    except S3NoDataNotificationError:
-                        logger.exception('Unable to process message. File size of 0')
-                        message.delete()
+                # Processed messages are removed from the queue together in a batch request
+                delete_batch = SQSDeleteBatch(client)
+                try:
+                    for message in messages:
+                        try:
+                            # Perform message extraction and then callback to ingest
+                            self._process_s3_notification(message)
+
+                            # Remove message from queue now that the message is processed
+                            delete_batch.add(message)
+                        except SQSNotificationError:
+                            logger.exception('Unable to process message. Invalid SQS S3 notification.')
+
+                            if self.sqs_discard_unrecognized:
+                                # Remove message from queue when unrecognized
+                                logger.warning('Removing message that cannot be processed.')
+                                delete_batch.add(message)
+                        except S3NoDataNotificationError:
+                            logger.exception('Unable to process message. File size of 0')
+                            delete_batch.add(message)
+                finally:
+                    delete_batch.flush()
 
     def stop(self):
         """See :meth:`ingest.strike.monitors.monitor.Monitor.stop`
@@ -116,9 +116,10 @@ class TestScanner(TestCase):
         self.assertFalse(dedup.called)
 
     @patch('ingest.models.IngestManager.start_ingest_tasks')
+    @patch('ingest.models.IngestManager.bulk_create_scan_ingests')
     @patch('ingest.scan.scanners.s3_scanner.S3Scanner._deduplicate_ingest_list')
     @patch('ingest.scan.scanners.s3_scanner.S3Scanner._ingest_file')
-    def test_process_scanned_successfully(self, ingest_file, dedup, start_ingests):
+    def test_process_scanned_successfully(self, ingest_file, dedup, bulk_create, start_ingests):
         """Tests calling S3Scanner._process_scanned() successfully"""
 
         scanner = S3Scanner()
@@ -131,43 +132,26 @@ class TestScanner(TestCase):
 
         # Verify that all method calls were made from callback method
         self.assertTrue(dedup.called)
+        self.assertTrue(bulk_create.called)
         self.assertTrue(start_ingests.called)
 
-    @patch('ingest.models.Ingest.objects.get_ingests_by_scan')
-    def test_deduplicate_ingest_list_no_existing(self, ingests_by_scan):
-        """Tests calling S3Scanner._deduplicate_ingest_list() without existing"""
-
-        ingests_by_scan.return_value = []
+    def test_deduplicate_ingest_list_no_duplicates(self):
+        """Tests calling S3Scanner._deduplicate_ingest_list() without duplicates"""
 
         ingests = [Ingest(file_name='test1'), Ingest(file_name='test2')]
-        final_ingests = S3Scanner._deduplicate_ingest_list(None, ingests)
+        final_ingests = S3Scanner._deduplicate_ingest_list(ingests)
 
         self.assertItemsEqual(ingests, final_ingests)
 
-    @patch('ingest.models.Ingest.objects.get_ingests_by_scan')
-    def test_deduplicate_ingest_list_with_duplicate_file_names(self, ingests_by_scan):
+    def test_deduplicate_ingest_list_with_duplicate_file_names(self):
         """Tests calling S3Scanner._deduplicate_ingest_list() with duplicates"""
 
-        ingests_by_scan.return_value = []
-
         ingests = [Ingest(file_name='test1'), Ingest(file_name='test1')]
-        final_ingests = S3Scanner._deduplicate_ingest_list(None, ingests)
+        final_ingests = S3Scanner._deduplicate_ingest_list(ingests)
 
         self.assertEquals(len(final_ingests), 1)
         self.assertEquals(final_ingests[0].file_name, 'test1')
 
-    @patch('ingest.models.Ingest.objects.get_ingests_by_scan')
-    def test_deduplicate_ingest_list_with_existing_no_other_dups(self, ingests_by_scan):
-        """Tests calling S3Scanner._deduplicate_ingest_list() with existing and no other dups"""
-
-        ingests_by_scan.return_value = [Ingest(file_name='test1')]
-
-        ingests = [Ingest(file_name='test1'), Ingest(file_name='test2')]
-        final_ingests = S3Scanner._deduplicate_ingest_list(None, ingests)
-
-        self.assertEquals(len(final_ingests), 1)
-        self.assertEquals(final_ingests[0].file_name, 'test2')
-
     def test_set_recursive_false(self):
         """Tests calling S3Scanner.set_recursive() to false"""
 
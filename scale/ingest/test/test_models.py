@@ -4,12 +4,14 @@ import django
 from django.test import TestCase, TransactionTestCase
 from mock import patch
 
+import ingest.test.utils as ingest_test_utils
 import recipe.test.utils as recipe_test_utils
 import storage.test.utils as storage_test_utils
 from ingest.strike.configuration.json.configuration_v6 import StrikeConfigurationV6
 from ingest.models import Ingest, Strike
 from messaging.backends.amqp import AMQPMessagingBackend
 from messaging.backends.factory import add_message_backend
+from queue.models import Queue
 from storage.exceptions import InvalidDataTypeTag
 
 
@@ -71,6 +73,44 @@ class TestIngestGetDataTypeTags(TestCase):
         self.assertSetEqual(tags, set())
 
 
+class TestIngestManagerBulkScanIngests(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.scan = ingest_test_utils.create_scan()
+        self.workspace = storage_test_utils.create_workspace()
+
+    def _create_ingest(self, file_name):
+        """Creates an unsaved ingest for the scan"""
+        ingest = Ingest.objects.create_ingest(file_name, self.workspace, scan_id=self.scan.id)
+        ingest.file_path = 'path/%s' % file_name
+        ingest.file_size = 100
+        return ingest
+
+    def test_bulk_create_and_start(self):
+        """Tests inserting scan ingests, skipping existing file names, and queueing their jobs in bulk"""
+
+        ingests = Ingest.objects.bulk_create_scan_ingests([self._create_ingest('file_1.txt')])
+        self.assertEqual(len(ingests), 1)
+
+        ingests = Ingest.objects.bulk_create_scan_ingests([self._create_ingest('file_1.txt'),
+                                                           self._create_ingest('file_2.txt'),
+                                                           self._create_ingest('file_3.txt')])
+        self.assertListEqual([ingest.file_name for ingest in ingests], ['file_2.txt', 'file_3.txt'])
+        self.assertEqual(Ingest.objects.filter(scan_id=self.scan.id).count(), 3)
+
+        Ingest.objects.start_ingest_tasks(ingests, scan_id=self.scan.id)
+
+        for ingest in Ingest.objects.filter(id__in=[ingest.id for ingest in ingests]).select_related('job__event'):
+            self.assertEqual(ingest.status, 'QUEUED')
+            self.assertEqual(ingest.job.status, 'QUEUED')
+            self.assertEqual(ingest.job.get_input_data().values['ingest_id'].value, ingest.id)
+            self.assertDictEqual(ingest.job.event.description, {'file_name': ingest.file_name,
+                                                                'scan_id': self.scan.id})
+        self.assertEqual(Queue.objects.filter(job_id__in=[ingest.job_id for ingest in ingests]).count(), 2)
+
+
 class TestStrikeManagerCreateStrikeProcess(TransactionTestCase):
     fixtures = ['ingest_job_types.json']
 
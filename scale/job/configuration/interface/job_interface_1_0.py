@@ -290,8 +290,8 @@ class JobInterface(object):
         :type job_exe: :class:`job.models.JobExecution`
         :param job_data: The job data
         :type job_data: :class:`job.configuration.data.job_data.JobData`
-        :param stdoutAndStderr: the standard out from the job execution
-        :type stdoutAndStderr: str
+        :param stdoutAndStderr: the standard out from the job execution, either as a string or an iterable of lines
+        :type stdoutAndStderr: str or iterable
         :return: A tuple of the job results and the results manifest generated by the job execution
         :rtype: (:class:`job.configuration.results.job_results.JobResults`,
             :class:`job.configuration.results.results_manifest.results_manifest.ResultsManifest`)
@@ -492,18 +492,22 @@ class JobInterface(object):
 
     def _get_artifacts_from_stdout(self, stdout):
         """Parses stdout looking for artifacts of the form ARTIFACT:<ouput_name>:<output_path>
-        :param stdout: the standard out from the job execution
-        :type stdout: str
+        :param stdout: the standard out from the job execution, either as a string or an iterable of lines
+        :type stdout: str or iterable
 
         :return: a list of artifacts that were found by parsing stdout
         :rtype: a list of artifact dicts.  each artifact dict has a "name" and either a "path" or "paths
         see job.configuration.results.manifest.RESULTS_MANIFEST_SCHEMA
         """
         artifacts_found = {}
-        artifacts_pattern = '^ARTIFACT:([^:]*):(.*)'
-        for artifact_match in re.findall(artifacts_pattern, stdout, re.MULTILINE):
-            artifact_name = artifact_match[0]
-            artifact_path = artifact_match[1]
+        artifacts_pattern = re.compile('^ARTIFACT:([^:]*):(.*)')
+        lines = stdout.split('\n') if isinstance(stdout, basestring) else stdout
+        for line in lines:
+            artifact_match = artifacts_pattern.match(line)
+            if not artifact_match:
+                continue
+            artifact_name = artifact_match.group(1)
+            artifact_path = artifact_match.group(2)
             if artifact_name in artifacts_found:
                 paths = []
                 if 'paths' in artifacts_found[artifact_name]:
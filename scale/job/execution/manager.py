@@ -263,18 +263,20 @@ class JobExecutionManager(object):
                 job_ids.append(running_job_exe.job_id)
                 running_job_exes.append(running_job_exe)
 
-        # Query job models from database to check if any running executions have been canceled
-        job_models = {}
-        for job in Job.objects.filter(id__in=job_ids):
-            job_models[job.id] = job
+        # Query job status and number of executions from database to check if any running executions have been
+        # canceled
+        job_states = {}  # {Job ID: (status, num_exes)}
+        if job_ids:
+            for job_id, status, num_exes in Job.objects.filter(id__in=job_ids).values_list('id', 'status', 'num_exes'):
+                job_states[job_id] = (status, num_exes)
 
         finished_job_exes = []
         when_canceled = now()
         with self._lock:
             for running_job_exe in running_job_exes:
-                job_model = job_models[running_job_exe.job_id]
+                status, num_exes = job_states[running_job_exe.job_id]
                 # If the job has been canceled or the job has a newer execution, this execution must be canceled
-                if job_model.status == 'CANCELED' or job_model.num_exes > running_job_exe.exe_num:
+                if status == 'CANCELED' or num_exes > running_job_exe.exe_num:
                     running_job_exe.execution_canceled(when_canceled)
                     if running_job_exe.is_finished():
                         self._handle_finished_job_exe(running_job_exe)
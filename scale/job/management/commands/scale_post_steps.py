@@ -71,6 +71,22 @@ class Command(BaseCommand):
 
         return JobExecution.objects.get_job_exe_with_job_and_job_type(job_id, exe_num)
 
+    def _stream_logs(self, job_exe):
+        """Streams the log lines of the job execution so that they can be parsed without holding the entire log in
+        memory. A failure to retrieve the logs ends the stream instead of failing the post steps.
+
+        :param job_exe: The job execution
+        :type job_exe: :class:`job.models.JobExecution`
+        :returns: The generator of log lines
+        :rtype: generator
+        """
+
+        try:
+            for line in job_exe.get_log_lines():
+                yield line
+        except:
+            logger.exception('Failed to retrieve job execution logs')
+
     @retry_database_query
     def _perform_post_steps(self, job_exe):
         """Populates the full set of command arguments for the job execution
@@ -81,13 +97,7 @@ class Command(BaseCommand):
 
         job_interface = job_exe.job_type.get_job_interface()
         job_data = job_exe.job.get_job_data()
-        stdout_and_stderr = None
-        try:
-            stdout_and_stderr, _last_modified = job_exe.get_log_text()
-        except:
-            logger.exception('Failed to retrieve job execution logs')
-        if stdout_and_stderr is None:
-            stdout_and_stderr = ''
+        stdout_and_stderr = self._stream_logs(job_exe)
 
         with transaction.atomic():
             if JobInterfaceSunset.is_seed_dict(job_interface.definition):
@@ -79,6 +79,22 @@ class BlockedJobs(CommandMessage):
 
         return self._count < MAX_NUM
 
+    def can_merge(self, other):
+        """See :meth:`messaging.messages.message.CommandMessage.can_merge`
+        """
+
+        # Only jobs with the same status change time can be combined, as the time determines which updates are stale
+        if not isinstance(other, BlockedJobs) or other.status_change != self.status_change:
+            return False
+        return self._count + other._count <= MAX_NUM
+
+    def merge(self, other):
+        """See :meth:`messaging.messages.message.CommandMessage.merge`
+        """
+
+        for job_id in other._blocked_job_ids:
+            self.add_job(job_id)
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
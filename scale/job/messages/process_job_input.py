@@ -1,4 +1,4 @@
-"""Defines a command message that processes the input for a job"""
+"""Defines a command message that processes the input for jobs"""
 from __future__ import unicode_literals
 
 import logging
@@ -11,6 +11,10 @@ from job.messages.cancel_jobs import create_cancel_jobs_messages
 from job.models import Job
 from messaging.messages.message import CommandMessage
 
+# This is the maximum number of job models that can fit in one message. This maximum ensures that every message of this
+# type is less than 25 KiB long and bounds the size of the combined input file insert.
+MAX_NUM = 100
+
 
 logger = logging.getLogger(__name__)
 
@@ -25,16 +29,22 @@ def create_process_job_input_messages(job_ids):
 
     messages = []
 
+    message = None
     for job_id in job_ids:
-        message = ProcessJobInput()
-        message.job_id = job_id
+        if not message:
+            message = ProcessJobInput()
+        elif not message.can_fit_more():
+            messages.append(message)
+            message = ProcessJobInput()
+        message.add_job(job_id)
+    if message:
         messages.append(message)
 
     return messages
 
 
 class ProcessJobInput(CommandMessage):
-    """Command message that processes the input for a job
+    """Command message that processes the input for jobs
     """
 
     def __init__(self):
@@ -43,14 +53,49 @@ class ProcessJobInput(CommandMessage):
 
         super(ProcessJobInput, self).__init__('process_job_input')
 
-        self.job_id = None
-        # self.tries = 0
+        self._count = 0
+        self._job_ids = []
+
+    def add_job(self, job_id):
+        """Adds the given job ID to this message
+
+        :param job_id: The job ID
+        :type job_id: int
+        """
+
+        if job_id not in self._job_ids:
+            self._count += 1
+            self._job_ids.append(job_id)
+
+    def can_fit_more(self):
+        """Indicates whether more jobs can fit in this message
+
+        :return: True if more jobs can fit, False otherwise
+        :rtype: bool
+        """
+
+        return self._count < MAX_NUM
+
+    def can_merge(self, other):
+        """See :meth:`messaging.messages.message.CommandMessage.can_merge`
+        """
+
+        if not isinstance(other, ProcessJobInput):
+            return False
+        return self._count + other._count <= MAX_NUM
+
+    def merge(self, other):
+        """See :meth:`messaging.messages.message.CommandMessage.merge`
+        """
+
+        for job_id in other._job_ids:
+            self.add_job(job_id)
 
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
 
-        return {'job_id': self.job_id} #, 'tries': self.tries}
+        return {'job_ids': self._job_ids}
 
     @staticmethod
     def from_json(json_dict):
@@ -58,8 +103,11 @@ class ProcessJobInput(CommandMessage):
         """
 
         message = ProcessJobInput()
-        message.job_id = json_dict['job_id']
-        # message.tries = json_dict['tries']
+        if 'job_id' in json_dict:
+            # Messages sent before jobs were batched contain a single job ID
+            message.add_job(json_dict['job_id'])
+        for job_id in json_dict.get('job_ids', []):
+            message.add_job(job_id)
         return message
 
     def execute(self):
@@ -68,37 +116,50 @@ class ProcessJobInput(CommandMessage):
 
         from queue.messages.queued_jobs import create_queued_jobs_messages, QueuedJob
 
-        try:
-            job = Job.objects.get_job_with_interfaces(self.job_id)
-        except Job.DoesNotExist:
-            logger.exception('Failed to get job %d - job does not exist. Message will not re-run.', self.job_id)
-            return True
-        
-        if job.status not in ['PENDING', 'BLOCKED']:
-            logger.warning('Job %d input has already been processed. Message will not re-run', self.job_id)
-            return True
+        jobs = {job.id: job for job in Job.objects.get_jobs_with_interfaces(self._job_ids)}
 
-        if not job.has_input():
-            if not job.recipe:
-                logger.error('Job %d has no input and is not in a recipe. Message will not re-run.', self.job_id)
-                return True
+        ready_job_ids = []
+        invalid_job_ids = []
+        for job_id in self._job_ids:
+            if job_id not in jobs:
+                logger.error('Failed to get job %d - job does not exist. Message will not re-run.', job_id)
+                continue
+            job = jobs[job_id]
 
-            try:
-                self._generate_input_data_from_recipe(job)
-            except InvalidData:
-                logger.exception('Recipe created invalid input data for job %d. Message will not re-run. Cancelling job that cannot be queued.', self.job_id)
-                self.new_messages.extend(create_cancel_jobs_messages([self.job_id], now()))
-                return True
+            if job.status not in ['PENDING', 'BLOCKED']:
+                logger.warning('Job %d input has already been processed. Message will not re-run', job_id)
+                continue
 
-        # Lock job model and process job's input data
-        with transaction.atomic():
-            job = Job.objects.get_locked_job(self.job_id)
-            Job.objects.process_job_input(job)
+            if not job.has_input():
+                if not job.recipe:
+                    logger.error('Job %d has no input and is not in a recipe. Message will not re-run.', job_id)
+                    continue
 
-        # Create message to queue the job
-        if job.num_exes == 0:
-            logger.info('Processed input for job %d, sending message to queue job', self.job_id)
-            self.new_messages.extend(create_queued_jobs_messages([QueuedJob(job.id, 0)], requeue=False))
+                try:
+                    self._generate_input_data_from_recipe(job)
+                except InvalidData:
+                    logger.exception('Recipe created invalid input data for job %d. Message will not re-run. Cancelling job that cannot be queued.', job_id)
+                    invalid_job_ids.append(job_id)
+                    continue
+
+            ready_job_ids.append(job_id)
+
+        if invalid_job_ids:
+            self.new_messages.extend(create_cancel_jobs_messages(invalid_job_ids, now()))
+
+        if not ready_job_ids:
+            return True
+
+        # Lock job models and process the input data of all of the jobs together
+        with transaction.atomic():
+            locked_jobs = Job.objects.get_locked_jobs(ready_job_ids)
+            Job.objects.process_job_inputs(locked_jobs)
+
+        # Create messages to queue the jobs
+        queued_jobs = [QueuedJob(job.id, 0) for job in locked_jobs if job.num_exes == 0]
+        if queued_jobs:
+            logger.info('Processed input for %d job(s), sending messages to queue jobs', len(queued_jobs))
+            self.new_messages.extend(create_queued_jobs_messages(queued_jobs, requeue=False))
 
         return True
 
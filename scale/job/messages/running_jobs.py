@@ -93,6 +93,22 @@ class RunningJobs(CommandMessage):
 
         return self._count < MAX_NUM
 
+    def can_merge(self, other):
+        """See :meth:`messaging.messages.message.CommandMessage.can_merge`
+        """
+
+        if not isinstance(other, RunningJobs) or other._started != self._started:
+            return False
+        return self._count + other._count <= MAX_NUM
+
+    def merge(self, other):
+        """See :meth:`messaging.messages.message.CommandMessage.merge`
+        """
+
+        for node_id, job_list in other._running_jobs.items():
+            for job_id, exe_num in job_list:
+                self.add_running_job(job_id, exe_num, node_id)
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -63,6 +63,10 @@ MIN_RESOURCE = {
 
 INPUT_FILE_BATCH_SIZE = 500  # Maximum batch size for creating JobInputFile models
 
+LOG_INDEX = 'logstash-*,scalelogs-*'  # The elasticsearch indexes that contain job execution logs
+LOG_PAGE_SIZE = 5000  # The number of log hits to retrieve from elasticsearch at a time
+LOG_SCROLL_TIMEOUT = '1m'  # How long elasticsearch keeps a log scroll alive between pages
+
 # IMPORTANT NOTE: Locking order
 # Always adhere to the following model order for obtaining row locks via select_for_update() in order to prevent
 # deadlocks and ensure query efficiency
@@ -423,6 +427,17 @@ class JobManager(models.Manager):
 
         return self.select_related('job_type_rev', 'recipe__recipe_type_rev').get(id=job_id)
 
+    def get_jobs_with_interfaces(self, job_ids):
+        """Gets the job models for the given IDs with related job_type_rev and recipe__recipe_type_rev models
+
+        :param job_ids: The job IDs
+        :type job_ids: :func:`list`
+        :returns: The job models with related job_type_rev and recipe__recipe_type_rev models
+        :rtype: :func:`list`
+        """
+
+        return self.select_related('job_type_rev', 'recipe__recipe_type_rev').filter(id__in=job_ids)
+
     def get_jobs_with_related(self, job_ids):
         """Gets the job models for the given IDs with related job_type, job_type_rev, and batch models
 
@@ -515,40 +530,55 @@ class JobManager(models.Manager):
         :type job: :class:`job.models.Job`
         """
 
-        if job.input_file_size is not None:
-            return  # Job has already had its input processed
+        self.process_job_inputs([job])
+
+    def process_job_inputs(self, jobs):
+        """Processes the input data for the given jobs to populate their input file models and input meta-data fields.
+        The input file models for all of the jobs are created together and the input meta-data fields are set with a
+        single update. The caller must have obtained model locks on the given job models.
+
+        :param jobs: The locked job models
+        :type jobs: :func:`list`
+        """
+
+        # Skip jobs that have already had their input processed
+        jobs = [job for job in jobs if job.input_file_size is None]
+        if not jobs:
+            return
 
-        # Create JobInputFile models in batches
-        all_file_ids = set()
+        input_file_ids = {}  # {Job ID: set of input file IDs}
         input_file_models = []
-        for file_value in job.get_input_data().values.values():
-            if file_value.param_type != FileParameter.PARAM_TYPE:
-                continue
-            for file_id in file_value.file_ids:
-                all_file_ids.add(file_id)
-                job_input_file = JobInputFile()
-                job_input_file.job_id = job.id
-                job_input_file.input_file_id = file_id
-                job_input_file.job_input = file_value.name
-                input_file_models.append(job_input_file)
-                if len(input_file_models) >= INPUT_FILE_BATCH_SIZE:
-                    JobInputFile.objects.bulk_create(input_file_models)
-                    input_file_models = []
-
-        # Finish creating any remaining JobInputFile models
+        for job in jobs:
+            job_file_ids = set()
+            for file_value in job.get_input_data().values.values():
+                if file_value.param_type != FileParameter.PARAM_TYPE:
+                    continue
+                for file_id in file_value.file_ids:
+                    job_file_ids.add(file_id)
+                    job_input_file = JobInputFile()
+                    job_input_file.job_id = job.id
+                    job_input_file.input_file_id = file_id
+                    job_input_file.job_input = file_value.name
+                    input_file_models.append(job_input_file)
+            input_file_ids[job.id] = job_file_ids
+
         if input_file_models:
-            JobInputFile.objects.bulk_create(input_file_models)
+            JobInputFile.objects.bulk_create(input_file_models, batch_size=INPUT_FILE_BATCH_SIZE)
 
-        # Create file ancestry links for job
+        # Create file ancestry links for the jobs
         from product.models import FileAncestryLink
-        FileAncestryLink.objects.create_file_ancestry_links(list(all_file_ids), None, job, None)
+        FileAncestryLink.objects.create_input_file_ancestry_links(jobs, input_file_ids)
+
+        # If there are no input files, just zero out the file size and skip input meta-data fields
+        no_file_job_ids = [job.id for job in jobs if not input_file_ids[job.id]]
+        if no_file_job_ids:
+            self.filter(id__in=no_file_job_ids).update(input_file_size=0.0)
 
-        if len(all_file_ids) == 0:
-            # If there are no input files, just zero out the file size and skip input meta-data fields
-            self.filter(id=job.id).update(input_file_size=0.0)
+        file_job_ids = [job.id for job in jobs if input_file_ids[job.id]]
+        if not file_job_ids:
             return
 
-        # Set input meta-data fields on the job
+        # Set input meta-data fields on the jobs
         # Total input file size is in MiB rounded up to the nearest whole MiB
         qry = 'UPDATE job j SET input_file_size = CEILING(s.total_file_size / (1024.0 * 1024.0)), '
         qry += 'source_started = s.source_started, source_ended = s.source_ended, last_modified = %s, '
@@ -561,10 +591,10 @@ class JobManager(models.Manager):
         qry += 'MAX(f.source_collection) AS source_collection, '
         qry += 'MAX(f.source_task) AS source_task '
         qry += 'FROM scale_file f JOIN job_input_file jif ON f.id = jif.input_file_id '
-        qry += 'WHERE jif.job_id = %s GROUP BY jif.job_id) s '
+        qry += 'WHERE jif.job_id IN %s GROUP BY jif.job_id) s '
         qry += 'WHERE j.id = s.job_id'
         with connection.cursor() as cursor:
-            cursor.execute(qry, [timezone.now(), job.id])
+            cursor.execute(qry, [timezone.now(), tuple(file_job_ids)])
 
     def process_job_output(self, job_ids, when):
         """Processes the job output for the given job IDs. The caller must have obtained model locks on the job models
@@ -617,6 +647,28 @@ class JobManager(models.Manager):
 
         self.filter(id__in=job_ids).update(is_superseded=True, superseded=when, last_modified=timezone.now())
 
+    def _apply_metrics_deltas(self, jobs, job_ids, status):
+        """Applies the status changes of the given jobs to the job counts of their recipes and batches when these
+        metrics are maintained incrementally (INCREMENTAL_RECIPE_METRICS). The caller must have obtained model locks on
+        the job models in an atomic transaction.
+
+        :param jobs: The job models, with their status prior to the update
+        :type jobs: :func:`list`
+        :param job_ids: The IDs of the jobs that were updated to the new status
+        :type job_ids: :func:`list`
+        :param status: The new job status
+        :type status: string
+        """
+
+        if not settings.INCREMENTAL_RECIPE_METRICS or not job_ids:
+            return
+
+        from recipe.models import Recipe
+
+        updated_job_ids = set(job_ids)
+        job_deltas = [(job.id, job.status, status) for job in jobs if job.id in updated_job_ids]
+        Recipe.objects.apply_job_status_deltas(job_deltas, timezone.now())
+
     def update_jobs_node(self, job_ids, node_id, when):
         """Updates the jobs with the given IDs to have the given node and start time
 
@@ -649,6 +701,7 @@ class JobManager(models.Manager):
                 job_ids.append(job.id)
 
         self.filter(id__in=job_ids).update(status='BLOCKED', last_status_change=when, last_modified=timezone.now())
+        self._apply_metrics_deltas(jobs, job_ids, 'BLOCKED')
         return job_ids
 
     def update_jobs_to_canceled(self, jobs, when):
@@ -671,6 +724,7 @@ class JobManager(models.Manager):
 
         self.filter(id__in=job_ids).update(status='CANCELED', error=None, node=None, last_status_change=when,
                                            last_modified=timezone.now())
+        self._apply_metrics_deltas(jobs, job_ids, 'CANCELED')
         return job_ids
 
     def update_jobs_to_completed(self, jobs, when):
@@ -693,6 +747,7 @@ class JobManager(models.Manager):
 
         self.filter(id__in=job_ids).update(status='COMPLETED', ended=when, last_status_change=when,
                                            last_modified=timezone.now())
+        self._apply_metrics_deltas(jobs, job_ids, 'COMPLETED')
         return job_ids
 
     def update_jobs_to_failed(self, jobs, error_id, when):
@@ -717,6 +772,7 @@ class JobManager(models.Manager):
 
         self.filter(id__in=job_ids).update(status='FAILED', error_id=error_id, ended=when, last_status_change=when,
                                            last_modified=timezone.now())
+        self._apply_metrics_deltas(jobs, job_ids, 'FAILED')
         return job_ids
 
     def update_jobs_to_pending(self, jobs, when):
@@ -738,6 +794,7 @@ class JobManager(models.Manager):
                 job_ids.append(job.id)
 
         self.filter(id__in=job_ids).update(status='PENDING', last_status_change=when, last_modified=timezone.now())
+        self._apply_metrics_deltas(jobs, job_ids, 'PENDING')
         return job_ids
 
     def update_jobs_to_queued(self, jobs, when_queued, requeue=False):
@@ -768,6 +825,7 @@ class JobManager(models.Manager):
                                            ended=None, last_status_change=when_queued,
                                            num_exes=models.F('num_exes') + 1, last_modified=timezone.now())
 
+        self._apply_metrics_deltas(jobs, job_ids, 'QUEUED')
         return job_ids
 
     def update_jobs_to_running(self, jobs, when):
@@ -789,6 +847,7 @@ class JobManager(models.Manager):
                 job_ids.append(job.id)
 
         self.filter(id__in=job_ids).update(status='RUNNING', last_status_change=when, last_modified=timezone.now())
+        self._apply_metrics_deltas(jobs, job_ids, 'RUNNING')
         return job_ids
 
 class Job(models.Model):
@@ -1517,8 +1576,11 @@ class JobExecution(models.Model):
             self.configuration = {}
         return ExecutionConfiguration(self.configuration, do_validate=False)
 
-    def get_log_json(self, include_stdout=True, include_stderr=True, since=None):
-        """Get log data from elasticsearch as a dict (from the raw JSON).
+    def get_log_hits(self, include_stdout=True, include_stderr=True, since=None):
+        """Returns a generator that pages through the log data in elasticsearch and yields each log hit (from the raw
+        JSON) in order. The pages are retrieved as the generator is consumed, so logs of any size can be streamed
+        without holding them in memory. Elasticsearch 5.x and 6.x are paged with search_after, other versions with a
+        scroll.
 
         :param include_stdout: If True, include stdout in the result
         :type include_stdout: bool
@@ -1526,20 +1588,24 @@ class JobExecution(models.Model):
         :type include_stderr: bool
         :param since: If present, only retrieve logs since this timestamp (non-inclusive).
         :type since: :class:`datetime.datetime` or None
-        :rtype: tuple of (dict, :class:`datetime.datetime`) with the results or None and the last modified timestamp
+        :returns: The generator of log hits
+        :rtype: generator
         """
 
         # If job_exe has not started
-        if not self.started:
-            return None, timezone.now()
+        if not self.started or (not include_stdout and not include_stderr):
+            return
 
-        if settings.ELASTICSEARCH_VERSION and settings.ELASTICSEARCH_VERSION.startswith('2.'):
-            extension = ".raw"
-        else:
-            extension = ".keyword"
+        es_version = settings.ELASTICSEARCH_VERSION or ''
+        extension = '.raw' if es_version.startswith('2.') else '.keyword'
+
+        # Paging with search_after needs a unique final sort key, and the logs carry no unique field with doc values.
+        # The document ID can only be sorted on by default in 5.x (_uid) and 6.x (_id), where it is loaded as fielddata.
+        # Sorting on _id is deprecated in 7.x and disabled in 8.x, so those versions (and 2.x) page with a scroll.
+        tiebreaker = {'5': '_uid', '6': '_id'}.get(es_version.split('.')[0])
 
         q = {
-                'size': 10000,
+                'size': LOG_PAGE_SIZE,
                 'query': {
                     'bool': {
                         'must': [
@@ -1550,24 +1616,81 @@ class JobExecution(models.Model):
                 'sort': [{'@timestamp': 'asc'}, {'scale_order_num': 'asc'}],
                 '_source': ['@timestamp', 'scale_order_num', 'message', 'stream', 'scale_job_exe']
             }
-        if not include_stdout and not include_stderr:
-            return None, timezone.now()
-        elif include_stdout and not include_stderr:
+        if include_stdout and not include_stderr:
             q['query']['bool']['must'].append({'term': {'stream'+extension: 'stdout'}})
         elif include_stderr and not include_stdout:
             q['query']['bool']['must'].append({'term': {'stream'+extension: 'stderr'}})
         if since is not None:
             q['query']['bool']['must'].append({'range': {'@timestamp': {'gte': since.isoformat()}}})
 
-        hits = settings.ELASTICSEARCH.search(index='logstash-*,scalelogs-*', body=q)
+        if not tiebreaker:
+            # Page with a scroll, which needs no unique sort key, when search_after cannot be used
+            hits = settings.ELASTICSEARCH.search(index=LOG_INDEX, body=q, scroll=LOG_SCROLL_TIMEOUT)
+            try:
+                while hits['hits']['hits']:
+                    for hit in hits['hits']['hits']:
+                        yield hit
+                    hits = settings.ELASTICSEARCH.scroll(scroll_id=hits['_scroll_id'], scroll=LOG_SCROLL_TIMEOUT)
+            finally:
+                settings.ELASTICSEARCH.clear_scroll(scroll_id=hits['_scroll_id'], ignore=(404,))
+            return
+
+        q['sort'].append({tiebreaker: 'asc'})
+        while True:
+            page = settings.ELASTICSEARCH.search(index=LOG_INDEX, body=q)['hits']['hits']
+            for hit in page:
+                yield hit
+            if len(page) < LOG_PAGE_SIZE:
+                return
+            q = dict(q, search_after=page[-1]['sort'])
+
+    def get_log_lines(self, include_stdout=True, include_stderr=True, since=None, html=False):
+        """Returns a generator that streams the log data from elasticsearch one line at a time. Each line ends with a
+        newline.
+
+        :param include_stdout: If True, include stdout in the result
+        :type include_stdout: bool
+        :param include_stderr: If True include stderr in the result
+        :type include_stderr: bool
+        :param since: If present, only retrieve logs since this timestamp (non-inclusive).
+        :type since: :class:`datetime.datetime` or None
+        :param html: If True, wrap the lines in div elements with stdout/stderr css classes, otherwise use plain text
+        :type html: bool
+        :returns: The generator of log lines
+        :rtype: generator
+        """
+
+        for hit in self.get_log_hits(include_stdout, include_stderr, since):
+            source = hit['_source']
+            if 'message' not in source:  # Make sure hits have the required message field
+                continue
+            if html:
+                yield '<div class="%s">%s</div>\n' % (source['stream'], django.utils.html.escape(source['message']))
+            else:
+                yield '%s\n' % source['message']
+
+    def get_log_json(self, include_stdout=True, include_stderr=True, since=None):
+        """Get log data from elasticsearch as a dict (from the raw JSON). This reads the entire log into memory, use
+        :meth:`get_log_hits` to stream large logs.
 
-        if hits['hits']['total'] == 0:
+        :param include_stdout: If True, include stdout in the result
+        :type include_stdout: bool
+        :param include_stderr: If True include stderr in the result
+        :type include_stderr: bool
+        :param since: If present, only retrieve logs since this timestamp (non-inclusive).
+        :type since: :class:`datetime.datetime` or None
+        :rtype: tuple of (dict, :class:`datetime.datetime`) with the results or None and the last modified timestamp
+        """
+
+        hits = list(self.get_log_hits(include_stdout, include_stderr, since))
+        if not hits:
             return None, timezone.now()
-        last_modified = max([util.parse.parse_datetime(h['_source']['@timestamp']) for h in hits['hits']['hits']])
-        return hits, last_modified
+        last_modified = max([util.parse.parse_datetime(h['_source']['@timestamp']) for h in hits])
+        return {'hits': {'total': len(hits), 'hits': hits}}, last_modified
 
     def get_log_text(self, include_stdout=True, include_stderr=True, since=None, html=False):
-        """Get log data from elasticsearch.
+        """Get log data from elasticsearch. This reads the entire log into memory, use :meth:`get_log_lines` to stream
+        large logs.
 
         :param include_stdout: If True, include stdout in the result
         :type include_stdout: bool
@@ -1588,11 +1711,10 @@ class JobExecution(models.Model):
             if 'message' in h['_source']:
                 valid_hits.append(h)
         if html:
-            d = ''
-            for h in valid_hits:
-                cls = h['_source']['stream']
-                d += '<div class="%s">%s</div>\n' % (cls, django.utils.html.escape(h['_source']['message']))
-            return d, last_modified
+            lines = ['<div class="%s">%s</div>\n' % (h['_source']['stream'],
+                                                     django.utils.html.escape(h['_source']['message']))
+                     for h in valid_hits]
+            return ''.join(lines), last_modified
         return '\n'.join(h['_source']['message'] for h in valid_hits), last_modified
 
     def get_resources(self):
@@ -2530,6 +2652,26 @@ class JobTypeManager(models.Manager):
         secrets_handler = SecretsHandler()
         secrets_handler.set_job_type_secrets(secrets_key, secrets)
 
+    def set_unmet_resources(self, unmet_resources):
+        """Sets the unmet resources of the given job types with a single update
+
+        :param unmet_resources: Dict of job type ID to its comma-separated unmet resource names, possibly None
+        :type unmet_resources: dict
+        """
+
+        if not unmet_resources:
+            return
+
+        values = []
+        params = []
+        for job_type_id, resources in unmet_resources.items():
+            values.append('(%s, %s)')
+            params.extend([job_type_id, resources])
+        qry = 'UPDATE job_type jt SET unmet_resources = d.unmet_resources FROM (VALUES %s) AS d(id, unmet_resources) '
+        qry += 'WHERE jt.id = d.id'
+        with connection.cursor() as cursor:
+            cursor.execute(qry % ', '.join(values), params)
+
     def validate_job_type_v6(self, manifest_dict, configuration_dict=None):
         """Validates a new job type prior to attempting a save
 
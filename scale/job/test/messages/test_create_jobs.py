@@ -106,7 +106,7 @@ class TestCreateJobs(TransactionTestCase):
         self.assertIsNotNone(process_job_input_msg)
         self.assertIsNotNone(update_metrics_msg)
         # Check message to process job input for new job 2
-        self.assertEqual(process_job_input_msg.job_id, job_2.id)
+        self.assertEqual(process_job_input_msg._job_ids, [job_2.id])
         # Check message to update recipe metrics for the recipe containing the new jobs
         self.assertListEqual(update_metrics_msg._recipe_ids, [recipe.id])
 
@@ -181,7 +181,7 @@ class TestCreateJobs(TransactionTestCase):
         self.assertIsNotNone(process_job_input_msg)
         self.assertIsNotNone(update_metrics_msg)
         # Check message to process job input for new job 2
-        self.assertEqual(process_job_input_msg.job_id, job_2.id)
+        self.assertEqual(process_job_input_msg._job_ids, [job_2.id])
         # Check message to update recipe metrics for the recipe containing the new jobs
         self.assertListEqual(update_metrics_msg._recipe_ids, [recipe.id])
 
@@ -327,7 +327,7 @@ class TestCreateJobs(TransactionTestCase):
         self.assertIsNotNone(process_job_input_msg)
         self.assertIsNotNone(update_metrics_msg)
         # Check message to process job input for new job 2
-        self.assertEqual(process_job_input_msg.job_id, job_2.id)
+        self.assertEqual(process_job_input_msg._job_ids, [job_2.id])
         # Check message to update recipe metrics for the recipe containing the new jobs
         self.assertListEqual(update_metrics_msg._recipe_ids, [recipe.id])
 
@@ -366,7 +366,7 @@ class TestCreateJobs(TransactionTestCase):
         self.assertIsNotNone(process_job_input_msg)
         self.assertIsNotNone(update_metrics_msg)
         # Check message to process job input for new job 2
-        self.assertEqual(process_job_input_msg.job_id, job_2.id)
+        self.assertEqual(process_job_input_msg._job_ids, [job_2.id])
         # Check message to update recipe metrics for the recipe containing the new jobs
         self.assertListEqual(update_metrics_msg._recipe_ids, [recipe.id])
 
@@ -435,7 +435,7 @@ class TestCreateJobs(TransactionTestCase):
         self.assertIsNotNone(process_job_input_msg)
         self.assertIsNotNone(update_metrics_msg)
         # Check message to process job input for new job 2
-        self.assertEqual(process_job_input_msg.job_id, job_2.id)
+        self.assertEqual(process_job_input_msg._job_ids, [job_2.id])
         # Check message to update recipe metrics for the recipe containing the new jobs
         self.assertListEqual(update_metrics_msg._recipe_ids, [recipe.id])
 
@@ -482,6 +482,6 @@ class TestCreateJobs(TransactionTestCase):
         self.assertIsNotNone(process_job_input_msg)
         self.assertIsNotNone(update_metrics_msg)
         # Check message to process job input for new job 2
-        self.assertEqual(process_job_input_msg.job_id, job_2.id)
+        self.assertEqual(process_job_input_msg._job_ids, [job_2.id])
         # Check message to update recipe metrics for the recipe containing the new jobs
         self.assertListEqual(update_metrics_msg._recipe_ids, [recipe.id])
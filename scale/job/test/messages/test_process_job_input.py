@@ -6,7 +6,7 @@ from django.test import TransactionTestCase
 
 from data.data.json.data_v6 import DataV6
 from data.interface.interface import Interface
-from job.messages.process_job_input import ProcessJobInput
+from job.messages.process_job_input import create_process_job_input_messages, ProcessJobInput
 from job.models import Job, JobInputFile
 from job.test import utils as job_test_utils
 from storage.test import utils as storage_test_utils
@@ -24,7 +24,7 @@ class TestProcessJobInput(TransactionTestCase):
 
         # Create message
         message = ProcessJobInput()
-        message.job_id = job.id
+        message.add_job(job.id)
 
         # Convert message to JSON and back, and then execute
         message_json_dict = message.to_json()
@@ -39,6 +39,66 @@ class TestProcessJobInput(TransactionTestCase):
         # Job should have input_file_size set to 0 (no input files)
         self.assertEqual(job.input_file_size, 0.0)
 
+    def test_json_legacy(self):
+        """Tests converting a ProcessJobInput message from JSON sent before jobs were batched"""
+
+        job = job_test_utils.create_job(num_exes=0, status='PENDING', input_file_size=None, input=DataV6().get_dict())
+
+        message = ProcessJobInput.from_json({'job_id': job.id})
+        result = message.execute()
+
+        self.assertTrue(result)
+        self.assertListEqual(message._job_ids, [job.id])
+        self.assertEqual(Job.objects.get(id=job.id).input_file_size, 0.0)
+
+    def test_create_and_merge(self):
+        """Tests creating and merging ProcessJobInput messages"""
+
+        messages = create_process_job_input_messages(range(1, 251))
+        self.assertListEqual([len(message._job_ids) for message in messages], [100, 100, 50])
+
+        self.assertFalse(messages[0].can_merge(messages[2]))
+        self.assertTrue(messages[2].can_merge(messages[2]))
+        first, second = create_process_job_input_messages([1, 2]) + create_process_job_input_messages([2, 3])
+        self.assertTrue(first.can_merge(second))
+        first.merge(second)
+        self.assertListEqual(first._job_ids, [1, 2, 3])
+
+    def test_execute_multiple_jobs(self):
+        """Tests calling ProcessJobInput.execute() successfully for multiple jobs in one message"""
+
+        workspace = storage_test_utils.create_workspace()
+        file_1 = storage_test_utils.create_file(workspace=workspace, file_size=104857600.0)
+        file_2 = storage_test_utils.create_file(workspace=workspace, file_size=987654321.0)
+        inputs = [{'name': 'Input 1', 'mediaTypes': ['text/plain']}]
+        manifest = job_test_utils.create_seed_manifest(command='my_command', inputs_files=inputs, outputs_files=[])
+        job_type = job_test_utils.create_seed_job_type(manifest=manifest)
+        job_1 = job_test_utils.create_job(job_type=job_type, num_exes=0, status='PENDING', input_file_size=None,
+                                          input={'version': '1.0', 'input_data': [{'name': 'Input 1',
+                                                                                   'file_id': file_1.id}]})
+        job_2 = job_test_utils.create_job(job_type=job_type, num_exes=0, status='PENDING', input_file_size=None,
+                                          input={'version': '1.0', 'input_data': [{'name': 'Input 1',
+                                                                                   'file_id': file_2.id}]})
+        job_3 = job_test_utils.create_job(num_exes=0, status='PENDING', input_file_size=None,
+                                          input=DataV6().get_dict())
+        job_4 = job_test_utils.create_job(num_exes=1, status='RUNNING')
+
+        message = create_process_job_input_messages([job_1.id, job_2.id, job_3.id, job_4.id, 999999])[0]
+        result = message.execute()
+        self.assertTrue(result)
+
+        # All jobs that were processed should be queued with a single message
+        self.assertEqual(len(message.new_messages), 1)
+        self.assertEqual(message.new_messages[0].type, 'queued_jobs')
+        queued_job_ids = {queued_job.job_id for queued_job in message.new_messages[0]._queued_jobs}
+        self.assertSetEqual(queued_job_ids, {job_1.id, job_2.id, job_3.id})
+
+        jobs = {job.id: job for job in Job.objects.filter(id__in=[job_1.id, job_2.id, job_3.id])}
+        self.assertEqual(jobs[job_1.id].input_file_size, 100.0)
+        self.assertEqual(jobs[job_2.id].input_file_size, 942.0)
+        self.assertEqual(jobs[job_3.id].input_file_size, 0.0)
+        self.assertEqual(JobInputFile.objects.filter(job_id__in=[job_1.id, job_2.id]).count(), 2)
+
     def test_execute_with_data(self):
         """Tests calling ProcessJobInput.execute() successfully when the job already has data populated"""
 
@@ -79,7 +139,7 @@ class TestProcessJobInput(TransactionTestCase):
 
         # Create message
         message = ProcessJobInput()
-        message.job_id = job.id
+        message.add_job(job.id)
 
         # Execute message
         result = message.execute()
@@ -206,7 +266,7 @@ class TestProcessJobInput(TransactionTestCase):
 
         # Create message
         message = ProcessJobInput()
-        message.job_id = job_2.id
+        message.add_job(job_2.id)
 
         # Execute message
         result = message.execute()
@@ -335,7 +395,7 @@ class TestProcessJobInput(TransactionTestCase):
 
         # Create message
         message = ProcessJobInput()
-        message.job_id = job_2.id
+        message.add_job(job_2.id)
 
         # Execute message
         result = message.execute()
@@ -450,7 +510,7 @@ class TestProcessJobInput(TransactionTestCase):
 
         # Create message
         message = ProcessJobInput()
-        message.job_id = job_2.id
+        message.add_job(job_2.id)
 
         # Execute message
         result = message.execute()
@@ -9,6 +9,7 @@ import time
 import django
 import django.utils.timezone as timezone
 from django.test import TestCase, TransactionTestCase
+from mock import MagicMock, patch
 
 import error.test.utils as error_test_utils
 import job.test.utils as job_test_utils
@@ -273,6 +274,53 @@ class TestJob(TestCase):
         self.assertIsInstance(job.get_job_results(), SeedJobResults)
 
 
+class TestJobExecution(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    @patch('job.models.LOG_PAGE_SIZE', 2)
+    def test_get_log_lines(self):
+        """Tests streaming the log lines of a job execution across multiple pages of elasticsearch results"""
+
+        def hit(message, sort):
+            return {'_source': {'message': message, 'stream': 'stdout'}, 'sort': sort}
+        elasticsearch = MagicMock()
+        elasticsearch.search.side_effect = [{'hits': {'hits': [hit('a', [1, 1, 'x']), hit('b', [1, 1, 'y'])]}},
+                                            {'hits': {'hits': [hit('c<', [1, 1, 'z'])]}}]
+        job_exe = job_test_utils.create_job_exe(status='COMPLETED')
+
+        with self.settings(ELASTICSEARCH=elasticsearch, ELASTICSEARCH_VERSION='6.6.0'):
+            lines = list(job_exe.get_log_lines(html=True))
+
+        self.assertListEqual(lines, ['<div class="stdout">a</div>\n', '<div class="stdout">b</div>\n',
+                                     '<div class="stdout">c&lt;</div>\n'])
+        calls = elasticsearch.search.call_args_list
+        self.assertEqual(len(calls), 2)
+        self.assertNotIn('search_after', calls[0][1]['body'])
+        self.assertEqual(calls[0][1]['body']['sort'][-1], {'_id': 'asc'})
+        self.assertListEqual(calls[1][1]['body']['search_after'], [1, 1, 'y'])
+
+    def test_get_log_lines_scroll(self):
+        """Tests streaming the log lines of a job execution with a scroll when search_after cannot be used"""
+
+        def hit(message):
+            return {'_source': {'message': message, 'stream': 'stdout'}}
+        elasticsearch = MagicMock()
+        elasticsearch.search.return_value = {'_scroll_id': 's1', 'hits': {'hits': [hit('a'), hit('b')]}}
+        elasticsearch.scroll.side_effect = [{'_scroll_id': 's2', 'hits': {'hits': [hit('c')]}},
+                                            {'_scroll_id': 's3', 'hits': {'hits': []}}]
+        job_exe = job_test_utils.create_job_exe(status='COMPLETED')
+
+        with self.settings(ELASTICSEARCH=elasticsearch, ELASTICSEARCH_VERSION='7.10.2'):
+            lines = list(job_exe.get_log_lines())
+
+        self.assertListEqual(lines, ['a\n', 'b\n', 'c\n'])
+        body = elasticsearch.search.call_args[1]['body']
+        self.assertListEqual(body['sort'], [{'@timestamp': 'asc'}, {'scale_order_num': 'asc'}])
+        elasticsearch.clear_scroll.assert_called_once_with(scroll_id='s3', ignore=(404,))
+
+
 class TestJobType(TransactionTestCase):
 
     def setUp(self):
@@ -452,6 +500,19 @@ class TestJobType(TransactionTestCase):
         value = job_type.get_job_version_array(version)
         self.assertEqual([0,0,0,0], value)
 
+    def test_set_unmet_resources(self):
+        """Tests setting the unmet resources of several job types with a single update"""
+
+        job_type_1 = job_test_utils.create_seed_job_type()
+        job_type_2 = job_test_utils.create_seed_job_type()
+        job_type_2.unmet_resources = 'chocolate'
+        job_type_2.save()
+
+        JobType.objects.set_unmet_resources({job_type_1.id: 'gpus,chocolate', job_type_2.id: None})
+
+        self.assertEqual(JobType.objects.get(id=job_type_1.id).unmet_resources, 'gpus,chocolate')
+        self.assertIsNone(JobType.objects.get(id=job_type_2.id).unmet_resources)
+
 
 class TestJobTypeRevision(TransactionTestCase):
 
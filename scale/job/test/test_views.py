@@ -2363,63 +2363,70 @@ class TestJobExecutionSpecificLogViewV6(APITestCase):
 
     @patch('job.views.JobExecution.objects.get_logs')
     def test_combined_log_json_no_time(self, mock_get_logs):
-        def new_get_log_json(include_stdout, include_stderr, since):
+        def new_get_log_hits(include_stdout, include_stderr, since):
             self.assertTrue(include_stdout)
             self.assertTrue(include_stderr)
             self.assertIsNone(since)
-            return {}, now()
+            return iter([{'_source': {'message': 'hello'}}, {'_source': {'message': 'world'}}])
 
-        mock_get_logs.return_value.get_log_json.side_effect = new_get_log_json
+        mock_get_logs.return_value.get_log_hits.side_effect = new_get_log_hits
 
         url = '/%s/job-executions/999999/logs/combined/?format=json' % self.api
         response = self.client.generic('GET', url)
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
-        self.assertEqual(response.accepted_media_type, 'application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        result = json.loads(''.join(response.streaming_content))
+        self.assertEqual(result['hits']['total'], 2)
+        self.assertEqual(result['hits']['hits'][1]['_source']['message'], 'world')
 
     @patch('job.views.JobExecution.objects.get_logs')
     def test_combined_log_text_no_time(self, mock_get_logs):
-        def new_get_log_text(include_stdout, include_stderr, since, html):
+        def new_get_log_lines(include_stdout, include_stderr, since, html):
             self.assertTrue(include_stdout)
             self.assertTrue(include_stderr)
             self.assertIsNone(since)
             self.assertFalse(html)
-            return 'hello', now()
+            return iter(['hello\n', 'world\n'])
 
-        mock_get_logs.return_value.get_log_text.side_effect = new_get_log_text
+        mock_get_logs.return_value.get_log_lines.side_effect = new_get_log_lines
 
         url = '/%s/job-executions/999999/logs/combined/?format=txt' % self.api
         response = self.client.get(url)
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
-        self.assertEqual(response.accepted_media_type, 'text/plain')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertEqual(''.join(response.streaming_content), 'hello\nworld\n')
 
     @patch('job.views.JobExecution.objects.get_logs')
     def test_combined_log_html_no_time(self, mock_get_logs):
-        def new_get_log_text(include_stdout, include_stderr, since, html):
+        def new_get_log_lines(include_stdout, include_stderr, since, html):
             self.assertTrue(include_stdout)
             self.assertTrue(include_stderr)
             self.assertIsNone(since)
             self.assertTrue(html)
-            return '<html>hello</html>', now()
+            return iter(['<div class="stdout">hello</div>\n'])
 
-        mock_get_logs.return_value.get_log_text.side_effect = new_get_log_text
+        mock_get_logs.return_value.get_log_lines.side_effect = new_get_log_lines
 
         url = '/%s/job-executions/999999/logs/combined/?format=html' % self.api
         response = self.client.generic('GET', url)
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
-        self.assertEqual(response.accepted_media_type, 'text/html')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/html')
+        content = ''.join(response.streaming_content)
+        self.assertTrue(content.startswith('<html>'))
+        self.assertIn('<div class="stdout">hello</div>', content)
 
     @patch('job.views.JobExecution.objects.get_logs')
     def test_combined_log_json_no_content(self, mock_get_logs):
-        def new_get_log_json(include_stdout, include_stderr, since):
+        def new_get_log_hits(include_stdout, include_stderr, since):
             self.assertTrue(include_stdout)
             self.assertTrue(include_stderr)
             self.assertIsNone(since)
-            return None, now()
+            return iter([])
 
-        mock_get_logs.return_value.get_log_json.side_effect = new_get_log_json
+        mock_get_logs.return_value.get_log_hits.side_effect = new_get_log_hits
 
         url = '/%s/job-executions/999999/logs/combined/?format=json' % self.api
         response = self.client.generic('GET', url)
@@ -2428,55 +2435,55 @@ class TestJobExecutionSpecificLogViewV6(APITestCase):
 
     @patch('job.views.JobExecution.objects.get_logs')
     def test_stdout_log_html_no_time(self, mock_get_logs):
-        def new_get_log_text(include_stdout, include_stderr, since, html):
+        def new_get_log_lines(include_stdout, include_stderr, since, html):
             self.assertTrue(include_stdout)
             self.assertFalse(include_stderr)
             self.assertIsNone(since)
             self.assertTrue(html)
-            return '<html>hello</html>', now()
+            return iter(['<div class="stdout">hello</div>\n'])
 
-        mock_get_logs.return_value.get_log_text.side_effect = new_get_log_text
+        mock_get_logs.return_value.get_log_lines.side_effect = new_get_log_lines
 
         url = '/%s/job-executions/999999/logs/stdout/?format=html' % self.api
         response = self.client.generic('GET', url)
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
-        self.assertEqual(response.accepted_media_type, 'text/html')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/html')
 
     @patch('job.views.JobExecution.objects.get_logs')
     def test_stderr_log_html_no_time(self, mock_get_logs):
-        def new_get_log_text(include_stdout, include_stderr, since, html):
+        def new_get_log_lines(include_stdout, include_stderr, since, html):
             self.assertFalse(include_stdout)
             self.assertTrue(include_stderr)
             self.assertIsNone(since)
             self.assertTrue(html)
-            return '<html>hello</html>', now()
+            return iter(['<div class="stderr">hello</div>\n'])
 
-        mock_get_logs.return_value.get_log_text.side_effect = new_get_log_text
+        mock_get_logs.return_value.get_log_lines.side_effect = new_get_log_lines
 
         url = '/%s/job-executions/999999/logs/stderr/?format=html' % self.api
         response = self.client.generic('GET', url)
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
-        self.assertEqual(response.accepted_media_type, 'text/html')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/html')
 
     @patch('job.views.JobExecution.objects.get_logs')
     def test_combined_log_json_with_time(self, mock_get_logs):
         started = datetime.datetime(2016, 1, 1, tzinfo=utc)
 
-        def new_get_log_json(include_stdout, include_stderr, since):
+        def new_get_log_hits(include_stdout, include_stderr, since):
             self.assertTrue(include_stdout)
             self.assertTrue(include_stderr)
             self.assertEqual(since, started)
-            return {}, now()
+            return iter([{'_source': {'message': 'hello'}}])
 
-        mock_get_logs.return_value.get_log_json.side_effect = new_get_log_json
+        mock_get_logs.return_value.get_log_hits.side_effect = new_get_log_hits
 
         url = '/%s/job-executions/999999/logs/combined/?started=2016-01-01T00:00:00Z&format=json' % self.api
         response = self.client.generic('GET', url)
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
-        self.assertEqual(response.accepted_media_type, 'application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
 
 
 class TestJobInputFilesViewV6(APITestCase):
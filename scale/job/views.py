@@ -1,11 +1,13 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import itertools
+import json
 import logging
 
 import rest_framework.status as status
 from django.db import transaction
-from django.http.response import Http404, HttpResponse
+from django.http.response import Http404, HttpResponse, StreamingHttpResponse
 from job.seed.exceptions import InvalidSeedManifestDefinition
 from job.seed.manifest import SeedManifest
 from rest_framework.generics import GenericAPIView, ListAPIView, ListCreateAPIView, RetrieveAPIView
@@ -41,6 +43,9 @@ from vault.exceptions import InvalidSecretsConfiguration
 
 logger = logging.getLogger(__name__)
 
+LOG_HTML_HEADER = '<html><head><style>.stdout {} .stderr {color: red;}</style></head><body>'
+LOG_HTML_FOOTER = '</body></html>'
+
 
 class JobTypesView(ListCreateAPIView):
     """This view is the endpoint for retrieving the list of all job types."""
@@ -964,20 +969,43 @@ class JobExecutionSpecificLogView(RetrieveAPIView):
 
         started = rest_util.parse_timestamp(request, 'started', required=False)
 
-        if request.accepted_renderer.format == 'json':
-            logs, last_modified = job_exe.get_log_json(include_stdout, include_stderr, started)
-        elif request.accepted_renderer.format == 'txt':
-            logs, last_modified = job_exe.get_log_text(include_stdout, include_stderr, started, False)
-        elif request.accepted_renderer.format == 'html':
-            logs, last_modified = job_exe.get_log_text(include_stdout, include_stderr, started, True)
-            if logs is not None:
-                logs = '<html><head><style>.stdout {} .stderr {color: red;}</style></head><body>' + logs + '</body></html>'
+        log_format = request.accepted_renderer.format
+        if log_format == 'json':
+            logs = job_exe.get_log_hits(include_stdout, include_stderr, started)
+        elif log_format in ('txt', 'html'):
+            logs = job_exe.get_log_lines(include_stdout, include_stderr, started, log_format == 'html')
         else:
             return HttpResponse('%s is not a valid content type request.' % request.accepted_renderer.content_type,
                                 content_type='text/plain', status=406)
 
-        if logs is None:
-            rsp = HttpResponse(status=204)
+        # Fetch the first page of the log before responding so that an empty log can be reported
+        first = next(logs, None)
+        if first is None:
+            return HttpResponse(status=204)
+        logs = itertools.chain([first], logs)
+
+        if log_format == 'json':
+            content = self._stream_json(logs)
+        elif log_format == 'html':
+            content = itertools.chain([LOG_HTML_HEADER], logs, [LOG_HTML_FOOTER])
         else:
-            rsp = Response(data=logs)
-        return rsp
+            content = logs
+        return StreamingHttpResponse(content, content_type=request.accepted_media_type)
+
+    def _stream_json(self, hits):
+        """Streams the given log hits as a JSON document in the same form as the elasticsearch search response
+
+        :param hits: The generator of log hits
+        :type hits: generator
+        :returns: The generator of JSON strings
+        :rtype: generator
+        """
+
+        yield '{"hits": {"hits": ['
+        total = 0
+        for hit in hits:
+            if total:
+                yield ', '
+            yield json.dumps(hit)
+            total += 1
+        yield '], "total": %d}}' % total
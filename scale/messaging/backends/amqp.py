@@ -6,7 +6,9 @@ from __future__ import unicode_literals
 
 import Queue
 import logging
-from contextlib import closing
+import socket
+from contextlib import closing, contextmanager
+from functools import partial
 
 from kombu import Connection
 
@@ -14,6 +16,9 @@ from messaging.backends.backend import MessagingBackend
 
 logger = logging.getLogger(__name__)
 
+# Number of attempts made to (re-)establish a broker connection before failing
+MAX_CONNECT_RETRIES = 3
+
 
 class AMQPMessagingBackend(MessagingBackend):
     """Backend supporting message passing via AMQP 0.9.1 broker, targeting RabbitMQ"""
@@ -24,35 +29,170 @@ class AMQPMessagingBackend(MessagingBackend):
         # Message retrieval timeout
         self._timeout = 1
 
+    def consume_messages(self, prefetch_count):
+        """See :meth:`messaging.backends.backend.MessagingBackend.consume_messages`"""
+        with self._pool.connection() as connection:
+            # Closing the dedicated channel returns any unacknowledged messages to the queue
+            with closing(connection.channel()) as channel:
+                # Prefetch applies to the consumer of each routed queue
+                channel.basic_qos(0, prefetch_count, False)
+                with self._open_queues(connection, channel) as simple_queues:
+                    poll_order = self._router.get_poll_order()
+                    while True:
+                        message = self._get_message(connection, simple_queues, poll_order.next())
+                        if not message:
+                            yield None
+                            continue
+                        yield message.payload, partial(self._acknowledge, message)
+
     def send_messages(self, messages):
         """See :meth:`messaging.backends.backend.MessagingBackend.send_messages`"""
-        with Connection(self._broker_url) as connection:
-            with closing(connection.SimpleQueue(self._queue_name)) as simple_queue:
-                for message in messages:
-                    logger.debug('Sending message of type: %s', message['type'])
-                    simple_queue.put(message)
+        with self._pool.connection() as connection:
+            for queue_name, queue_messages in self._router.group_messages(messages).items():
+                with closing(connection.SimpleQueue(queue_name)) as simple_queue:
+                    # Re-establish the connection and revive the producer if the pooled connection drops mid-send
+                    put = connection.ensure(simple_queue.producer, simple_queue.put,
+                                            errback=self._on_connection_error, max_retries=MAX_CONNECT_RETRIES)
+                    for message in queue_messages:
+                        logger.debug('Sending message of type: %s', message['type'])
+                        put(message)
 
     def receive_messages(self, batch_size):
         """See :meth:`messaging.backends.backend.MessagingBackend.receive_messages`"""
-        with Connection(self._broker_url) as connection:
-            with closing(connection.SimpleQueue(self._queue_name)) as simple_queue:
-                for _ in range(batch_size):
-                    try:
-                        message = simple_queue.get(timeout=self._timeout)
+        with self._pool.connection() as connection:
+            # A dedicated channel is used per batch so that closing it returns any unacknowledged messages to the queue
+            # while the underlying connection stays open in the pool
+            with closing(connection.channel()) as channel:
+                channel.basic_qos(0, batch_size, False)
+                with self._open_queues(connection, channel) as simple_queues:
+                    poll_order = self._router.get_poll_order()
+                    for _ in range(batch_size):
+                        message = self._get_message(connection, simple_queues, poll_order.next())
+                        if not message:
+                            # We've reached the end of the queue... exit loop
+                            break
 
                         # Accept success back via generator send
                         success = yield message.payload
                         if success:
                             message.ack()
-                    except Queue.Empty:
-                        # We've reached the end of the queue... exit loop
-                        break
 
     def get_queue_size(self):
         """See :meth:`messaging.backends.backend.MessagingBackend.get_queue_size`"""
 
         queue_size = 0
-        with Connection(self._broker_url) as connection:
-            with closing(connection.SimpleQueue(self._queue_name)) as simple_queue:
-                queue_size = simple_queue.qsize()
+        with self._pool.connection() as connection:
+            for queue_name in self._router.queue_names:
+                with closing(connection.SimpleQueue(queue_name)) as simple_queue:
+                    queue_size += simple_queue.qsize()
         return queue_size
+
+    def _create_connection(self):
+        """See :meth:`messaging.backends.backend.MessagingBackend._create_connection`"""
+
+        connection = Connection(self._broker_url)
+        connection.ensure_connection(errback=self._on_connection_error, max_retries=MAX_CONNECT_RETRIES)
+        return connection
+
+    def _check_connection(self, connection):
+        """See :meth:`messaging.backends.backend.MessagingBackend._check_connection`"""
+
+        return connection.connected
+
+    def _close_connection(self, connection):
+        """See :meth:`messaging.backends.backend.MessagingBackend._close_connection`"""
+
+        connection.release()
+
+    def _get_message(self, connection, simple_queues, order):
+        """Gets the next message from the given queues, waiting up to the timeout for one to arrive
+
+        :param connection: The broker connection
+        :type connection: :class:`kombu.Connection`
+        :param simple_queues: The queues, in the same order as the router's queue names
+        :type simple_queues: [:class:`kombu.simple.SimpleQueue`]
+        :param order: The indexes of the queues in the order they should be checked
+        :type order: [int]
+        :return: The message, possibly None if no message arrived
+        :rtype: :class:`kombu.message.Message`
+        """
+
+        message = self._get_delivered_message(simple_queues, order)
+        if not message:
+            # Waiting on the connection delivers messages from every queue's consumer, so a message arriving on any
+            # queue ends the wait
+            try:
+                connection.drain_events(timeout=self._timeout)
+            except socket.timeout:
+                return None
+            message = self._get_delivered_message(simple_queues, order)
+        return message
+
+    @staticmethod
+    def _get_delivered_message(simple_queues, order):
+        """Gets the next message that has already been delivered to one of the given queues, without waiting
+
+        :param simple_queues: The queues, in the same order as the router's queue names
+        :type simple_queues: [:class:`kombu.simple.SimpleQueue`]
+        :param order: The indexes of the queues in the order they should be checked
+        :type order: [int]
+        :return: The message, possibly None if no message has been delivered
+        :rtype: :class:`kombu.message.Message`
+        """
+
+        for index in order:
+            try:
+                # A zero timeout starts the queue's consumer if needed and only checks its delivered messages
+                return simple_queues[index].get(timeout=0)
+            except Queue.Empty:
+                pass
+        return None
+
+    @contextmanager
+    def _open_queues(self, connection, channel):
+        """Context manager that opens a consumer queue on the given channel for each routed queue
+
+        :param connection: The broker connection
+        :type connection: :class:`kombu.Connection`
+        :param channel: The channel to consume on
+        :type channel: :class:`kombu.transport.base.StdChannel`
+        :return: The queues, in the same order as the router's queue names
+        :rtype: [:class:`kombu.simple.SimpleQueue`]
+        """
+
+        simple_queues = []
+        try:
+            for queue_name in self._router.queue_names:
+                simple_queues.append(connection.SimpleQueue(queue_name, channel=channel))
+            yield simple_queues
+        finally:
+            for simple_queue in simple_queues:
+                simple_queue.close()
+
+    @staticmethod
+    def _acknowledge(message, success):
+        """Acknowledges the given message on success, otherwise returns it to the queue so the prefetch slot it holds
+        on the long-lived consumer channel is released
+
+        :param message: The received message
+        :type message: :class:`kombu.message.Message`
+        :param success: Whether the message was processed successfully
+        :type success: bool
+        """
+
+        if success:
+            message.ack()
+        else:
+            message.requeue()
+
+    @staticmethod
+    def _on_connection_error(exc, interval):
+        """Logs a failed attempt to connect to the broker
+
+        :param exc: The connection error
+        :type exc: :class:`Exception`
+        :param interval: The number of seconds until the next attempt
+        :type interval: float
+        """
+
+        logger.warning('Broker connection error: %s, retrying in %s seconds', exc, interval)
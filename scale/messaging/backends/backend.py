@@ -2,6 +2,8 @@ from abc import ABCMeta, abstractmethod
 
 from django.conf import settings
 
+from messaging.backends.pool import ConnectionPool
+from messaging.backends.routing import MessageRouter
 from util.broker import BrokerDetails
 
 
@@ -19,15 +21,53 @@ class MessagingBackend(object):
         self._broker_url = settings.BROKER_URL
         self._broker = BrokerDetails.from_broker_url(settings.BROKER_URL)
 
-        # TODO: Transition to more advanced message routing per command message type
+        # Message types may be routed to additional queues, which are polled with weighted fairness
         self._queue_name = settings.QUEUE_NAME
+        self._router = MessageRouter(settings.QUEUE_NAME, settings.MESSAGE_QUEUE_ROUTES)
+
+        # Long-lived connections shared by all callers of this backend within the process
+        self._pool = ConnectionPool(self._create_connection, self._check_connection, self._close_connection)
+
+    def close(self):
+        """Closes all idle connections held by this backend
+        """
+
+        self._pool.close()
+
+    def set_pool_size(self, pool_size):
+        """Sets the number of idle connections this backend retains, which should match the number of threads that
+        concurrently send or receive messages
+
+        :param pool_size: The number of idle connections to retain
+        :type pool_size: int
+        """
+
+        self._pool.set_max_idle(pool_size)
+
+    @abstractmethod
+    def consume_messages(self, prefetch_count):
+        """Continuously receive messages from the backend with deferred acknowledgement
+
+        Implementing function must yield (message, ack) tuples, where message is in dict form and ack is a function
+        taking a boolean success argument. On True the ack function must acknowledge / delete the message, on False
+        it must leave the message to be redelivered. None must be yielded when no message is currently available, so
+        the caller regains control periodically. The generator runs until it is closed by the caller. Ack functions
+        must be called from the thread iterating the generator and before the generator is closed; any message that
+        has not been acknowledged when the generator is closed will be redelivered. Messages must be received from all
+        routed queues, polling the queues with weighted fairness.
+
+        :param prefetch_count: Maximum number of unacknowledged messages the caller will hold at once
+        :type prefetch_count: int
+        :return: Yielded (message, ack) tuples or None
+        :rtype: Generator[(dict, function)]
+        """
 
     @abstractmethod
     def send_messages(self, messages):
         """Send a collection of messages to the backend
-        
-        Connections are not persisted across send_messages calls. It is recommended that if a large
-        number of messages are to be sent it be done directly in a single function call.
+
+        Connections are pooled and persisted across send_messages calls, so it is safe to call this method frequently
+        with small numbers of messages. Each message must be sent to the queue its type is routed to.
 
         :param messages: JSON payload of messages
         :type messages: [dict]
@@ -37,8 +77,8 @@ class MessagingBackend(object):
     def receive_messages(self, batch_size):
         """Receive a batch of messages from the backend
 
-        Connections are not persisted across receive_messages calls. It is recommended that if a large
-        number of messages are to be retrieved it be done directly in a single function call.
+        Connections are pooled and persisted across receive_messages calls, so it is safe to call this method in a
+        tight loop.
 
         Implementing function must yield messages from backend. Messages must be
         in dict form. It is also the responsibility of the function to handle a boolean response
@@ -52,8 +92,38 @@ class MessagingBackend(object):
 
     @abstractmethod
     def get_queue_size(self):
-        """Gets the current length of the queue
+        """Gets the current length of the queue, summed across all routed queues
 
         :return: number of messages in the queue
         :rtype: int
-        """
\ No newline at end of file
+        """
+
+    def _create_connection(self):
+        """Creates a new connection to the broker for the connection pool. Must be implemented by any backend that uses
+        the connection pool.
+
+        :return: The new, open connection
+        :rtype: object
+        """
+
+        raise NotImplementedError()
+
+    def _check_connection(self, connection):
+        """Checks whether the given pooled connection is still usable
+
+        :param connection: The pooled connection
+        :type connection: object
+        :return: True if the connection is healthy, False otherwise
+        :rtype: bool
+        """
+
+        return True
+
+    def _close_connection(self, connection):
+        """Closes the given pooled connection
+
+        :param connection: The pooled connection
+        :type connection: object
+        """
+
+        pass
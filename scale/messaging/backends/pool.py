@@ -0,0 +1,173 @@
+"""Defines the thread-safe pool of long-lived connections used by the messaging backends"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of idle connections retained by the pool
+DEFAULT_MAX_IDLE = 4
+
+# Idle connections are health checked before re-use if they have not been used for this many seconds
+DEFAULT_CHECK_INTERVAL = 30
+
+
+class ConnectionPool(object):
+    """Thread-safe pool of long-lived broker connections. Connections are handed out to a single caller at a time and
+    returned to the pool when the caller is done. Any connection that fails while in use or fails its health check is
+    closed and replaced by a new connection on the next request.
+    """
+
+    def __init__(self, create_func, check_func, close_func, max_idle=DEFAULT_MAX_IDLE,
+                 check_interval=DEFAULT_CHECK_INTERVAL):
+        """Constructor
+
+        :param create_func: Function with no arguments that returns a new, open connection
+        :type create_func: function
+        :param check_func: Function taking a connection that returns True if the connection is healthy
+        :type check_func: function
+        :param close_func: Function taking a connection that closes it
+        :type close_func: function
+        :param max_idle: The maximum number of idle connections to retain
+        :type max_idle: int
+        :param check_interval: Idle connections older than this number of seconds are health checked before re-use
+        :type check_interval: float
+        """
+
+        self._create_func = create_func
+        self._check_func = check_func
+        self._close_func = close_func
+        self._max_idle = max_idle
+        self._check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._idle = []  # Stack of (connection, last used time) tuples, most recently used last
+        self._pid = os.getpid()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that provides a pooled connection for exclusive use within the context. The connection is
+        returned to the pool if the context exits normally and is closed if the context raises.
+
+        :return: The pooled connection
+        :rtype: object
+        """
+
+        connection = self._acquire()
+        healthy = False
+        try:
+            yield connection
+            healthy = True
+        except GeneratorExit:
+            # Caller is a generator that was closed early, which does not indicate a connection failure
+            healthy = True
+            raise
+        finally:
+            if healthy:
+                self._release(connection)
+            else:
+                self._discard(connection)
+
+    def close(self):
+        """Closes all idle connections held by the pool
+        """
+
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def get_idle_count(self):
+        """Returns the number of idle connections currently held by the pool
+
+        :return: The number of idle connections
+        :rtype: int
+        """
+
+        with self._lock:
+            return len(self._idle)
+
+    def set_max_idle(self, max_idle):
+        """Sets the maximum number of idle connections to retain. This should be at least the number of threads that
+        concurrently use the pool to avoid repeatedly closing and re-creating connections.
+
+        :param max_idle: The maximum number of idle connections to retain
+        :type max_idle: int
+        """
+
+        with self._lock:
+            self._max_idle = max_idle
+
+    def _acquire(self):
+        """Returns a healthy connection, either from the idle stack or newly created
+
+        :return: The connection
+        :rtype: object
+        """
+
+        while True:
+            with self._lock:
+                self._check_pid()
+                if not self._idle:
+                    break
+                connection, last_used = self._idle.pop()
+
+            if time.time() - last_used < self._check_interval:
+                return connection
+
+            try:
+                if self._check_func(connection):
+                    return connection
+            except Exception:
+                logger.exception('Error checking health of pooled messaging connection')
+            logger.warning('Pooled messaging connection failed health check, reconnecting')
+            self._discard(connection)
+
+        logger.debug('Creating new pooled messaging connection')
+        return self._create_func()
+
+    def _check_pid(self):
+        """Drops all idle connections if the process has forked since they were created, as sockets must not be shared
+        between processes. Caller must hold the lock.
+        """
+
+        pid = os.getpid()
+        if pid != self._pid:
+            self._idle = []
+            self._pid = pid
+
+    def _discard(self, connection):
+        """Closes the given connection without returning it to the pool
+
+        :param connection: The connection to close
+        :type connection: object
+        """
+
+        try:
+            self._close_func(connection)
+        except Exception:
+            logger.exception('Error closing pooled messaging connection')
+
+    def _release(self, connection):
+        """Returns the given connection to the idle stack, closing it if the pool is full
+
+        :param connection: The connection to return
+        :type connection: object
+        """
+
+        with self._lock:
+            self._check_pid()
+            if len(self._idle) < self._max_idle:
+                self._idle.append((connection, time.time()))
+                return
+
+        self._discard(connection)
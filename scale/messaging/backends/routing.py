@@ -0,0 +1,130 @@
+"""Defines the routing of command message types to weighted queues"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+
+from django.core.exceptions import ImproperlyConfigured
+
+# Polling weight of the default queue, which receives all message types that are not routed to another queue
+DEFAULT_QUEUE_WEIGHT = 1
+
+
+class MessageRouter(object):
+    """Routes each message type to a queue. Message types without a configured route are sent to the default queue.
+    Each queue has a polling weight so that receivers can poll the queues with weighted fairness: a queue with weight 4
+    is polled four times as often as a queue with weight 1, while no queue is ever starved.
+    """
+
+    def __init__(self, default_queue_name, routes):
+        """Constructor
+
+        :param default_queue_name: The name of the default queue
+        :type default_queue_name: string
+        :param routes: Dict of route name to a dict with the polling weight ("weight") and message types ("types") of
+            the route. The queue for each route is named after the default queue suffixed with the route name.
+        :type routes: dict
+        :raises :class:`django.core.exceptions.ImproperlyConfigured`: If the routes are invalid
+        """
+
+        self.default_queue_name = default_queue_name
+        self.queue_names = [default_queue_name]
+        self.weights = [DEFAULT_QUEUE_WEIGHT]
+        self._type_queues = {}  # {Message type: queue name}
+
+        for route_name in sorted(routes.keys()):
+            route = routes[route_name]
+            queue_name = '%s-%s' % (default_queue_name, route_name)
+            weight = route.get('weight', DEFAULT_QUEUE_WEIGHT)
+            if not isinstance(weight, int) or weight < 1:
+                raise ImproperlyConfigured('Message queue route %s must have a positive integer weight' % route_name)
+            for message_type in route.get('types', []):
+                if message_type in self._type_queues:
+                    raise ImproperlyConfigured('Message type %s is routed to more than one queue' % message_type)
+                self._type_queues[message_type] = queue_name
+            self.queue_names.append(queue_name)
+            self.weights.append(weight)
+
+    def get_poll_order(self):
+        """Returns a new poll order for a single receiver of the queues
+
+        :return: The poll order
+        :rtype: :class:`messaging.backends.routing.WeightedPollOrder`
+        """
+
+        return WeightedPollOrder(self.weights)
+
+    def get_queue_name(self, message_type):
+        """Returns the name of the queue that the given message type is routed to
+
+        :param message_type: The message type
+        :type message_type: string
+        :return: The queue name
+        :rtype: string
+        """
+
+        return self._type_queues.get(message_type, self.default_queue_name)
+
+    def group_messages(self, messages):
+        """Groups the given messages by the queue they are routed to, preserving the order of the messages within each
+        queue
+
+        :param messages: The messages, each a dict with a "type" key
+        :type messages: [dict]
+        :return: Dict of queue name to the list of messages for that queue
+        :rtype: :class:`collections.OrderedDict`
+        """
+
+        grouped = OrderedDict()
+        for message in messages:
+            queue_name = self.get_queue_name(message['type'])
+            if queue_name not in grouped:
+                grouped[queue_name] = []
+            grouped[queue_name].append(message)
+        return grouped
+
+    def is_routed(self):
+        """Indicates whether any message types are routed to queues other than the default queue
+
+        :return: True if there is more than one queue, False otherwise
+        :rtype: bool
+        """
+
+        return len(self.queue_names) > 1
+
+
+class WeightedPollOrder(object):
+    """Produces the order in which a receiver polls the queues, using smooth weighted round-robin so that the queue
+    polled first is spread evenly across the queues in proportion to their weights
+    """
+
+    def __init__(self, weights):
+        """Constructor
+
+        :param weights: The polling weight of each queue
+        :type weights: [int]
+        """
+
+        self._weights = weights
+        self._total_weight = sum(weights)
+        self._current = [0] * len(weights)
+
+        # Remaining queues are polled in order of descending weight after the selected queue
+        self._by_weight = sorted(range(len(weights)), key=lambda i: weights[i], reverse=True)
+
+    def next(self):
+        """Returns the indexes of the queues in the order they should be polled for the next message(s). The first
+        queue is the one selected by the weighted round-robin, if it is empty the following queues should be polled.
+
+        :return: The queue indexes
+        :rtype: [int]
+        """
+
+        for index, weight in enumerate(self._weights):
+            self._current[index] += weight
+        selected = max(range(len(self._weights)), key=lambda i: self._current[i])
+        self._current[selected] -= self._total_weight
+
+        return [selected] + [index for index in self._by_weight if index != selected]
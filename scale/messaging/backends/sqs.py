@@ -6,13 +6,17 @@ from __future__ import unicode_literals
 
 import json
 import logging
-import uuid
+from functools import partial
 
 from messaging.backends.backend import MessagingBackend
-from util.aws import AWSCredentials, SQSClient
+from util.aws import AWSCredentials, SQSClient, SQSDeleteBatch, SQSVisibilityHeartbeat
 
 logger = logging.getLogger(__name__)
 
+# Visibility timeout of consumed messages, which is extended every heartbeat interval while a message is in progress
+VISIBILITY_TIMEOUT = 30
+HEARTBEAT_INTERVAL = 10
+
 
 class SQSMessagingBackend(MessagingBackend):
     """Backend supporting message passing via Amazon SQS"""
@@ -25,27 +29,121 @@ class SQSMessagingBackend(MessagingBackend):
         self._credentials = AWSCredentials(self._broker.get_user_name(),
                                            self._broker.get_password())
 
+        # Long-poll duration when continuously consuming messages
+        self._wait_time = 1
+
+        # Index of the queue with the highest polling weight
+        self._priority_index = self._router.weights.index(max(self._router.weights))
+
+    def consume_messages(self, prefetch_count):
+        """See :meth:`messaging.backends.backend.MessagingBackend.consume_messages`"""
+
+        batch_size = min(prefetch_count, 10)
+        with self._pool.connection() as client:
+            delete_batch = SQSDeleteBatch(client)
+            heartbeat = SQSVisibilityHeartbeat(client, VISIBILITY_TIMEOUT, HEARTBEAT_INTERVAL)
+            heartbeat.start()
+            try:
+                poll_order = self._router.get_poll_order()
+                while True:
+                    # Delete the messages acknowledged since the last poll
+                    delete_batch.flush()
+
+                    messages = self._poll_queues(client, poll_order.next(), batch_size)
+                    for message in messages:
+                        heartbeat.add(message)
+                        yield json.loads(message.body), partial(self._acknowledge, delete_batch, heartbeat, message)
+                    if not messages:
+                        yield None
+            finally:
+                heartbeat.stop()
+                delete_batch.flush()
+
     def send_messages(self, messages):
         """See:meth:`messaging.backends.backend.MessagingBackend.send_messages`"""
-        with SQSClient(self._credentials, self._region_name) as client:
-            encoded_messages = []
-            for message in messages:
-                encoded_messages.append({'Id': str(uuid.uuid4()), 'MessageBody': json.dumps(message)})
+        with self._pool.connection() as client:
+            for queue_name, queue_messages in self._router.group_messages(messages).items():
+                encoded_messages = []
+                for index, message in enumerate(queue_messages):
+                    # IDs only need to be unique within a batch request
+                    encoded_messages.append({'Id': str(index), 'MessageBody': json.dumps(message)})
 
-            client.send_messages(self._queue_name, encoded_messages)
+                client.send_messages(queue_name, encoded_messages)
 
     def receive_messages(self, batch_size):
         """See :meth:`messaging.backends.backend.MessagingBackend.receive_messages`"""
 
-        with SQSClient(self._credentials, self._region_name) as client:
-            for message in client.receive_messages(self._queue_name, batch_size=batch_size):
+        with self._pool.connection() as client:
+            poll_order = self._router.get_poll_order()
+            for message in self._poll_queues(client, poll_order.next(), batch_size):
                 # Accept success back via generator send
                 success = yield json.loads(message.body)
                 if success:
                     message.delete()
-                    
+
     def get_queue_size(self):
         """See :meth:`messaging.backends.backend.MessagingBackend.get_queue_size`"""
 
-        with SQSClient(self._credentials, self._region_name) as client:
-            return client.get_queue_size(queue_name=self._queue_name)
+        with self._pool.connection() as client:
+            return sum(int(client.get_queue_size(queue_name=queue_name)) for queue_name in self._router.queue_names)
+
+    def _poll_queues(self, client, order, batch_size):
+        """Receives the next batch of messages from the first of the given queues that has any available
+
+        :param client: The SQS client
+        :type client: :class:`util.aws.SQSClient`
+        :param order: The indexes of the queues in the order they should be polled
+        :type order: [int]
+        :param batch_size: The maximum number of messages to receive
+        :type batch_size: int
+        :return: The received messages
+        :rtype: [:class:`boto3.sqs.Message`]
+        """
+
+        queue_names = self._router.queue_names
+        if not self._router.is_routed():
+            # Use a short long-poll so the caller can acknowledge completed messages while the queue is idle
+            return list(client.receive_messages(queue_names[0], batch_size=batch_size,
+                                                wait_time_seconds=self._wait_time,
+                                                visibility_timeout_seconds=VISIBILITY_TIMEOUT))
+
+        for index in order:
+            messages = list(client.receive_messages(queue_names[index], batch_size=batch_size, wait_time_seconds=0,
+                                                    visibility_timeout_seconds=VISIBILITY_TIMEOUT))
+            if messages:
+                return messages
+
+        # All queues are empty, long-poll the highest weight queue so its messages are received with the least delay
+        return list(client.receive_messages(queue_names[self._priority_index], batch_size=batch_size,
+                                            wait_time_seconds=self._wait_time,
+                                            visibility_timeout_seconds=VISIBILITY_TIMEOUT))
+
+    @staticmethod
+    def _acknowledge(delete_batch, heartbeat, message, success):
+        """Deletes the given message (in a batch) on success, otherwise leaves it to become visible again once its
+        visibility timeout expires. Either way the message's visibility is no longer extended.
+
+        :param delete_batch: The batch of messages to delete
+        :type delete_batch: :class:`util.aws.SQSDeleteBatch`
+        :param heartbeat: The heartbeat extending the visibility of in-progress messages
+        :type heartbeat: :class:`util.aws.SQSVisibilityHeartbeat`
+        :param message: The received message
+        :type message: :class:`boto3.sqs.Message`
+        :param success: Whether the message was processed successfully
+        :type success: bool
+        """
+
+        heartbeat.remove(message)
+        if success:
+            delete_batch.add(message)
+
+    def _create_connection(self):
+        """See :meth:`messaging.backends.backend.MessagingBackend._create_connection`"""
+
+        # The boto3 session and client are kept open for the lifetime of the pooled connection
+        return SQSClient(self._credentials, self._region_name).__enter__()
+
+    def _close_connection(self, connection):
+        """See :meth:`messaging.backends.backend.MessagingBackend._close_connection`"""
+
+        connection.__exit__(None, None, None)
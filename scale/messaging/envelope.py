@@ -0,0 +1,129 @@
+"""Defines the versioned envelope that packs command messages for transmission to the message broker"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import base64
+import json
+import zlib
+from collections import OrderedDict
+
+from messaging.exceptions import InvalidCommandMessage
+
+ENVELOPE_VERSION = 2
+
+# Packed message bodies larger than this many bytes are compressed
+COMPRESSION_THRESHOLD = 4096
+
+# Maximum number of bytes of message bodies packed into a single envelope before compression
+MAX_PACKED_SIZE = 1024 * 1024
+
+# Maximum number of bytes of a compressed envelope, leaving headroom under the 256KB SQS message limit
+MAX_ENVELOPE_SIZE = 192 * 1024
+
+COMPRESSION_ZLIB = 'zlib'
+
+
+def pack_messages(messages, sent=None):
+    """Packs the given command messages into envelopes. Messages of the same type are packed together into as few
+    envelopes as possible (preserving their order), and large envelopes are compressed. Each envelope retains the
+    message type so it can be routed like an individual message.
+
+    :param messages: The command messages, each a dict with "type" and "body" keys
+    :type messages: [dict]
+    :param sent: When the messages were sent, in seconds since the epoch, possibly None
+    :type sent: float
+    :return: The envelopes
+    :rtype: [dict]
+    """
+
+    bodies_by_type = OrderedDict()
+    for message in messages:
+        if message['type'] not in bodies_by_type:
+            bodies_by_type[message['type']] = []
+        serialized = json.dumps(message['body'], separators=(',', ':'))
+        bodies_by_type[message['type']].append((message['body'], serialized))
+
+    envelopes = []
+    for message_type, bodies in bodies_by_type.items():
+        chunk = []
+        chunk_size = 0
+        for body in bodies:
+            if chunk and chunk_size + len(body[1]) > MAX_PACKED_SIZE:
+                envelopes.extend(_create_envelopes(message_type, chunk, chunk_size, sent))
+                chunk = []
+                chunk_size = 0
+            chunk.append(body)
+            chunk_size += len(body[1]) + 1
+        envelopes.extend(_create_envelopes(message_type, chunk, chunk_size, sent))
+    return envelopes
+
+
+def unpack_message(message):
+    """Unpacks the command messages from the given message received from the broker, which is either an envelope or
+    a single command message in the original (unversioned) format
+
+    :param message: The received message
+    :type message: dict
+    :return: The command messages, each a dict with "type" and "body" keys
+    :rtype: [dict]
+
+    :raises :class:`messaging.exceptions.InvalidCommandMessage`: If the message is not a valid envelope
+    """
+
+    if 'version' not in message:
+        return [message]
+
+    if message['version'] != ENVELOPE_VERSION:
+        raise InvalidCommandMessage('Unsupported message envelope version: %s' % message['version'])
+
+    try:
+        message_type = message['type']
+        if 'data' in message:
+            if message.get('compression') != COMPRESSION_ZLIB:
+                raise InvalidCommandMessage('Unsupported message compression: %s' % message.get('compression'))
+            bodies = json.loads(zlib.decompress(base64.b64decode(message['data'])))
+        else:
+            bodies = message['bodies']
+    except (KeyError, TypeError, ValueError, zlib.error) as ex:
+        raise InvalidCommandMessage('Invalid message envelope: %s' % ex)
+
+    return [{'type': message_type, 'body': body} for body in bodies]
+
+
+def _create_envelopes(message_type, bodies, size, sent):
+    """Creates the envelope(s) for the given serialized message bodies of a single type, compressing them if they are
+    large. Bodies that still exceed the maximum envelope size once compressed are split across multiple envelopes.
+
+    :param message_type: The message type
+    :type message_type: string
+    :param bodies: Tuples of each message body and its JSON serialization
+    :type bodies: [(dict, string)]
+    :param size: The total size of the serialized bodies
+    :type size: int
+    :param sent: When the messages were sent, in seconds since the epoch, possibly None
+    :type sent: float
+    :return: The envelopes
+    :rtype: [dict]
+    """
+
+    envelope = {'version': ENVELOPE_VERSION, 'type': message_type, 'count': len(bodies)}
+    if sent is not None:
+        envelope['sent'] = sent
+
+    if size <= COMPRESSION_THRESHOLD:
+        envelope['bodies'] = [body[0] for body in bodies]
+        return [envelope]
+
+    packed = '[' + ','.join(body[1] for body in bodies) + ']'
+    data = base64.b64encode(zlib.compress(packed.encode('utf-8')))
+    if len(data) > MAX_ENVELOPE_SIZE and len(bodies) > 1:
+        half = len(bodies) // 2
+        half_size = sum(len(body[1]) + 1 for body in bodies[:half])
+        return (_create_envelopes(message_type, bodies[:half], half_size, sent) +
+                _create_envelopes(message_type, bodies[half:], size - half_size, sent))
+
+    envelope['compression'] = COMPRESSION_ZLIB
+    envelope['data'] = data
+    return [envelope]
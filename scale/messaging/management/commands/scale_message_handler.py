@@ -7,10 +7,13 @@ from __future__ import unicode_literals
 import logging
 import signal
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 
 from error.models import Error
 from messaging.manager import CommandMessageManager
+from messaging.metrics import messaging_metrics_mgr
+from messaging.workers import CommandMessageWorkerPool
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +24,12 @@ class Command(BaseCommand):
 
     help = 'Command for retrieval and execution of CommandMessages from queue'
 
+    def add_arguments(self, parser):
+        parser.add_argument('-w', '--workers', action='store', type=int, default=settings.MESSAGE_HANDLER_WORKERS,
+                            help='Number of worker threads executing messages concurrently.')
+        parser.add_argument('-p', '--prefetch', action='store', type=int, default=settings.MESSAGE_HANDLER_PREFETCH,
+                            help='Maximum number of messages received but not yet completed when using workers.')
+
     def handle(self, *args, **options):
         """See :meth:`django.core.management.base.BaseCommand.handle`.
 
@@ -30,20 +39,31 @@ class Command(BaseCommand):
         logger.info('Command starting: scale_message_handler')
 
         self.running = True
+        self.worker_pool = None
+
+        workers = options.get('workers') or 1
+        prefetch = options.get('prefetch') or workers * 2
 
         logger.info('Initializing message handler')
         logger.info('Caching builtin errors...')
         Error.objects.cache_builtin_errors()
         logger.info('Initialization complete, ready to process messages')
-        
+
+        if workers > 1:
+            self.worker_pool = CommandMessageWorkerPool(workers, prefetch)
+
         # Set the signal handler
         signal.signal(signal.SIGINT, self.interupt)
         signal.signal(signal.SIGTERM, self.interupt)
 
-        manager = CommandMessageManager()
+        if self.worker_pool:
+            self.worker_pool.run()
+        else:
+            manager = CommandMessageManager()
 
-        while self.running:
-            manager.receive_messages()
+            while self.running:
+                manager.receive_messages()
+                messaging_metrics_mgr.flush_if_due()
 
         logger.info('Command completed: scale_message_handler')
 
@@ -51,3 +71,5 @@ class Command(BaseCommand):
 
         logger.info('Halting queue processing as a result of signal: {}'.format(signum))
         self.running = False
+        if self.worker_pool:
+            self.worker_pool.stop()
@@ -4,18 +4,24 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import logging
+import time
 
 from django.conf import settings
 from django.utils.timezone import now
 from six import raise_from
 
+from messaging.envelope import pack_messages, unpack_message
 from messaging.messages.factory import get_message_type
+from messaging.metrics import messaging_metrics_mgr
 from util.broker import BrokerDetails
 from .backends.factory import get_message_backend
 from .exceptions import CommandMessageExecuteFailure, InvalidCommandMessage
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of messages received, merged and processed in one call to receive_messages
+BATCH_SIZE = 10
+
 
 class CommandMessageManager(object):
     def __new__(cls):
@@ -46,72 +52,187 @@ class CommandMessageManager(object):
         """Serialize CommandMessages and send via configured message broker
 
         The command.to_json() and command.message_type will be used to generate
-        serialized form of CommandMessage for transmission across the wire.
+        serialized form of CommandMessage for transmission across the wire. Messages of the same type are packed
+        together into compressed envelopes, see :func:`messaging.envelope.pack_messages`. Each envelope is stamped with
+        the time it was sent so that the lag between sending and execution can be measured.
 
         :param command: CommandMessages to be sent via configured broker
         :type command: [`messaging.messages.message.CommandMessage`]
         """
 
         messages = [{"type": x.type, "body": x.to_json()} for x in commands]
-        self._backend.send_messages(messages)
+        self._backend.send_messages(pack_messages(messages, time.time()))
 
     def receive_messages(self):
         """Main entry point to message processing.
 
         This will process up to a batch of 10 messages at a time. Behavior may
         differ slightly based on message backend. RabbitMQ will immediately
-        iterate over up to 10 messages, process and return. SQS will long-poll
-        up to 20 seconds or until 10 messages have been processed, process and
+        iterate over up to 10 messages, process and return. SQS will poll
+        until 10 messages have been received or the queue is empty, process and
         then return.
 
+        Compatible messages within the batch are merged so they are executed together, see
+        :meth:`merge_messages`. Each received message is individually acknowledged once the execution that includes
+        it succeeds.
+
         New messages will potentially be sent within this method, if CommandMessage populates
         the new_messages list.
         """
 
-        message_generator = self._backend.receive_messages(10)
+        messages = []
+        acks = []
+        consumer = self._backend.consume_messages(BATCH_SIZE)
+        try:
+            while len(messages) < BATCH_SIZE:
+                received = next(consumer)
+                if not received:
+                    # We've reached the end of the queue
+                    break
+                messages.append(received[0])
+                acks.append(received[1])
+
+            for ack, success in zip(acks, self.process_messages(messages)):
+                ack(success)
+        finally:
+            consumer.close()
+
+    def consume_messages(self, prefetch_count):
+        """Continuously receives messages from the backend, deferring acknowledgement to the caller. See
+        :meth:`messaging.backends.backend.MessagingBackend.consume_messages`
+
+        :param prefetch_count: Maximum number of unacknowledged messages the caller will hold at once
+        :type prefetch_count: int
+        :return: Yielded (message, ack) tuples or None
+        :rtype: Generator[(dict, function)]
+        """
+
+        return self._backend.consume_messages(prefetch_count)
+
+    def execute_command(self, command):
+        """Executes a single CommandMessage, logging any failure. This method is thread-safe.
+
+        :param command: The command message
+        :type command: :class:`messaging.messages.message.CommandMessage`
+        :return: True if the command was executed successfully, False otherwise
+        :rtype: bool
+        """
 
-        # Manually control iteration, so we can pass back success/failure to co-routine
         try:
-            # Seed message to start processing
-            message = message_generator.next()
-            while True:
-                success = False
-                try:
-                    self._process_message(message)
-                    success = True
-                except InvalidCommandMessage:
-                    logger.exception('Exception encountered processing message payload. Message remains on queue.')
-                except CommandMessageExecuteFailure:
-                    logger.exception('CommandMessage failure during execute call. Message remains on queue.')
-
-                # Feed boolean to backend generator and grab next message
-                message = message_generator.send(success)
-        except StopIteration:
-            pass
+            self._execute_command(command)
+            return True
+        except CommandMessageExecuteFailure:
+            logger.exception('CommandMessage failure during execute call. Message remains on queue.')
+        return False
+
+    def handle_message(self, message):
+        """Processes a single incoming message payload, logging any failure. This method is thread-safe.
+
+        :param message: message payload
+        :type message: dict
+        :return: True if the message was processed successfully and should be acknowledged, False otherwise
+        :rtype: bool
+        """
+
+        try:
+            self._process_message(message)
+            return True
+        except InvalidCommandMessage:
+            logger.exception('Exception encountered processing message payload. Message remains on queue.')
+        except CommandMessageExecuteFailure:
+            logger.exception('CommandMessage failure during execute call. Message remains on queue.')
+        return False
+
+    def merge_messages(self, messages):
+        """Reconstitutes the given message payloads and merges compatible CommandMessages together, so that each
+        resulting CommandMessage covers one or more of the given messages. A message payload that packs several
+        CommandMessages may be covered by several of the resulting CommandMessages, all of which must succeed for the
+        message to be acknowledged. Invalid messages are logged and omitted.
+
+        :param messages: The incoming message payloads
+        :type messages: [dict]
+        :return: List of tuples, each containing a CommandMessage and the indexes of the messages it covers
+        :rtype: [(:class:`messaging.messages.message.CommandMessage`, [int])]
+        """
+
+        merged = []
+        for index, message in enumerate(messages):
+            try:
+                commands = self._extract_commands(message)
+            except InvalidCommandMessage:
+                logger.exception('Exception encountered processing message payload. Message remains on queue.')
+                continue
+
+            for command in commands:
+                for merged_command, indexes in merged:
+                    if merged_command.can_merge(command):
+                        merged_command.merge(command)
+                        if index not in indexes:
+                            indexes.append(index)
+                        break
+                else:
+                    merged.append((command, [index]))
+
+        if len(merged) < len(messages):
+            logger.info('Merged %d message(s) into %d execution(s)', len(messages), len(merged))
+        return merged
+
+    def process_messages(self, messages):
+        """Processes the given incoming message payloads, merging compatible messages into a single execution
+
+        :param messages: The incoming message payloads
+        :type messages: [dict]
+        :return: Whether each message was processed successfully and should be acknowledged, in the same order as the
+            given messages
+        :rtype: [bool]
+        """
+
+        results = [None] * len(messages)
+        for command, indexes in self.merge_messages(messages):
+            success = self.execute_command(command)
+            for index in indexes:
+                results[index] = success and results[index] is not False
+        return [bool(result) for result in results]
+
+    def set_connection_pool_size(self, pool_size):
+        """Sets the number of broker connections retained for re-use, which should match the number of threads that
+        concurrently send or receive messages
+
+        :param pool_size: The number of connections to retain
+        :type pool_size: int
+        """
+
+        self._backend.set_pool_size(pool_size)
 
     @staticmethod
-    def _extract_command(message):
-        """Reconstitute a CommandMessage from incoming raw message payload
+    def _extract_commands(message):
+        """Reconstitute the CommandMessages from incoming raw message payload, unpacking any envelope
 
         :param message: Incoming message payload
         :type message: dict
-        :return: Instantiated CommendMessage
-        :rtype: `messaging.messages.message.CommandMessage`
+        :return: Instantiated CommandMessages
+        :rtype: [`messaging.messages.message.CommandMessage`]
         """
         if 'type' not in message:
             raise InvalidCommandMessage('Invalid message missing type: %s', message)
 
-        if 'body' not in message:
+        if 'body' not in message and 'version' not in message:
             raise InvalidCommandMessage('Missing body in message.')
 
         try:
             message_class = get_message_type(message['type'])
-            message_body = message['body']
-
-            return message_class.from_json(message_body)
         except KeyError as ex:
             raise_from(InvalidCommandMessage('No message type handler available for message type %s' % message['type']), ex)
 
+        try:
+            commands = [message_class.from_json(command_message['body']) for command_message in unpack_message(message)]
+        except (KeyError, ValueError) as ex:
+            raise_from(InvalidCommandMessage('Invalid body in message of type %s: %s' % (message['type'], ex)), ex)
+
+        for _ in commands:
+            messaging_metrics_mgr.record_received(message['type'], message.get('sent'))
+        return commands
+
     def _process_message(self, message):
         """Inspects message for type and then attempts to launch execution
 
@@ -125,7 +246,21 @@ class CommandMessageManager(object):
         :raises CommandMessageExecuteFailure: Failure during CommandMessage.execute
         """
 
-        command = self._extract_command(message)
+        for command in self._extract_commands(message):
+            self._execute_command(command)
+
+    def _execute_command(self, command):
+        """Launches execution of the given CommandMessage
+
+        This function will potentially fire off new messages as required by
+        execution logic within CommandMessage extending class. These messages
+        will only be sent if command execution is successful.
+
+        :param command: The command message
+        :type command: :class:`messaging.messages.message.CommandMessage`
+        :raises CommandMessageExecuteFailure: Failure during CommandMessage.execute
+        """
+
         start_time = now()
         logger.info('Processing message of type %s', command.type)
         try:
@@ -136,6 +271,9 @@ class CommandMessageManager(object):
         duration = now() - start_time
         logger.info('Message execution took %.3f seconds', duration.total_seconds())
 
+        num_new_messages = len(command.new_messages) if success else 0
+        messaging_metrics_mgr.record_execution(command.type, duration.total_seconds(), success, num_new_messages)
+
         if not success:
             raise CommandMessageExecuteFailure
 
@@ -48,3 +48,26 @@ class CommandMessage(object):
         :return: Success or failure of execute operation
         :rtype: bool
         """
+
+    def can_merge(self, other):
+        """Indicates whether the given message can be merged into this message, so that executing this message once
+        has the same effect as executing both. Subclasses that hold a collection of model IDs should override this
+        along with :meth:`merge`. By default messages cannot be merged.
+
+        :param other: The other message
+        :type other: :class:`messaging.messages.message.CommandMessage`
+        :return: True if the other message can be merged into this one, False otherwise
+        :rtype: bool
+        """
+
+        return False
+
+    def merge(self, other):
+        """Merges the given message into this message. This is only called if :meth:`can_merge` returned True for the
+        other message.
+
+        :param other: The other message
+        :type other: :class:`messaging.messages.message.CommandMessage`
+        """
+
+        raise NotImplementedError()
@@ -0,0 +1,375 @@
+"""Defines the classes that record per-message-type execution metrics for the messaging subsystem"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import bisect
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (in seconds) of the histogram buckets, the final bucket holds everything larger than the last bound
+BUCKET_BOUNDS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0]
+
+# Number of seconds between each write of a message handler's metrics to the database
+FLUSH_INTERVAL = 10
+
+# Number of flush intervals covered by the metrics of each message handler (5 minutes)
+WINDOW_COUNT = 30
+
+# Message handler metrics that have not been written for this many seconds belong to a handler that has stopped
+STALE_THRESHOLD = 60
+
+PERCENTILES = [50, 95, 99]
+
+
+class Histogram(object):
+    """Fixed-bucket histogram of durations in seconds. Histograms from different message handlers share the same
+    buckets so that they can be merged and percentiles estimated across all handlers.
+    """
+
+    def __init__(self):
+        """Constructor
+        """
+
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        """Adds the given value to the histogram
+
+        :param value: The value in seconds
+        :type value: float
+        """
+
+        value = max(value, 0.0)
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def get_percentile(self, percentile):
+        """Estimates the given percentile of the histogram values, which is the upper bound of the bucket containing
+        the percentile (or the maximum value if that is smaller)
+
+        :param percentile: The percentile between 0 and 100
+        :type percentile: int
+        :return: The estimated percentile in seconds, possibly None if the histogram is empty
+        :rtype: float
+        """
+
+        if not self.count:
+            return None
+
+        rank = self.count * percentile / 100.0
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank and bucket_count:
+                if index < len(BUCKET_BOUNDS):
+                    return min(BUCKET_BOUNDS[index], self.max)
+                break
+        return self.max
+
+    def merge(self, histogram):
+        """Merges the values of the given histogram into this one
+
+        :param histogram: The histogram to merge
+        :type histogram: :class:`messaging.metrics.Histogram`
+        """
+
+        self.counts = [a + b for a, b in zip(self.counts, histogram.counts)]
+        self.count += histogram.count
+        self.total += histogram.total
+        self.max = max(self.max, histogram.max)
+
+    def get_summary_json(self):
+        """Returns the percentile, average and maximum summary of this histogram as a JSON dict
+
+        :return: The summary JSON
+        :rtype: dict
+        """
+
+        summary = {'p%d' % percentile: self.get_percentile(percentile) for percentile in PERCENTILES}
+        summary['avg'] = self.total / self.count if self.count else None
+        summary['max'] = self.max if self.count else None
+        return summary
+
+    @staticmethod
+    def from_json(json_dict):
+        """Creates a histogram from the given JSON dict
+
+        :param json_dict: The JSON dict
+        :type json_dict: dict
+        :return: The histogram
+        :rtype: :class:`messaging.metrics.Histogram`
+        """
+
+        histogram = Histogram()
+        if len(json_dict['counts']) == len(histogram.counts):
+            histogram.counts = list(json_dict['counts'])
+            histogram.count = json_dict['count']
+            histogram.total = json_dict['total']
+            histogram.max = json_dict['max']
+        return histogram
+
+    def to_json(self):
+        """Returns the JSON dict for this histogram
+
+        :return: The JSON dict
+        :rtype: dict
+        """
+
+        return {'counts': self.counts, 'count': self.count, 'total': self.total, 'max': self.max}
+
+
+class MessageTypeMetrics(object):
+    """Metrics for a single message type"""
+
+    def __init__(self, message_type):
+        """Constructor
+
+        :param message_type: The message type
+        :type message_type: string
+        """
+
+        self.type = message_type
+        self.messages = 0  # Messages received, several may be merged into a single execution
+        self.executions = 0
+        self.failures = 0
+        self.new_messages = 0
+        self.max_new_messages = 0
+        self.execution_time = Histogram()
+        self.lag = Histogram()
+
+    def merge(self, metrics):
+        """Merges the given metrics for the same message type into these metrics
+
+        :param metrics: The metrics to merge
+        :type metrics: :class:`messaging.metrics.MessageTypeMetrics`
+        """
+
+        self.messages += metrics.messages
+        self.executions += metrics.executions
+        self.failures += metrics.failures
+        self.new_messages += metrics.new_messages
+        self.max_new_messages = max(self.max_new_messages, metrics.max_new_messages)
+        self.execution_time.merge(metrics.execution_time)
+        self.lag.merge(metrics.lag)
+
+    def get_summary_json(self):
+        """Returns the summary of these metrics as a JSON dict
+
+        :return: The summary JSON
+        :rtype: dict
+        """
+
+        successes = self.executions - self.failures
+        return {'type': self.type, 'messages': self.messages, 'executions': self.executions,
+                'failures': self.failures,
+                'failure_rate': self.failures / self.executions if self.executions else 0.0,
+                'execution_time': self.execution_time.get_summary_json(),
+                'total_execution_time': self.execution_time.total,
+                'lag': self.lag.get_summary_json(),
+                'new_messages': {'total': self.new_messages, 'max': self.max_new_messages,
+                                 'avg': self.new_messages / successes if successes > 0 else None}}
+
+    @staticmethod
+    def from_json(json_dict):
+        """Creates message type metrics from the given JSON dict
+
+        :param json_dict: The JSON dict
+        :type json_dict: dict
+        :return: The message type metrics
+        :rtype: :class:`messaging.metrics.MessageTypeMetrics`
+        """
+
+        metrics = MessageTypeMetrics(json_dict['type'])
+        metrics.messages = json_dict['messages']
+        metrics.executions = json_dict['executions']
+        metrics.failures = json_dict['failures']
+        metrics.new_messages = json_dict['new_messages']
+        metrics.max_new_messages = json_dict['max_new_messages']
+        metrics.execution_time = Histogram.from_json(json_dict['execution_time'])
+        metrics.lag = Histogram.from_json(json_dict['lag'])
+        return metrics
+
+    def to_json(self):
+        """Returns the JSON dict for these metrics, which retains the full histograms so they can be merged later
+
+        :return: The JSON dict
+        :rtype: dict
+        """
+
+        return {'type': self.type, 'messages': self.messages, 'executions': self.executions,
+                'failures': self.failures, 'new_messages': self.new_messages,
+                'max_new_messages': self.max_new_messages, 'execution_time': self.execution_time.to_json(),
+                'lag': self.lag.to_json()}
+
+
+class MessagingMetricsManager(object):
+    """Thread-safe registry of the message metrics recorded by this process. Metrics are recorded in fixed intervals
+    and the most recent intervals are periodically written to the database so that the metrics of every message
+    handler can be combined by the scheduler and the REST API.
+    """
+
+    def __init__(self):
+        """Constructor
+        """
+
+        self._lock = threading.Lock()
+        self._current = {}  # {Message type: MessageTypeMetrics}
+        self._window = deque(maxlen=WINDOW_COUNT)  # Metrics dicts for the previous intervals, most recent last
+        self._last_flush = time.time()
+        self._handler = '%s:%d' % (socket.gethostname(), os.getpid())
+
+    def flush(self):
+        """Ends the current metrics interval and writes the metrics for the recent intervals to the database
+        """
+
+        from messaging.models import MessageHandlerMetrics
+
+        with self._lock:
+            self._window.append(self._current)
+            self._current = {}
+            self._last_flush = time.time()
+            window = list(self._window)
+
+        metrics_json = [metrics.to_json() for metrics in merge_metrics(window).values()]
+        MessageHandlerMetrics.objects.update_handler_metrics(self._handler, metrics_json)
+
+    def flush_if_due(self):
+        """Flushes the metrics to the database if the flush interval has elapsed. Any error writing the metrics is
+        logged and does not interrupt message processing.
+        """
+
+        if time.time() - self._last_flush < FLUSH_INTERVAL:
+            return
+
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Failed to write messaging metrics')
+
+    def generate_status_json(self, status_dict):
+        """Generates the portion of the status JSON that describes the messaging metrics across all message handlers
+
+        :param status_dict: The status JSON dict
+        :type status_dict: dict
+        """
+
+        from messaging.models import MessageHandlerMetrics
+
+        metrics_json = MessageHandlerMetrics.objects.get_metrics_json()
+        # The status has its own timestamp, leaving this one out keeps the status ETag stable while metrics are unchanged
+        del metrics_json['timestamp']
+        status_dict['messaging'] = metrics_json
+
+    def get_metrics(self):
+        """Returns the metrics recorded by this process over the current window
+
+        :return: The metrics for each message type
+        :rtype: dict
+        """
+
+        with self._lock:
+            window = list(self._window)
+            window.append(self._current)
+        return merge_metrics(window)
+
+    def record_execution(self, message_type, duration, success, num_new_messages=0):
+        """Records the execution of a (possibly merged) command message
+
+        :param message_type: The message type
+        :type message_type: string
+        :param duration: The execution time in seconds
+        :type duration: float
+        :param success: Whether the execution succeeded
+        :type success: bool
+        :param num_new_messages: The number of downstream messages created by a successful execution
+        :type num_new_messages: int
+        """
+
+        with self._lock:
+            metrics = self._get_type_metrics(message_type)
+            metrics.executions += 1
+            metrics.execution_time.add(duration)
+            if success:
+                metrics.new_messages += num_new_messages
+                metrics.max_new_messages = max(metrics.max_new_messages, num_new_messages)
+            else:
+                metrics.failures += 1
+
+    def record_received(self, message_type, sent=None):
+        """Records that a message was received from the broker
+
+        :param message_type: The message type
+        :type message_type: string
+        :param sent: When the message was sent, in seconds since the epoch, possibly None
+        :type sent: float
+        """
+
+        lag = time.time() - sent if sent else None
+        with self._lock:
+            metrics = self._get_type_metrics(message_type)
+            metrics.messages += 1
+            if lag is not None:
+                metrics.lag.add(lag)
+
+    def _get_type_metrics(self, message_type):
+        """Returns the metrics for the given message type in the current interval, creating them if needed. Caller
+        must hold the lock.
+
+        :param message_type: The message type
+        :type message_type: string
+        :return: The metrics
+        :rtype: :class:`messaging.metrics.MessageTypeMetrics`
+        """
+
+        if message_type not in self._current:
+            self._current[message_type] = MessageTypeMetrics(message_type)
+        return self._current[message_type]
+
+
+def get_summary_json(metrics_dicts):
+    """Returns the summary JSON for the given metrics, with message types sorted by total execution time so that the
+    message types that dominate message handler time are listed first
+
+    :param metrics_dicts: List of metrics dicts to combine, each a dict of message type to metrics
+    :type metrics_dicts: [dict]
+    :return: The summary JSON
+    :rtype: dict
+    """
+
+    merged = merge_metrics(metrics_dicts).values()
+    merged.sort(key=lambda metrics: metrics.execution_time.total, reverse=True)
+    return {'message_types': [metrics.get_summary_json() for metrics in merged]}
+
+
+def merge_metrics(metrics_dicts):
+    """Merges the given metrics by message type
+
+    :param metrics_dicts: List of metrics dicts to combine, each a dict of message type to metrics
+    :type metrics_dicts: [dict]
+    :return: The merged metrics for each message type
+    :rtype: dict
+    """
+
+    merged = {}
+    for metrics_dict in metrics_dicts:
+        for message_type, metrics in metrics_dict.items():
+            if message_type not in merged:
+                merged[message_type] = MessageTypeMetrics(message_type)
+            merged[message_type].merge(metrics)
+    return merged
+
+
+messaging_metrics_mgr = MessagingMetricsManager()
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.20 on 2026-10-17 12:00
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageHandlerMetrics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('handler', models.CharField(max_length=250, unique=True)),
+                ('metrics', django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+                ('last_modified', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'db_table': 'message_handler_metrics',
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+"""Defines the database models for the messaging subsystem"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import datetime
+
+import django.contrib.postgres.fields
+from django.db import models
+from django.utils.timezone import now
+
+from messaging.metrics import MessageTypeMetrics, STALE_THRESHOLD, get_summary_json
+from util.parse import datetime_to_string
+
+
+class MessageHandlerMetricsManager(models.Manager):
+    """Provides additional methods for handling message handler metrics
+    """
+
+    def get_metrics_json(self):
+        """Returns the summary JSON of the recent metrics across all running message handlers. Metrics from message
+        handlers that have stopped are ignored.
+
+        :return: The metrics summary JSON
+        :rtype: dict
+        """
+
+        when = now()
+        stale_threshold = when - datetime.timedelta(seconds=STALE_THRESHOLD)
+
+        metrics_dicts = []
+        for handler_metrics in self.filter(last_modified__gte=stale_threshold).only('metrics'):
+            metrics_dict = {}
+            for metrics_json in handler_metrics.metrics:
+                metrics = MessageTypeMetrics.from_json(metrics_json)
+                metrics_dict[metrics.type] = metrics
+            metrics_dicts.append(metrics_dict)
+
+        summary = get_summary_json(metrics_dicts)
+        summary['num_handlers'] = len(metrics_dicts)
+        summary['timestamp'] = datetime_to_string(when)
+        return summary
+
+    def update_handler_metrics(self, handler, metrics_json):
+        """Writes the recent metrics of the given message handler. Metrics from message handlers that have stopped are
+        deleted.
+
+        :param handler: The unique name of the message handler process
+        :type handler: string
+        :param metrics_json: The JSON for the metrics of each message type
+        :type metrics_json: [dict]
+        """
+
+        self.update_or_create(handler=handler, defaults={'metrics': metrics_json})
+
+        stale_threshold = now() - datetime.timedelta(seconds=STALE_THRESHOLD)
+        self.filter(last_modified__lt=stale_threshold).delete()
+
+
+class MessageHandlerMetrics(models.Model):
+    """Represents the recent message execution metrics recorded by a single message handler process
+
+    :keyword handler: The unique name (hostname and process ID) of the message handler process
+    :type handler: :class:`django.db.models.CharField`
+    :keyword metrics: JSON list of the metrics (including histograms) for each message type
+    :type metrics: :class:`django.contrib.postgres.fields.JSONField`
+    :keyword last_modified: When the metrics were last written
+    :type last_modified: :class:`django.db.models.DateTimeField`
+    """
+
+    handler = models.CharField(max_length=250, unique=True)
+    metrics = django.contrib.postgres.fields.JSONField(default=list)
+    last_modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = MessageHandlerMetricsManager()
+
+    class Meta(object):
+        """meta information for the db"""
+        db_table = 'message_handler_metrics'
@@ -5,6 +5,7 @@ from __future__ import unicode_literals
 
 import Queue
 import json
+import socket
 
 import django
 from django.conf import settings
@@ -15,6 +16,7 @@ from mock import call, patch
 import messaging.backends.factory as backend_factory
 from messaging.backends.amqp import AMQPMessagingBackend
 from messaging.backends.backend import MessagingBackend
+from messaging.backends.pool import ConnectionPool
 from messaging.backends.sqs import SQSMessagingBackend
 
 
@@ -23,6 +25,9 @@ class DummyBackend(MessagingBackend):
     def __init__(self):
         super(DummyBackend, self).__init__('dummy')
 
+    def consume_messages(self, prefetch_count):  # pragma: no cover
+        pass
+
     def send_messages(self, message):  # pragma: no cover
         pass
 
@@ -52,8 +57,8 @@ class TestAMQPBackend(TestCase):
         backend = AMQPMessagingBackend()
         backend.send_messages(messages)
 
-        # Deep diving through context managers to assert put call
-        put = connection.return_value.__enter__.return_value.SimpleQueue.return_value.put
+        # Puts are wrapped by kombu ensure for reconnect-on-failure
+        put = connection.return_value.ensure.return_value
         put.assert_called_with(messages[0])
         self.assertEquals(put.call_count, 1)
 
@@ -69,8 +74,8 @@ class TestAMQPBackend(TestCase):
         backend = AMQPMessagingBackend()
         backend.send_messages(messages)
 
-        # Deep diving through context managers to assert put call
-        put = connection.return_value.__enter__.return_value.SimpleQueue.return_value.put
+        # Puts are wrapped by kombu ensure for reconnect-on-failure
+        put = connection.return_value.ensure.return_value
         put.assert_has_calls([call(x) for x in messages])
         self.assertEquals(put.call_count, 2)
 
@@ -82,8 +87,7 @@ class TestAMQPBackend(TestCase):
         message2 = MagicMock(payload={'type': 'echo', 'body': '2'})
         get_func = MagicMock(side_effect=[message1, message2, Queue.Empty])
 
-        # Deep diving through context managers to patch get call
-        connection.return_value.__enter__.return_value.SimpleQueue.return_value.get = get_func
+        connection.return_value.SimpleQueue.return_value.get = get_func
 
         backend = AMQPMessagingBackend()
         generator = backend.receive_messages(5)
@@ -108,8 +112,7 @@ class TestAMQPBackend(TestCase):
         message3 = MagicMock(payload={'type': 'echo', 'body': '3'})
         get_func = MagicMock(side_effect=[message1, message2, Queue.Empty])
 
-        # Deep diving through context managers to patch get call
-        connection.return_value.__enter__.return_value.SimpleQueue.return_value.get = get_func
+        connection.return_value.SimpleQueue.return_value.get = get_func
 
         backend = AMQPMessagingBackend()
         generator = backend.receive_messages(2)
@@ -135,8 +138,7 @@ class TestAMQPBackend(TestCase):
         message.payload = 'test'
         get_func = MagicMock(return_value=message)
 
-        # Deep diving through context managers to patch get call
-        connection.return_value.__enter__.return_value.SimpleQueue.return_value.get = get_func
+        connection.return_value.SimpleQueue.return_value.get = get_func
 
         backend = AMQPMessagingBackend()
 
@@ -149,6 +151,139 @@ class TestAMQPBackend(TestCase):
 
         message.ack.assert_not_called()
 
+    @patch('messaging.backends.amqp.Connection')
+    def test_consume_messages(self, connection):
+        """Validate consumed messages are acknowledged on success and requeued on failure in AMQP backend"""
+
+        message1 = MagicMock(payload={'type': 'echo', 'body': '1'}, delivery_info={'redelivered': False})
+        message2 = MagicMock(payload={'type': 'echo', 'body': '2'}, delivery_info={'redelivered': False})
+        message3 = MagicMock(payload={'type': 'echo', 'body': '3'}, delivery_info={'redelivered': True})
+        get_func = MagicMock(side_effect=[message1, Queue.Empty, Queue.Empty, message2, message3])
+        connection.return_value.SimpleQueue.return_value.get = get_func
+        connection.return_value.drain_events.side_effect = [socket.timeout, None]
+
+        backend = AMQPMessagingBackend()
+        consumer = backend.consume_messages(5)
+        payload1, ack1 = consumer.next()
+        self.assertIsNone(consumer.next())
+        payload2, ack2 = consumer.next()
+        payload3, ack3 = consumer.next()
+        ack1(True)
+        ack2(False)
+        ack3(False)
+        consumer.close()
+
+        self.assertEqual(payload1, message1.payload)
+        self.assertEqual(payload2, message2.payload)
+        self.assertEqual(payload3, message3.payload)
+        message1.ack.assert_called_once()
+        message2.ack.assert_not_called()
+        message2.requeue.assert_called_once()
+        # A redelivered message that fails again is still requeued, its redelivered flag is also set by broker restarts
+        message3.ack.assert_not_called()
+        message3.requeue.assert_called_once()
+        connection.return_value.channel.return_value.basic_qos.assert_called_with(0, 5, False)
+        connection.return_value.channel.return_value.close.assert_called_once()
+        connection.return_value.release.assert_not_called()
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_routed_messages(self, connection):
+        """Validate messages are sent to their routed queues and consumed with weighted fairness in AMQP backend"""
+
+        routes = {'priority': {'weight': 2, 'types': ['running_jobs']}}
+        with self.settings(MESSAGE_QUEUE_ROUTES=routes):
+            backend = AMQPMessagingBackend()
+
+        # Each queue has three messages waiting, the priority queue is polled twice as often
+        queues = {settings.QUEUE_NAME: MagicMock(), settings.QUEUE_NAME + '-priority': MagicMock()}
+        for name, simple_queue in queues.items():
+            simple_queue.get.side_effect = [MagicMock(payload=name) for _ in range(3)] + [Queue.Empty] * 10
+        connection.return_value.SimpleQueue.side_effect = lambda name, **kwargs: queues[name]
+        connection.return_value.drain_events.side_effect = socket.timeout
+
+        consumer = backend.consume_messages(5)
+        payloads = [consumer.next()[0] for _ in range(6)]
+        self.assertIsNone(consumer.next())
+        consumer.close()
+
+        priority = settings.QUEUE_NAME + '-priority'
+        default = settings.QUEUE_NAME
+        self.assertListEqual(payloads, [priority, default, priority, priority, default, default])
+
+        backend.send_messages([{'type': 'running_jobs', 'body': '1'}, {'type': 'echo', 'body': '2'}])
+        connection.return_value.SimpleQueue.assert_any_call(priority)
+        connection.return_value.SimpleQueue.assert_any_call(default)
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_connection_reused(self, connection):
+        """Validate the broker connection is pooled and re-used across calls in AMQP backend"""
+
+        connection.return_value.SimpleQueue.return_value.get = MagicMock(side_effect=Queue.Empty)
+
+        backend = AMQPMessagingBackend()
+        backend.send_messages([{'type': 'echo', 'body': '1'}])
+        list(backend.receive_messages(5))
+        backend.send_messages([{'type': 'echo', 'body': '2'}])
+
+        self.assertEqual(connection.call_count, 1)
+        connection.return_value.release.assert_not_called()
+
+        # Each batch of received messages uses its own channel, which is closed when the batch is done
+        connection.return_value.channel.return_value.close.assert_called_once()
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_connection_replaced_after_failure(self, connection):
+        """Validate a broker connection that fails during use is closed and replaced in AMQP backend"""
+
+        connection.return_value.ensure.return_value.side_effect = [IOError, None]
+
+        backend = AMQPMessagingBackend()
+        with self.assertRaises(IOError):
+            backend.send_messages([{'type': 'echo', 'body': '1'}])
+        backend.send_messages([{'type': 'echo', 'body': '2'}])
+
+        self.assertEqual(connection.call_count, 2)
+        connection.return_value.release.assert_called_once()
+
+
+class TestConnectionPool(TestCase):
+    def setUp(self):
+        django.setup()
+
+    def test_unhealthy_connection_replaced(self):
+        """Validate an idle connection that fails its health check is closed and replaced"""
+
+        create_func = MagicMock(side_effect=['conn1', 'conn2'])
+        check_func = MagicMock(return_value=False)
+        close_func = MagicMock()
+        pool = ConnectionPool(create_func, check_func, close_func, check_interval=0)
+
+        with pool.connection() as conn:
+            self.assertEqual(conn, 'conn1')
+        with pool.connection() as conn:
+            self.assertEqual(conn, 'conn2')
+
+        check_func.assert_called_once_with('conn1')
+        close_func.assert_called_once_with('conn1')
+
+    def test_max_idle(self):
+        """Validate connections beyond the maximum idle count are closed when released"""
+
+        create_func = MagicMock(side_effect=['conn1', 'conn2'])
+        close_func = MagicMock()
+        pool = ConnectionPool(create_func, MagicMock(return_value=True), close_func, max_idle=1)
+
+        with pool.connection():
+            with pool.connection():
+                pass
+
+        self.assertEqual(pool.get_idle_count(), 1)
+        close_func.assert_called_once_with('conn1')
+
+        pool.close()
+        self.assertEqual(pool.get_idle_count(), 0)
+        close_func.assert_called_with('conn2')
+
 
 class TestBackendsFactory(TestCase):
     def setUp(self):
@@ -303,3 +438,30 @@ class TestSQSBackend(TestCase):
 
         self.assertEquals(results, [value])
         message.delete.assert_not_called()
+
+    @patch('messaging.backends.sqs.SQSVisibilityHeartbeat')
+    @patch('messaging.backends.sqs.SQSClient')
+    def test_consume_messages(self, client, heartbeat):
+        """Validate consumed messages are deleted in a batch on success and left on the queue on failure in SQS
+        backend"""
+
+        message1 = MagicMock(body=json.dumps({'type': 'echo', 'body': '1'}))
+        message2 = MagicMock(body=json.dumps({'type': 'echo', 'body': '2'}))
+        sqs_client = client.return_value.__enter__.return_value
+        sqs_client.receive_messages.side_effect = [[message1, message2], []]
+
+        backend = SQSMessagingBackend()
+        consumer = backend.consume_messages(5)
+        payload1, ack1 = consumer.next()
+        payload2, ack2 = consumer.next()
+        ack1(True)
+        ack2(False)
+        self.assertFalse(sqs_client.delete_messages.called)
+        self.assertIsNone(consumer.next())
+        consumer.close()
+
+        self.assertEqual(payload1, {'type': 'echo', 'body': '1'})
+        sqs_client.delete_messages.assert_called_once_with([message1])
+        heartbeat.return_value.add.assert_has_calls([call(message1), call(message2)])
+        heartbeat.return_value.remove.assert_has_calls([call(message1), call(message2)])
+        heartbeat.return_value.stop.assert_called_once()
@@ -0,0 +1,74 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+
+import django
+from django.test import TestCase
+from mock import patch
+
+from messaging.envelope import pack_messages, unpack_message
+from messaging.exceptions import InvalidCommandMessage
+
+
+class TestEnvelope(TestCase):
+    def setUp(self):
+        django.setup()
+
+    def test_pack_small_messages(self):
+        """Validate that small messages of the same type are packed together without compression"""
+
+        messages = [{'type': 'a', 'body': {'id': 1}}, {'type': 'b', 'body': {'id': 2}},
+                    {'type': 'a', 'body': {'id': 3}}]
+
+        envelopes = pack_messages(messages, 1000.0)
+
+        self.assertEqual(len(envelopes), 2)
+        self.assertDictEqual(envelopes[0], {'version': 2, 'type': 'a', 'count': 2, 'sent': 1000.0,
+                                            'bodies': [{'id': 1}, {'id': 3}]})
+        self.assertListEqual(unpack_message(envelopes[0]), [messages[0], messages[2]])
+        self.assertListEqual(unpack_message(envelopes[1]), [messages[1]])
+
+    def test_pack_large_messages(self):
+        """Validate that large messages are compressed and round trip through JSON serialization"""
+
+        messages = [{'type': 'a', 'body': {'id': i, 'input': 'x' * 1000}} for i in range(100)]
+
+        envelopes = pack_messages(messages)
+
+        self.assertEqual(len(envelopes), 1)
+        self.assertEqual(envelopes[0]['compression'], 'zlib')
+        self.assertLess(len(json.dumps(envelopes[0])), len(json.dumps(messages)) / 10)
+        self.assertListEqual(unpack_message(json.loads(json.dumps(envelopes[0]))), messages)
+
+    @patch('messaging.envelope.MAX_ENVELOPE_SIZE', 1)
+    def test_split_envelopes(self):
+        """Validate that compressed envelopes exceeding the maximum size are split"""
+
+        messages = [{'type': 'a', 'body': {'id': i, 'input': 'x' * 5000}} for i in range(4)]
+
+        envelopes = pack_messages(messages)
+
+        self.assertEqual(len(envelopes), 4)
+        unpacked = []
+        for envelope in envelopes:
+            unpacked.extend(unpack_message(envelope))
+        self.assertListEqual(unpacked, messages)
+
+    def test_unpack_unversioned_message(self):
+        """Validate that messages in the original format are unpacked as a single message"""
+
+        message = {'type': 'a', 'body': {'id': 1}}
+        self.assertListEqual(unpack_message(message), [message])
+
+    def test_unpack_invalid_envelope(self):
+        """Validate that invalid envelopes are rejected"""
+
+        with self.assertRaises(InvalidCommandMessage):
+            unpack_message({'version': 99, 'type': 'a', 'bodies': []})
+        with self.assertRaises(InvalidCommandMessage):
+            unpack_message({'version': 2, 'type': 'a', 'compression': 'zlib', 'data': 'not compressed'})
+        with self.assertRaises(InvalidCommandMessage):
+            unpack_message({'version': 2, 'type': 'a', 'compression': 'lzma', 'data': ''})
@@ -8,6 +8,7 @@ from django.test import TestCase
 from mock import MagicMock
 from mock import call, patch
 
+from messaging.envelope import pack_messages
 from messaging.exceptions import CommandMessageExecuteFailure, InvalidCommandMessage
 from messaging.manager import CommandMessageManager
 from messaging.messages.message import CommandMessage
@@ -37,8 +38,10 @@ class TestCommandMessageManager(TestCase):
         self.new_patcher.stop()
         self.init_patcher.stop()
 
-    def test_send_message(self):
-        """Validate that send_message composes dict with `type` and `body` keys for backend"""
+    @patch('messaging.manager.time')
+    def test_send_message(self, mock_time):
+        """Validate that send_message packs the message into an envelope stamped with the time sent"""
+        mock_time.time.return_value = 1000.0
         command = MagicMock(type='test')
         command.to_json.return_value = 'body_content'
         manager = CommandMessageManager()
@@ -48,7 +51,8 @@ class TestCommandMessageManager(TestCase):
 
         manager.send_messages([command])
 
-        send_messages.assert_called_with([{'type': 'test', 'body': 'body_content'}])
+        send_messages.assert_called_with([{'version': 2, 'type': 'test', 'count': 1, 'sent': 1000.0,
+                                           'bodies': ['body_content']}])
 
     def test_send_messages_no_type(self):
         """Validate that send_message raises AttributeError when message type is not available"""
@@ -77,27 +81,109 @@ class TestCommandMessageManager(TestCase):
             manager.send_messages([message])
 
     def test_receive_message(self):
-        """Validate the receive_message calls _process_message with each result"""
+        """Validate the receive_message processes each result and acknowledges it with the result"""
 
         mocks = [MagicMock() for _ in range(10)]
+        acks = [MagicMock() for _ in range(10)]
 
         def gen():
-            for mock in mocks:
-                yield mock
+            for mock, ack in zip(mocks, acks):
+                yield mock, ack
 
         manager = CommandMessageManager()
         manager._backend = MagicMock()
-        process_message = manager._process_message = MagicMock()
-        manager._backend.receive_messages = MagicMock(return_value=gen())
+        process_messages = manager.process_messages = MagicMock(return_value=[True] * 9 + [False])
+        manager._backend.consume_messages = MagicMock(return_value=gen())
         manager.receive_messages()
 
-        calls = [call(x) for x in mocks]
-        process_message.assert_has_calls(calls)
-        self.assertEquals(process_message.call_count, 10)
+        process_messages.assert_called_once_with(mocks)
+        for ack in acks[:9]:
+            ack.assert_called_once_with(True)
+        acks[9].assert_called_once_with(False)
 
-    @patch('messaging.manager.CommandMessageManager._extract_command')
+    def test_receive_message_empty_queue(self):
+        """Validate the receive_message stops receiving when the queue is empty"""
+
+        def gen():
+            yield 'message', MagicMock()
+            yield None
+            yield 'unreachable', MagicMock()  # pragma: no cover
+
+        manager = CommandMessageManager()
+        manager._backend = MagicMock()
+        process_messages = manager.process_messages = MagicMock(return_value=[True])
+        manager._backend.consume_messages = MagicMock(return_value=gen())
+        manager.receive_messages()
+
+        process_messages.assert_called_once_with(['message'])
+
+    @patch('messaging.manager.CommandMessageManager._extract_commands')
+    def test_merge_messages(self, extract_commands):
+        """Validate compatible messages are merged and invalid messages are omitted"""
+
+        class MergeableCommand(object):
+            def __init__(self, kind):
+                self.kind = kind
+                self.merged = []
+
+            def can_merge(self, other):
+                return self.kind == other.kind
+
+            def merge(self, other):
+                self.merged.append(other)
+
+        commands = {'a1': MergeableCommand('a'), 'b1': MergeableCommand('b'), 'a2': MergeableCommand('a'),
+                    'a3': MergeableCommand('a'), 'c1': MergeableCommand('c')}
+
+        def extract(message):
+            if message == 'invalid':
+                raise InvalidCommandMessage()
+            return [commands[name] for name in message.split(',')]
+        extract_commands.side_effect = extract
+
+        manager = CommandMessageManager()
+        merged = manager.merge_messages(['a1', 'invalid', 'b1', 'a2', 'a3,c1'])
+
+        self.assertEqual(merged, [(commands['a1'], [0, 3, 4]), (commands['b1'], [2]), (commands['c1'], [4])])
+        self.assertEqual(commands['a1'].merged, [commands['a2'], commands['a3']])
+
+    @patch('messaging.manager.get_message_type')
+    def test_merge_messages_malformed_body(self, get_message_type):
+        """Validate a message with a malformed body is omitted from the merged messages instead of raising"""
+
+        command = MagicMock(spec=CommandMessage)
+
+        def from_json(json_dict):
+            return command if json_dict['job_id'] else None
+        get_message_type.return_value = MagicMock(from_json=MagicMock(side_effect=from_json))
+
+        manager = CommandMessageManager()
+        merged = manager.merge_messages([{'type': 'test', 'body': {}}, {'type': 'test', 'body': {'job_id': 1}}])
+
+        self.assertEqual(merged, [(command, [1])])
+
+    @patch('messaging.manager.CommandMessageManager._execute_command')
+    @patch('messaging.manager.CommandMessageManager.merge_messages')
+    def test_process_messages(self, merge_messages, execute_command):
+        """Validate every message covered by a successful merged execution is marked successful"""
+
+        good_command = MagicMock()
+        bad_command = MagicMock()
+        merge_messages.return_value = [(good_command, [0, 2, 4]), (bad_command, [1, 4])]
+
+        def execute(command):
+            if command == bad_command:
+                raise CommandMessageExecuteFailure()
+        execute_command.side_effect = execute
+
+        manager = CommandMessageManager()
+        results = manager.process_messages(['m1', 'm2', 'm3', 'invalid', 'packed'])
+
+        self.assertEqual(results, [True, False, True, False, False])
+
+    @patch('messaging.manager.CommandMessageManager._extract_commands')
     @patch('messaging.manager.CommandMessageManager._send_downstream')
-    def test_successful_process_message(self, send_downstream, extract_command):
+    def test_successful_process_message(self, send_downstream, extract_commands):
         """Validate logic for a successful command process """
 
         message = {'type': 'test', 'body': 'payload'}
@@ -106,15 +192,15 @@ class TestCommandMessageManager(TestCase):
         command = MagicMock(execute=MagicMock(return_value=True))
         command.execute.return_value = True
         command.new_messages = []
-        extract_command.return_value = command
+        extract_commands.return_value = [command]
 
         manager._process_message(message)
 
         send_downstream.assert_called_with([])
 
-    @patch('messaging.manager.CommandMessageManager._extract_command')
+    @patch('messaging.manager.CommandMessageManager._extract_commands')
     @patch('messaging.manager.CommandMessageManager._send_downstream')
-    def test_failing_process_message(self, send_downstream, extract_command):
+    def test_failing_process_message(self, send_downstream, extract_commands):
         """Validate logic for a process message failing in process execution"""
 
         message = {'type': 'test', 'body': 'payload'}
@@ -122,16 +208,16 @@ class TestCommandMessageManager(TestCase):
         manager = CommandMessageManager()
         command = MagicMock()
         command.execute = MagicMock(return_value=False)
-        extract_command.return_value = command
+        extract_commands.return_value = [command]
 
         with self.assertRaises(CommandMessageExecuteFailure):
             manager._process_message(message)
 
         self.assertFalse(send_downstream.called)
 
-    @patch('messaging.manager.CommandMessageManager._extract_command')
+    @patch('messaging.manager.CommandMessageManager._extract_commands')
     @patch('messaging.manager.CommandMessageManager._send_downstream')
-    def test_process_message_exception(self, send_downstream, extract_command):
+    def test_process_message_exception(self, send_downstream, extract_commands):
         """Validate logic for a process message throwing an exception in process execution"""
 
         message = {'type': 'test', 'body': 'payload'}
@@ -140,7 +226,7 @@ class TestCommandMessageManager(TestCase):
         command = MagicMock()
         command.execute = MagicMock()
         command.execute.side_effect = Exception
-        extract_command.return_value = command
+        extract_commands.return_value = [command]
 
         with self.assertRaises(CommandMessageExecuteFailure):
             manager._process_message(message)
@@ -168,32 +254,48 @@ class TestCommandMessageManager(TestCase):
         self.assertFalse(send_messages.called)
 
     @patch('messaging.manager.get_message_type')
-    def test_valid_extract_command(self, get_message_type):
-        """Validate a successful _extract_command call instantiation of CommandMessage class from payload"""
+    def test_valid_extract_commands(self, get_message_type):
+        """Validate a successful _extract_commands call instantiation of CommandMessage class from payload"""
         message = {'type': 'test', 'body': 'payload'}
 
         from_json = MagicMock(return_value=MagicMock(spec=CommandMessage))
         message_class = MagicMock(from_json=from_json)
         get_message_type.return_value = message_class
-        result = CommandMessageManager._extract_command(message)
+        result = CommandMessageManager._extract_commands(message)
 
         get_message_type.assert_called_once()
         message_class.from_json.assert_called_with(message['body'])
-        self.assertTrue(isinstance(result, CommandMessage))
+        self.assertEqual(len(result), 1)
+        self.assertTrue(isinstance(result[0], CommandMessage))
+
+    @patch('messaging.manager.get_message_type')
+    def test_envelope_extract_commands(self, get_message_type):
+        """Validate _extract_commands unpacks every CommandMessage from an envelope"""
+        bodies = [{'job_id': i, 'padding': 'x' * 100} for i in range(100)]
+        envelopes = pack_messages([{'type': 'test', 'body': body} for body in bodies])
+        self.assertEqual(len(envelopes), 1)
+        self.assertEqual(envelopes[0]['compression'], 'zlib')
+
+        message_class = MagicMock()
+        get_message_type.return_value = message_class
+        result = CommandMessageManager._extract_commands(envelopes[0])
+
+        self.assertEqual(len(result), 100)
+        message_class.from_json.assert_has_calls([call(body) for body in bodies])
 
     def test_missing_type_extract_command(self):
         """Validate InvalidCommandMessage is raised when missing type key"""
         message = {'body': 'payload'}
 
         with self.assertRaises(InvalidCommandMessage):
-            CommandMessageManager._extract_command(message)
+            CommandMessageManager._extract_commands(message)
 
     def test_missing_body_extract_command(self):
         """Validate InvalidCommandMessage is raised when missing body key"""
         message = {'type': 'test'}
 
         with self.assertRaises(InvalidCommandMessage):
-            CommandMessageManager._extract_command(message)
+            CommandMessageManager._extract_commands(message)
 
     @patch('messaging.manager.get_message_type')
     def test_no_registered_type_extract_command(self, get_message_type):
@@ -202,4 +304,4 @@ class TestCommandMessageManager(TestCase):
 
         get_message_type.side_effect = KeyError
         with self.assertRaises(InvalidCommandMessage):
-            CommandMessageManager._extract_command(message)
+            CommandMessageManager._extract_commands(message)
@@ -0,0 +1,108 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import django
+from django.test import TestCase
+from mock import patch
+
+from messaging.metrics import Histogram, MessageTypeMetrics, MessagingMetricsManager, get_summary_json
+
+
+class TestHistogram(TestCase):
+    def setUp(self):
+        django.setup()
+
+    def test_percentiles(self):
+        """Validate that percentiles are estimated from the bucket bounds"""
+
+        histogram = Histogram()
+        for _ in range(90):
+            histogram.add(0.003)
+        for _ in range(9):
+            histogram.add(0.2)
+        histogram.add(1000.0)
+
+        self.assertEqual(histogram.get_percentile(50), 0.005)
+        self.assertEqual(histogram.get_percentile(95), 0.25)
+        self.assertEqual(histogram.get_percentile(99), 0.25)
+        self.assertEqual(histogram.get_percentile(100), 1000.0)
+        self.assertIsNone(Histogram().get_percentile(50))
+
+    def test_merge_json(self):
+        """Validate that histograms round trip through JSON and merge"""
+
+        histogram_1 = Histogram()
+        histogram_1.add(0.1)
+        histogram_2 = Histogram()
+        histogram_2.add(2.0)
+
+        histogram = Histogram.from_json(histogram_1.to_json())
+        histogram.merge(histogram_2)
+
+        self.assertEqual(histogram.count, 2)
+        self.assertAlmostEqual(histogram.total, 2.1)
+        self.assertEqual(histogram.max, 2.0)
+        self.assertEqual(histogram.get_percentile(50), 0.1)
+
+
+class TestMessagingMetricsManager(TestCase):
+    def setUp(self):
+        django.setup()
+
+    @patch('messaging.metrics.time')
+    def test_record(self, mock_time):
+        """Validate that received messages and executions are recorded per message type"""
+
+        mock_time.time.return_value = 100.0
+        manager = MessagingMetricsManager()
+        manager.record_received('type_a', 99.0)
+        manager.record_received('type_a', 99.0)
+        manager.record_received('type_b')
+        manager.record_execution('type_a', 0.2, True, 4)
+        manager.record_execution('type_b', 3.0, False, 0)
+
+        metrics = manager.get_metrics()
+        self.assertEqual(metrics['type_a'].messages, 2)
+        self.assertEqual(metrics['type_a'].executions, 1)
+        self.assertEqual(metrics['type_a'].new_messages, 4)
+        self.assertEqual(metrics['type_a'].lag.count, 2)
+        self.assertEqual(metrics['type_a'].lag.get_percentile(99), 1.0)
+        self.assertEqual(metrics['type_b'].failures, 1)
+        self.assertEqual(metrics['type_b'].lag.count, 0)
+
+        # Message types that dominate execution time are listed first
+        summary = get_summary_json([metrics, {'type_a': MessageTypeMetrics.from_json(metrics['type_a'].to_json())}])
+        self.assertListEqual([m['type'] for m in summary['message_types']], ['type_b', 'type_a'])
+        self.assertEqual(summary['message_types'][0]['failure_rate'], 1.0)
+        self.assertEqual(summary['message_types'][1]['messages'], 4)
+        self.assertEqual(summary['message_types'][1]['new_messages'], {'total': 8, 'max': 4, 'avg': 4.0})
+
+    @patch('messaging.models.MessageHandlerMetrics.objects.update_handler_metrics')
+    def test_flush(self, mock_update):
+        """Validate that flushing writes the metrics of the window and starts a new interval"""
+
+        manager = MessagingMetricsManager()
+        manager.record_execution('type_a', 0.2, True)
+        manager.flush()
+        manager.record_execution('type_a', 0.2, True)
+        manager.flush()
+
+        metrics_json = mock_update.call_args[0][1]
+        self.assertEqual(len(metrics_json), 1)
+        self.assertEqual(metrics_json[0]['executions'], 2)
+        self.assertEqual(manager._current, {})
+
+    @patch('messaging.metrics.MessagingMetricsManager.flush')
+    def test_flush_if_due(self, mock_flush):
+        """Validate that metrics are only flushed once the interval has elapsed and that errors are suppressed"""
+
+        manager = MessagingMetricsManager()
+        manager.flush_if_due()
+        self.assertFalse(mock_flush.called)
+
+        manager._last_flush = 0
+        mock_flush.side_effect = Exception
+        manager.flush_if_due()
+        self.assertTrue(mock_flush.called)
@@ -0,0 +1,40 @@
+from __future__ import unicode_literals
+
+import datetime
+
+import django
+from django.test import TestCase
+from django.utils.timezone import now
+
+from messaging.metrics import MessageTypeMetrics
+from messaging.models import MessageHandlerMetrics
+
+
+class TestMessageHandlerMetricsManager(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        metrics = MessageTypeMetrics('type_a')
+        metrics.messages = 1
+        MessageHandlerMetrics.objects.update_handler_metrics('host-1:1', [metrics.to_json()])
+        MessageHandlerMetrics.objects.update_handler_metrics('host-2:1', [metrics.to_json()])
+
+        # The second message handler stopped writing its metrics
+        stale = now() - datetime.timedelta(hours=1)
+        MessageHandlerMetrics.objects.filter(handler='host-2:1').update(last_modified=stale)
+
+    def test_get_metrics_json_stale(self):
+        """Tests that metrics from stopped message handlers are ignored, without being deleted, when read"""
+
+        summary = MessageHandlerMetrics.objects.get_metrics_json()
+
+        self.assertEqual(summary['num_handlers'], 1)
+        self.assertEqual(MessageHandlerMetrics.objects.count(), 2)
+
+    def test_update_handler_metrics_stale(self):
+        """Tests that metrics from stopped message handlers are deleted when a message handler writes its metrics"""
+
+        MessageHandlerMetrics.objects.update_handler_metrics('host-1:1', [])
+
+        self.assertListEqual(list(MessageHandlerMetrics.objects.values_list('handler', flat=True)), ['host-1:1'])
@@ -0,0 +1,54 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import django
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+
+from messaging.backends.routing import MessageRouter
+
+
+class TestMessageRouter(TestCase):
+    def setUp(self):
+        django.setup()
+
+    def test_get_queue_name(self):
+        """Validate that routed message types are sent to their queue and all others to the default queue"""
+
+        router = MessageRouter('scale', {'priority': {'weight': 4, 'types': ['running_jobs']},
+                                         'bulk': {'types': ['cancel_jobs_bulk']}})
+
+        self.assertListEqual(router.queue_names, ['scale', 'scale-bulk', 'scale-priority'])
+        self.assertListEqual(router.weights, [1, 1, 4])
+        self.assertTrue(router.is_routed())
+        self.assertEqual(router.get_queue_name('running_jobs'), 'scale-priority')
+        self.assertEqual(router.get_queue_name('cancel_jobs_bulk'), 'scale-bulk')
+        self.assertEqual(router.get_queue_name('echo'), 'scale')
+
+        messages = [{'type': 'echo'}, {'type': 'running_jobs'}, {'type': 'echo'}]
+        grouped = router.group_messages(messages)
+        self.assertListEqual(grouped.keys(), ['scale', 'scale-priority'])
+        self.assertListEqual(grouped['scale'], [messages[0], messages[2]])
+
+    def test_invalid_routes(self):
+        """Validate that invalid routes are rejected"""
+
+        with self.assertRaises(ImproperlyConfigured):
+            MessageRouter('scale', {'priority': {'weight': 0, 'types': ['running_jobs']}})
+        with self.assertRaises(ImproperlyConfigured):
+            MessageRouter('scale', {'a': {'types': ['running_jobs']}, 'b': {'types': ['running_jobs']}})
+
+    def test_poll_order(self):
+        """Validate that queues are polled first in proportion to their weights"""
+
+        router = MessageRouter('scale', {'priority': {'weight': 3, 'types': ['running_jobs']}})
+        poll_order = router.get_poll_order()
+
+        orders = [poll_order.next() for _ in range(8)]
+        self.assertListEqual([order[0] for order in orders], [1, 0, 1, 1, 1, 0, 1, 1])
+        self.assertListEqual(orders[1], [0, 1])
+        self.assertListEqual(orders[0], [1, 0])
+
+        self.assertListEqual(MessageRouter('scale', {}).get_poll_order().next(), [0])
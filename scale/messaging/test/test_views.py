@@ -0,0 +1,49 @@
+from __future__ import unicode_literals
+
+import json
+
+import django
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from messaging.metrics import MessageTypeMetrics
+from messaging.models import MessageHandlerMetrics
+from util import rest
+
+
+class TestMessagingMetricsViewV6(APITransactionTestCase):
+
+    def setUp(self):
+        django.setup()
+
+        rest.login_client(self.client)
+
+        metrics_1 = MessageTypeMetrics('type_a')
+        metrics_1.messages = 2
+        metrics_1.executions = 1
+        metrics_1.execution_time.add(0.5)
+        metrics_2 = MessageTypeMetrics('type_a')
+        metrics_2.messages = 1
+        metrics_2.executions = 1
+        metrics_2.failures = 1
+        metrics_2.execution_time.add(2.0)
+        MessageHandlerMetrics.objects.update_handler_metrics('host-1:1', [metrics_1.to_json()])
+        MessageHandlerMetrics.objects.update_handler_metrics('host-2:1', [metrics_2.to_json()])
+
+    def test_get_metrics(self):
+        """Tests the REST call to retrieve the messaging metrics combined across message handlers"""
+
+        url = '/v6/messaging/metrics/'
+        response = self.client.generic('GET', url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+
+        result = json.loads(response.content)
+        self.assertEqual(result['num_handlers'], 2)
+        self.assertEqual(len(result['message_types']), 1)
+        message_type = result['message_types'][0]
+        self.assertEqual(message_type['type'], 'type_a')
+        self.assertEqual(message_type['messages'], 3)
+        self.assertEqual(message_type['executions'], 2)
+        self.assertEqual(message_type['failures'], 1)
+        self.assertEqual(message_type['execution_time']['p50'], 0.5)
+        self.assertEqual(message_type['execution_time']['max'], 2.0)
@@ -0,0 +1,89 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import django
+from django.test import TestCase
+from mock import MagicMock, patch
+
+from messaging.workers import CommandMessageWorkerPool
+
+
+class TestCommandMessageWorkerPool(TestCase):
+    def setUp(self):
+        django.setup()
+
+    @patch('messaging.workers.CommandMessageManager')
+    def test_run(self, manager_class):
+        """Validate that messages are merged, individually acknowledged and that the pool drains on stop"""
+
+        acks = [MagicMock() for _ in range(4)]
+        manager = manager_class.return_value
+        manager.merge_messages.side_effect = lambda messages: [(message, [i]) for i, message in enumerate(messages)
+                                                               if message != 'invalid']
+        manager.execute_command.side_effect = lambda command: command != 'bad'
+
+        pool = CommandMessageWorkerPool(2, 4)
+
+        def consume():
+            yield 'good', acks[0]
+            yield None
+            yield 'bad', acks[1]
+            yield 'invalid', acks[2]
+            yield 'good', acks[3]
+            pool.stop()
+            while True:  # pragma: no cover
+                yield None
+
+        manager.consume_messages.return_value = consume()
+
+        pool.run()
+
+        manager.set_connection_pool_size.assert_called_with(3)
+        manager.consume_messages.assert_called_with(4)
+        self.assertEqual(manager.execute_command.call_count, 3)
+        acks[0].assert_called_once_with(True)
+        acks[1].assert_called_once_with(False)
+        acks[2].assert_called_once_with(False)
+        acks[3].assert_called_once_with(True)
+
+    @patch('messaging.workers.CommandMessageManager')
+    def test_execute_command_error(self, manager_class):
+        """Validate that an unexpected error during execution does not acknowledge the merged messages"""
+
+        acks = [MagicMock(), MagicMock()]
+        manager = manager_class.return_value
+        manager.execute_command.side_effect = Exception
+
+        pool = CommandMessageWorkerPool(1, 1)
+        pool._execute_command(MagicMock(), acks)
+
+        self.assertEqual(pool._acknowledge_completed(False), 2)
+        acks[0].assert_called_once_with(False)
+        acks[1].assert_called_once_with(False)
+
+    @patch('messaging.workers.CommandMessageManager')
+    def test_run_packed_message(self, manager_class):
+        """Validate that a message packing several commands is acknowledged once after all of its executions"""
+
+        acks = [MagicMock(), MagicMock()]
+        manager = manager_class.return_value
+        manager.merge_messages.return_value = [('good', [0, 1]), ('bad', [1])]
+        manager.execute_command.side_effect = lambda command: command != 'bad'
+
+        pool = CommandMessageWorkerPool(2, 4)
+
+        def consume():
+            yield 'message_1', acks[0]
+            yield 'message_2', acks[1]
+            pool.stop()
+            while True:  # pragma: no cover
+                yield None
+
+        manager.consume_messages.return_value = consume()
+
+        pool.run()
+
+        acks[0].assert_called_once_with(True)
+        acks[1].assert_called_once_with(False)
@@ -0,0 +1,10 @@
+"""Defines the URLs for the RESTful messaging services"""
+from __future__ import unicode_literals
+
+from django.conf.urls import url
+
+import messaging.views as views
+
+urlpatterns = [
+    url(r'^messaging/metrics/$', views.MessagingMetricsView.as_view(), name='messaging_metrics_view'),
+]
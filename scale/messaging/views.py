@@ -0,0 +1,44 @@
+"""Messaging Views"""
+from __future__ import unicode_literals
+
+import logging
+
+from django.http.response import Http404
+from rest_framework.generics import GenericAPIView
+from rest_framework.response import Response
+
+from messaging.models import MessageHandlerMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class MessagingMetricsView(GenericAPIView):
+    """This view is the endpoint for viewing the recent execution metrics of each message type"""
+    queryset = MessageHandlerMetrics.objects.all()
+
+    def get(self, request):
+        """Gets the messaging metrics
+
+        :param request: the HTTP GET request
+        :type request: :class:`rest_framework.request.Request`
+        :rtype: :class:`rest_framework.response.Response`
+        :returns: the HTTP response to send back to the user
+        """
+
+        if request.version == 'v6':
+            return self.get_v6(request)
+        elif request.version == 'v7':
+            return self.get_v6(request)
+
+        raise Http404()
+
+    def get_v6(self, request):
+        """Gets the v6 messaging metrics
+
+        :param request: the HTTP GET request
+        :type request: :class:`rest_framework.request.Request`
+        :rtype: :class:`rest_framework.response.Response`
+        :returns: the HTTP response to send back to the user
+        """
+
+        return Response(MessageHandlerMetrics.objects.get_metrics_json())
@@ -0,0 +1,192 @@
+"""Defines the worker pool that executes command messages concurrently"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import Queue
+import logging
+from multiprocessing.pool import ThreadPool
+
+from django.db import close_old_connections
+
+from messaging.manager import CommandMessageManager
+from messaging.metrics import messaging_metrics_mgr
+
+logger = logging.getLogger(__name__)
+
+# Number of seconds to wait for an in-flight message to complete before checking for shutdown
+COMPLETED_TIMEOUT = 1
+
+
+class CommandMessageWorkerPool(object):
+    """Receives command messages into a bounded prefetch buffer and executes them concurrently across a pool of worker
+    threads. Compatible messages that are received together are merged into a single execution. Each message is
+    acknowledged individually, on the receiving thread, as soon as the execution that includes it completes.
+    """
+
+    def __init__(self, num_workers, prefetch_count):
+        """Constructor
+
+        :param num_workers: The number of worker threads that execute messages
+        :type num_workers: int
+        :param prefetch_count: The maximum number of messages received but not yet completed at any one time
+        :type prefetch_count: int
+        """
+
+        self._num_workers = num_workers
+        self._prefetch_count = max(prefetch_count, num_workers)
+        self._running = True
+
+        # (ack functions, success) tuples for executions that have finished
+        self._completed = Queue.Queue()
+
+        self._manager = CommandMessageManager()
+        # Each worker may send downstream messages concurrently with the receiving thread
+        self._manager.set_connection_pool_size(num_workers + 1)
+
+    def run(self):
+        """Receives and executes messages until stop() is called. Once stopped, no new messages are received and this
+        method returns after all in-flight messages have completed and been acknowledged.
+        """
+
+        logger.info('Starting message worker pool with %d worker(s) and prefetch of %d', self._num_workers,
+                    self._prefetch_count)
+
+        thread_pool = ThreadPool(self._num_workers)
+        consumer = self._manager.consume_messages(self._prefetch_count)
+        in_flight = 0
+        try:
+            while self._running or in_flight:
+                block = in_flight >= self._prefetch_count or not self._running
+                in_flight -= self._acknowledge_completed(block)
+
+                if self._running and in_flight < self._prefetch_count:
+                    messages, acks = self._receive_messages(consumer, self._prefetch_count - in_flight)
+                    merged = self._manager.merge_messages(messages)
+
+                    # A message that packs several commands is only acknowledged once all of its executions complete
+                    num_executions = [0] * len(acks)
+                    for _, indexes in merged:
+                        for index in indexes:
+                            num_executions[index] += 1
+                    acks = [PendingAck(ack, count) for ack, count in zip(acks, num_executions)]
+
+                    for command, indexes in merged:
+                        command_acks = [acks[index] for index in indexes]
+                        thread_pool.apply_async(self._execute_command, (command, command_acks))
+                        in_flight += len(command_acks)
+
+                    # Invalid messages could not be merged into a command, return them to the queue immediately
+                    for ack, count in zip(acks, num_executions):
+                        if not count:
+                            ack(False)
+
+                messaging_metrics_mgr.flush_if_due()
+        finally:
+            # Any message still unacknowledged is returned to the queue when the consumer closes
+            consumer.close()
+            thread_pool.close()
+            thread_pool.join()
+
+        logger.info('Message worker pool drained and stopped')
+
+    def stop(self):
+        """Stops receiving new messages, allowing in-flight messages to drain
+        """
+
+        logger.info('Draining message worker pool...')
+        self._running = False
+
+    def _acknowledge_completed(self, block):
+        """Acknowledges all messages whose executions have completed
+
+        :param block: Whether to wait briefly for an execution to complete if none have completed yet
+        :type block: bool
+        :return: The number of messages that completed (successfully or not)
+        :rtype: int
+        """
+
+        count = 0
+        try:
+            acks, success = self._completed.get(block, COMPLETED_TIMEOUT)
+            while True:
+                count += len(acks)
+                for ack in acks:
+                    ack(success)
+                acks, success = self._completed.get_nowait()
+        except Queue.Empty:
+            pass
+        return count
+
+    def _execute_command(self, command, acks):
+        """Executes a single (possibly merged) command on a worker thread and records its result for acknowledgement
+
+        :param command: The command message
+        :type command: :class:`messaging.messages.message.CommandMessage`
+        :param acks: The functions that acknowledge each message covered by the command
+        :type acks: :func:`list`
+        """
+
+        success = False
+        try:
+            close_old_connections()
+            success = self._manager.execute_command(command)
+        except Exception:
+            logger.exception('Unexpected error executing message')
+        finally:
+            close_old_connections()
+            self._completed.put((acks, success))
+
+    @staticmethod
+    def _receive_messages(consumer, max_count):
+        """Receives the messages that are currently available, up to the given count
+
+        :param consumer: The message consumer
+        :type consumer: Generator[(dict, function)]
+        :param max_count: The maximum number of messages to receive
+        :type max_count: int
+        :return: The list of message payloads and the list of their ack functions
+        :rtype: tuple
+        """
+
+        messages = []
+        acks = []
+        while len(messages) < max_count:
+            received = next(consumer)
+            if not received:
+                break
+            messages.append(received[0])
+            acks.append(received[1])
+        return messages, acks
+
+
+class PendingAck(object):
+    """Acknowledges a received message once every execution covering the message has completed. The message is
+    acknowledged as successful only if all of the executions succeeded.
+    """
+
+    def __init__(self, ack, num_executions):
+        """Constructor
+
+        :param ack: The function that acknowledges the message
+        :type ack: function
+        :param num_executions: The number of executions covering the message
+        :type num_executions: int
+        """
+
+        self._ack = ack
+        self._remaining = max(num_executions, 1)
+        self._success = True
+
+    def __call__(self, success):
+        """Records the completion of an execution covering the message
+
+        :param success: Whether the execution succeeded
+        :type success: bool
+        """
+
+        self._success = self._success and success
+        self._remaining -= 1
+        if not self._remaining:
+            self._ack(self._success)
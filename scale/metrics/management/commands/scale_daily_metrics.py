@@ -4,8 +4,10 @@ from __future__ import unicode_literals
 import datetime
 import logging
 import sys
+from multiprocessing.pool import ThreadPool
 
 from django.core.management.base import BaseCommand
+from django.db import connection
 
 import metrics.registry as registry
 from util.retry import retry_database_query
@@ -22,6 +24,11 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('day', help='The ISO 8601 date to compute metrics for.')
+        parser.add_argument('-e', '--end-day', dest='end_day',
+                            help='The ISO 8601 date of the last day to backfill, metrics are computed for every day'
+                            ' from the first day through this day.')
+        parser.add_argument('-w', '--workers', type=int, default=4,
+                            help='The number of days to compute in parallel when backfilling.')
 
     def handle(self, *args, **options):
         """See :meth:`django.core.management.base.BaseCommand.handle`.
@@ -30,29 +37,74 @@ class Command(BaseCommand):
         """
 
         day = options.get('day')
+        end_day = options.get('end_day') or day
+        workers = options.get('workers')
 
         logger.info('Command starting: scale_daily_metrics')
         logger.info(' - Day: %s', day)
+        if end_day != day:
+            logger.info(' - End Day: %s', end_day)
+            logger.info(' - Workers: %i', workers)
 
-        logger.info('Generating metrics...')
         date = datetime.datetime.strptime(day, '%Y-%m-%d')
+        end_date = datetime.datetime.strptime(end_day, '%Y-%m-%d')
+        if end_date < date:
+            logger.error('End day %s is before day %s', end_day, day)
+            sys.exit(1)
+        dates = [date + datetime.timedelta(days=i) for i in range((end_date - date).days + 1)]
+
+        logger.info('Generating metrics...')
+        if len(dates) == 1:
+            failed = self._calculate_day(date)
+        else:
+            # Backfill the days in parallel, each worker thread uses its own database connection
+            thread_pool = ThreadPool(max(min(workers, len(dates)), 1))
+            try:
+                failed = sum(thread_pool.map(self._backfill_day, dates))
+            finally:
+                thread_pool.close()
+                thread_pool.join()
+
+        logger.info('Command completed: scale_daily_metrics')
+        if failed:
+            logger.info('Metric providers failed: %i', failed)
+            sys.exit(failed)
+
+    def _backfill_day(self, date):
+        """Calculates the Scale metrics for the given date on a worker thread
+
+        :param date: The date for generating metrics
+        :type date: :class:`datetime.datetime`
+        :returns: The number of metrics providers that failed
+        :rtype: int
+        """
+
+        try:
+            return self._calculate_day(date)
+        finally:
+            connection.close()
+
+    def _calculate_day(self, date):
+        """Calculates the Scale metrics for the given date with every provider
+
+        :param date: The date for generating metrics
+        :type date: :class:`datetime.datetime`
+        :returns: The number of metrics providers that failed
+        :rtype: int
+        """
 
         # Run the calculations against each provider for the requested date
         failed = 0
         for provider in registry.get_providers():
             metrics_type = provider.get_metrics_type()
             try:
-                logger.info('Starting: %s', metrics_type.name)
+                logger.info('Starting: %s (%s)', metrics_type.name, date.date())
                 self._calculate_metrics(provider, date)
-                logger.info('Completed: %s', metrics_type.name)
+                logger.info('Completed: %s (%s)', metrics_type.name, date.date())
             except:
                 failed += 1
-                logger.exception('Unable to calculate metrics: %s', metrics_type.name)
-
-        logger.info('Command completed: scale_daily_metrics')
-        if failed:
-            logger.info('Metric providers failed: %i', failed)
-            sys.exit(failed)
+                logger.exception('Unable to calculate metrics: %s (%s)', metrics_type.name, date.date())
+        return failed
 
     @retry_database_query
     def _calculate_metrics(self, provider, date):
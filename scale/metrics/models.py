@@ -3,15 +3,17 @@ from __future__ import unicode_literals
 
 import datetime
 import logging
-import sys
+from decimal import Decimal
 
 import django.contrib.gis.db.models as models
 import django.utils.timezone as timezone
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour
 
 from error.models import Error
-from job.models import Job, JobExecutionEnd, JobType
-from ingest.models import Ingest, Strike
+from job.models import JobExecutionEnd, JobType
+from ingest.models import Strike
 from metrics.registry import MetricsPlotData, MetricsType, MetricsTypeGroup, MetricsTypeFilter
 
 logger = logging.getLogger(__name__)
@@ -67,39 +69,129 @@ class PlotIntegerField(models.IntegerField):
 PLOT_FIELD_TYPES = [PlotBigIntegerField, PlotIntegerField]
 
 
+def _create_entry(model_class, row):
+    """Creates a metrics model from a row of hourly aggregates
+
+    :param model_class: The metrics model class to create
+    :type model_class: class
+    :param row: The aggregate values keyed by model field name
+    :type row: dict
+    :returns: The new (unsaved) metrics model
+    :rtype: :class:`django.db.models.Model`
+    """
+
+    values = {name: _get_plot_value(value) for name, value in row.items()}
+    return model_class(created=timezone.now(), **values)
+
+
+def _get_day_range(date):
+    """Returns the first and last moments of the given day
+
+    :param date: The day
+    :type date: datetime.date
+    :returns: The tuple of the start and end of the day in UTC
+    :rtype: (:class:`datetime.datetime`, :class:`datetime.datetime`)
+    """
+
+    started = datetime.datetime.combine(date, datetime.time.min).replace(tzinfo=timezone.utc)
+    ended = datetime.datetime.combine(date, datetime.time.max).replace(tzinfo=timezone.utc)
+    return started, ended
+
+
+def _get_plot_value(value):
+    """Returns the given aggregate value truncated to a whole number to match the integer plot fields
+
+    :param value: The aggregate value, possibly None
+    :type value: object
+    :returns: The plot value
+    :rtype: object
+    """
+
+    return int(value) if isinstance(value, (Decimal, float)) else value
+
+
+def _get_rows(qry, params):
+    """Executes the given query and returns its rows as dicts keyed by column name
+
+    :param qry: The SQL query
+    :type qry: string
+    :param params: The query parameters
+    :type params: :func:`list`
+    :returns: The query rows
+    :rtype: :func:`list`
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(qry, params)
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _get_secs_sql(started, ended):
+    """Returns the SQL expression for the number of seconds between two timestamps, clamped to zero to tolerate machine
+    clocks that are out of sync. The expression is NULL when either timestamp is missing.
+
+    :param started: The SQL expression for the start timestamp
+    :type started: string
+    :param ended: The SQL expression for the end timestamp
+    :type ended: string
+    :returns: The SQL expression
+    :rtype: string
+    """
+
+    return 'CASE WHEN %s IS NOT NULL AND %s IS NOT NULL THEN GREATEST(EXTRACT(EPOCH FROM %s - %s), 0) END' % (
+        started, ended, ended, started)
+
+
+def _get_stats_sql(expression, name):
+    """Returns the SQL select list for the sum, min, max, and avg plot fields of the given value
+
+    :param expression: The SQL expression for the value, NULL values are ignored
+    :type expression: string
+    :param name: The base name of the plot fields, such as queue_time
+    :type name: string
+    :returns: The SQL select list
+    :rtype: string
+    """
+
+    stats = ['%s(%s) AS %s_%s' % (func, expression, name, func.lower()) for func in ['SUM', 'MIN', 'MAX', 'AVG']]
+    return ', '.join(stats)
+
+
+def _get_task_secs_sql(task_type, name):
+    """Returns the SQL select item for the run length in seconds of the first task of the given type within the task
+    results of a job_exe_end row aliased as jee. Tasks that never started or ended are skipped.
+
+    :param task_type: The task type, such as pre
+    :type task_type: string
+    :param name: The column alias
+    :type name: string
+    :returns: The SQL select item
+    :rtype: string
+    """
+
+    secs = _get_secs_sql("(t.task->>'started')::timestamptz", "(t.task->>'ended')::timestamptz")
+    qry = '(SELECT %s FROM jsonb_array_elements(jee.task_results->\'tasks\') WITH ORDINALITY t(task, n) ' % secs
+    qry += 'WHERE t.task->>\'type\' = \'%s\' AND t.task ? \'started\' AND t.task ? \'ended\' ' % task_type
+    qry += 'ORDER BY t.n LIMIT 1) AS %s' % name
+    return qry
+
+
 class MetricsErrorManager(models.Manager):
     """Provides additional methods for computing daily error metrics."""
 
     def calculate(self, date):
         """See :meth:`metrics.registry.MetricsTypeProvider.calculate`."""
 
-        started = datetime.datetime.combine(date, datetime.time.min).replace(tzinfo=timezone.utc)
-        ended = datetime.datetime.combine(date, datetime.time.max).replace(tzinfo=timezone.utc)
+        started, ended = _get_day_range(date)
 
-        # Fetch all the job executions with an error for the requested day
+        # Count the job executions with a builtin error for each error and hour of the requested day
         job_exe_ends = JobExecutionEnd.objects.filter(error__is_builtin=True, ended__gte=started, ended__lte=ended)
-        job_exe_ends = job_exe_ends.select_related('error')
-
-        # Calculate the overall counts based on job status
-        entry_map = {}
-        for job_exe_end in job_exe_ends.iterator():
-            occurred_datetime = job_exe_end.ended if job_exe_end.ended else date
-            entry_date_time = datetime.datetime(occurred_datetime.year, occurred_datetime.month, occurred_datetime.day,
-                                                occurred_datetime.hour, tzinfo=timezone.utc)
-            if job_exe_end.error not in entry_map:
-                entry_map[job_exe_end.error] = {}
-
-            if entry_date_time not in entry_map[job_exe_end.error]:
-                entry = MetricsError(error=job_exe_end.error, occurred=entry_date_time, created=timezone.now())
-                entry.total_count = 0
-                entry_map[job_exe_end.error][entry_date_time] = entry
-            entry = entry_map[job_exe_end.error][entry_date_time]
-            entry.total_count += 1
+        job_exe_ends = job_exe_ends.annotate(occurred=TruncHour('ended', tzinfo=timezone.utc)).order_by()
+        rows = job_exe_ends.values('error_id', 'occurred').annotate(total_count=Count('job_exe_id'))
 
         # Save the new metrics to the database
-        for entry in entry_map:
-            for entry_time in entry_map[entry]:
-                self._replace_entries(entry_time, entry, [entry_map[entry][entry_time]])
+        self._replace_entries(started, ended, [_create_entry(MetricsError, row) for row in rows])
 
     def get_metrics_type(self, include_choices=False):
         """See :meth:`metrics.registry.MetricsTypeProvider.get_metrics_type`."""
@@ -136,17 +228,19 @@ class MetricsErrorManager(models.Manager):
         return MetricsPlotData.create(entries, 'occurred', 'error_id', choice_ids, columns)
 
     @transaction.atomic
-    def _replace_entries(self, date, error, entries):
-        """Replaces all the existing metric entries for the given date with new ones.
+    def _replace_entries(self, started, ended, entries):
+        """Replaces all the existing metric entries for the given time range with new ones.
 
-        :param date: The date when job executions associated with the metrics ended.
-        :type date: datetime.date
+        :param started: The start of the time range when job executions associated with the metrics ended.
+        :type started: :class:`datetime.datetime`
+        :param ended: The end of the time range when job executions associated with the metrics ended.
+        :type ended: :class:`datetime.datetime`
         :param entries: The new metrics model to save.
         :type entries: list[:class:`metrics.models.MetricsError`]
         """
 
         # Delete all the previous metrics entries
-        MetricsError.objects.filter(occurred=date, error=error).delete()
+        MetricsError.objects.filter(occurred__gte=started, occurred__lte=ended).delete()
 
         # Save all the new metrics models
         MetricsError.objects.bulk_create(entries)
@@ -192,38 +286,26 @@ class MetricsIngestManager(models.Manager):
     def calculate(self, date):
         """See :meth:`metrics.registry.MetricsTypeProvider.calculate`."""
 
-        started = datetime.datetime.combine(date, datetime.time.min).replace(tzinfo=timezone.utc)
-        ended = datetime.datetime.combine(date, datetime.time.max).replace(tzinfo=timezone.utc)
-
-        # Fetch all the ingests relevant for metrics
-        ingests = Ingest.objects.filter(status__in=['DEFERRED', 'INGESTED', 'ERRORED', 'DUPLICATE'],
-                                        ingest_ended__gte=started, ingest_ended__lte=ended, strike__isnull=False)
-        ingests = ingests.select_related('strike').defer('strike__configuration')
-
-        # Calculate the overall counts based on ingest status
-        entry_map = {}
-        for ingest in ingests.iterator():
-            occurred_datetime = ingest.ingest_ended if ingest.ingest_ended else date
-            entry_datetime = datetime.datetime(occurred_datetime.year, occurred_datetime.month, occurred_datetime.day,
-                                                occurred_datetime.hour, tzinfo=timezone.utc)
-            if ingest.strike not in entry_map:
-                entry_map[ingest.strike] = {}
-
-            if entry_datetime not in entry_map[ingest.strike]:
-                entry = MetricsIngest(strike=ingest.strike, occurred=entry_datetime, created=timezone.now())
-                entry.deferred_count = 0
-                entry.ingested_count = 0
-                entry.errored_count = 0
-                entry.duplicate_count = 0
-                entry.total_count = 0
-                entry_map[ingest.strike][entry_datetime] = entry
-            entry = entry_map[ingest.strike][entry_datetime]
-            self._update_metrics(entry_datetime, ingest, entry)
+        started, ended = _get_day_range(date)
+
+        # Aggregate the ingests relevant for metrics for each strike process and hour of the requested day
+        qry = 'SELECT i.strike_id, date_trunc(\'hour\', i.ingest_ended) AS occurred, '
+        qry += 'SUM(CASE WHEN i.status = \'DEFERRED\' THEN 1 ELSE 0 END) AS deferred_count, '
+        qry += 'SUM(CASE WHEN i.status = \'INGESTED\' THEN 1 ELSE 0 END) AS ingested_count, '
+        qry += 'SUM(CASE WHEN i.status = \'ERRORED\' THEN 1 ELSE 0 END) AS errored_count, '
+        qry += 'SUM(CASE WHEN i.status = \'DUPLICATE\' THEN 1 ELSE 0 END) AS duplicate_count, '
+        qry += 'COUNT(*) AS total_count, '
+        qry += _get_stats_sql('CASE WHEN i.file_size > 0 THEN i.file_size END', 'file_size') + ', '
+        qry += _get_stats_sql(_get_secs_sql('i.transfer_started', 'i.transfer_ended'), 'transfer_time') + ', '
+        ingest_secs = 'CASE WHEN i.status = \'INGESTED\' THEN %s END' % _get_secs_sql('i.ingest_started',
+                                                                                      'i.ingest_ended')
+        qry += _get_stats_sql(ingest_secs, 'ingest_time') + ' '
+        qry += 'FROM ingest i WHERE i.status IN (\'DEFERRED\', \'INGESTED\', \'ERRORED\', \'DUPLICATE\') '
+        qry += 'AND i.ingest_ended >= %s AND i.ingest_ended <= %s AND i.strike_id IS NOT NULL GROUP BY 1, 2'
+        rows = _get_rows(qry, [started, ended])
 
         # Save the new metrics to the database
-        for entry in entry_map:
-            for entry_time in entry_map[entry]:
-                self._replace_entries(entry_time, entry, [entry_map[entry][entry_time]])
+        self._replace_entries(started, ended, [_create_entry(MetricsIngest, row) for row in rows])
 
     def get_metrics_type(self, include_choices=False):
         """See :meth:`metrics.registry.MetricsTypeProvider.get_metrics_type`."""
@@ -259,69 +341,20 @@ class MetricsIngestManager(models.Manager):
         # Convert the database models to plot models
         return MetricsPlotData.create(entries, 'occurred', 'strike_id', choice_ids, columns)
 
-    def _update_metrics(self, date, ingest, entry):
-        """Updates the metrics model attributes for a single ingest.
-
-        :param date: The date when ingests associated with the metrics ended.
-        :type date: datetime.date
-        :param ingest: The ingest from which to derive statistics.
-        :type ingest: :class:`ingest.models.Ingest`
-        :param entry: The metrics model to update.
-        :type entry: :class:`metrics.models.MetricsIngest`
-        """
-        if ingest.status == 'DEFERRED':
-            entry.deferred_count += 1
-            entry.total_count += 1
-        elif ingest.status == 'INGESTED':
-            entry.ingested_count += 1
-            entry.total_count += 1
-        elif ingest.status == 'ERRORED':
-            entry.errored_count += 1
-            entry.total_count += 1
-        elif ingest.status == 'DUPLICATE':
-            entry.duplicate_count += 1
-            entry.total_count += 1
-
-        # Update file size metrics
-        if ingest.file_size:
-            entry._file_count = (entry._file_count if hasattr(entry, '_file_count') else 0) + 1
-            entry.file_size_sum = (entry.file_size_sum or 0) + ingest.file_size
-            entry.file_size_min = min(entry.file_size_min or sys.maxint, ingest.file_size)
-            entry.file_size_max = max(entry.file_size_max or 0, ingest.file_size)
-            entry.file_size_avg = entry.file_size_sum / entry._file_count
-
-        # Update elapsed transfer time metrics
-        if ingest.transfer_started and ingest.transfer_ended:
-            transfer_secs = max((ingest.transfer_ended - ingest.transfer_started).total_seconds(), 0)
-            entry._transfer_count = (entry._transfer_count if hasattr(entry, '_transfer_count') else 0) + 1
-            entry.transfer_time_sum = (entry.transfer_time_sum or 0) + transfer_secs
-            entry.transfer_time_min = min(entry.transfer_time_min or sys.maxint, transfer_secs)
-            entry.transfer_time_max = max(entry.transfer_time_max or 0, transfer_secs)
-            entry.transfer_time_avg = entry.transfer_time_sum / entry._transfer_count
-
-        # Update elapsed ingest time metrics
-        if ingest.status == 'INGESTED' and ingest.ingest_started and ingest.ingest_ended:
-            ingest_secs = max((ingest.ingest_ended - ingest.ingest_started).total_seconds(), 0)
-            entry._ingest_count = (entry._ingest_count if hasattr(entry, '_ingest_count') else 0) + 1
-            entry.ingest_time_sum = (entry.ingest_time_sum or 0) + ingest_secs
-            entry.ingest_time_min = min(entry.ingest_time_min or sys.maxint, ingest_secs)
-            entry.ingest_time_max = max(entry.ingest_time_max or 0, ingest_secs)
-            entry.ingest_time_avg = entry.ingest_time_sum / entry._ingest_count
-
-        return entry
-
     @transaction.atomic
-    def _replace_entries(self, date, strike, entries):
-        """Replaces all the existing metric entries for the given date with new ones.
+    def _replace_entries(self, started, ended, entries):
+        """Replaces all the existing metric entries for the given time range with new ones.
 
-        :param date: The date when ingests associated with the metrics ended.
-        :type date: datetime.date
+        :param started: The start of the time range when ingests associated with the metrics ended.
+        :type started: :class:`datetime.datetime`
+        :param ended: The end of the time range when ingests associated with the metrics ended.
+        :type ended: :class:`datetime.datetime`
         :param entries: The new metrics model to save.
         :type entries: list[:class:`metrics.models.MetricsIngest`]
         """
 
         # Delete all the previous metrics entries
-        MetricsIngest.objects.filter(occurred=date, strike=strike).delete()
+        MetricsIngest.objects.filter(occurred__gte=started, occurred__lte=ended).delete()
 
         # Save all the new metrics models
         MetricsIngest.objects.bulk_create(entries)
@@ -453,49 +486,59 @@ class MetricsJobTypeManager(models.Manager):
 
     def calculate(self, date):
         """See :meth:`metrics.registry.MetricsTypeProvider.calculate`."""
-        started = datetime.datetime.combine(date, datetime.time.min).replace(tzinfo=timezone.utc)
-        ended = datetime.datetime.combine(date, datetime.time.max).replace(tzinfo=timezone.utc)
 
-        # Fetch all the jobs relevant for metrics
-        jobs = Job.objects.filter(status__in=['CANCELED', 'COMPLETED', 'FAILED'], ended__gte=started, ended__lte=ended)
-        jobs = jobs.select_related('job_type', 'error').defer('input', 'output')
-
-        # Calculate the overall counts based on job status
+        started, ended = _get_day_range(date)
+
+        # Count the jobs relevant for metrics for each job type and hour of the requested day
+        qry = 'SELECT j.job_type_id, date_trunc(\'hour\', j.ended) AS occurred, '
+        qry += 'SUM(CASE WHEN j.status = \'COMPLETED\' THEN 1 ELSE 0 END) AS completed_count, '
+        qry += 'SUM(CASE WHEN j.status = \'FAILED\' THEN 1 ELSE 0 END) AS failed_count, '
+        qry += 'SUM(CASE WHEN j.status = \'CANCELED\' THEN 1 ELSE 0 END) AS canceled_count, '
+        qry += 'COUNT(*) AS total_count, '
+        qry += 'SUM(CASE WHEN e.category = \'SYSTEM\' THEN 1 ELSE 0 END) AS error_system_count, '
+        qry += 'SUM(CASE WHEN e.category = \'DATA\' THEN 1 ELSE 0 END) AS error_data_count, '
+        qry += 'SUM(CASE WHEN e.category = \'ALGORITHM\' THEN 1 ELSE 0 END) AS error_algorithm_count '
+        qry += 'FROM job j LEFT OUTER JOIN error e ON j.error_id = e.id '
+        qry += 'WHERE j.status IN (\'CANCELED\', \'COMPLETED\', \'FAILED\') AND j.ended >= %s AND j.ended <= %s '
+        qry += 'GROUP BY 1, 2'
         entry_map = {}
-        for job in jobs.iterator():
-            occurred_datetime = job.ended if job.ended else date
-            entry_date_time = datetime.datetime(occurred_datetime.year, occurred_datetime.month, occurred_datetime.day,
-                                                occurred_datetime.hour, tzinfo=timezone.utc)
-            if job.job_type not in entry_map:
-                entry_map[job.job_type] = {}
-
-            if entry_date_time not in entry_map[job.job_type]:
-                entry = MetricsJobType(job_type=job.job_type, occurred=entry_date_time, created=timezone.now())
-                entry.completed_count = 0
-                entry.failed_count = 0
-                entry.canceled_count = 0
-                entry.total_count = 0
-                entry.error_system_count = 0
-                entry.error_data_count = 0
-                entry.error_algorithm_count = 0
-                entry_map[job.job_type][entry_date_time] = entry
-            entry = entry_map[job.job_type][entry_date_time]
-            self._update_counts(occurred_datetime, job, entry)
-
-        # Fetch all the completed job executions for the requested day
-        job_exe_ends = JobExecutionEnd.objects.filter(status__in=['COMPLETED'], ended__gte=started, ended__lte=ended)
-        job_exe_ends = job_exe_ends.select_related('job_type')
-
-        # Calculate the metrics per job execution grouped by job type
-        for job_exe_end in job_exe_ends.iterator():
-            entry = entry_map[job_exe_end.job.job_type]
-            for entry_time in entry:
-                self._update_times(entry_time, job_exe_end, entry[entry_time])
+        for row in _get_rows(qry, [started, ended]):
+            entry_map[(row['job_type_id'], row['occurred'])] = _create_entry(MetricsJobType, row)
+
+        # Aggregate the times of the completed job executions for each job type and hour of the requested day
+        run_secs = _get_secs_sql('x.started', 'x.ended')
+        task_secs = 'COALESCE(x.pull_secs, 0) + COALESCE(x.pre_secs, 0) + COALESCE(x.main_secs, 0) + '
+        task_secs += 'COALESCE(x.post_secs, 0)'
+        stage_secs = 'CASE WHEN x.started IS NOT NULL THEN GREATEST(%s - (%s), 0) END' % (run_secs, task_secs)
+        qry = 'SELECT x.job_type_id, x.occurred, '
+        qry += _get_stats_sql(_get_secs_sql('x.queued', 'x.started'), 'queue_time') + ', '
+        qry += _get_stats_sql('x.pre_secs', 'pre_time') + ', '
+        qry += _get_stats_sql('x.main_secs', 'job_time') + ', '
+        qry += _get_stats_sql('x.post_secs', 'post_time') + ', '
+        qry += _get_stats_sql(run_secs, 'run_time') + ', '
+        qry += _get_stats_sql(stage_secs, 'stage_time') + ' '
+        qry += 'FROM (SELECT jee.job_type_id, date_trunc(\'hour\', jee.ended) AS occurred, jee.queued, jee.started, '
+        qry += 'jee.ended, %s, %s, %s, %s ' % (_get_task_secs_sql('pull', 'pull_secs'),
+                                               _get_task_secs_sql('pre', 'pre_secs'),
+                                               _get_task_secs_sql('main', 'main_secs'),
+                                               _get_task_secs_sql('post', 'post_secs'))
+        qry += 'FROM job_exe_end jee WHERE jee.status = \'COMPLETED\' AND jee.ended >= %s AND jee.ended <= %s) x '
+        qry += 'GROUP BY 1, 2'
+        for row in _get_rows(qry, [started, ended]):
+            key = (row.pop('job_type_id'), row.pop('occurred'))
+            if key not in entry_map:
+                # The jobs ended in a different hour than their executions, so there are no job counts for this hour
+                entry_map[key] = _create_entry(MetricsJobType, {
+                    'job_type_id': key[0], 'occurred': key[1], 'completed_count': 0, 'failed_count': 0,
+                    'canceled_count': 0, 'total_count': 0, 'error_system_count': 0, 'error_data_count': 0,
+                    'error_algorithm_count': 0,
+                })
+            entry = entry_map[key]
+            for name, value in row.items():
+                setattr(entry, name, _get_plot_value(value))
 
         # Save the new metrics to the database
-        for entry in entry_map:
-            for entry_time in entry_map[entry]:
-                self._replace_entries(entry_time, entry, [entry_map[entry][entry_time]])
+        self._replace_entries(started, ended, entry_map.values())
 
     def get_metrics_type(self, include_choices=False):
         """See :meth:`metrics.registry.MetricsTypeProvider.get_metrics_type`."""
@@ -530,126 +573,20 @@ class MetricsJobTypeManager(models.Manager):
         # Convert the database models to plot models
         return MetricsPlotData.create(entries, 'occurred', 'job_type_id', choice_ids, columns)
 
-    def _update_counts(self, date, job, entry):
-        """Updates the metrics model attributes for a single job.
-
-        :param date: The date when jobs associated with the metrics ended.
-        :type date: datetime.date
-        :param job: The job from which to derive statistics.
-        :type job: :class:`job.models.Job`
-        :param entry: The metrics model to update.
-        :type entry: :class:`metrics.models.MetricsJobType`
-        """
-        if job.status == 'COMPLETED':
-            entry.completed_count += 1
-            entry.total_count += 1
-        elif job.status == 'FAILED':
-            entry.failed_count += 1
-            entry.total_count += 1
-        elif job.status == 'CANCELED':
-            entry.canceled_count += 1
-            entry.total_count += 1
-
-        if job.error:
-            if job.error.category == 'SYSTEM':
-                entry.error_system_count += 1
-            elif job.error.category == 'DATA':
-                entry.error_data_count += 1
-            elif job.error.category == 'ALGORITHM':
-                entry.error_algorithm_count += 1
-
-    def _update_times(self, date, job_exe_end, entry):
-        """Updates the metrics model attributes for a single job execution.
-
-        :param date: The date when job executions associated with the metrics ended.
-        :type date: datetime.date
-        :param job_exe_end: The job execution from which to derive statistics.
-        :type job_exe_end: :class:`job.models.JobExecutionEnd`
-        :param entry: The metrics model to update.
-        :type entry: :class:`metrics.models.MetricsJobType`
-        """
-
-        entry_count = entry.completed_count if entry.completed_count > 0 else entry.total_count
-
-        # Update elapsed queue time metrics
-        queue_secs = None
-        if job_exe_end.queued and job_exe_end.started:
-            queue_secs = max((job_exe_end.started - job_exe_end.queued).total_seconds(), 0)
-            entry.queue_time_sum = (entry.queue_time_sum or 0) + queue_secs
-            entry.queue_time_min = min(entry.queue_time_min or sys.maxint, queue_secs)
-            entry.queue_time_max = max(entry.queue_time_max or 0, queue_secs)
-            if entry_count:
-                entry.queue_time_avg = entry.queue_time_sum / entry_count
-
-        task_results = job_exe_end.get_task_results()
-
-        pull_secs = None
-        pull_task_length = task_results.get_task_run_length('pull')
-        if pull_task_length:
-            pull_secs = max(pull_task_length.total_seconds(), 0)
-
-        # Update elapsed pre-task time metrics
-        pre_secs = None
-        pre_task_length = task_results.get_task_run_length('pre')
-        if pre_task_length:
-            pre_secs = max(pre_task_length.total_seconds(), 0)
-            entry.pre_time_sum = (entry.pre_time_sum or 0) + pre_secs
-            entry.pre_time_min = min(entry.pre_time_min or sys.maxint, pre_secs)
-            entry.pre_time_max = max(entry.pre_time_max or 0, pre_secs)
-            if entry_count:
-                entry.pre_time_avg = entry.pre_time_sum / entry_count
-
-        # Update elapsed actual job time metrics
-        job_secs = None
-        job_task_length = task_results.get_task_run_length('main')
-        if job_task_length:
-            job_secs = max(job_task_length.total_seconds(), 0)
-            entry.job_time_sum = (entry.job_time_sum or 0) + job_secs
-            entry.job_time_min = min(entry.job_time_min or sys.maxint, job_secs)
-            entry.job_time_max = max(entry.job_time_max or 0, job_secs)
-            if entry_count:
-                entry.job_time_avg = entry.job_time_sum / entry_count
-
-        # Update elapsed post-task time metrics
-        post_secs = None
-        post_task_length = task_results.get_task_run_length('post')
-        if post_task_length:
-            post_secs = max(post_task_length.total_seconds(), 0)
-            entry.post_time_sum = (entry.post_time_sum or 0) + post_secs
-            entry.post_time_min = min(entry.post_time_min or sys.maxint, post_secs)
-            entry.post_time_max = max(entry.post_time_max or 0, post_secs)
-            if entry_count:
-                entry.post_time_avg = entry.post_time_sum / entry_count
-
-        # Update elapsed overall run and stage time metrics
-        if job_exe_end.started and job_exe_end.ended:
-            run_secs = max((job_exe_end.ended - job_exe_end.started).total_seconds(), 0)
-            entry.run_time_sum = (entry.run_time_sum or 0) + run_secs
-            entry.run_time_min = min(entry.run_time_min or sys.maxint, run_secs)
-            entry.run_time_max = max(entry.run_time_max or 0, run_secs)
-            if entry_count:
-                entry.run_time_avg = entry.run_time_sum / entry_count
-
-            stage_secs = max(run_secs - ((pull_secs or 0) + (pre_secs or 0) + (job_secs or 0) + (post_secs or 0)), 0)
-            entry.stage_time_sum = (entry.stage_time_sum or 0) + stage_secs
-            entry.stage_time_min = min(entry.stage_time_min or sys.maxint, stage_secs)
-            entry.stage_time_max = max(entry.stage_time_max or 0, stage_secs)
-            if entry_count:
-                entry.stage_time_avg = entry.stage_time_sum / entry_count
-        return entry
-
     @transaction.atomic
-    def _replace_entries(self, date, job_type, entries):
-        """Replaces all the existing metric entries for the given date with new ones.
+    def _replace_entries(self, started, ended, entries):
+        """Replaces all the existing metric entries for the given time range with new ones.
 
-        :param date: The date when job executions associated with the metrics ended.
-        :type date: datetime.date
+        :param started: The start of the time range when jobs associated with the metrics ended.
+        :type started: :class:`datetime.datetime`
+        :param ended: The end of the time range when jobs associated with the metrics ended.
+        :type ended: :class:`datetime.datetime`
         :param entries: The new metrics model to save.
         :type entries: list[:class:`metrics.models.MetricsJobType`]
         """
 
         # Delete all the previous metrics entries
-        MetricsJobType.objects.filter(occurred=date, job_type=job_type).delete()
+        MetricsJobType.objects.filter(occurred__gte=started, occurred__lte=ended).delete()
 
         # Save all the new metrics models
         MetricsJobType.objects.bulk_create(entries)
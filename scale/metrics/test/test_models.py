@@ -482,6 +482,72 @@ class TestMetricsJobType(TestCase):
 
         self.assertEqual(len(entries), 1)
 
+    def test_calculate_repeated_stale(self):
+        """Tests regenerating metrics removes entries for hours that no longer have any jobs."""
+        job_type = job_test_utils.create_seed_job_type()
+        metrics_test_utils.create_job_type(job_type=job_type, occurred=datetime.datetime(2015, 1, 1, 5, tzinfo=utc),
+                                           completed_count=1)
+        metrics_test_utils.create_job_type(job_type=job_type, occurred=datetime.datetime(2015, 1, 2, 5, tzinfo=utc),
+                                           completed_count=1)
+        job = job_test_utils.create_job(job_type=job_type, status='COMPLETED',
+                                        ended=datetime.datetime(2015, 1, 1, 3, tzinfo=utc))
+        job_test_utils.create_job_exe(job=job, status=job.status, ended=job.ended)
+
+        MetricsJobType.objects.calculate(datetime.datetime(2015, 1, 1, tzinfo=utc))
+        entries = MetricsJobType.objects.filter(job_type=job_type).order_by('occurred')
+
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0].occurred, datetime.datetime(2015, 1, 1, 3, tzinfo=utc))
+        self.assertEqual(entries[1].occurred, datetime.datetime(2015, 1, 2, 5, tzinfo=utc))
+
+    def test_calculate_hourly_times(self):
+        """Tests execution times are only aggregated into the hour when each execution ended."""
+        job_type = job_test_utils.create_seed_job_type()
+        job1 = job_test_utils.create_job(job_type=job_type, status='COMPLETED',
+                                         ended=datetime.datetime(2015, 1, 1, 1, 30, tzinfo=utc))
+        job_test_utils.create_job_exe(job=job1, status=job1.status,
+                                      queued=datetime.datetime(2015, 1, 1, 1, tzinfo=utc),
+                                      started=datetime.datetime(2015, 1, 1, 1, 10, tzinfo=utc), ended=job1.ended)
+        job2 = job_test_utils.create_job(job_type=job_type, status='COMPLETED',
+                                         ended=datetime.datetime(2015, 1, 1, 2, 30, tzinfo=utc))
+        job_test_utils.create_job_exe(job=job2, status=job2.status,
+                                      queued=datetime.datetime(2015, 1, 1, 2, tzinfo=utc),
+                                      started=datetime.datetime(2015, 1, 1, 2, 20, tzinfo=utc), ended=job2.ended)
+
+        MetricsJobType.objects.calculate(datetime.datetime(2015, 1, 1, tzinfo=utc))
+        entries = MetricsJobType.objects.filter(job_type=job_type).order_by('occurred')
+
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0].completed_count, 1)
+        self.assertEqual(entries[0].queue_time_sum, 600)
+        self.assertEqual(entries[0].run_time_avg, 1200)
+        self.assertEqual(entries[1].completed_count, 1)
+        self.assertEqual(entries[1].queue_time_sum, 1200)
+        self.assertEqual(entries[1].run_time_avg, 600)
+
+    def test_calculate_unlaunched_task(self):
+        """Tests task times skip tasks that never started."""
+        job_type = job_test_utils.create_seed_job_type()
+        job = job_test_utils.create_job(job_type=job_type, status='COMPLETED',
+                                        ended=datetime.datetime(2015, 1, 1, 1, tzinfo=utc))
+        task_results_dict = {'version': '1.0',
+                             'tasks': [{'task_id': '1', 'type': 'pre', 'was_launched': False},
+                                       {'task_id': '2', 'type': 'pre', 'was_launched': True,
+                                        'started': datetime_to_string(datetime.datetime(2015, 1, 1, 0, 30, tzinfo=utc)),
+                                        'ended': datetime_to_string(datetime.datetime(2015, 1, 1, 0, 40, tzinfo=utc))}]}
+        job_test_utils.create_job_exe(
+            job=job, status=job.status,
+            queued=datetime.datetime(2015, 1, 1, tzinfo=utc),
+            started=datetime.datetime(2015, 1, 1, 0, 10, tzinfo=utc),
+            ended=job.ended,
+            task_results=TaskResults(task_results_dict)
+        )
+
+        MetricsJobType.objects.calculate(datetime.datetime(2015, 1, 1, tzinfo=utc))
+
+        entry = MetricsJobType.objects.get(job_type=job_type)
+        self.assertEqual(entry.pre_time_sum, 600)
+
     def test_calculate_stats(self):
         """Tests calculating individual statistics for a metrics entry."""
         job_type = job_test_utils.create_seed_job_type()
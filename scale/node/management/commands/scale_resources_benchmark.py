@@ -0,0 +1,133 @@
+"""Defines the command line method for benchmarking the node resources math used by the scheduler"""
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from node.resources.node_resources import NodeResources, find_sufficient
+from node.resources.resource import Cpus, Disk, Gpus, Mem
+
+
+class Command(BaseCommand):
+    """Command that compares the performance of node resources with the previous dict-backed representation
+    """
+
+    help = 'Benchmarks the node resources operations performed during a scheduling pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--nodes', action='store', type=int, default=1000,
+                            help='The number of nodes to simulate')
+        parser.add_argument('-r', '--requests', action='store', type=int, default=100,
+                            help='The number of resource requests to test against every node')
+        parser.add_argument('-t', '--trials', action='store', type=int, default=5,
+                            help='The number of trials, the best trial is reported')
+
+    def handle(self, *args, **options):
+        """See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method runs the benchmark and prints the results.
+        """
+
+        num_nodes = options.get('nodes')
+        num_requests = options.get('requests')
+        trials = options.get('trials')
+
+        random.seed(0)
+        node_values = [(random.choice([4.0, 8.0, 16.0, 32.0]), random.choice([8192.0, 32768.0, 65536.0]),
+                        random.choice([51200.0, 102400.0]), random.choice([0.0, 0.0, 0.0, 2.0]))
+                       for _ in range(num_nodes)]
+        request_values = [(random.choice([0.5, 1.0, 2.0, 8.0]), random.choice([512.0, 2048.0, 16384.0]),
+                           random.choice([1024.0, 10240.0]), random.choice([0.0, 0.0, 1.0]))
+                          for _ in range(num_requests)]
+
+        print('Nodes: %d, requests: %d, best of %d trials' % (num_nodes, num_requests, trials))
+        for name, resources_class in [('dict-backed', DictNodeResources), ('array-backed', NodeResources)]:
+            nodes = [resources_class([Cpus(c), Mem(m), Disk(d), Gpus(g)]) for c, m, d, g in node_values]
+            requests = [resources_class([Cpus(c), Mem(m), Disk(d), Gpus(g)]) for c, m, d, g in request_values]
+
+            def run_scalar():
+                for request in requests:
+                    for node in nodes:
+                        if node.is_sufficient_to_meet(request):
+                            available = node.copy()
+                            available.subtract(request)
+                            available.add(request)
+
+            duration = min(timeit.repeat(run_scalar, number=1, repeat=trials))
+            print('%-13s is_sufficient_to_meet/copy/subtract/add: %.3f s' % (name, duration))
+
+            if resources_class is NodeResources:
+                def run_vector():
+                    for request in requests:
+                        find_sufficient(nodes, request)
+
+                duration = min(timeit.repeat(run_vector, number=1, repeat=trials))
+                print('%-13s find_sufficient: %.3f s' % (name, duration))
+
+
+class DictNodeResources(object):
+    """The previous representation of node resources as a dict of resource objects, retained for comparison
+    """
+
+    def __init__(self, resources=None):
+        """Constructor
+
+        :param resources: The list of node resources
+        :type resources: :func:`list`
+        """
+
+        self._resources = {}  # {Name: Resource}
+        if resources:
+            for resource in resources:
+                self._resources[resource.name] = resource
+        if 'cpus' not in self._resources:
+            self._resources['cpus'] = Cpus(0.0)
+        if 'mem' not in self._resources:
+            self._resources['mem'] = Mem(0.0)
+        if 'disk' not in self._resources:
+            self._resources['disk'] = Disk(0.0)
+        if 'gpus' not in self._resources:
+            self._resources['gpus'] = Gpus(0.0)
+
+    @property
+    def resources(self):
+        """The list of resources"""
+
+        return self._resources.values()
+
+    def add(self, node_resources):
+        """Adds the given resources"""
+
+        for resource in node_resources.resources:
+            if resource.name in self._resources:
+                self._resources[resource.name].value += resource.value
+            else:
+                self._resources[resource.name] = resource.copy()
+
+    def copy(self):
+        """Returns a deep copy of these resources"""
+
+        resources_copy = DictNodeResources()
+        resources_copy.add(self)
+        return resources_copy
+
+    def is_sufficient_to_meet(self, node_resources):
+        """Indicates if these resources are sufficient to meet the requested resources"""
+
+        for resource in node_resources.resources:
+            if resource.name in self._resources:
+                if self._resources[resource.name].value < resource.value:
+                    return False
+            elif resource.value > 0.0:
+                return False
+        return True
+
+    def subtract(self, node_resources):
+        """Subtracts the given resources"""
+
+        for resource in node_resources.resources:
+            if resource.name in self._resources:
+                self._resources[resource.name].value -= resource.value
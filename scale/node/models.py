@@ -3,7 +3,7 @@ from __future__ import unicode_literals
 
 import logging
 
-from django.db import models, transaction
+from django.db import connection, models, transaction
 from django.utils.timezone import now
 
 from job.models import Job
@@ -134,6 +134,26 @@ class NodeManager(models.Manager):
         
         Node.objects.filter(hostname__in=hostnames).update(last_offer_received=when)
 
+    def update_node_offer_times(self, offer_times):
+        """Updates the last_offer_received field for nodes with a single update, each node getting its own time
+
+        :param offer_times: Dict of hostname to when the last offer was received from the node
+        :type offer_times: dict
+        """
+
+        if not offer_times:
+            return
+
+        values = []
+        params = []
+        for hostname, when in offer_times.items():
+            values.append('(%s, %s)')
+            params.extend([hostname, when])
+        qry = 'UPDATE node n SET last_offer_received = o.last_offer_received '
+        qry += 'FROM (VALUES %s) AS o(hostname, last_offer_received) WHERE n.hostname = o.hostname'
+        with connection.cursor() as cursor:
+            cursor.execute(qry % ', '.join(values), params)
+
 
 class Node(models.Model):
     """Represents a cluster node on which jobs can be run
@@ -3,13 +3,21 @@ from __future__ import unicode_literals
 
 from util.exceptions import ScaleLogicBug
 
-from node.resources.resource import Cpus, Disk, Mem, Gpus
+from node.resources.resource import Cpus, Disk, Mem, Gpus, ScalarResource
+
+# The standard resources that are always defined, in the order that their values are stored
+STANDARD_RESOURCES = ['cpus', 'mem', 'disk', 'gpus']
+STANDARD_INDEXES = {name: index for index, name in enumerate(STANDARD_RESOURCES)}
 
 
 class NodeResources(object):
-    """This class encapsulates a set of node resources
+    """This class encapsulates a set of node resources. The values of the standard resources are stored in a fixed
+    position list and any other resources in a dict so that the resource math in the scheduler does not need to create
+    resource objects or look up the standard resources by name.
     """
 
+    __slots__ = ('_values', '_custom')
+
     def __init__(self, resources=None):
         """Constructor
 
@@ -17,22 +25,16 @@ class NodeResources(object):
         :type resources: :func:`list`
         """
 
-        self._resources = {}  # {Name: Resource}
+        self._values = [0.0, 0.0, 0.0, 0.0]  # Values of the standard resources
+        self._custom = {}  # {Name: value} for non-standard resources
         if resources:
             for resource in resources:
                 if resource.resource_type != 'SCALAR':
                     raise ScaleLogicBug('Resource type "%s" is not currently supported', resource.resource_type)
-                self._resources[resource.name] = resource
-
-        # Make sure standard resources are defined
-        if 'cpus' not in self._resources:
-            self._resources['cpus'] = Cpus(0.0)
-        if 'mem' not in self._resources:
-            self._resources['mem'] = Mem(0.0)
-        if 'disk' not in self._resources:
-            self._resources['disk'] = Disk(0.0)
-        if 'gpus' not in self._resources:
-            self._resources['gpus'] = Gpus(0.0)
+                if resource.name in STANDARD_INDEXES:
+                    self._values[STANDARD_INDEXES[resource.name]] = resource.value
+                else:
+                    self._custom[resource.name] = resource.value
 
     def __str__(self):
         """Converts the resource to a readable logging string
@@ -41,7 +43,7 @@ class NodeResources(object):
         :rtype: string
         """
 
-        logging_str = ', '.join(['%.2f %s' % (resource.value, resource.name) for resource in self._resources.values()])
+        logging_str = ', '.join(['%.2f %s' % (value, name) for name, value in self._iter_values()])
         return '[%s]' % logging_str
 
     @property
@@ -52,7 +54,7 @@ class NodeResources(object):
         :rtype: float
         """
 
-        return self._resources['cpus'].value
+        return self._values[0]
 
     @property
     def disk(self):
@@ -62,7 +64,7 @@ class NodeResources(object):
         :rtype: float
         """
 
-        return self._resources['disk'].value
+        return self._values[2]
 
     @property
     def mem(self):
@@ -72,27 +74,31 @@ class NodeResources(object):
         :rtype: float
         """
 
-        return self._resources['mem'].value
+        return self._values[1]
 
     @property
     def gpus(self):
         """The number of GPUs
 
-        :returns: The amount of GPUs
+        :returns: The number of GPUs
         :rtype: float
         """
 
-        return self._resources['gpus'].value
+        return self._values[3]
 
     @property
     def resources(self):
-        """The list of resources
+        """The list of resources. The resources are copies, editing them will not affect these resources.
 
         :returns: The list of resources
         :rtype: :func:`list`
         """
 
-        return self._resources.values()
+        values = self._values
+        resources = [Cpus(values[0]), Mem(values[1]), Disk(values[2]), Gpus(values[3])]
+        for name, value in self._custom.items():
+            resources.append(ScalarResource(name, value))
+        return resources
 
     def add(self, node_resources):
         """Adds the given resources
@@ -101,11 +107,16 @@ class NodeResources(object):
         :type node_resources: :class:`node.resources.NodeResources`
         """
 
-        for resource in node_resources.resources:
-            if resource.name in self._resources:
-                self._resources[resource.name].value += resource.value  # Assumes SCALAR type
-            else:
-                self._resources[resource.name] = resource.copy()
+        values = self._values
+        other_values = node_resources._values
+        values[0] += other_values[0]
+        values[1] += other_values[1]
+        values[2] += other_values[2]
+        values[3] += other_values[3]
+        if node_resources._custom:
+            custom = self._custom
+            for name, value in node_resources._custom.items():
+                custom[name] = custom.get(name, 0.0) + value  # Assumes SCALAR type
 
     def copy(self):
         """Returns a deep copy of these resources. Editing one of the resources objects will not affect the other.
@@ -115,7 +126,9 @@ class NodeResources(object):
         """
 
         resources_copy = NodeResources()
-        resources_copy.add(self)
+        resources_copy._values = self._values[:]
+        if self._custom:
+            resources_copy._custom = self._custom.copy()
         return resources_copy
 
     def generate_status_json(self, resources_dict, key_name):
@@ -127,15 +140,15 @@ class NodeResources(object):
         :type key_name: string
         """
 
-        for resource in self._resources.values():
-            if resource.name in resources_dict:
-                resource_dict = resources_dict[resource.name]
+        for name, value in self._iter_values():
+            if name in resources_dict:
+                resource_dict = resources_dict[name]
             else:
                 resource_dict = {}
-                resources_dict[resource.name] = resource_dict
+                resources_dict[name] = resource_dict
 
             # Assumes SCALAR type
-            resource_dict[key_name] = resource.value
+            resource_dict[key_name] = value
 
     def get_json(self):
         """Returns these resources as a JSON schema
@@ -145,11 +158,22 @@ class NodeResources(object):
         """
 
         from node.resources.json.resources import Resources
-        resources_dict = {}
-        for resource in self._resources.values():
-            resources_dict[resource.name] = resource.value  # Assumes SCALAR type
+        resources_dict = dict(self._iter_values())  # Assumes SCALAR type
         return Resources({'resources': resources_dict}, do_validate=False)
 
+    def get_value(self, name):
+        """Returns the value of the resource with the given name
+
+        :param name: The name of the resource
+        :type name: string
+        :returns: The value of the resource, possibly None if these resources do not have it
+        :rtype: float
+        """
+
+        if name in STANDARD_INDEXES:
+            return self._values[STANDARD_INDEXES[name]]
+        return self._custom.get(name)
+
     def increase_up_to(self, node_resources):
         """Increases each resource up to the value in the given node resources
 
@@ -157,12 +181,14 @@ class NodeResources(object):
         :type node_resources: :class:`node.resources.NodeResources`
         """
 
-        for resource in node_resources.resources:
-            if resource.name in self._resources:
-                if self._resources[resource.name].value < resource.value:  # Assumes SCALAR type
-                    self._resources[resource.name].value = resource.value
-            else:
-                self._resources[resource.name] = resource.copy()
+        values = self._values
+        for index, value in enumerate(node_resources._values):
+            if values[index] < value:  # Assumes SCALAR type
+                values[index] = value
+        custom = self._custom
+        for name, value in node_resources._custom.items():
+            if name not in custom or custom[name] < value:
+                custom[name] = value
 
     def is_equal(self, node_resources):
         """Indicates if these resources are equal. This should be used for testing only.
@@ -174,14 +200,11 @@ class NodeResources(object):
         """
 
         # Make sure they have the exact same set of resource names
-        names = set()
-        for resource in node_resources.resources:
-            names.add(resource.name)
-        if set(self._resources.keys()) != names:
+        if set(self._custom.keys()) != set(node_resources._custom.keys()):
             return False
 
-        for resource in node_resources.resources:
-            if round(self._resources[resource.name].value, 5) != round(resource.value, 5):  # Assumes SCALAR type
+        for name, value in node_resources._iter_values():
+            if round(self.get_value(name), 5) != round(value, 5):  # Assumes SCALAR type
                 return False
 
         return True
@@ -195,16 +218,13 @@ class NodeResources(object):
         :rtype: bool
         """
 
-        for resource in node_resources.resources:
-            if resource.name in self._resources:
-                if self._resources[resource.name].value < resource.value:  # Assumes SCALAR type
-                    return False
-            else:
-                # Do not have this resource, not a problem if requesting 0.0
-                if resource.value > 0.0:
-                    return False
+        values = self._values
+        requested = node_resources._values
+        if values[0] < requested[0] or values[1] < requested[1] or values[2] < requested[2] or \
+                values[3] < requested[3]:
+            return False
 
-        return True
+        return not node_resources._custom or self._is_custom_sufficient_to_meet(node_resources)
 
     def limit_to(self, node_resources):
         """Limits each resource, subtracting any amount that goes over the amount in the given node resources
@@ -213,32 +233,37 @@ class NodeResources(object):
         :type node_resources: :class:`node.resources.NodeResources`
         """
 
-        for resource in self._resources.values():
-            if resource.name in node_resources._resources:
-                if resource.value > node_resources._resources[resource.name].value:  # Assumes SCALAR type
-                    resource.value = node_resources._resources[resource.name].value
+        values = self._values
+        for index, value in enumerate(node_resources._values):
+            if values[index] > value:  # Assumes SCALAR type
+                values[index] = value
+        custom = self._custom
+        for name in custom.keys():
+            if name in node_resources._custom:
+                if custom[name] > node_resources._custom[name]:
+                    custom[name] = node_resources._custom[name]
             else:
-                self.remove_resource(resource.name)
+                del custom[name]
 
     def remove_resource(self, name):
-        """Removes the resource with the given name
+        """Removes the resource with the given name. Standard resources are set to zero instead of being removed.
 
         :param name: The name of the resource to remove
         :type name: string
         """
 
-        if name in self._resources:
-            if name in ['cpus', 'mem', 'disk']:
-                self._resources[name].value = 0.0
-            else:
-                del self._resources[name]
+        if name in STANDARD_INDEXES:
+            self._values[STANDARD_INDEXES[name]] = 0.0
+        else:
+            self._custom.pop(name, None)
 
     def round_values(self):
         """Rounds all of the resource values
         """
 
-        for resource in self._resources.values():
-            resource.value = round(resource.value, 2)  # Assumes SCALAR type
+        self._values = [round(value, 2) for value in self._values]  # Assumes SCALAR type
+        for name, value in self._custom.items():
+            self._custom[name] = round(value, 2)
 
     def subtract(self, node_resources):
         """Subtracts the given resources
@@ -247,6 +272,65 @@ class NodeResources(object):
         :type node_resources: :class:`node.resources.NodeResources`
         """
 
-        for resource in node_resources.resources:
-            if resource.name in self._resources:
-                self._resources[resource.name].value -= resource.value  # Assumes SCALAR type
+        values = self._values
+        other_values = node_resources._values
+        values[0] -= other_values[0]
+        values[1] -= other_values[1]
+        values[2] -= other_values[2]
+        values[3] -= other_values[3]
+        if node_resources._custom:
+            custom = self._custom
+            for name, value in node_resources._custom.items():
+                if name in custom:
+                    custom[name] -= value  # Assumes SCALAR type
+
+    def _is_custom_sufficient_to_meet(self, node_resources):
+        """Indicates if the non-standard resources are sufficient to meet the requested resources
+
+        :param node_resources: The requested resources
+        :type node_resources: :class:`node.resources.NodeResources`
+        :returns: True if these resources are sufficient for the request, False otherwise
+        :rtype: bool
+        """
+
+        for name, value in node_resources._custom.items():
+            if name in self._custom:
+                if self._custom[name] < value:  # Assumes SCALAR type
+                    return False
+            elif value > 0.0:
+                # Do not have this resource, not a problem if requesting 0.0
+                return False
+
+        return True
+
+    def _iter_values(self):
+        """Returns the name and value of each resource
+
+        :returns: The list of (name, value) tuples
+        :rtype: :func:`list`
+        """
+
+        return zip(STANDARD_RESOURCES, self._values) + self._custom.items()
+
+
+def find_sufficient(node_resources_list, node_resources):
+    """Tests the given request against many sets of resources at once, returning the indexes of the resources that are
+    sufficient to meet it. This is the same as calling
+    :meth:`node.resources.node_resources.NodeResources.is_sufficient_to_meet` on each set of resources.
+
+    :param node_resources_list: The list of resources to test, such as the remaining resources of each node
+    :type node_resources_list: [:class:`node.resources.node_resources.NodeResources`]
+    :param node_resources: The requested resources
+    :type node_resources: :class:`node.resources.node_resources.NodeResources`
+    :returns: The indexes of the resources in the list that are sufficient for the request
+    :rtype: [int]
+    """
+
+    cpus, mem, disk, gpus = node_resources._values
+    indexes = [index for index, resources in enumerate(node_resources_list)
+               if resources._values[0] >= cpus and resources._values[1] >= mem and resources._values[2] >= disk and
+               resources._values[3] >= gpus]
+    if node_resources._custom:
+        indexes = [index for index in indexes
+                   if node_resources_list[index]._is_custom_sufficient_to_meet(node_resources)]
+    return indexes
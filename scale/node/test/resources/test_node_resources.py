@@ -0,0 +1,75 @@
+from __future__ import unicode_literals
+
+import django
+from django.test import TestCase
+
+from node.resources.node_resources import NodeResources, find_sufficient
+from node.resources.resource import Cpus, Disk, Mem, Gpus, ScalarResource
+
+
+class TestNodeResources(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_add_and_subtract(self):
+        """Tests adding and subtracting standard and custom resources"""
+
+        resources = NodeResources([Cpus(4.0), Mem(1024.0), ScalarResource('foo', 2.0)])
+        resources.add(NodeResources([Cpus(1.0), Disk(10.0), Gpus(1.0), ScalarResource('bar', 3.0)]))
+        self.assertTrue(resources.is_equal(NodeResources([Cpus(5.0), Mem(1024.0), Disk(10.0), Gpus(1.0),
+                                                          ScalarResource('foo', 2.0), ScalarResource('bar', 3.0)])))
+
+        # Subtracting a resource that is not defined is ignored
+        resources.subtract(NodeResources([Cpus(2.0), ScalarResource('foo', 1.0), ScalarResource('baz', 1.0)]))
+        self.assertTrue(resources.is_equal(NodeResources([Cpus(3.0), Mem(1024.0), Disk(10.0), Gpus(1.0),
+                                                          ScalarResource('foo', 1.0), ScalarResource('bar', 3.0)])))
+
+    def test_copy(self):
+        """Tests that editing a copy does not affect the original resources"""
+
+        resources = NodeResources([Cpus(4.0), ScalarResource('foo', 2.0)])
+        resources_copy = resources.copy()
+        resources_copy.subtract(NodeResources([Cpus(1.0), ScalarResource('foo', 1.0)]))
+
+        self.assertTrue(resources.is_equal(NodeResources([Cpus(4.0), ScalarResource('foo', 2.0)])))
+        self.assertTrue(resources_copy.is_equal(NodeResources([Cpus(3.0), ScalarResource('foo', 1.0)])))
+
+    def test_resources(self):
+        """Tests that the list of resources includes the standard resources"""
+
+        resources = NodeResources([Mem(1024.0), ScalarResource('foo', 2.0)])
+        values = {resource.name: resource.value for resource in resources.resources}
+
+        self.assertDictEqual(values, {'cpus': 0.0, 'mem': 1024.0, 'disk': 0.0, 'gpus': 0.0, 'foo': 2.0})
+        self.assertEqual(resources.get_value('foo'), 2.0)
+        self.assertIsNone(resources.get_value('bar'))
+
+    def test_is_sufficient_to_meet(self):
+        """Tests calling is_sufficient_to_meet() and find_sufficient()"""
+
+        resources_1 = NodeResources([Cpus(4.0), Mem(1024.0)])
+        resources_2 = NodeResources([Cpus(8.0), Mem(512.0), ScalarResource('foo', 1.0)])
+        resources_3 = NodeResources([Cpus(8.0), Mem(2048.0), ScalarResource('foo', 1.0)])
+        resources_list = [resources_1, resources_2, resources_3]
+
+        request = NodeResources([Cpus(2.0), Mem(1024.0), ScalarResource('foo', 0.0)])
+        self.assertTrue(resources_1.is_sufficient_to_meet(request))
+        self.assertFalse(resources_2.is_sufficient_to_meet(request))
+        self.assertListEqual(find_sufficient(resources_list, request), [0, 2])
+
+        request = NodeResources([Cpus(2.0), Mem(1024.0), ScalarResource('foo', 1.0)])
+        self.assertFalse(resources_1.is_sufficient_to_meet(request))
+        self.assertTrue(resources_3.is_sufficient_to_meet(request))
+        self.assertListEqual(find_sufficient(resources_list, request), [2])
+
+    def test_limit_to(self):
+        """Tests calling limit_to() and increase_up_to()"""
+
+        resources = NodeResources([Cpus(4.0), Mem(1024.0), ScalarResource('foo', 2.0), ScalarResource('bar', 2.0)])
+        resources.limit_to(NodeResources([Cpus(2.0), Mem(2048.0), ScalarResource('foo', 1.0)]))
+        self.assertTrue(resources.is_equal(NodeResources([Cpus(2.0), Mem(1024.0), ScalarResource('foo', 1.0)])))
+
+        resources.increase_up_to(NodeResources([Cpus(3.0), Mem(512.0), ScalarResource('bar', 5.0)]))
+        self.assertTrue(resources.is_equal(NodeResources([Cpus(3.0), Mem(1024.0), ScalarResource('foo', 1.0),
+                                                          ScalarResource('bar', 5.0)])))
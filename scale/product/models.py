@@ -6,10 +6,11 @@ import os
 
 import django.contrib.gis.db.models as models
 import django.utils.timezone as timezone
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Max, Min
 
 import storage.geospatial_utils as geo_utils
-from recipe.models import Recipe
+from recipe.models import Recipe, RecipeNode
 from storage.brokers.broker import FileUpload
 from storage.models import ScaleFile
 from util.parse import parse_datetime
@@ -37,46 +38,86 @@ class FileAncestryLinkManager(models.Manager):
         :type job_exe_id: int
         """
 
-        new_links = []
-        created = timezone.now()
-
         # Delete any previous file ancestry links for the given job
         # This overrides any file input links that were created when the job first received its input data
         FileAncestryLink.objects.filter(job_id=job.id).delete()
 
-        # Convert parent IDs to source file ancestors
-        parent_ids = self.get_source_ancestor_ids(parent_ids)
-
         # Not all jobs have a recipe so attempt to get one if applicable
         job_recipe = Recipe.objects.get_recipe_for_job(job.id)
-
-        # See if this job is in a batch
-        batch_id = job.batch_id
+        recipe_id = job_recipe.recipe_id if job_recipe else None
 
         # Make sure all input file links are still created when no products are generated
-        if not child_ids:
-            child_ids = {None}
+        child_ids = list(child_ids) if child_ids else [None]
+        parent_ids = list(parent_ids)
+
+        # Create direct links (from source to product) by leaving the ancestor job fields as null. The parent IDs are
+        # converted to their source file ancestors and crossed with the child IDs within the database.
+        qry = 'INSERT INTO file_ancestry_link (ancestor_id, descendant_id, job_exe_id, job_id, recipe_id, batch_id, '
+        qry += 'created) SELECT sf.id, d.id, %s, %s, %s, %s, %s '
+        qry += 'FROM scale_file sf CROSS JOIN unnest(%s::integer[]) AS d(id) '
+        qry += "WHERE sf.file_type = 'SOURCE' AND (sf.id = ANY(%s::integer[]) OR sf.id IN "
+        qry += '(SELECT ancestor_id FROM file_ancestry_link WHERE descendant_id = ANY(%s::integer[])))'
+        with connection.cursor() as cursor:
+            cursor.execute(qry, [job_exe_id, job.id, recipe_id, job.batch_id, timezone.now(), child_ids, parent_ids,
+                                 parent_ids])
 
-        # Create direct links (from source to product) by leaving the ancestor job fields as null
-        for parent_id in parent_ids:
-            for child_id in child_ids:
+    @transaction.atomic
+    def create_input_file_ancestry_links(self, jobs, input_file_ids):
+        """Creates the file ancestry links between the given jobs and the source file ancestors of their input files.
+        The links for all of the jobs are created with a single insert. All database changes are made in an atomic
+        transaction.
+
+        :param jobs: The jobs that are receiving their input files
+        :type jobs: [:class:`job.models.Job`]
+        :param input_file_ids: Dict of job ID to the set of its input file IDs
+        :type input_file_ids: dict
+        """
 
-                # Set references to the current file
+        if not jobs:
+            return
+
+        created = timezone.now()
+        job_ids = [job.id for job in jobs]
+
+        # Delete any previous file ancestry links for the given jobs
+        FileAncestryLink.objects.filter(job_id__in=job_ids).delete()
+
+        # Convert the input files of every job to source file ancestors in one pass
+        all_file_ids = set()
+        for file_ids in input_file_ids.values():
+            all_file_ids.update(file_ids)
+        ancestor_ids = {}  # {File ID: set of ancestor file IDs}
+        if all_file_ids:
+            links_qry = self.filter(descendant_id__in=list(all_file_ids)).values_list('descendant_id', 'ancestor_id')
+            for descendant_id, ancestor_id in links_qry.iterator():
+                ancestor_ids.setdefault(descendant_id, set()).add(ancestor_id)
+        potential_src_file_ids = set(all_file_ids)
+        for file_ancestor_ids in ancestor_ids.values():
+            potential_src_file_ids.update(file_ancestor_ids)
+        source_file_ids = set()
+        if potential_src_file_ids:
+            source_file_qry = ScaleFile.objects.filter(id__in=list(potential_src_file_ids), file_type='SOURCE')
+            source_file_ids = set(source_file_qry.values_list('id', flat=True))
+
+        # Not all jobs have a recipe so get the original recipe of each job that has one
+        recipe_qry = RecipeNode.objects.filter(job_id__in=job_ids, is_original=True).values_list('job_id', 'recipe_id')
+        recipe_ids = dict(recipe_qry)
+
+        new_links = []
+        for job in jobs:
+            parent_ids = set()
+            for file_id in input_file_ids.get(job.id, []):
+                parent_ids.add(file_id)
+                parent_ids.update(ancestor_ids.get(file_id, []))
+            for parent_id in parent_ids & source_file_ids:
                 link = FileAncestryLink(created=created)
                 link.ancestor_id = parent_id
-                link.descendant_id = child_id
-
-                # Set references to the current execution
-                link.job_exe_id = job_exe_id
+                link.descendant_id = None
                 link.job_id = job.id
-                link.batch_id = batch_id
+                link.batch_id = job.batch_id
+                link.recipe_id = recipe_ids.get(job.id)
                 new_links.append(link)
 
-                if job_recipe:
-                    link.recipe_id = job_recipe.recipe_id
-                else:
-                    link.recipe = None
-
         FileAncestryLink.objects.bulk_create(new_links)
 
     def get_source_ancestor_ids(self, file_ids):
@@ -490,21 +531,27 @@ class ProductFileManager(models.GeoManager):
         if not source_started:
             # Compute the overall start and stop times for all file_entries
             source_files = FileAncestryLink.objects.get_source_ancestors([f['id'] for f in input_files])
-            start_times = [f.data_started for f in source_files]
-            end_times = [f.data_ended for f in source_files]
-            start_times.sort()
-            end_times.sort(reverse=True)
-            if start_times:
-                source_started = start_times[0]
-            if end_times:
-                source_ended = end_times[0]
+            times = source_files.aggregate(Min('data_started'), Max('data_ended'))
+            source_started = times['data_started__min']
+            source_ended = times['data_ended__max']
+
+        # Details shared by all of the products of the job
+        job_type = job_exe.job.job_type
+        job_recipe = Recipe.objects.get_recipe_for_job(job_exe.job_id)
+        if job_exe.batch_id:
+            batch_id = job_exe.batch_id
+        else:
+            batch_id = job_exe.job.batch_id
+        job_name = job_exe.job_type.name
+        job_version = job_exe.job_type.get_job_version()
+        package_version = job_exe.job_type.get_package_version()
 
         products_to_save = []
         for entry in file_entries:
             product = ProductFile.create()
             product.job_exe = job_exe
             product.job = job_exe.job
-            product.job_type = job_exe.job.job_type
+            product.job_type = job_type
 
             file_name = os.path.basename(entry.local_path)
             file_size = os.path.getsize(entry.local_path)
@@ -514,7 +561,7 @@ class ProductFileManager(models.GeoManager):
 
             # Add a stable identifier based on the job type, input files, input properties, and file name
             # This is designed to remain stable across re-processing the same type of job on the same inputs
-            product.update_uuid(job_exe.job.job_type.id, file_name, *input_strings)
+            product.update_uuid(job_type.id, file_name, *input_strings)
 
             # Add temporal info to product if available
             if entry.data_start:
@@ -530,18 +577,14 @@ class ProductFileManager(models.GeoManager):
                 product.center_point = geo_utils.get_center_point(geom)
 
             # Add recipe info to product if available.
-            job_recipe = Recipe.objects.get_recipe_for_job(job_exe.job_id)
             if job_recipe:
                 product.recipe_id = job_recipe.recipe.id
                 product.recipe_type = job_recipe.recipe.recipe_type
                 product.recipe_node = job_recipe.node_name
 
-                # Add batch info to product if available.
-                
-            if job_exe.batch_id:
-                product.batch_id = job_exe.batch_id
-            elif job_exe.job.batch_id:
-                product.batch_id = job_exe.job.batch_id
+            # Add batch info to product if available.
+            if batch_id:
+                product.batch_id = batch_id
 
             # Allow override, if set via side-car metadata, otherwise take derived values from above
             product.source_started = entry.source_started if entry.source_started else source_started
@@ -555,9 +598,9 @@ class ProductFileManager(models.GeoManager):
 
             # Update product model with details derived from the job_type
             product.meta_data['url'] = product.url
-            product.meta_data['job_name'] = job_exe.job_type.name
-            product.meta_data['job_version'] = job_exe.job_type.get_job_version()
-            product.meta_data['package_version'] = job_exe.job_type.get_package_version()
+            product.meta_data['job_name'] = job_name
+            product.meta_data['job_version'] = job_version
+            product.meta_data['package_version'] = package_version
 
             products_to_save.append(FileUpload(product, entry.local_path))
 
@@ -12,17 +12,19 @@ logger = logging.getLogger(__name__)
 class QueuedJobExecution(object):
     """This class represents a queued job execution that is being considered for scheduling"""
 
-    def __init__(self, queue):
+    def __init__(self, queue, interface=None):
         """Constructor
 
         :param queue: The queue model
         :type queue: :class:`queue.models.Queue`
+        :param interface: The already parsed job interface of the queued job, if None it is parsed from the queue model
+        :type interface: :class:`job.seed.manifest.SeedManifest`
         """
 
         self.id = queue.id
         self.is_canceled = queue.is_canceled
         self.configuration = queue.get_execution_configuration()
-        self.interface = queue.get_job_interface()
+        self.interface = interface if interface else queue.get_job_interface()
         self.priority = queue.priority
         self.required_resources = queue.get_resources()
         self.scheduled_agent_id = None
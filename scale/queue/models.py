@@ -6,6 +6,7 @@ import logging
 import django.utils.timezone as timezone
 import django.contrib.postgres.fields
 from django.db import models, transaction
+from django.db.models import F
 
 from job.execution.configuration.configurators import QueuedExecutionConfigurator
 from job.configuration.data.exceptions import InvalidData
@@ -242,6 +243,22 @@ class QueueManager(models.Manager):
             return query.order_by('priority', '-queued')
         return query.order_by('priority')
 
+    def get_queue_to_schedule(self, order_mode, ignore_job_type_ids=None):
+        """Returns the queue models to consider for scheduling, sorted the same as :meth:`get_queue`. Only the fields
+        needed for scheduling are retrieved: the job interface is omitted and each model is instead annotated with the
+        ID of its job type revision (job_type_rev_id), since queued jobs share the interface of their revision.
+
+        :param order_mode: The mode determining how to order the queue (FIFO or LIFO)
+        :type order_mode: string
+        :param ignore_job_type_ids: The list of job type IDs to ignore
+        :type ignore_job_type_ids: :func:`list`
+        :returns: The list of queue models
+        :rtype: list[:class:`queue.models.Queue`]
+        """
+
+        query = self.get_queue(order_mode, ignore_job_type_ids).defer('interface', 'created')
+        return query.annotate(job_type_rev_id=F('job__job_type_rev'))
+
     def get_queue_status(self):
         """Returns the current status of the queue with statistics broken down by job type.
 
@@ -14,6 +14,12 @@ class RecipeConfig(AppConfig):
     def ready(self):
         """Registers components related to recipes"""
 
+        # Register the recipe metrics reconciliation processor with the clock system
+        import job.clock as clock
+        from recipe.recipe_metrics import RecipeMetricsProcessor
+
+        clock.register_processor('scale-recipe-metrics', RecipeMetricsProcessor)
+
         # Register recipe message types
         from messaging.messages.factory import add_message_type
         from recipe.messages.create_conditions import CreateConditions
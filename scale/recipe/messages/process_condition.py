@@ -10,6 +10,11 @@ from messaging.messages.message import CommandMessage
 from recipe.models import RecipeCondition, RecipeNode
 
 
+# This is the maximum number of conditions that can fit in one message. This maximum ensures that every message of this
+# type is less than 25 KiB long.
+MAX_NUM = 100
+
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,16 +29,22 @@ def create_process_condition_messages(condition_ids):
 
     messages = []
 
+    message = None
     for condition_id in condition_ids:
-        message = ProcessCondition()
-        message.condition_id = condition_id
+        if not message:
+            message = ProcessCondition()
+        elif not message.can_fit_more():
+            messages.append(message)
+            message = ProcessCondition()
+        message.add_condition(condition_id)
+    if message:
         messages.append(message)
 
     return messages
 
 
 class ProcessCondition(CommandMessage):
-    """Command message that processes a recipe condition
+    """Command message that processes recipe conditions
     """
 
     def __init__(self):
@@ -42,13 +53,49 @@ class ProcessCondition(CommandMessage):
 
         super(ProcessCondition, self).__init__('process_condition')
 
-        self.condition_id = None
+        self._count = 0
+        self._condition_ids = []
+
+    def add_condition(self, condition_id):
+        """Adds the given condition ID to this message
+
+        :param condition_id: The condition ID
+        :type condition_id: int
+        """
+
+        if condition_id not in self._condition_ids:
+            self._count += 1
+            self._condition_ids.append(condition_id)
+
+    def can_fit_more(self):
+        """Indicates whether more conditions can fit in this message
+
+        :return: True if more conditions can fit, False otherwise
+        :rtype: bool
+        """
+
+        return self._count < MAX_NUM
+
+    def can_merge(self, other):
+        """See :meth:`messaging.messages.message.CommandMessage.can_merge`
+        """
+
+        if not isinstance(other, ProcessCondition):
+            return False
+        return self._count + other._count <= MAX_NUM
+
+    def merge(self, other):
+        """See :meth:`messaging.messages.message.CommandMessage.merge`
+        """
+
+        for condition_id in other._condition_ids:
+            self.add_condition(condition_id)
 
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
 
-        return {'condition_id': self.condition_id}
+        return {'condition_ids': self._condition_ids}
 
     @staticmethod
     def from_json(json_dict):
@@ -56,49 +103,77 @@ class ProcessCondition(CommandMessage):
         """
 
         message = ProcessCondition()
-        message.condition_id = json_dict['condition_id']
+        if 'condition_id' in json_dict:
+            # Messages sent before conditions were batched contain a single condition ID
+            message.add_condition(json_dict['condition_id'])
+        for condition_id in json_dict.get('condition_ids', []):
+            message.add_condition(condition_id)
         return message
 
     def execute(self):
         """See :meth:`messaging.messages.message.CommandMessage.execute`
         """
 
-        condition = RecipeCondition.objects.get_condition_with_interfaces(self.condition_id)
-
-        if not condition.is_processed:
-            definition = condition.recipe.recipe_type_rev.get_definition()
-
-            # Get condition data from dependencies in the recipe
-            recipe_input_data = condition.recipe.get_input_data()
-            node_outputs = RecipeNode.objects.get_recipe_node_outputs(condition.recipe_id)
-            for node_output in node_outputs.values():
-                if node_output.node_type == 'condition' and node_output.id == condition.id:
-                    node_name = node_output.node_name
-                    break
-
-            # Set data on the condition model
-            try:
-                data = definition.generate_node_input_data(node_name, recipe_input_data, node_outputs)
-                RecipeCondition.objects.set_condition_data_v6(condition, data, node_name)
-            except InvalidData:
-                logger.exception('Recipe %d created invalid input data for condition %d. Message will not re-run.',
-                                 condition.recipe_id, self.condition_id)
-                return True
-
-            # Process filter and set whether condition was accepted
-            data_filter = definition.graph[node_name].data_filter
-            is_accepted = data_filter.is_data_accepted(data)
-            RecipeCondition.objects.set_processed(condition.id, is_accepted)
-
-            # Log results
-            filter_str = json.dumps(data_filter.filter_list, sort_keys=True, indent=4, separators=(',', ': '))
-            data_str = json.dumps(convert_data_to_v6_json(data).get_dict(), sort_keys=True, indent=4, separators=(',', ': '))
-            logger.info('Condition %d (recipe %d at %s) evaluated to %s:\nCondition: %s\nInput Data: %s', condition.id, condition.recipe_id, node_name, is_accepted, filter_str, data_str)
-            
-        # Create message to update the condition's recipe
         from recipe.messages.update_recipe import create_update_recipe_message
-        root_recipe_id = condition.recipe.root_recipe_id if condition.recipe.root_recipe_id else condition.recipe_id
-        logger.info('Processed data for condition %d, sending message to update recipe %d', self.condition_id, root_recipe_id)
-        self.new_messages.append(create_update_recipe_message(root_recipe_id))
+
+        conditions = RecipeCondition.objects.get_conditions_with_interfaces(self._condition_ids)
+        conditions = {condition.id: condition for condition in conditions}
+
+        definitions = {}  # {Recipe type revision ID: Recipe definition}
+        condition_datas = {}  # {(Recipe type revision ID, Node name): [(Condition, Data)]}
+        root_recipe_ids = []
+        for condition_id in self._condition_ids:
+            if condition_id not in conditions:
+                logger.error('Failed to get condition %d - condition does not exist. Message will not re-run.',
+                             condition_id)
+                continue
+            condition = conditions[condition_id]
+
+            if not condition.is_processed:
+                revision_id = condition.recipe.recipe_type_rev_id
+                if revision_id not in definitions:
+                    definitions[revision_id] = condition.recipe.recipe_type_rev.get_definition()
+                definition = definitions[revision_id]
+
+                # Get condition data from dependencies in the recipe
+                recipe_input_data = condition.recipe.get_input_data()
+                node_outputs = RecipeNode.objects.get_recipe_node_outputs(condition.recipe_id)
+                for node_output in node_outputs.values():
+                    if node_output.node_type == 'condition' and node_output.id == condition.id:
+                        node_name = node_output.node_name
+                        break
+
+                # Set data on the condition model
+                try:
+                    data = definition.generate_node_input_data(node_name, recipe_input_data, node_outputs)
+                    RecipeCondition.objects.set_condition_data_v6(condition, data, node_name)
+                except InvalidData:
+                    logger.exception('Recipe %d created invalid input data for condition %d. Message will not re-run.',
+                                     condition.recipe_id, condition_id)
+                    continue
+                condition_datas.setdefault((revision_id, node_name), []).append((condition, data))
+
+            root_recipe_id = condition.recipe.root_recipe_id if condition.recipe.root_recipe_id else condition.recipe_id
+            if root_recipe_id not in root_recipe_ids:
+                root_recipe_ids.append(root_recipe_id)
+
+        # Process each filter over all of its data at once and set whether each condition was accepted
+        for (revision_id, node_name), datas in condition_datas.items():
+            data_filter = definitions[revision_id].graph[node_name].data_filter
+            accepted = data_filter.accept_many([data for _, data in datas])
+            filter_str = json.dumps(data_filter.filter_list, sort_keys=True, indent=4, separators=(',', ': '))
+            for (condition, data), is_accepted in zip(datas, accepted):
+                RecipeCondition.objects.set_processed(condition.id, is_accepted)
+
+                # Log results
+                data_str = json.dumps(convert_data_to_v6_json(data).get_dict(), sort_keys=True, indent=4,
+                                      separators=(',', ': '))
+                logger.info('Condition %d (recipe %d at %s) evaluated to %s:\nCondition: %s\nInput Data: %s',
+                            condition.id, condition.recipe_id, node_name, is_accepted, filter_str, data_str)
+
+        # Create messages to update the conditions' recipes
+        for root_recipe_id in root_recipe_ids:
+            logger.info('Processed data for conditions, sending message to update recipe %d', root_recipe_id)
+            self.new_messages.append(create_update_recipe_message(root_recipe_id))
 
         return True
@@ -3,6 +3,8 @@ from __future__ import unicode_literals
 
 import logging
 
+from django.conf import settings
+
 from messaging.messages.message import CommandMessage
 from recipe.models import Recipe
 
@@ -14,11 +16,13 @@ MAX_NUM = 100
 logger = logging.getLogger(__name__)
 
 
-def create_update_recipe_metrics_messages(recipe_ids):
+def create_update_recipe_metrics_messages(recipe_ids, count_jobs=True):
     """Creates messages to update the metrics for the given recipes
 
     :param recipe_ids: The recipe IDs
     :type recipe_ids: :func:`list`
+    :param count_jobs: Whether the jobs in the recipes should be recounted
+    :type count_jobs: bool
     :return: The list of messages
     :rtype: :func:`list`
     """
@@ -29,9 +33,11 @@ def create_update_recipe_metrics_messages(recipe_ids):
     for recipe_id in recipe_ids:
         if not message:
             message = UpdateRecipeMetrics()
+            message.count_jobs = count_jobs
         elif not message.can_fit_more():
             messages.append(message)
             message = UpdateRecipeMetrics()
+            message.count_jobs = count_jobs
         message.add_recipe(recipe_id)
     if message:
         messages.append(message)
@@ -40,7 +46,9 @@ def create_update_recipe_metrics_messages(recipe_ids):
 
 
 def create_update_recipe_metrics_messages_from_jobs(job_ids):
-    """Creates messages to update the metrics for the recipes affected by the given jobs
+    """Creates messages to update the metrics for the recipes affected by the status changes of the given jobs. When
+    the job counts are maintained incrementally the status changes have already been counted, so the jobs in the
+    recipes are not recounted.
 
     :param job_ids: The job IDs
     :type job_ids: :func:`list`
@@ -49,20 +57,22 @@ def create_update_recipe_metrics_messages_from_jobs(job_ids):
     """
 
     recipe_ids = Recipe.objects.get_recipe_ids_for_jobs(job_ids)
-    return create_update_recipe_metrics_messages(recipe_ids)
+    return create_update_recipe_metrics_messages(recipe_ids, count_jobs=not settings.INCREMENTAL_RECIPE_METRICS)
 
 
-def create_update_recipe_metrics_messages_from_sub_recipes(sub_recipe_ids):
+def create_update_recipe_metrics_messages_from_sub_recipes(sub_recipe_ids, count_jobs=True):
     """Creates messages to update the metrics for the recipes affected by the given sub-recipes
 
     :param sub_recipe_ids: The sub-recipe IDs
     :type sub_recipe_ids: :func:`list`
+    :param count_jobs: Whether the jobs in the recipes should be recounted
+    :type count_jobs: bool
     :return: The list of messages
     :rtype: :func:`list`
     """
 
     recipe_ids = Recipe.objects.get_recipe_ids_for_sub_recipes(sub_recipe_ids)
-    return create_update_recipe_metrics_messages(recipe_ids)
+    return create_update_recipe_metrics_messages(recipe_ids, count_jobs=count_jobs)
 
 
 class UpdateRecipeMetrics(CommandMessage):
@@ -77,6 +87,9 @@ class UpdateRecipeMetrics(CommandMessage):
 
         self._recipe_ids = []
 
+        # Job counts are not recounted when they are maintained incrementally as job statuses change
+        self.count_jobs = True
+
     def add_recipe(self, recipe_id):
         """Adds the given recipe ID to this message
 
@@ -95,11 +108,28 @@ class UpdateRecipeMetrics(CommandMessage):
 
         return len(self._recipe_ids) < MAX_NUM
 
+    def can_merge(self, other):
+        """See :meth:`messaging.messages.message.CommandMessage.can_merge`
+        """
+
+        if not isinstance(other, UpdateRecipeMetrics):
+            return False
+        return len(self._recipe_ids) + len(other._recipe_ids) <= MAX_NUM
+
+    def merge(self, other):
+        """See :meth:`messaging.messages.message.CommandMessage.merge`
+        """
+
+        for recipe_id in other._recipe_ids:
+            if recipe_id not in self._recipe_ids:
+                self.add_recipe(recipe_id)
+        self.count_jobs = self.count_jobs or other.count_jobs
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
 
-        return {'recipe_ids': self._recipe_ids}
+        return {'recipe_ids': self._recipe_ids, 'count_jobs': self.count_jobs}
 
     @staticmethod
     def from_json(json_dict):
@@ -107,6 +137,7 @@ class UpdateRecipeMetrics(CommandMessage):
         """
 
         message = UpdateRecipeMetrics()
+        message.count_jobs = json_dict.get('count_jobs', True)
         for recipe_id in json_dict['recipe_ids']:
             message.add_recipe(recipe_id)
 
@@ -116,10 +147,11 @@ class UpdateRecipeMetrics(CommandMessage):
         """See :meth:`messaging.messages.message.CommandMessage.execute`
         """
 
-        Recipe.objects.update_recipe_metrics(self._recipe_ids)
+        Recipe.objects.update_recipe_metrics(self._recipe_ids, count_jobs=self.count_jobs)
 
         # If any of these recipes are sub-recipes, update the metrics of the recipes that contain these
-        self.new_messages.extend(create_update_recipe_metrics_messages_from_sub_recipes(self._recipe_ids))
+        self.new_messages.extend(create_update_recipe_metrics_messages_from_sub_recipes(self._recipe_ids,
+                                                                                        count_jobs=self.count_jobs))
 
         # If any of these recipes are sub-recipes, grab root recipe IDs and update those recipes
         root_recipe_ids = set()
@@ -137,6 +169,6 @@ class UpdateRecipeMetrics(CommandMessage):
         for recipe in qry:
             batch_ids.add(recipe.batch_id)
         if batch_ids:
-            self.new_messages.extend(create_update_batch_metrics_messages(batch_ids))
+            self.new_messages.extend(create_update_batch_metrics_messages(batch_ids, count_jobs=self.count_jobs))
 
         return True
@@ -50,12 +50,84 @@ INPUT_FILE_BATCH_SIZE = 500  # Maximum batch size for creating RecipeInputFile m
 # Always adhere to the following model order for obtaining row locks via select_for_update() in order to prevent
 # deadlocks and ensure query efficiency
 # When editing a job/recipe type: RecipeType, JobType, TriggerRule
+# When applying job status deltas to metrics: Job, Recipe, BatchMetrics
+
+# Job statuses that have a count in the recipe and batch metrics, each stored in a jobs_<status> column
+METRICS_JOB_STATUSES = ['PENDING', 'BLOCKED', 'QUEUED', 'RUNNING', 'FAILED', 'COMPLETED', 'CANCELED']
+
+# Names of the recipe metrics fields that are compared when reconciling metrics
+RECIPE_METRICS_FIELDS = ['jobs_total'] + ['jobs_%s' % status.lower() for status in METRICS_JOB_STATUSES]
+RECIPE_METRICS_FIELDS += ['sub_recipes_total', 'sub_recipes_completed']
 
 
 class RecipeManager(models.Manager):
     """Provides additional methods for handling recipes
     """
 
+    def apply_job_status_deltas(self, job_deltas, when):
+        """Applies the given job status changes to the job counts of the recipes that contain the jobs (and the recipes
+        that contain those recipes) and to the per-job metrics of their batches, without recounting all of the jobs in
+        the recipes. The caller must have obtained model locks on the job models in an atomic transaction.
+
+        :param job_deltas: List of tuples of job ID, old status, and new status
+        :type job_deltas: :func:`list`
+        :param when: The current time
+        :type when: :class:`datetime.datetime`
+        """
+
+        job_deltas = [delta for delta in job_deltas if delta[1] != delta[2]]
+        if not job_deltas:
+            return
+
+        statuses = {job_id: (old_status, new_status) for job_id, old_status, new_status in job_deltas}
+        recipe_deltas = {}  # {Recipe ID: {Status: delta}}
+        node_deltas = {}  # {(Batch ID, node name): {Status: delta}}
+        qry = RecipeNode.objects.filter(job_id__in=statuses.keys())
+        qry = qry.values_list('recipe_id', 'job_id', 'node_name', 'recipe__recipe', 'recipe__batch')
+        for recipe_id, job_id, node_name, parent_recipe_id, batch_id in qry:
+            old_status, new_status = statuses[job_id]
+            _add_status_delta(recipe_deltas.setdefault(recipe_id, {}), old_status, new_status)
+            if parent_recipe_id is None and batch_id is not None:
+                _add_status_delta(node_deltas.setdefault((batch_id, node_name), {}), old_status, new_status)
+
+        # Recipe metrics include the job counts of their sub-recipes, so apply the deltas up through each parent recipe
+        all_recipe_deltas = dict(recipe_deltas)
+        while recipe_deltas:
+            parent_deltas = {}
+            qry = RecipeNode.objects.filter(sub_recipe_id__in=recipe_deltas.keys())
+            for sub_recipe_id, recipe_id in qry.values_list('sub_recipe_id', 'recipe_id'):
+                parent_delta = parent_deltas.setdefault(recipe_id, {})
+                for status, delta in recipe_deltas[sub_recipe_id].items():
+                    parent_delta[status] = parent_delta.get(status, 0) + delta
+            for recipe_id, parent_delta in parent_deltas.items():
+                recipe_delta = all_recipe_deltas.setdefault(recipe_id, {})
+                for status, delta in parent_delta.items():
+                    recipe_delta[status] = recipe_delta.get(status, 0) + delta
+            recipe_deltas = parent_deltas
+
+        if all_recipe_deltas:
+            # Recipe models are always locked in order of ascending ID to prevent deadlocks
+            recipe_ids = sorted(all_recipe_deltas.keys())
+            list(self.select_for_update().filter(id__in=recipe_ids).order_by('id').values_list('id', flat=True))
+
+            columns = ['jobs_%s' % status.lower() for status in METRICS_JOB_STATUSES]
+            values = []
+            params = [when]
+            for recipe_id in recipe_ids:
+                values.append('(' + ', '.join(['%s'] * (len(columns) + 1)) + ')')
+                params.append(recipe_id)
+                params.extend(all_recipe_deltas[recipe_id].get(status, 0) for status in METRICS_JOB_STATUSES)
+            qry = 'UPDATE recipe r SET last_modified = %s, '
+            qry += ', '.join('%s = r.%s + d.%s' % (column, column, column) for column in columns)
+            qry += ' FROM (VALUES %s) AS d(recipe_id, %s) ' % (', '.join(values), ', '.join(columns))
+            qry += 'WHERE r.id = d.recipe_id'
+            with connection.cursor() as cursor:
+                cursor.execute(qry, params)
+
+        if node_deltas:
+            from batch.models import BatchMetrics
+            BatchMetrics.objects.apply_job_status_deltas(node_deltas, when)
+
     def complete_recipes(self, recipe_ids, when):
         """Marks the recipes with the given IDs as being completed
 
@@ -488,16 +560,70 @@ class RecipeManager(models.Manager):
         qry = self.filter(id__in=recipe_ids, is_superseded=False)
         qry.update(is_superseded=True, superseded=when, last_modified=now())
 
-    def update_recipe_metrics(self, recipe_ids):
+    def reconcile_recipe_metrics(self, recipe_ids):
+        """Recounts the metrics for the recipes with the given IDs and returns any differences from the metrics that
+        were previously stored. Sub-recipes are recounted before the recipes that contain them.
+
+        :param recipe_ids: The recipe IDs
+        :type recipe_ids: :func:`list`
+        :returns: Dict of recipe ID to a dict of each metrics field that drifted to a tuple of the stored and recounted
+            values
+        :rtype: dict
+        """
+
+        drift = {}
+        if not recipe_ids:
+            return drift
+
+        sub_recipe_ids = list(self.filter(id__in=recipe_ids, recipe__isnull=False).values_list('id', flat=True))
+        sub_recipe_id_set = set(sub_recipe_ids)
+        top_recipe_ids = [recipe_id for recipe_id in recipe_ids if recipe_id not in sub_recipe_id_set]
+        for ids in [sub_recipe_ids, top_recipe_ids]:
+            if not ids:
+                continue
+            with transaction.atomic():
+                list(self.select_for_update().filter(id__in=ids).order_by('id').values_list('id', flat=True))
+                qry = self.filter(id__in=ids).values_list('id', *RECIPE_METRICS_FIELDS)
+                before = {values[0]: values[1:] for values in qry}
+                self.update_recipe_metrics(ids)
+                after = list(qry.all())
+            for values in after:
+                recipe_id = values[0]
+                fields = {}
+                for field, old_value, new_value in zip(RECIPE_METRICS_FIELDS, before[recipe_id], values[1:]):
+                    if old_value != new_value:
+                        fields[field] = (old_value, new_value)
+                if fields:
+                    drift[recipe_id] = fields
+
+        return drift
+
+    def update_recipe_metrics(self, recipe_ids, count_jobs=True):
         """Updates the metrics for the recipes with the given IDs
 
         :param recipe_ids: The recipe IDs
         :type recipe_ids: :func:`list`
+        :param count_jobs: Whether to recount the jobs in the recipes. When the job counts are maintained incrementally
+            only the sub-recipe counts are updated.
+        :type count_jobs: bool
         """
 
         if not recipe_ids:
             return
 
+        if not count_jobs:
+            qry = 'UPDATE recipe r SET sub_recipes_total = s.sub_recipes_total, '
+            qry += 'sub_recipes_completed = s.sub_recipes_completed, last_modified = %s FROM ('
+            qry += 'SELECT rn.recipe_id, COUNT(r.id) + COALESCE(SUM(r.sub_recipes_total), 0) AS sub_recipes_total, '
+            qry += 'COUNT(r.id) FILTER(WHERE r.is_completed) '
+            qry += '+ COALESCE(SUM(r.sub_recipes_completed), 0) AS sub_recipes_completed '
+            qry += 'FROM recipe_node rn JOIN recipe r ON rn.sub_recipe_id = r.id '
+            qry += 'WHERE rn.recipe_id IN %s GROUP BY rn.recipe_id) s '
+            qry += 'WHERE r.id = s.recipe_id'
+            with connection.cursor() as cursor:
+                cursor.execute(qry, [now(), tuple(recipe_ids)])
+            return
+
         qry = 'UPDATE recipe r SET jobs_total = s.jobs_total, jobs_pending = s.jobs_pending, '
         qry += 'jobs_blocked = s.jobs_blocked, jobs_queued = s.jobs_queued, jobs_running = s.jobs_running, '
         qry += 'jobs_failed = s.jobs_failed, jobs_completed = s.jobs_completed, jobs_canceled = s.jobs_canceled, '
@@ -707,6 +833,21 @@ class Recipe(models.Model):
         index_together = ['last_modified', 'recipe_type']
 
 
+def _add_status_delta(deltas, old_status, new_status):
+    """Adds a job status change to the given status count deltas
+
+    :param deltas: Dict of status to count delta
+    :type deltas: dict
+    :param old_status: The old job status
+    :type old_status: string
+    :param new_status: The new job status
+    :type new_status: string
+    """
+
+    deltas[old_status] = deltas.get(old_status, 0) - 1
+    deltas[new_status] = deltas.get(new_status, 0) + 1
+
+
 class RecipeConditionManager(models.Manager):
     """Provides additional methods for handling recipe conditions
     """
@@ -742,6 +883,17 @@ class RecipeConditionManager(models.Manager):
 
         return self.select_related('recipe__recipe_type_rev').get(id=condition_id)
 
+    def get_conditions_with_interfaces(self, condition_ids):
+        """Gets the condition models for the given IDs with related recipe__recipe_type_rev models
+
+        :param condition_ids: The condition IDs
+        :type condition_ids: :func:`list`
+        :returns: The condition models with related recipe__recipe_type_rev models
+        :rtype: :func:`list`
+        """
+
+        return list(self.select_related('recipe__recipe_type_rev').filter(id__in=condition_ids))
+
     def set_processed(self, condition_id, is_accepted):
         """Sets the condition with the given ID as being processed
 
@@ -0,0 +1,56 @@
+"""Defines the clock event processor that reconciles recipe and batch metrics"""
+from __future__ import unicode_literals
+
+import logging
+
+from django.db.models import Q
+
+from job.clock import ClockEventProcessor
+from recipe.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of recipes recounted in each transaction
+RECONCILE_BATCH_SIZE = 100
+
+
+class RecipeMetricsProcessor(ClockEventProcessor):
+    """This class periodically recounts the metrics of active recipes and their batches and reports any drift from the
+    metrics that were maintained as job statuses changed."""
+
+    def process_event(self, event, last_event=None):
+        """See :meth:`job.clock.ClockEventProcessor.process_event`.
+
+        Recounts the metrics for all recipes that are not completed or have been modified since the last event.
+        """
+
+        from batch.models import Batch, BatchMetrics
+
+        recipe_qry = Q(is_completed=False, is_superseded=False)
+        if last_event:
+            recipe_qry |= Q(last_modified__gte=last_event.occurred)
+        recipes = Recipe.objects.filter(recipe_qry)
+
+        # Sub-recipes are recounted before the recipes that contain them
+        sub_recipe_ids = list(recipes.filter(recipe__isnull=False).values_list('id', flat=True))
+        top_recipe_ids = list(recipes.filter(recipe__isnull=True).values_list('id', flat=True))
+
+        recipe_drift = {}
+        for recipe_ids in [sub_recipe_ids, top_recipe_ids]:
+            for i in range(0, len(recipe_ids), RECONCILE_BATCH_SIZE):
+                recipe_drift.update(Recipe.objects.reconcile_recipe_metrics(recipe_ids[i:i + RECONCILE_BATCH_SIZE]))
+        for recipe_id, fields in recipe_drift.items():
+            logger.warning('Recipe %d metrics drifted (stored, counted): %s', recipe_id, fields)
+
+        batch_ids = list(recipes.filter(recipe__isnull=True, batch__isnull=False).values_list('batch_id', flat=True)
+                         .distinct())
+        batch_drift = {}
+        for i in range(0, len(batch_ids), RECONCILE_BATCH_SIZE):
+            ids = batch_ids[i:i + RECONCILE_BATCH_SIZE]
+            Batch.objects.update_batch_metrics(ids, count_jobs=False)
+            batch_drift.update(BatchMetrics.objects.reconcile_batch_metrics_per_job(ids))
+        for (batch_id, job_name), fields in batch_drift.items():
+            logger.warning('Batch %d metrics for job %s drifted (stored, counted): %s', batch_id, job_name, fields)
+
+        logger.info('Reconciled metrics for %d recipe(s) and %d batch(es), %d recipe(s) and %d batch job(s) drifted',
+                    len(sub_recipe_ids) + len(top_recipe_ids), len(batch_ids), len(recipe_drift), len(batch_drift))
@@ -41,7 +41,7 @@ class TestCreateConditions(TransactionTestCase):
         self.assertEqual(len(new_message.new_messages), 1)
         process_condition_msg = new_message.new_messages[0]
         self.assertEqual(process_condition_msg.type, 'process_condition')
-        self.assertEqual(process_condition_msg.condition_id, condition_2.id)
+        self.assertListEqual(process_condition_msg._condition_ids, [condition_2.id])
 
     def test_execute(self):
         """Tests calling CreateConditions.execute() successfully"""
@@ -66,7 +66,7 @@ class TestCreateConditions(TransactionTestCase):
         self.assertEqual(len(message.new_messages), 1)
         process_condition_msg = message.new_messages[0]
         self.assertEqual(process_condition_msg.type, 'process_condition')
-        self.assertEqual(process_condition_msg.condition_id, condition_2.id)
+        self.assertListEqual(process_condition_msg._condition_ids, [condition_2.id])
 
         # Test executing message again
         message_json_dict = message.to_json()
@@ -85,4 +85,4 @@ class TestCreateConditions(TransactionTestCase):
         self.assertEqual(len(message.new_messages), 1)
         process_condition_msg = message.new_messages[0]
         self.assertEqual(process_condition_msg.type, 'process_condition')
-        self.assertEqual(process_condition_msg.condition_id, condition_2.id)
+        self.assertListEqual(process_condition_msg._condition_ids, [condition_2.id])
@@ -3,6 +3,7 @@ from __future__ import absolute_import
 
 import django
 from django.test import TestCase
+from mock import patch
 
 from data.data.data import Data
 from data.data.json.data_v6 import convert_data_to_v6_json
@@ -63,6 +64,51 @@ class TestProcessCondition(TestCase):
         self.assertIsNotNone(condition.processed)
         self.assertTrue(condition.is_accepted)
 
+    def test_execute_batch(self):
+        """Tests executing a ProcessCondition message that evaluates several conditions with one data filter"""
+
+        cond_interface_1 = Interface()
+        cond_interface_1.add_parameter(JsonParameter('cond_int', 'integer'))
+        df1 = DataFilter(filter_list=[{'name': 'cond_int', 'type': 'integer', 'condition': '==', 'values': [0]}])
+        definition = RecipeDefinition(cond_interface_1)
+        definition.add_condition_node('node_a', cond_interface_1, df1)
+        definition.add_recipe_input_connection('node_a', 'cond_int', 'cond_int')
+
+        definition_dict = convert_recipe_definition_to_v6_json(definition).get_dict()
+        recipe_type = recipe_test_utils.create_recipe_type_v6(definition=definition_dict)
+
+        conditions = []
+        recipes = []
+        for value in [0, 1]:
+            data = Data()
+            data.add_value(JsonValue('cond_int', value))
+            data_dict = convert_data_to_v6_json(data).get_dict()
+            recipe = recipe_test_utils.create_recipe(recipe_type=recipe_type, input=data_dict)
+            condition = recipe_test_utils.create_recipe_condition(recipe=recipe, save=True)
+            recipe_test_utils.create_recipe_node(recipe=recipe, node_name='node_a', condition=condition, save=True)
+            conditions.append(condition)
+            recipes.append(recipe)
+
+        # Messages sent before conditions were batched are merged into one message
+        message = ProcessCondition.from_json({'condition_id': conditions[0].id})
+        other_message = ProcessCondition.from_json({'condition_id': conditions[1].id})
+        self.assertTrue(message.can_merge(other_message))
+        message.merge(other_message)
+
+        with patch('data.filter.filter.DataFilter.accept_many', autospec=True,
+                   side_effect=DataFilter.accept_many) as accept_many:
+            result = message.execute()
+
+        self.assertTrue(result)
+        self.assertEqual(accept_many.call_count, 1)
+        condition_1 = RecipeCondition.objects.get(id=conditions[0].id)
+        condition_2 = RecipeCondition.objects.get(id=conditions[1].id)
+        self.assertTrue(condition_1.is_processed)
+        self.assertTrue(condition_1.is_accepted)
+        self.assertTrue(condition_2.is_processed)
+        self.assertFalse(condition_2.is_accepted)
+        self.assertListEqual([msg.root_recipe_id for msg in message.new_messages], [recipe.id for recipe in recipes])
+
     def test_execute(self):
         """Tests calling ProcessCondition.execute() successfully"""
 
@@ -225,9 +225,9 @@ class TestUpdateRecipe(TestCase):
         sub = SubRecipe(recipe_type_e.name, recipe_type_e.revision_num, 'node_e', True)
         self.assertListEqual(create_recipes_msg.sub_recipes, [sub])
         # Check message to process condition
-        self.assertEqual(process_condition_msg.condition_id, condition_i.id)
+        self.assertListEqual(process_condition_msg._condition_ids, [condition_i.id])
         # Check message to process job input
-        self.assertEqual(process_job_input_msg.job_id, job_c.id)
+        self.assertEqual(process_job_input_msg._job_ids, [job_c.id])
         # Check message to process recipe input
         self.assertEqual(process_recipe_input_msg.recipe_id, recipe_b.id)
 
@@ -301,8 +301,8 @@ class TestUpdateRecipe(TestCase):
         sub = SubRecipe(recipe_type_e.name, recipe_type_e.revision_num, 'node_e', True)
         self.assertListEqual(create_recipes_msg.sub_recipes, [sub])
         # Check message to process condition
-        self.assertEqual(process_condition_msg.condition_id, condition_i.id)
+        self.assertListEqual(process_condition_msg._condition_ids, [condition_i.id])
         # Check message to process job input
-        self.assertEqual(process_job_input_msg.job_id, job_c.id)
+        self.assertEqual(process_job_input_msg._job_ids, [job_c.id])
         # Check message to process recipe input
         self.assertEqual(process_recipe_input_msg.recipe_id, recipe_b.id)
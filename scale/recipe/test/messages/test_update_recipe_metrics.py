@@ -55,6 +55,35 @@ class TestUpdateRecipes(TestCase):
         self.assertEqual(recipe.jobs_completed, 1)
         self.assertEqual(recipe.jobs_canceled, 1)
 
+    def test_merge(self):
+        """Tests merging UpdateRecipeMetrics messages together"""
+
+        message_1 = UpdateRecipeMetrics()
+        message_1.add_recipe(1)
+        message_1.add_recipe(2)
+        message_2 = UpdateRecipeMetrics()
+        message_2.add_recipe(2)
+        message_2.add_recipe(3)
+
+        self.assertTrue(message_1.can_merge(message_2))
+        message_1.merge(message_2)
+        self.assertListEqual(message_1.to_json()['recipe_ids'], [1, 2, 3])
+
+        # Jobs are recounted if either message recounts jobs
+        message_2.count_jobs = False
+        message_4 = UpdateRecipeMetrics.from_json({'recipe_ids': [4], 'count_jobs': False})
+        message_4.merge(message_2)
+        self.assertFalse(message_4.count_jobs)
+        message_4.merge(message_1)
+        self.assertTrue(message_4.count_jobs)
+        self.assertTrue(UpdateRecipeMetrics.from_json({'recipe_ids': [1]}).count_jobs)
+
+        # Merged message would be too large
+        message_3 = UpdateRecipeMetrics()
+        for recipe_id in range(100):
+            message_3.add_recipe(recipe_id)
+        self.assertFalse(message_1.can_merge(message_3))
+
     def test_execute(self):
         """Tests calling UpdateRecipeMetrics.execute() successfully"""
 
@@ -5,7 +5,7 @@ import datetime
 
 import django
 from django.db import transaction
-from django.test import TransactionTestCase
+from django.test import TransactionTestCase, override_settings
 from django.utils.timezone import now
 from mock import patch
 
@@ -33,6 +33,71 @@ class TestRecipeManager(TransactionTestCase):
     def setUp(self):
         django.setup()
 
+    @override_settings(INCREMENTAL_RECIPE_METRICS=True)
+    def test_apply_job_status_deltas(self):
+        """Tests applying job status changes to recipe and batch metrics incrementally"""
+
+        from batch.models import BatchMetrics
+        from batch.test import utils as batch_test_utils
+
+        batch = batch_test_utils.create_batch()
+        BatchMetrics.objects.create(batch=batch, job_name='node_a')
+        recipe_1 = recipe_test_utils.create_recipe(batch=batch)
+        recipe_2 = recipe_test_utils.create_recipe()
+        recipe_2.recipe = recipe_1
+        recipe_2.save()
+        job_1 = job_test_utils.create_job(status='QUEUED')
+        job_2 = job_test_utils.create_job(status='RUNNING')
+        job_3 = job_test_utils.create_job(status='PENDING')
+        RecipeNode.objects.bulk_create([
+            recipe_test_utils.create_recipe_node(recipe=recipe_1, node_name='node_a', job=job_1),
+            recipe_test_utils.create_recipe_node(recipe=recipe_1, node_name='node_b', sub_recipe=recipe_2),
+            recipe_test_utils.create_recipe_node(recipe=recipe_2, node_name='node_c', job=job_2),
+            recipe_test_utils.create_recipe_node(recipe=recipe_2, node_name='node_d', job=job_3)])
+        Recipe.objects.update_recipe_metrics([recipe_2.id])
+        Recipe.objects.update_recipe_metrics([recipe_1.id])
+        BatchMetrics.objects.update_batch_metrics_per_job([batch.id])
+
+        # Change job statuses, deltas are applied as the jobs are updated
+        with transaction.atomic():
+            jobs = Job.objects.get_locked_jobs([job_1.id, job_2.id])
+            Job.objects.update_jobs_to_running([job for job in jobs if job.id == job_1.id], now())
+            Job.objects.update_jobs_to_completed([job for job in jobs if job.id == job_2.id], now())
+
+        recipe_1 = Recipe.objects.get(id=recipe_1.id)
+        self.assertEqual(recipe_1.jobs_total, 3)
+        self.assertEqual(recipe_1.jobs_queued, 0)
+        self.assertEqual(recipe_1.jobs_running, 1)
+        self.assertEqual(recipe_1.jobs_completed, 1)
+        self.assertEqual(recipe_1.jobs_pending, 1)
+        recipe_2 = Recipe.objects.get(id=recipe_2.id)
+        self.assertEqual(recipe_2.jobs_running, 0)
+        self.assertEqual(recipe_2.jobs_completed, 1)
+        batch_metrics = BatchMetrics.objects.get(batch_id=batch.id, job_name='node_a')
+        self.assertEqual(batch_metrics.jobs_queued, 0)
+        self.assertEqual(batch_metrics.jobs_running, 1)
+
+        # Incremental metrics should match a full recount
+        self.assertDictEqual(Recipe.objects.reconcile_recipe_metrics([recipe_1.id, recipe_2.id]), {})
+        self.assertDictEqual(BatchMetrics.objects.reconcile_batch_metrics_per_job([batch.id]), {})
+
+    def test_reconcile_recipe_metrics(self):
+        """Tests calling RecipeManager.reconcile_recipe_metrics() when the stored metrics have drifted"""
+
+        recipe = recipe_test_utils.create_recipe()
+        job_1 = job_test_utils.create_job(status='COMPLETED')
+        job_2 = job_test_utils.create_job(status='FAILED')
+        RecipeNode.objects.bulk_create([recipe_test_utils.create_recipe_node(recipe=recipe, job=job_1),
+                                        recipe_test_utils.create_recipe_node(recipe=recipe, job=job_2)])
+        Recipe.objects.filter(id=recipe.id).update(jobs_total=2, jobs_completed=1, jobs_running=1)
+
+        drift = Recipe.objects.reconcile_recipe_metrics([recipe.id])
+
+        self.assertDictEqual(drift, {recipe.id: {'jobs_running': (1, 0), 'jobs_failed': (0, 1)}})
+        recipe = Recipe.objects.get(id=recipe.id)
+        self.assertEqual(recipe.jobs_running, 0)
+        self.assertEqual(recipe.jobs_failed, 1)
+
     def test_process_recipe_input(self):
         """Tests calling RecipeManager.process_recipe_input()"""
 
@@ -3,6 +3,7 @@
 # Include all the default settings.
 from settings import *
 import elasticsearch
+import json
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.environ.get('SCALE_SECRET_KEY', INSECURE_DEFAULT_KEY)
@@ -49,6 +50,7 @@ if ELASTICSEARCH_URL:
 # Broker URL for connection to messaging backend. Bootstrap must populate.
 BROKER_URL = os.environ.get('SCALE_BROKER_URL', BROKER_URL)
 QUEUE_NAME = os.environ.get('SCALE_QUEUE_NAME', QUEUE_NAME)
+MESSAGE_QUEUE_ROUTES = json.loads(os.environ.get('SCALE_QUEUE_ROUTES', 'null')) or MESSAGE_QUEUE_ROUTES
 
 # Mesos connection information. Default for -m
 # This can be something like "127.0.0.1:5050"
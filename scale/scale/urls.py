@@ -20,6 +20,7 @@ REST_API_APPS = [
     'error',
     'ingest',
     'job',
+    'messaging',
     'metrics',
     'node',
     'queue',
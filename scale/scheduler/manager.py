@@ -8,6 +8,7 @@ from collections import namedtuple
 
 from django.utils.timezone import now
 
+from messaging.metrics import Histogram
 from scheduler.configuration import SchedulerConfiguration
 from scheduler.models import Scheduler
 from util.active_warnings import ActiveError, ActiveWarning
@@ -40,6 +41,7 @@ class SchedulerManager(object):
         self.hostname = None
         self.mesos_address = None
 
+        self._callback_durations = {}  # {Callback name: Histogram of durations since last status JSON}
         self._job_fin_count = 0  # Number of job executions finished since last status JSON
         self._job_launch_count = 0  # Number of new job executions scheduled since last status JSON
         self._last_json = now()  # Last time status JSON was generated
@@ -53,6 +55,20 @@ class SchedulerManager(object):
         self._state = None
         self._update_state()
 
+    def add_callback_duration(self, name, duration):
+        """Adds the duration of a Mesos callback to the histogram for that callback
+
+        :param name: The name of the callback
+        :type name: string
+        :param duration: How long the callback took
+        :type duration: :class:`datetime.timedelta`
+        """
+
+        with self._lock:
+            if name not in self._callback_durations:
+                self._callback_durations[name] = Histogram()
+            self._callback_durations[name].add(duration.total_seconds())
+
     def add_new_offer_count(self, new_offer_count):
         """Add count from a group of newly received offers
 
@@ -164,6 +180,8 @@ class SchedulerManager(object):
             task_fin_count = self._task_fin_count
             task_launch_count = self._task_launch_count
             task_update_count = self._task_update_count
+            callback_durations = self._callback_durations
+            self._callback_durations = {}
             self._last_json = when
             self._job_fin_count = 0
             self._job_launch_count = 0
@@ -186,7 +204,11 @@ class SchedulerManager(object):
         metrics_dict = {'new_offers_per_sec': new_offer_per_sec, 'task_updates_per_sec': task_update_per_sec,
                         'tasks_finished_per_sec': task_fin_per_sec, 'jobs_finished_per_sec': job_fin_per_sec,
                         'jobs_launched_per_sec': job_launch_per_sec, 'tasks_launched_per_sec': task_launch_per_sec,
-                        'offers_launched_per_sec': offer_launch_per_sec}
+                        'offers_launched_per_sec': offer_launch_per_sec, 'callbacks': {}}
+        for name, histogram in callback_durations.items():
+            callback_dict = histogram.get_summary_json()
+            callback_dict['count'] = histogram.count
+            metrics_dict['callbacks'][name] = callback_dict
 
         self._warning_inactive_old()
         warning_list = []
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.22 on 2026-10-17 12:00
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0013_auto_20181220_2014'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduler',
+            name='status_etag',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='scheduler',
+            name='status_updated',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -4,7 +4,7 @@ import logging
 
 import django.contrib.postgres.fields
 import mesos_api.api as mesos_api
-from django.db import models, transaction
+from django.db import connection, models, transaction
 from mesos_api.api import MesosError
 
 from queue.models import Queue, QUEUE_ORDER_FIFO, QUEUE_ORDER_LIFO
@@ -28,6 +28,25 @@ class SchedulerManager(models.Manager):
             logger.exception('Initial database import missing master scheduler: 1')
             raise
 
+    def get_status(self):
+        """Returns the scheduler status JSON along with its ETag and when the scheduler last updated it
+
+        :returns: A tuple of the status dict, the status ETag, and when the status was last updated (possibly None)
+        :rtype: tuple
+        """
+
+        return self.filter(pk=1).values_list('status', 'status_etag', 'status_updated').get()
+
+    def get_status_etag(self):
+        """Returns the ETag of the scheduler status JSON and when the scheduler last updated it, without reading the
+        status JSON itself
+
+        :returns: A tuple of the status ETag and when the status was last updated (possibly None)
+        :rtype: tuple
+        """
+
+        return self.filter(pk=1).values_list('status_etag', 'status_updated').get()
+
     def initialize_scheduler(self):
         """Initializes the scheduler table by creating a model if one does not already exist
         """
@@ -61,6 +80,31 @@ class SchedulerManager(models.Manager):
 
         self.all().update(**new_data)
 
+    def update_status(self, status_json, status_etag, when):
+        """Updates the scheduler status JSON
+
+        :param status_json: The serialized status JSON
+        :type status_json: string
+        :param status_etag: The ETag of the status JSON
+        :type status_etag: string
+        :param when: When the status was generated
+        :type when: :class:`datetime.datetime`
+        """
+
+        # The status is already serialized, so write it directly instead of having the JSON field serialize it again
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE scheduler SET status = %s::jsonb, status_etag = %s, status_updated = %s',
+                           [status_json, status_etag, when])
+
+    def update_status_timestamp(self, when):
+        """Updates when the scheduler last generated its status, indicating that the status JSON is still current
+
+        :param when: When the status was generated
+        :type when: :class:`datetime.datetime`
+        """
+
+        self.all().update(status_updated=when)
+
 
 class Scheduler(models.Model):
     """Represents a scheduler instance. There should only be a single instance of this and it's used for storing
@@ -70,6 +114,12 @@ class Scheduler(models.Model):
     :type is_paused: :class:`django.db.models.BooleanField()`
     :keyword num_message_handlers: The number of message handlers to have scheduled 
     :type num_message_handlers: :class:`django.db.models.IntegerField`
+    :keyword status: The JSON describing the status of the scheduler
+    :type status: :class:`django.contrib.postgres.fields.JSONField`
+    :keyword status_etag: The ETag of the status JSON, which only changes when the content of the status changes
+    :type status_etag: :class:`django.db.models.CharField`
+    :keyword status_updated: When the scheduler last generated its status
+    :type status_updated: :class:`django.db.models.DateTimeField`
     :keyword system_logging_level: The logging level for all scale system components
     :type system_logging_level: :class:`django.db.models.CharField`
     """
@@ -83,6 +133,8 @@ class Scheduler(models.Model):
     num_message_handlers = models.IntegerField(default=1)
     queue_mode = models.CharField(choices=QUEUE_MODES, default=QUEUE_ORDER_FIFO, max_length=50)
     status = django.contrib.postgres.fields.JSONField(default=dict)
+    status_etag = models.CharField(blank=True, max_length=32)
+    status_updated = models.DateTimeField(blank=True, null=True)
     system_logging_level = models.CharField(max_length=10, default='INFO')
 
     objects = SchedulerManager()
@@ -0,0 +1,75 @@
+"""Defines the class that manages pushing the times that nodes last offered resources to the database"""
+from __future__ import unicode_literals
+
+import logging
+import threading
+
+from node.models import Node
+from util.retry import retry_database_query
+
+
+logger = logging.getLogger(__name__)
+
+
+class NodeOfferTimeManager(object):
+    """This class coalesces the times that nodes last offered resources so that the Mesos offer callback does not write
+    to the database. Only the latest offer time of each node is kept and the times are pushed to the database in a
+    single update by a background thread. This class is thread-safe."""
+
+    def __init__(self):
+        """Constructor
+        """
+
+        self._offer_times = {}  # {Hostname: When the latest offer was received}
+        self._lock = threading.Lock()
+
+    def add_offer_times(self, hostnames, when):
+        """Records that the nodes with the given hostnames offered resources at the given time
+
+        :param hostnames: The hostnames of the nodes
+        :type hostnames: [string]
+        :param when: When the offers were received
+        :type when: :class:`datetime.datetime`
+        """
+
+        with self._lock:
+            for hostname in hostnames:
+                self._offer_times[hostname] = when
+
+    def push_to_database(self):
+        """Pushes the recent offer times to the database
+
+        :returns: The number of nodes whose offer times were pushed
+        :rtype: int
+        """
+
+        with self._lock:
+            offer_times = self._offer_times
+            self._offer_times = {}
+
+        if not offer_times:
+            return 0
+
+        try:
+            self._update_offer_times(offer_times)
+        except Exception:
+            # Keep the times that failed to push unless a newer time has been received since
+            with self._lock:
+                for hostname, when in offer_times.items():
+                    self._offer_times.setdefault(hostname, when)
+            raise
+
+        return len(offer_times)
+
+    @retry_database_query
+    def _update_offer_times(self, offer_times):
+        """Performs the update of the given offer times
+
+        :param offer_times: Dict of hostname to when the last offer was received from the node
+        :type offer_times: dict
+        """
+
+        Node.objects.update_node_offer_times(offer_times)
+
+
+offer_time_mgr = NodeOfferTimeManager()
@@ -164,13 +164,7 @@ class ResourceManager(object):
             agent_max = agent.get_max_resources()
             if not agent_max:
                 continue
-            for resource in agent_max.resources:
-                if resource.name in max_resources._resources:
-                    x = max_resources._resources[resource.name].value
-                    y = resource.value
-                    max_resources._resources[resource.name].value = max(x, y)
-                else:
-                    max_resources._resources[resource.name] = resource.copy()
+            max_resources.increase_up_to(agent_max)
 
         return max_resources
                 
@@ -19,7 +19,6 @@ from mesos_api import utils
 from mesos_api.offers import from_mesos_offer
 from mesos_api.tasks import RESOURCE_TYPE_SCALAR
 from mesoshttp.client import MesosClient
-from node.models import Node
 from node.resources.node_resources import NodeResources
 from node.resources.resource import ScalarResource
 from node.resources.gpu_manager import GPUManager
@@ -29,6 +28,7 @@ from scheduler.manager import scheduler_mgr
 from scheduler.messages.restart_scheduler import RestartScheduler
 from scheduler.node.agent import Agent
 from scheduler.node.manager import node_mgr
+from scheduler.node.offer_times import offer_time_mgr
 from scheduler.recon.manager import recon_mgr
 from scheduler.resources.manager import resource_mgr
 from scheduler.resources.offer import ResourceOffer
@@ -37,6 +37,7 @@ from scheduler.sync.workspace_manager import workspace_mgr
 from scheduler.task.manager import task_update_mgr
 from scheduler.tasks.manager import system_task_mgr
 from scheduler.threads.messaging import MessagingThread
+from scheduler.threads.node_offers import NodeOfferThread
 from scheduler.threads.recon import ReconciliationThread
 from scheduler.threads.schedule import SchedulingThread
 from scheduler.threads.scheduler_status import SchedulerStatusThread
@@ -64,6 +65,7 @@ class ScaleScheduler(object):
         self._master_host_address = None
 
         self._messaging_thread = None
+        self._node_offer_thread = None
         self._recon_thread = None
         self._scheduler_status_thread = None
         self._scheduling_thread = None
@@ -103,6 +105,12 @@ class ScaleScheduler(object):
         messaging_thread.start()
         self._threads.append(messaging_thread)
 
+        self._node_offer_thread = NodeOfferThread()
+        node_offer_thread = threading.Thread(target=self._node_offer_thread.run)
+        node_offer_thread.daemon = True
+        node_offer_thread.start()
+        self._threads.append(node_offer_thread)
+
         self._recon_thread = ReconciliationThread()
         recon_thread = threading.Thread(target=self._recon_thread.run)
         recon_thread.daemon = True
@@ -280,8 +288,7 @@ class ScaleScheduler(object):
         logger.debug("Agents registered.")
         resource_mgr.add_new_offers(resource_offers)
         logger.debug("Resource offers added.")
-        Node.objects.update_node_offers(offered_nodes, now())
-        logger.debug("Node offer times updated.")
+        offer_time_mgr.add_offer_times(offered_nodes, started)
 
         num_offers = len(resource_offers)
         logger.info('Received %d offer(s) with %s from %d node(s)', num_offers, total_resources, len(agents))
@@ -289,12 +296,7 @@ class ScaleScheduler(object):
             logger.warning('Skipped offers from roles that are not marked as accepted: %s', ','.join(skipped_roles))
         scheduler_mgr.add_new_offer_count(num_offers)
 
-        duration = now() - started
-        msg = 'Scheduler resourceOffers() took %.3f seconds'
-        if duration > ScaleScheduler.NORMAL_WARN_THRESHOLD:
-            logger.warning(msg, duration.total_seconds())
-        else:
-            logger.debug(msg, duration.total_seconds())
+        self._record_callback_duration('resourceOffers', started)
 
     def rescind(self, offer):
         """
@@ -309,12 +311,7 @@ class ScaleScheduler(object):
         offer_id = offer['offer_id']['value']
         resource_mgr.rescind_offers([offer_id])
 
-        duration = now() - started
-        msg = 'Scheduler offerRescinded() took %.3f seconds'
-        if duration > ScaleScheduler.NORMAL_WARN_THRESHOLD:
-            logger.warning(msg, duration.total_seconds())
-        else:
-            logger.debug(msg, duration.total_seconds())
+        self._record_callback_duration('offerRescinded', started)
 
     def update(self, status):
         """
@@ -385,12 +382,7 @@ class ScaleScheduler(object):
 
         scheduler_mgr.add_task_update_counts(was_task_finished, was_job_finished)
 
-        duration = now() - started
-        msg = 'Scheduler statusUpdate() took %.3f seconds'
-        if duration > ScaleScheduler.NORMAL_WARN_THRESHOLD:
-            logger.warning(msg, duration.total_seconds())
-        else:
-            logger.debug(msg, duration.total_seconds())
+        self._record_callback_duration('statusUpdate', started)
 
     def error(self, message):
         """
@@ -409,6 +401,7 @@ class ScaleScheduler(object):
 
         logger.info('Scheduler shutdown invoked, stopping background threads')
         self._messaging_thread.shutdown()
+        self._node_offer_thread.shutdown()
         self._recon_thread.shutdown()
         self._scheduler_status_thread.shutdown()
         self._scheduling_thread.shutdown()
@@ -423,6 +416,24 @@ class ScaleScheduler(object):
         if self._driver:
             self._driver.tearDown()
 
+    def _record_callback_duration(self, name, started):
+        """Records the duration of the given callback in the scheduler metrics and logs a warning if it was slow
+
+        :param name: The name of the callback
+        :type name: string
+        :param started: When the callback started
+        :type started: :class:`datetime.datetime`
+        """
+
+        duration = now() - started
+        scheduler_mgr.add_callback_duration(name, duration)
+
+        msg = 'Scheduler %s() took %.3f seconds'
+        if duration > ScaleScheduler.NORMAL_WARN_THRESHOLD:
+            logger.warning(msg, name, duration.total_seconds())
+        else:
+            logger.debug(msg, name, duration.total_seconds())
+
     def _reconcile_running_jobs(self):
         """Reconciles all currently running job executions with Mesos"""
 
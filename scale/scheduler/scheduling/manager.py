@@ -14,7 +14,8 @@ from job.execution.configuration.configurators import ScheduledExecutionConfigur
 from job.execution.job_exe import RunningJobExecution
 from job.execution.manager import job_exe_mgr
 from job.messages.running_jobs import create_running_job_messages
-from job.models import Job, JobExecution, JobExecutionEnd
+from job.models import Job, JobExecution, JobExecutionEnd, JobType, JobTypeRevision
+from job.seed.manifest import SeedManifest
 from job.tasks.manager import task_mgr
 from mesos_api.tasks import create_mesos_task
 from node.resources.node_resources import NodeResources
@@ -26,6 +27,7 @@ from scheduler.manager import scheduler_mgr, SchedulerWarning
 from scheduler.node.manager import node_mgr
 from scheduler.resources.agent import ResourceSet
 from scheduler.resources.manager import resource_mgr
+from scheduler.scheduling.scheduling_index import SchedulingIndex
 from scheduler.scheduling.scheduling_node import SchedulingNode
 from scheduler.sync.job_type_manager import job_type_mgr
 from scheduler.sync.workspace_manager import workspace_mgr
@@ -67,6 +69,7 @@ class SchedulingManager(object):
         """
 
         self._waiting_tasks = {}  # {Task ID: int}
+        self._job_interfaces = {}  # {Job type revision ID: SeedManifest}
 
     def perform_scheduling(self, client, when):
         """Organizes and analyzes the cluster resources, schedules new job executions, and launches tasks
@@ -135,6 +138,21 @@ class SchedulingManager(object):
                 offers = resources_offers[node.agent_id]
             node.add_allocated_offers(offers)
 
+    def _cache_job_interfaces(self, queues):
+        """Retrieves and parses the job interfaces for the job type revisions of the given queue models that have not
+        already been cached. Job type revisions never change, so their parsed interfaces are kept for later passes.
+
+        :param queues: The queue models annotated with their job type revision IDs
+        :type queues: :func:`list`
+        """
+
+        rev_ids = {queue.job_type_rev_id for queue in queues if queue.job_type_rev_id not in self._job_interfaces}
+        if not rev_ids:
+            return
+
+        for rev_id, manifest in JobTypeRevision.objects.filter(id__in=rev_ids).values_list('id', 'manifest'):
+            self._job_interfaces[rev_id] = SeedManifest(manifest, do_validate=False)
+
     def _calculate_job_type_limits(self, job_types, running_job_exes):
         """Calculates and returns the available job type limits
 
@@ -340,8 +358,14 @@ class SchedulingManager(object):
         started = now()
 
         max_cluster_resources = resource_mgr.get_max_available_resources()
-        for queue in Queue.objects.get_queue(scheduler_mgr.config.queue_mode, ignore_job_type_ids)[:QUEUE_LIMIT]:
-            job_exe = QueuedJobExecution(queue)
+        queue_mode = scheduler_mgr.config.queue_mode
+        queues = list(Queue.objects.get_queue_to_schedule(queue_mode, ignore_job_type_ids)[:QUEUE_LIMIT])
+        self._cache_job_interfaces(queues)
+        index = SchedulingIndex(nodes, job_type_resources)
+
+        prev_unmet_resources = {}  # {Job type ID: unmet resources before this pass}
+        for queue in queues:
+            job_exe = QueuedJobExecution(queue, self._job_interfaces.get(queue.job_type_rev_id))
 
             # Canceled job executions get processed as scheduled executions
             if job_exe.is_canceled:
@@ -353,7 +377,13 @@ class SchedulingManager(object):
                 logger.warning('There are no nodes available. Waiting to schedule until there are free resources...')
                 break
 
-            jt = job_type_mgr.get_job_type(queue.job_type.id)
+            # Make sure execution's job type has been synced to the scheduler
+            job_type_id = queue.job_type_id
+            if job_type_id not in job_types:
+                scheduler_mgr.warning_active(UNKNOWN_JOB_TYPE, description=UNKNOWN_JOB_TYPE.description % job_type_id)
+                continue
+
+            jt = job_types[job_type_id]
             name = INVALID_RESOURCES.name + jt.name
             title = INVALID_RESOURCES.title % jt.name
             warning = SchedulerWarning(name=name, title=title, description=None)
@@ -369,11 +399,12 @@ class SchedulingManager(object):
                 if resource.name.lower() == 'sharedmem':
                     logger.warning('Job type %s could not be scheduled due to required sharedmem resource', jt.name)
                     continue
-                if resource.name not in max_cluster_resources._resources:
+                max_value = max_cluster_resources.get_value(resource.name)
+                if max_value is None:
                     logger.warning('Job type %s could not be scheduled as resource %s does not exist in the available cluster resources', jt.name, resource.name)
                     # resource does not exist in cluster
                     invalid_resources.append(resource.name)
-                elif resource.value > max_cluster_resources._resources[resource.name].value:
+                elif resource.value > max_value:
                     # resource exceeds the max available from any node
                     insufficient_resources.append(resource.name)
 
@@ -385,22 +416,17 @@ class SchedulingManager(object):
                 description = INSUFFICIENT_RESOURCES.description % insufficient_resources
                 scheduler_mgr.warning_active(warning, description)
 
+            # Unmet resources are updated in memory now and written to the database at the end of this pass
             if invalid_resources or insufficient_resources:
                 invalid_resources.extend(insufficient_resources)
+                prev_unmet_resources.setdefault(job_type_id, jt.unmet_resources)
                 jt.unmet_resources = ','.join(invalid_resources)
-                jt.save(update_fields=["unmet_resources"])
                 continue
-            else:
+            elif jt.unmet_resources:
                 # reset unmet_resources flag
+                prev_unmet_resources.setdefault(job_type_id, jt.unmet_resources)
                 jt.unmet_resources = None
                 scheduler_mgr.warning_inactive(warning)
-                jt.save(update_fields=["unmet_resources"])
-
-            # Make sure execution's job type and workspaces have been synced to the scheduler
-            job_type_id = queue.job_type_id
-            if job_type_id not in job_types:
-                scheduler_mgr.warning_active(UNKNOWN_JOB_TYPE, description=UNKNOWN_JOB_TYPE.description % job_type_id)
-                continue
 
             workspace_names = job_exe.configuration.get_input_workspace_names()
             workspace_names.extend(job_exe.configuration.get_output_workspace_names())
@@ -418,11 +444,18 @@ class SchedulingManager(object):
                 continue
 
             # Try to schedule job execution and adjust job type limit if needed
-            if self._schedule_new_job_exe(job_exe, nodes, job_type_resources):
+            if self._schedule_new_job_exe(job_exe, nodes, index):
                 scheduled_job_executions.append(job_exe)
                 if job_type_id in job_type_limits:
                     job_type_limits[job_type_id] -= 1
 
+        # Write the unmet resources of the job types that changed during this pass
+        unmet_resources = {}
+        for job_type_id, prev_resources in prev_unmet_resources.items():
+            if job_types[job_type_id].unmet_resources != prev_resources:
+                unmet_resources[job_type_id] = job_types[job_type_id].unmet_resources
+        JobType.objects.set_unmet_resources(unmet_resources)
+
         duration = now() - started
         msg = 'Processing queue took %.3f seconds'
         if duration > PROCESS_QUEUE_WARN_THRESHOLD:
@@ -507,54 +540,32 @@ class SchedulingManager(object):
 
         return running_job_exes
 
-    def _schedule_new_job_exe(self, job_exe, nodes, job_type_resources):
+    def _schedule_new_job_exe(self, job_exe, nodes, index):
         """Schedules the given job execution on the queue on one of the available nodes, if possible
 
         :param job_exe: The job execution to schedule
         :type job_exe: :class:`queue.job_exe.QueuedJobExecution`
         :param nodes: The dict of available scheduling nodes stored by node ID
         :type nodes: dict
-        :param job_type_resources: The list of all of the job type resource requirements
-        :type job_type_resources: list
+        :param index: The index of the available scheduling nodes
+        :type index: :class:`scheduler.scheduling.scheduling_index.SchedulingIndex`
         :returns: True if scheduled, False otherwise
         :rtype: bool
         """
 
-        best_scheduling_node = None
-        best_scheduling_score = None
-        best_reservation_node = None
-        best_reservation_score = None
-
-        for node in nodes.values():
-            # Check node for scheduling this job execution
-            score = node.score_job_exe_for_scheduling(job_exe, job_type_resources)
-            if score is not None:
-                # Job execution could be scheduled on this node, check its score
-                if best_scheduling_node is None or score < best_scheduling_score:
-                    # This is the best node for scheduling so far
-                    best_scheduling_node = node
-                    best_scheduling_score = score
-                    best_reservation_node = None  # No need to reserve a node if we can schedule the job execution
-                    best_reservation_score = None  # No need to reserve a node if we can schedule the job execution
-
-            if best_scheduling_node is None:
-                # No nodes yet to schedule this job execution on, check whether we should reserve this node
-                score = node.score_job_exe_for_reservation(job_exe, job_type_resources)
-                if score is not None:
-                    # Job execution could reserve this node, check its score
-                    if best_reservation_node is None or score < best_reservation_score:
-                        # This is the best node to reserve so far
-                        best_reservation_node = node
-                        best_reservation_score = score
-
         # Schedule the job execution on the best node
+        best_scheduling_node = index.get_best_node_for_scheduling(job_exe)
         if best_scheduling_node:
             if best_scheduling_node.accept_new_job_exe(job_exe):
+                index.update_node(best_scheduling_node)
                 return True
+            return False
 
         # Could not schedule job execution, reserve a node to run this execution if possible
+        best_reservation_node = index.get_best_node_for_reservation(job_exe)
         if best_reservation_node:
             del nodes[best_reservation_node.node_id]
+            index.remove_node(best_reservation_node)
 
         return False
 
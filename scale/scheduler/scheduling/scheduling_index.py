@@ -0,0 +1,230 @@
+"""Defines the class that indexes scheduling nodes to find the best-fit node for new job executions"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import math
+
+from node.resources.node_resources import find_sufficient
+
+# Bucket for resource values that are zero or less, lower than the bucket of any positive value
+EMPTY_BUCKET = -2000
+
+
+class SchedulingIndex(object):
+    """This class indexes the nodes that are available for new job executions so that the best-fit node for each job
+    execution can be found without scoring every node. Nodes are bucketed by the power of two of their remaining cpus,
+    memory, disk, and GPUs so that only the buckets that may fit a job execution are examined, and the scores of each
+    node are cached until the node accepts a new job execution. The node selected is the same as scoring every node in
+    order: the lowest score wins with ties going to the earliest node.
+    """
+
+    def __init__(self, nodes, job_type_resources):
+        """Constructor
+
+        :param nodes: The dict of scheduling nodes stored by node ID for all nodes ready to accept new job executions
+        :type nodes: dict
+        :param job_type_resources: The list of all of the job type resource requirements
+        :type job_type_resources: list
+        """
+
+        self._job_type_resources = job_type_resources
+        self._grouped_job_type_resources = _group_resources(job_type_resources)  # [(NodeResources, count)]
+        self._nodes = {}  # {Node ID: (order, SchedulingNode)}
+        self._buckets = {}  # {Bucket key: set of node IDs}
+        self._node_buckets = {}  # {Node ID: Bucket key}
+        self._available_resources = {}  # {Node ID: NodeResources available to Scale on the node}
+        self._scheduling_scores = {}  # {Node ID: {Resources key: score}}
+        self._reservation_scores = {}  # {Node ID: {(Priority, resources key): score}}
+
+        for order, node in enumerate(nodes.values()):
+            self._nodes[node.node_id] = (order, node)
+            self._add_to_bucket(node)
+
+    def get_best_node_for_reservation(self, job_exe):
+        """Returns the best node to reserve for the given job execution, possibly None. This should only be called
+        when the job execution cannot be scheduled on any node.
+
+        :param job_exe: The job execution
+        :type job_exe: :class:`queue.job_exe.QueuedJobExecution`
+        :returns: The best node to reserve, possibly None
+        :rtype: :class:`scheduler.scheduling.scheduling_node.SchedulingNode`
+        """
+
+        key = (job_exe.priority, _get_resources_key(job_exe.required_resources))
+        best = None
+        for node_id, (order, node) in self._nodes.items():
+            scores = self._reservation_scores.setdefault(node_id, {})
+            if key not in scores:
+                scores[key] = node.score_job_exe_for_reservation(job_exe, self._job_type_resources)
+            score = scores[key]
+            if score is not None and (best is None or (score, order) < best[:2]):
+                best = (score, order, node)
+
+        return best[2] if best else None
+
+    def get_best_node_for_scheduling(self, job_exe):
+        """Returns the best node for scheduling the given job execution, possibly None if the job execution does not
+        fit on any node
+
+        :param job_exe: The job execution
+        :type job_exe: :class:`queue.job_exe.QueuedJobExecution`
+        :returns: The best node for scheduling, possibly None
+        :rtype: :class:`scheduler.scheduling.scheduling_node.SchedulingNode`
+        """
+
+        resources = job_exe.required_resources
+        required_bucket = _get_bucket_key(resources)
+        key = _get_resources_key(resources)
+        candidates = []
+        for bucket, node_ids in self._buckets.items():
+            if any(value < required for value, required in zip(bucket, required_bucket)):
+                continue
+            candidates.extend(self._nodes[node_id] for node_id in node_ids)
+
+        best = None
+        remaining_resources = [node.remaining_resources for _order, node in candidates]
+        for index in find_sufficient(remaining_resources, resources):
+            order, node = candidates[index]
+            score = self._score_node_for_scheduling(node, resources, key)
+            if best is None or (score, order) < best[:2]:
+                best = (score, order, node)
+
+        return best[2] if best else None
+
+    def remove_node(self, node):
+        """Removes the given node from the index
+
+        :param node: The node to remove
+        :type node: :class:`scheduler.scheduling.scheduling_node.SchedulingNode`
+        """
+
+        self._remove_from_bucket(node)
+        del self._nodes[node.node_id]
+
+    def update_node(self, node):
+        """Updates the index for the given node after it accepts a new job execution
+
+        :param node: The node that has changed
+        :type node: :class:`scheduler.scheduling.scheduling_node.SchedulingNode`
+        """
+
+        self._remove_from_bucket(node)
+        self._add_to_bucket(node)
+
+    def _add_to_bucket(self, node):
+        """Adds the given node to the bucket for its remaining resources
+
+        :param node: The node
+        :type node: :class:`scheduler.scheduling.scheduling_node.SchedulingNode`
+        """
+
+        bucket = _get_bucket_key(node.remaining_resources)
+        self._buckets.setdefault(bucket, set()).add(node.node_id)
+        self._node_buckets[node.node_id] = bucket
+
+    def _remove_from_bucket(self, node):
+        """Removes the given node from its bucket and clears its cached scores
+
+        :param node: The node
+        :type node: :class:`scheduler.scheduling.scheduling_node.SchedulingNode`
+        """
+
+        node_id = node.node_id
+        bucket = self._node_buckets.pop(node_id)
+        self._buckets[bucket].discard(node_id)
+        if not self._buckets[bucket]:
+            del self._buckets[bucket]
+        self._available_resources.pop(node_id, None)
+        self._scheduling_scores.pop(node_id, None)
+        self._reservation_scores.pop(node_id, None)
+
+    def _score_node_for_scheduling(self, node, resources, key):
+        """Returns the score (lower is better) for scheduling the given resources on the given node, which must have
+        enough remaining resources for them. This is the same score as
+        :meth:`scheduler.scheduling.scheduling_node.SchedulingNode.score_job_exe_for_scheduling`.
+
+        :param node: The node
+        :type node: :class:`scheduler.scheduling.scheduling_node.SchedulingNode`
+        :param resources: The resources to score
+        :type resources: :class:`node.resources.node_resources.NodeResources`
+        :param key: The key for the resources
+        :type key: tuple
+        :returns: The score
+        :rtype: int
+        """
+
+        node_id = node.node_id
+        scores = self._scheduling_scores.setdefault(node_id, {})
+        if key in scores:
+            return scores[key]
+
+        if node_id not in self._available_resources:
+            self._available_resources[node_id] = node.get_available_resources()
+        resources_available = self._available_resources[node_id].copy()
+        resources_available.subtract(resources)
+        score = 0
+        for job_type_resource, count in self._grouped_job_type_resources:
+            if resources_available.is_sufficient_to_meet(job_type_resource):
+                score += count
+
+        scores[key] = score
+        return score
+
+
+def _get_bucket(value):
+    """Returns the bucket for the given resource value. Buckets increase with the value so that a value can only meet
+    another value in the same or a lower bucket.
+
+    :param value: The resource value
+    :type value: float
+    :returns: The bucket
+    :rtype: int
+    """
+
+    if value <= 0.0:
+        return EMPTY_BUCKET
+    return math.frexp(value)[1]
+
+
+def _get_bucket_key(resources):
+    """Returns the bucket key for the given resources
+
+    :param resources: The resources
+    :type resources: :class:`node.resources.node_resources.NodeResources`
+    :returns: The bucket key
+    :rtype: tuple
+    """
+
+    return (_get_bucket(resources.cpus), _get_bucket(resources.mem), _get_bucket(resources.disk),
+            _get_bucket(resources.gpus))
+
+
+def _get_resources_key(resources):
+    """Returns a hashable key that is the same for equal resources
+
+    :param resources: The resources
+    :type resources: :class:`node.resources.node_resources.NodeResources`
+    :returns: The resources key
+    :rtype: tuple
+    """
+
+    return tuple(sorted((resource.name, resource.value) for resource in resources.resources))
+
+
+def _group_resources(job_type_resources):
+    """Groups the given job type resource requirements so that equal requirements are only checked once when scoring
+
+    :param job_type_resources: The list of all of the job type resource requirements
+    :type job_type_resources: list
+    :returns: The list of each distinct resource requirement and the number of job types with it
+    :rtype: list
+    """
+
+    grouped = {}  # {Resources key: [NodeResources, count]}
+    for resources in job_type_resources:
+        key = _get_resources_key(resources)
+        if key in grouped:
+            grouped[key][1] += 1
+        else:
+            grouped[key] = [resources, 1]
+    return [(resources, count) for resources, count in grouped.values()]
@@ -57,6 +57,15 @@ class SchedulingNode(object):
         if int(resource_set.offered_resources.gpus) > 0:
             GPUManager.define_node_gpus(self.node_id, int(resource_set.offered_resources.gpus))
 
+    @property
+    def remaining_resources(self):
+        """The resources on this node that have not yet been allocated, which should not be modified by the caller
+
+        :returns: The remaining resources
+        :rtype: :class:`node.resources.node_resources.NodeResources`
+        """
+
+        return self._remaining_resources
 
     def accept_job_exe_next_task(self, job_exe, waiting_tasks):
         """Asks the node if it can accept the next task for the given job execution. If the next task is waiting on
@@ -204,6 +213,20 @@ class SchedulingNode(object):
         self._allocated_queued_job_exes = []
         self._allocated_running_job_exes.extend(job_exes)
 
+    def get_available_resources(self):
+        """Returns our best guess of the total resources still available to Scale on this node, which is the watermark
+        resource level minus the resources for currently running and allocated tasks
+
+        :returns: The available resources
+        :rtype: :class:`node.resources.node_resources.NodeResources`
+        """
+
+        available_resources = NodeResources()
+        available_resources.add(self._watermark_resources)
+        available_resources.subtract(self._task_resources)
+        available_resources.subtract(self.allocated_resources)
+        return available_resources
+
     def reset_new_job_exes(self):
         """Resets the allocated new job executions and deallocates any resources associated with them
         """
@@ -318,12 +341,7 @@ class SchedulingNode(object):
         if not self._remaining_resources.is_sufficient_to_meet(resources):
             return None
 
-        # Calculate our best guess of the total resources still available to Scale on this node by starting with the
-        # watermark resource level and subtracting resources for currently running and allocated tasks
-        total_resources_available = NodeResources()
-        total_resources_available.add(self._watermark_resources)
-        total_resources_available.subtract(self._task_resources)
-        total_resources_available.subtract(self.allocated_resources)
+        total_resources_available = self.get_available_resources()
         total_resources_available.subtract(resources)
 
         # Score is the number of job types that can fit within the estimated resources on this node still available to
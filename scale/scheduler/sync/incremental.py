@@ -0,0 +1,64 @@
+"""Defines the class that tracks which models have changed since the scheduler last synced with the database"""
+from __future__ import unicode_literals
+
+import datetime
+
+from django.utils.timezone import now
+
+# How often all model IDs are checked to find deleted models and any changes missed by the incremental syncs
+FULL_SYNC_INTERVAL = datetime.timedelta(minutes=5)
+
+# Models modified this long before the previous sync are fetched again, covering clock skew between hosts and
+# transactions that committed after the previous sync with an earlier last_modified
+SYNC_OVERLAP = datetime.timedelta(minutes=1)
+
+
+class ModelChangeTracker(object):
+    """This class tracks the last_modified time of each model that the scheduler has synced so that each sync only
+    fetches the models that have changed. Models are found by their last_modified field, and on a longer interval the
+    IDs and last_modified times of all models are compared to find deleted models. This class is not thread-safe.
+    """
+
+    def __init__(self):
+        """Constructor
+        """
+
+        self._last_full_sync = None
+        self._last_modified = {}  # {Model ID: last_modified}
+        self._last_sync = None
+
+    def get_changes(self, queryset):
+        """Returns the models in the given queryset that have changed since the previous call, along with the IDs of
+        models that have been deleted
+
+        :param queryset: The queryset of all of the models, which must have a last_modified field
+        :type queryset: :class:`django.db.models.query.QuerySet`
+        :returns: A tuple of the list of changed models and the list of deleted model IDs
+        :rtype: tuple
+        """
+
+        when = now()
+        deleted_ids = []
+        if self._last_full_sync is None:
+            changed_models = list(queryset.iterator())
+            self._last_modified = {}
+            self._last_full_sync = when
+        elif when - self._last_full_sync >= FULL_SYNC_INTERVAL:
+            current = dict(queryset.values_list('id', 'last_modified'))
+            deleted_ids = [model_id for model_id in self._last_modified if model_id not in current]
+            changed_ids = [model_id for model_id, last_modified in current.items()
+                           if self._last_modified.get(model_id) != last_modified]
+            changed_models = list(queryset.filter(id__in=changed_ids).iterator()) if changed_ids else []
+            self._last_full_sync = when
+        else:
+            since = self._last_sync - SYNC_OVERLAP
+            changed_models = [model for model in queryset.filter(last_modified__gte=since).iterator()
+                              if self._last_modified.get(model.id) != model.last_modified]
+        self._last_sync = when
+
+        for model in changed_models:
+            self._last_modified[model.id] = model.last_modified
+        for model_id in deleted_ids:
+            del self._last_modified[model_id]
+
+        return changed_models, deleted_ids
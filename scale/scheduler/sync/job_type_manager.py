@@ -6,6 +6,7 @@ import threading
 
 from job.models import JobType
 from job.seed.exceptions import InvalidSeedMetadataDefinition
+from scheduler.sync.incremental import ModelChangeTracker
 
 # TODO: when we calculate duration averages for job types, create a new job type class that contains model, resources,
 # stats, etc
@@ -18,9 +19,22 @@ class JobTypeManager(object):
         """Constructor
         """
 
+        self._changes = ModelChangeTracker()
         self._job_type_resources = []
+        self._job_type_resources_by_id = {}  # {Job Type ID: Job type resources}
         self._job_types = {}  # {Job Type ID: Job Type}
         self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()  # Only one sync at a time since syncs track changes from the previous sync
+
+    def clear(self):
+        """Clears all job type data from the manager. This method is intended for testing only.
+        """
+
+        with self._lock:
+            self._changes = ModelChangeTracker()
+            self._job_type_resources = []
+            self._job_type_resources_by_id = {}
+            self._job_types = {}
 
     def generate_status_json(self, status_dict):
         """Generates the portion of the status JSON that describes the job types
@@ -73,24 +87,43 @@ class JobTypeManager(object):
             return dict(self._job_types)
 
     def sync_with_database(self):
-        """Syncs with the database to retrieve updated job type models
+        """Syncs with the database to retrieve updated job type models. Only the job types that have changed since the
+        last sync are retrieved and have their Seed manifests parsed.
         """
 
-        update_job_type_resources = []
+        with self._sync_lock:
+            self._sync_changes()
+
+    def _sync_changes(self):
+        """Retrieves the job types that have changed since the last sync and updates the manager with them. Caller
+        must have obtained the sync lock.
+        """
+
+        changed_job_types, deleted_ids = self._changes.get_changes(JobType.objects.all())
+
         updated_job_types = {}
-        for job_type in JobType.objects.all().iterator():
+        updated_job_type_resources = {}
+        invalid_ids = []
+        for job_type in changed_job_types:
             try:
                 job_type.title = job_type.get_title()
                 job_type.description = job_type.get_description()
+                updated_job_type_resources[job_type.id] = job_type.get_resources()
                 updated_job_types[job_type.id] = job_type
-                update_job_type_resources.append(job_type.get_resources())
             except InvalidSeedMetadataDefinition as ex:
                 logger.exception('Invalid Seed manifest for job type %s-%s, id=%d' % (job_type.name, job_type.version, job_type.id))
-                pass
+                invalid_ids.append(job_type.id)
+
+        if not updated_job_types and not deleted_ids and not invalid_ids:
+            return
 
         with self._lock:
-            self._job_type_resources = update_job_type_resources
-            self._job_types = updated_job_types
+            for job_type_id in deleted_ids + invalid_ids:
+                self._job_types.pop(job_type_id, None)
+                self._job_type_resources_by_id.pop(job_type_id, None)
+            self._job_types.update(updated_job_types)
+            self._job_type_resources_by_id.update(updated_job_type_resources)
+            self._job_type_resources = list(self._job_type_resources_by_id.values())
 
 
 job_type_mgr = JobTypeManager()
@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 
 import threading
 
+from scheduler.sync.incremental import ModelChangeTracker
 from storage.models import Workspace
 
 
@@ -13,7 +14,9 @@ class WorkspaceManager(object):
         """Constructor
         """
 
+        self._changes = ModelChangeTracker()
         self._workspaces = {}  # {Workspace Name: Workspace}
+        self._workspaces_by_id = {}  # {Workspace ID: Workspace}
         self._lock = threading.Lock()
 
     def get_workspaces(self):
@@ -27,12 +30,19 @@ class WorkspaceManager(object):
             return dict(self._workspaces)
 
     def sync_with_database(self):
-        """Syncs with the database to retrieve updated workspace models
+        """Syncs with the database to retrieve updated workspace models. Only the workspaces that have changed since the
+        last sync are retrieved.
         """
 
-        updated_workspaces = {}
-        for workspace in Workspace.objects.all().iterator():
-            updated_workspaces[workspace.name] = workspace
+        changed_workspaces, deleted_ids = self._changes.get_changes(Workspace.objects.all())
+        if not changed_workspaces and not deleted_ids:
+            return
+
+        for workspace_id in deleted_ids:
+            del self._workspaces_by_id[workspace_id]
+        for workspace in changed_workspaces:
+            self._workspaces_by_id[workspace.id] = workspace
+        updated_workspaces = {workspace.name: workspace for workspace in self._workspaces_by_id.values()}
 
         with self._lock:
             self._workspaces = updated_workspaces
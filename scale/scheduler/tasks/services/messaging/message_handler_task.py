@@ -1,6 +1,8 @@
 """Defines the class for a message handler task"""
 from __future__ import unicode_literals
 
+from django.conf import settings
+
 from job.tasks.base_task import AtomicCounter
 from node.resources.node_resources import NodeResources
 from node.resources.resource import Cpus, Mem
@@ -29,6 +31,10 @@ class MessageHandlerTask(SystemTask):
         self._add_database_docker_params()
         self._add_messaging_docker_params()
         self._command_arguments = 'scale_message_handler'
+        if settings.MESSAGE_HANDLER_WORKERS > 1:
+            self._command_arguments += ' --workers %d' % settings.MESSAGE_HANDLER_WORKERS
+            if settings.MESSAGE_HANDLER_PREFETCH:
+                self._command_arguments += ' --prefetch %d' % settings.MESSAGE_HANDLER_PREFETCH
 
         # System task properties
         self.task_type = 'message-handler'
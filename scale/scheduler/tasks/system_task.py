@@ -1,6 +1,7 @@
 """Defines the abstract base class for all system tasks"""
 from __future__ import unicode_literals
 
+import json
 from abc import ABCMeta
 
 from django.conf import settings
@@ -59,5 +60,10 @@ class SystemTask(Task):
             messaging_params.append(DockerParameter('env', 'SCALE_BROKER_URL=%s' % broker_url))
         if queue_name:
             messaging_params.append(DockerParameter('env', 'SCALE_QUEUE_NAME=%s' % queue_name))
+        if settings.MESSAGE_QUEUE_ROUTES:
+            queue_routes = json.dumps(settings.MESSAGE_QUEUE_ROUTES, separators=(',', ':'))
+            messaging_params.append(DockerParameter('env', 'SCALE_QUEUE_ROUTES=%s' % queue_routes))
+        if settings.INCREMENTAL_RECIPE_METRICS:
+            messaging_params.append(DockerParameter('env', 'INCREMENTAL_RECIPE_METRICS=true'))
 
         self._docker_params.extend(messaging_params)
@@ -0,0 +1,39 @@
+from __future__ import unicode_literals
+
+import datetime
+
+import django
+from django.test import TestCase
+from django.utils.timezone import now
+
+from node.models import Node
+from node.test import utils as node_test_utils
+from scheduler.node.offer_times import NodeOfferTimeManager
+
+
+class TestNodeOfferTimeManager(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.node_1 = node_test_utils.create_node(hostname='host_1')
+        self.node_2 = node_test_utils.create_node(hostname='host_2')
+        self.node_3 = node_test_utils.create_node(hostname='host_3')
+
+    def test_push_to_database(self):
+        """Tests pushing the latest offer time of each node to the database"""
+
+        when_1 = now() - datetime.timedelta(minutes=2)
+        when_2 = when_1 + datetime.timedelta(minutes=1)
+        manager = NodeOfferTimeManager()
+        manager.add_offer_times(['host_1', 'host_2'], when_1)
+        manager.add_offer_times(['host_2'], when_2)
+
+        self.assertEqual(manager.push_to_database(), 2)
+
+        self.assertEqual(Node.objects.get(id=self.node_1.id).last_offer_received, when_1)
+        self.assertEqual(Node.objects.get(id=self.node_2.id).last_offer_received, when_2)
+        self.assertEqual(Node.objects.get(id=self.node_3.id).last_offer_received, self.node_3.last_offer_received)
+
+        # Offer times are only pushed once
+        self.assertEqual(manager.push_to_database(), 0)
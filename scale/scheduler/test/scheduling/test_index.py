@@ -0,0 +1,110 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+
+import django
+from django.test import TestCase
+from mock import MagicMock
+
+import queue.test.utils as queue_test_utils
+from node.resources.gpu_manager import GPUManager
+from node.resources.node_resources import NodeResources
+from node.resources.resource import Cpus, Mem
+from queue.job_exe import QueuedJobExecution
+from scheduler.resources.agent import ResourceSet
+from scheduler.scheduling.scheduling_index import SchedulingIndex
+from scheduler.scheduling.scheduling_node import SchedulingNode
+
+
+class TestSchedulingIndex(TestCase):
+
+    def setUp(self):
+        django.setup()
+        GPUManager.reset_gpu_dict()
+
+    def _create_node(self, node_id, cpus, mem, watermark_cpus=None):
+        """Creates a scheduling node with the given offered resources"""
+
+        node = MagicMock()
+        node.hostname = 'host_%d' % node_id
+        node.id = node_id
+        node.is_ready_for_new_job = MagicMock()
+        node.is_ready_for_new_job.return_value = True
+        node.is_ready_for_next_job_task = MagicMock()
+        node.is_ready_for_next_job_task.return_value = True
+        offered_resources = NodeResources([Cpus(cpus), Mem(mem)])
+        watermark_resources = NodeResources([Cpus(watermark_cpus if watermark_cpus else cpus), Mem(mem)])
+        resource_set = ResourceSet(offered_resources, NodeResources(), watermark_resources)
+        return SchedulingNode('agent_%d' % node_id, node, [], [], resource_set)
+
+    def _create_job_exe(self, cpus, mem, priority=100):
+        """Creates a queued job execution requiring the given resources"""
+
+        queue = queue_test_utils.create_queue(priority=priority, cpus_required=cpus, mem_required=mem,
+                                              disk_in_required=0.0, disk_out_required=0.0, disk_total_required=0.0)
+        return QueuedJobExecution(queue)
+
+    def test_best_fit(self):
+        """Tests that the index selects the same best-fit node as scoring every node"""
+
+        node_1 = self._create_node(1, 64.0, 65536.0)
+        node_2 = self._create_node(2, 4.0, 4096.0)
+        node_3 = self._create_node(3, 1.0, 1024.0)
+        nodes = OrderedDict([(node_1.node_id, node_1), (node_2.node_id, node_2), (node_3.node_id, node_3)])
+        job_type_resources = [NodeResources([Cpus(1.0), Mem(1024.0)]), NodeResources([Cpus(1.0), Mem(1024.0)]),
+                              NodeResources([Cpus(16.0), Mem(16384.0)])]
+        index = SchedulingIndex(nodes, job_type_resources)
+        job_exe = self._create_job_exe(2.0, 2048.0)
+
+        # Node 3 is too small and node 2 leaves the least room for other job types
+        self.assertEqual(node_1.score_job_exe_for_scheduling(job_exe, job_type_resources), 3)
+        self.assertEqual(node_2.score_job_exe_for_scheduling(job_exe, job_type_resources), 2)
+        self.assertIsNone(node_3.score_job_exe_for_scheduling(job_exe, job_type_resources))
+        self.assertEqual(index.get_best_node_for_scheduling(job_exe), node_2)
+
+    def test_tie_goes_to_first_node(self):
+        """Tests that the earliest node wins when nodes have the same score"""
+
+        node_1 = self._create_node(1, 4.0, 4096.0)
+        node_2 = self._create_node(2, 4.0, 4096.0)
+        nodes = OrderedDict([(node_2.node_id, node_2), (node_1.node_id, node_1)])
+        index = SchedulingIndex(nodes, [])
+
+        self.assertEqual(index.get_best_node_for_scheduling(self._create_job_exe(1.0, 1024.0)), node_2)
+
+    def test_update_node(self):
+        """Tests that the index is updated after a node accepts a job execution"""
+
+        node_1 = self._create_node(1, 4.0, 4096.0)
+        node_2 = self._create_node(2, 8.0, 8192.0)
+        nodes = OrderedDict([(node_1.node_id, node_1), (node_2.node_id, node_2)])
+        index = SchedulingIndex(nodes, [NodeResources([Cpus(4.0), Mem(4096.0)])])
+
+        job_exe_1 = self._create_job_exe(3.0, 3072.0)
+        self.assertEqual(index.get_best_node_for_scheduling(job_exe_1), node_1)
+        self.assertTrue(node_1.accept_new_job_exe(job_exe_1))
+        index.update_node(node_1)
+
+        # Node 1 no longer fits an identical job execution
+        job_exe_2 = self._create_job_exe(3.0, 3072.0)
+        self.assertEqual(index.get_best_node_for_scheduling(job_exe_2), node_2)
+
+    def test_reservation(self):
+        """Tests reserving a node for a job execution that does not fit on any node"""
+
+        node_1 = self._create_node(1, 4.0, 4096.0, watermark_cpus=32.0)
+        node_2 = self._create_node(2, 8.0, 8192.0, watermark_cpus=16.0)
+        nodes = OrderedDict([(node_1.node_id, node_1), (node_2.node_id, node_2)])
+        index = SchedulingIndex(nodes, [NodeResources([Cpus(8.0), Mem(1024.0)])])
+
+        # Both nodes could eventually run the job execution, node 2 leaves no room for the other job type
+        job_exe = self._create_job_exe(12.0, 1024.0)
+        self.assertIsNone(index.get_best_node_for_scheduling(job_exe))
+        self.assertEqual(index.get_best_node_for_reservation(job_exe), node_2)
+
+        index.remove_node(node_2)
+        self.assertEqual(index.get_best_node_for_reservation(job_exe), node_1)
+
+        job_exe = self._create_job_exe(64.0, 1024.0)
+        self.assertIsNone(index.get_best_node_for_reservation(job_exe))
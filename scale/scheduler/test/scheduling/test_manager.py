@@ -70,6 +70,7 @@ class TestSchedulingManager(TestCase):
                                                      disk_out_required=45.0, disk_total_required=445.0)
         self.queue_large = queue_test_utils.create_queue(resources=NodeResources([Cpus(125.0), Mem(12048.0), Disk(12048.0)]))
 
+        job_type_mgr.clear()
         job_type_mgr.sync_with_database()
 
     def test_successful_schedule(self):
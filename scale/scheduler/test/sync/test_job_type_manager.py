@@ -3,6 +3,9 @@ from __future__ import unicode_literals
 import django
 from django.test import TestCase
 
+import job.test.utils as job_test_utils
+from job.models import JobType
+from scheduler.sync.incremental import FULL_SYNC_INTERVAL
 from scheduler.sync.job_type_manager import JobTypeManager
 
 
@@ -22,3 +25,27 @@ class TestJobTypeManager(TestCase):
         manager.generate_status_json(status_dict)
 
         self.assertEqual(len(status_dict['job_types']), 1)
+
+    def test_incremental_sync(self):
+        """Tests that only changed job types are synced and deleted job types are removed on a full sync"""
+
+        manager = JobTypeManager()
+        manager.sync_with_database()
+        job_type = job_test_utils.create_seed_job_type()
+
+        manager.sync_with_database()
+        self.assertFalse(manager.get_job_type(job_type.id).is_paused)
+        self.assertEqual(len(manager.get_job_type_resources()), 2)
+
+        job_type.is_paused = True
+        job_type.save()
+        manager.sync_with_database()
+        self.assertTrue(manager.get_job_type(job_type.id).is_paused)
+        self.assertEqual(len(manager.get_job_type_resources()), 2)
+
+        # Deleted job types are found by the next full sync
+        JobType.objects.filter(id=job_type.id).delete()
+        manager._changes._last_full_sync -= FULL_SYNC_INTERVAL
+        manager.sync_with_database()
+        self.assertIsNone(manager.get_job_type(job_type.id))
+        self.assertEqual(len(manager.get_job_type_resources()), 1)
@@ -11,6 +11,7 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from scheduler.models import Scheduler
 from scheduler.threads.scheduler_status import SchedulerStatusThread
+from scheduler.views import StatusView
 from util import rest
 from util.parse import datetime_to_string
 
@@ -131,6 +132,7 @@ class TestStatusView(APITestCase):
     def setUp(self):
         django.setup()
         Scheduler.objects.create(id=1)
+        StatusView._cached_status = (None, None)
 
         rest.login_client(self.client)
 
@@ -176,6 +178,56 @@ class TestStatusView(APITestCase):
         self.assertEqual(result['timestamp'], datetime_to_string(when))
         self.assertDictEqual(result['vault'], {u'status': u'Secrets Not Configured', u'message': u'', u'sealed': False})
 
+    @patch('messaging.manager.CommandMessageManager.get_queue_size')
+    def test_status_not_modified(self, mock_get_queue_size):
+        """Test getting scheduler status that has not changed since the client last requested it"""
+
+        mock_get_queue_size.return_value = 0
+
+        when = now()
+        status_thread = SchedulerStatusThread()
+        status_thread._generate_status_json(when)
+
+        url = '/%s/status/' % self.api
+        response = self.client.generic('GET', url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+
+        # The full status is not written again within the write interval, so only its timestamp is updated
+        status_thread._generate_status_json(when + datetime.timedelta(seconds=5))
+        self.assertEqual(Scheduler.objects.get_status()[0]['timestamp'], datetime_to_string(when))
+
+        response = self.client.generic('GET', url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, response.content)
+        self.assertEqual(response['ETag'], etag)
+
+        # Weak comparison also matches the ETag without its weak prefix
+        response = self.client.generic('GET', url, HTTP_IF_NONE_MATCH='"other", %s' % etag[2:])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, response.content)
+
+        response = self.client.generic('GET', url, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        result = json.loads(response.content)
+        self.assertEqual(result['timestamp'], datetime_to_string(when + datetime.timedelta(seconds=5)))
+
+    @patch('messaging.manager.CommandMessageManager.get_queue_size')
+    def test_status_idle_etag(self, mock_get_queue_size):
+        """Test that the status ETag does not change between loops of an idle scheduler"""
+
+        mock_get_queue_size.return_value = 0
+
+        when = now()
+        status_thread = SchedulerStatusThread()
+        status_thread._generate_status_json(when)
+        etag = Scheduler.objects.get_status_etag()[0]
+
+        # Loops past the write interval are still unchanged
+        status_thread._generate_status_json(when + datetime.timedelta(seconds=20))
+        self.assertEqual(Scheduler.objects.get_status_etag()[0], etag)
+        status_thread._generate_status_json(when + datetime.timedelta(seconds=40))
+        self.assertEqual(Scheduler.objects.get_status_etag()[0], etag)
+
 
 class TestVersionView(APITestCase):
     api = 'v6'
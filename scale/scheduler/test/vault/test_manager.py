@@ -0,0 +1,76 @@
+from __future__ import unicode_literals
+
+import django
+from django.test import TestCase
+from mock import patch
+
+from scheduler.vault.manager import SecretsManager
+from vault.exceptions import InvalidSecretsAuthorization, InvalidSecretsRequest
+
+
+class TestSecretsManager(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    @patch('scheduler.vault.manager.SecretsHandler')
+    def test_sync_with_backend(self, mock_handler_class):
+        """Tests syncing secrets, reusing the handler and keeping secrets that have not changed"""
+
+        handler = mock_handler_class.return_value
+        handler.is_token_expired.return_value = False
+        handler.list_job_types.return_value = ['job-a', 'job-b']
+        handler.get_changed_job_type_secrets.side_effect = lambda job, etag: ({'name': job}, 'etag-%s' % job)
+
+        manager = SecretsManager()
+        manager.sync_with_backend()
+        self.assertDictEqual(manager.retrieve_job_type_secrets('job-a'), {'name': 'job-a'})
+        self.assertDictEqual(manager.retrieve_job_type_secrets('job-b'), {'name': 'job-b'})
+
+        # Secrets for job-a have not changed and job-b fails
+        def get_changed(job, etag):
+            if job == 'job-b':
+                raise InvalidSecretsRequest('Invalid request return: Status Code 500', 500)
+            self.assertEqual(etag, 'etag-job-a')
+            return None, etag
+        handler.get_changed_job_type_secrets.side_effect = get_changed
+
+        manager.sync_with_backend()
+        self.assertDictEqual(manager.retrieve_job_type_secrets('job-a'), {'name': 'job-a'})
+        self.assertDictEqual(manager.retrieve_job_type_secrets('job-b'), {})
+        self.assertEqual(mock_handler_class.call_count, 1)
+
+        with self.settings(SECRETS_URL='http://127.0.0.1:8200'):
+            status_dict = {}
+            manager.generate_status_json(status_dict)
+        self.assertEqual(status_dict['vault']['status'], 'Secret Error')
+
+    @patch('scheduler.vault.manager.SecretsHandler')
+    def test_sync_expired_token(self, mock_handler_class):
+        """Tests that a new handler is created when the token of the current handler expires"""
+
+        handler = mock_handler_class.return_value
+        handler.is_token_expired.return_value = False
+        handler.list_job_types.return_value = []
+
+        manager = SecretsManager()
+        manager.sync_with_backend()
+        handler.is_token_expired.return_value = True
+        manager.sync_with_backend()
+
+        self.assertEqual(mock_handler_class.call_count, 2)
+
+    @patch('scheduler.vault.manager.SecretsHandler')
+    def test_sync_job_authorization_error(self, mock_handler_class):
+        """Tests that a new handler is created after retrieving job type secrets is no longer authorized"""
+
+        handler = mock_handler_class.return_value
+        handler.is_token_expired.return_value = False
+        handler.list_job_types.return_value = ['job-a']
+        handler.get_changed_job_type_secrets.side_effect = InvalidSecretsAuthorization('Token revoked')
+
+        manager = SecretsManager()
+        manager.sync_with_backend()
+        manager.sync_with_backend()
+
+        self.assertEqual(mock_handler_class.call_count, 2)
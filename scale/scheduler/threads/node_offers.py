@@ -0,0 +1,33 @@
+"""Defines the class that manages the node offer time background thread"""
+from __future__ import unicode_literals
+
+import datetime
+import logging
+
+from scheduler.node.offer_times import offer_time_mgr
+from scheduler.threads.base_thread import BaseSchedulerThread
+
+
+THROTTLE = datetime.timedelta(seconds=5)
+WARN_THRESHOLD = datetime.timedelta(milliseconds=500)
+
+logger = logging.getLogger(__name__)
+
+
+class NodeOfferThread(BaseSchedulerThread):
+    """This class manages the background thread that pushes the times that nodes last offered resources to the
+    database"""
+
+    def __init__(self):
+        """Constructor
+        """
+
+        super(NodeOfferThread, self).__init__('Node offer', THROTTLE, WARN_THRESHOLD)
+
+    def _execute(self):
+        """See :meth:`scheduler.threads.base_thread.BaseSchedulerThread._execute`
+        """
+
+        logger.debug('Entering %s _execute...', __name__)
+
+        offer_time_mgr.push_to_database()
@@ -1,13 +1,17 @@
 """Defines the class that manages the scheduler status background thread"""
 from __future__ import unicode_literals
 
+import copy
 import datetime
+import hashlib
+import json
 import logging
 
 from django.utils.timezone import now
 
 from job.execution.manager import job_exe_mgr
 from job.tasks.manager import task_mgr
+from messaging.metrics import messaging_metrics_mgr
 from scheduler.dependencies.manager import dependency_mgr
 from scheduler.manager import scheduler_mgr
 from scheduler.models import Scheduler
@@ -20,6 +24,10 @@ from scheduler.vault.manager import secrets_mgr
 from util.parse import datetime_to_string
 
 
+# The full status JSON is written to the database at most this often, in between only its timestamp is updated. The
+# values that change on every loop (rate metrics and refresh times) are not part of the status ETag and are refreshed
+# in the database at this interval.
+STATUS_WRITE_INTERVAL = datetime.timedelta(seconds=15)
 THROTTLE = datetime.timedelta(seconds=5)
 WARN_THRESHOLD = datetime.timedelta(milliseconds=500)
 
@@ -35,6 +43,11 @@ class SchedulerStatusThread(BaseSchedulerThread):
 
         super(SchedulerStatusThread, self).__init__('Scheduler status', THROTTLE, WARN_THRESHOLD)
 
+        self._last_status_write = None
+        self._volatile_hash = None
+        self._sections = {}  # {Section name: (Copy of section, serialized section JSON)}
+        self._status_etag = None
+
     def _execute(self):
         """See :meth:`scheduler.threads.base_thread.BaseSchedulerThread._execute`
         """
@@ -60,4 +73,77 @@ class SchedulerStatusThread(BaseSchedulerThread):
         job_type_mgr.generate_status_json(status_dict)
         secrets_mgr.generate_status_json(status_dict)
         dependency_mgr.generate_status_json(status_dict)
-        Scheduler.objects.all().update(status=status_dict)
+        messaging_metrics_mgr.generate_status_json(status_dict)
+
+        # The timestamp, the scheduler's rate metrics (recounted on every call), and the dependency refresh time change
+        # without the status itself changing, so they are left out of the ETag
+        timestamp = status_dict.pop('timestamp')
+        volatile_dict = {'last_updated': status_dict.pop('last_updated', None),
+                         'metrics': status_dict['scheduler'].pop('metrics')}
+        sections_json = self._serialize_sections(status_dict)
+        status_etag = hashlib.md5(', '.join(sections_json).encode('utf-8')).hexdigest()
+        volatile_json = json.dumps(volatile_dict, sort_keys=True)
+        volatile_hash = hashlib.md5(volatile_json.encode('utf-8')).hexdigest()
+
+        is_changed = status_etag != self._status_etag or volatile_hash != self._volatile_hash
+        if is_changed and (not self._last_status_write or when - self._last_status_write >= STATUS_WRITE_INTERVAL):
+            status_dict['scheduler']['metrics'] = volatile_dict['metrics']
+            status_json = self._serialize_status(timestamp, sections_json, status_dict['scheduler'],
+                                                 volatile_dict['last_updated'])
+            Scheduler.objects.update_status(status_json, status_etag, when)
+            self._last_status_write = when
+            self._status_etag = status_etag
+            self._volatile_hash = volatile_hash
+        else:
+            Scheduler.objects.update_status_timestamp(when)
+
+    @staticmethod
+    def _serialize_status(timestamp, sections_json, scheduler_dict, last_updated):
+        """Serializes the full status JSON from its serialized sections and the values left out of its ETag
+
+        :param timestamp: The status timestamp
+        :type timestamp: string
+        :param sections_json: The serialized sections, see _serialize_sections()
+        :type sections_json: [string]
+        :param scheduler_dict: The scheduler section, including its metrics
+        :type scheduler_dict: dict
+        :param last_updated: When the dependency statuses were last refreshed, possibly None
+        :type last_updated: string
+        :returns: The status JSON
+        :rtype: string
+        """
+
+        status_json = ['"timestamp": %s' % json.dumps(timestamp)]
+        if last_updated is not None:
+            status_json.append('"last_updated": %s' % json.dumps(last_updated))
+        for section_json in sections_json:
+            if section_json.startswith('"scheduler": '):
+                section_json = '"scheduler": %s' % json.dumps(scheduler_dict, sort_keys=True)
+            status_json.append(section_json)
+        return '{%s}' % ', '.join(status_json)
+
+    def _serialize_sections(self, status_dict):
+        """Serializes the sections of the given status JSON. Each section is only serialized again when it has changed
+        since the last time the status was generated.
+
+        :param status_dict: The status JSON, without its timestamp
+        :type status_dict: dict
+        :returns: The serialized name and value of each section, suitable for the body of a JSON object
+        :rtype: [string]
+        """
+
+        sections_json = []
+        for name in sorted(status_dict.keys()):
+            section = status_dict[name]
+            cached = self._sections.get(name)
+            if not cached or cached[0] != section:
+                # Copy the section since some managers include their own dicts in the status, which they may change
+                cached = (copy.deepcopy(section), json.dumps(section, sort_keys=True))
+                self._sections[name] = cached
+            sections_json.append('%s: %s' % (json.dumps(name), cached[1]))
+
+        for name in self._sections.keys():
+            if name not in status_dict:
+                del self._sections[name]
+
+        return sections_json
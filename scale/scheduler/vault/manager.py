@@ -2,10 +2,12 @@
 from __future__ import unicode_literals
 
 import logging
+import threading
+from multiprocessing.pool import ThreadPool
 
 from django.conf import settings
 from vault.exceptions import InvalidSecretsAuthorization, InvalidSecretsRequest, InvalidSecretsToken, InvalidSecretsValue
-from vault.secrets_handler import SecretsHandler
+from vault.secrets_handler import MAX_CONCURRENT_REQUESTS, SecretsHandler
 
 
 logger = logging.getLogger(__name__)
@@ -19,6 +21,11 @@ class SecretsManager(object):
         """
 
         self._all_secrets = {}
+        self._etags = {}  # {Job name: ETag of the cached secrets}
+        self._handler = None
+        self._lock = threading.Lock()
+        self._status = ('Ok', False, '')  # (Status, Is sealed, Message) from the latest sync
+        self._thread_pool = None
 
     def retrieve_job_type_secrets(self, job_name):
         """Get the secret values from the cache pertaining to the provided job
@@ -37,28 +44,45 @@ class SecretsManager(object):
         return secret_values
 
     def sync_with_backend(self):
-        """Gather all job type secrets that are stored in the secrets backend.
+        """Gather all job type secrets that are stored in the secrets backend. The secrets of each job type are
+        retrieved concurrently and secrets that have not changed since the previous sync are kept.
         """
 
-        updated_secrets = {}
         try:
-            sh = SecretsHandler()
-            jobs_with_secrets = sh.list_job_types()
+            handler = self._get_handler()
+            jobs_with_secrets = handler.list_job_types()
         except (InvalidSecretsAuthorization, InvalidSecretsRequest, InvalidSecretsToken) as e:
-            # do not spam logs with exception, this will be captured once in status json
-            # logger.exception('Secrets Error: %s', e.message)
+            self._handler = None  # Authenticate again on the next sync
+            self._set_status_for_error(e)
             return
 
-        for job in jobs_with_secrets:
-            try:
-                job_secrets = sh.get_job_type_secrets(job)
-                updated_secrets[job] = job_secrets
-            except (InvalidSecretsAuthorization, InvalidSecretsRequest, InvalidSecretsValue) as e:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPool(MAX_CONCURRENT_REQUESTS)
+        etags = self._etags
+        results = self._thread_pool.map(lambda job: self._get_job_type_secrets(handler, job, etags.get(job)),
+                                        jobs_with_secrets)
+
+        updated_secrets = {}
+        updated_etags = {}
+        status = ('Ok', False, '')
+        for job, (job_secrets, etag, error) in zip(jobs_with_secrets, results):
+            if error:
+                if isinstance(error, (InvalidSecretsAuthorization, InvalidSecretsToken)):
+                    self._handler = None  # Authenticate again on the next sync
                 # do not spam logs with exception, this will be captured once in status json
-                # logger.exception('Secrets Error: %s', e.message)
+                if status[0] == 'Ok':
+                    status = self._get_status_for_error(error)
                 continue
-                
-        self._all_secrets = updated_secrets
+            if job_secrets is None:  # Unchanged since the previous sync
+                job_secrets = self._all_secrets.get(job, {})
+            updated_secrets[job] = job_secrets
+            if etag:
+                updated_etags[job] = etag
+
+        with self._lock:
+            self._all_secrets = updated_secrets
+            self._etags = updated_etags
+            self._status = status
 
     def generate_status_json(self, status_dict):
         """Generates the portion of the status JSON that describes the secrets settings and metrics
@@ -67,62 +91,80 @@ class SecretsManager(object):
         :type status_dict: dict
         """
 
-        status_dict['vault'] = {}
-        status_dict['vault']['status'] = 'Ok'
-        status_dict['vault']['sealed'] = False
-        status_dict['vault']['message'] = ''
         if not settings.SECRETS_URL:
-            status_dict['vault']['status'] = 'Secrets Not Configured'
-            status_dict['vault']['sealed'] = False
-            status_dict['vault']['message'] = ''
+            status_dict['vault'] = {'status': 'Secrets Not Configured', 'sealed': False, 'message': ''}
             return
+
+        with self._lock:
+            status, sealed, message = self._status
+        status_dict['vault'] = {'status': status, 'sealed': sealed, 'message': message}
+
+    def _get_handler(self):
+        """Returns the secrets handler, creating a new one if it does not exist yet or its token has expired
+
+        :returns: The secrets handler
+        :rtype: :class:`vault.secrets_handler.SecretsHandler`
+        """
+
+        if self._handler is None or self._handler.is_token_expired():
+            self._handler = SecretsHandler()
+        return self._handler
+
+    def _get_job_type_secrets(self, handler, job_name, etag):
+        """Retrieves the secrets of the given job type if they have changed, catching any secrets error. This is called
+        from the thread pool.
+
+        :param handler: The secrets handler
+        :type handler: :class:`vault.secrets_handler.SecretsHandler`
+        :param job_name: The name of the job type secrets
+        :type job_name: string
+        :param etag: The ETag of the cached secrets, possibly None
+        :type etag: string
+        :returns: A tuple of the secrets (None if unchanged), their ETag, and any secrets error
+        :rtype: tuple
+        """
+
         try:
-            sh = SecretsHandler()
-            jobs_with_secrets = sh.list_job_types()
-        except (InvalidSecretsAuthorization) as e:
-            logger.exception('Secrets Error: %s', e.message)
-            status_dict['vault']['status'] = 'Secrets Improperly Configured'
-            status_dict['vault']['sealed'] = False
-            status_dict['vault']['message'] = e.message
-            return
-        except (InvalidSecretsRequest) as e:
-            logger.exception('Secrets Error: %s', e.message)
-            if 'is currently sealed' in e.message:
-                status_dict['vault']['status'] = 'Sealed'
-                status_dict['vault']['sealed'] = True
-            status_dict['vault']['message'] = e.message
-            return
-        except (InvalidSecretsToken) as e:
-            logger.exception('Secrets Error: %s', e.message)
-            status_dict['vault']['status'] = 'Invalid Token'
-            status_dict['vault']['sealed'] = False
-            status_dict['vault']['message'] = e.message
-            return
+            job_secrets, etag = handler.get_changed_job_type_secrets(job_name, etag)
+        except (InvalidSecretsAuthorization, InvalidSecretsRequest, InvalidSecretsToken, InvalidSecretsValue) as e:
+            return None, None, e
+        return job_secrets, etag, None
+
+    def _get_status_for_error(self, error):
+        """Returns the status of the secrets backend for the given secrets error
+
+        :param error: The secrets error
+        :type error: :class:`Exception`
+        :returns: A tuple of the status, whether the backend is sealed, and the message
+        :rtype: tuple
+        """
+
+        if 'is currently sealed' in error.message:
+            return 'Sealed', True, error.message
+        elif isinstance(error, InvalidSecretsAuthorization):
+            return 'Invalid Credentials', False, error.message
+        elif isinstance(error, InvalidSecretsToken):
+            return 'Invalid Token', False, error.message
+        elif isinstance(error, InvalidSecretsValue):
+            return 'Invalid Secret', False, error.message
+        return 'Secret Error', False, error.message
+
+    def _set_status_for_error(self, error):
+        """Sets the status of the secrets backend for the given error from connecting to the backend
+
+        :param error: The secrets error
+        :type error: :class:`Exception`
+        """
+
+        if isinstance(error, InvalidSecretsAuthorization):
+            status = ('Secrets Improperly Configured', False, error.message)
+        else:
+            status = self._get_status_for_error(error)
 
-        for job in jobs_with_secrets:
-            try:
-                job_secrets = sh.get_job_type_secrets(job)
-            except (InvalidSecretsAuthorization) as e:
-                logger.exception('Secrets Error: %s', e.message)
-                status_dict['vault']['status'] = 'Invalid Credentials'
-                status_dict['vault']['sealed'] = False
-                status_dict['vault']['message'] = e.message
-                return
-            except (InvalidSecretsRequest) as e:
-                logger.exception('Secrets Error: %s', e.message)
-                if 'is currently sealed' in e.message:
-                    status_dict['vault']['status'] = 'Sealed'
-                    status_dict['vault']['sealed'] = True
-                else:
-                    status_dict['vault']['status'] = 'Secret Error'
-                status_dict['vault']['message'] = e.message
-                return
-            except (InvalidSecretsValue) as e:
-                logger.exception('Secrets Error: %s', e.message)
-                status_dict['vault']['status'] = 'Invalid Secret'
-                status_dict['vault']['sealed'] = False
-                status_dict['vault']['message'] = e.message
-                return
+        with self._lock:
+            if status != self._status:
+                logger.error('Secrets Error: %s', error.message)
+            self._status = status
 
 
 secrets_mgr = SecretsManager()
@@ -7,7 +7,6 @@ import rest_framework.status as status
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.http.response import Http404
-from django.utils.dateparse import parse_datetime
 from django.utils.timezone import now
 from rest_framework import permissions
 from rest_framework.generics import GenericAPIView
@@ -16,6 +15,7 @@ from rest_framework.response import Response
 from scheduler.models import Scheduler
 from scheduler.serializers import SchedulerSerializerV6
 
+from util.parse import datetime_to_string
 from util.rest import ServiceUnavailable
 
 logger = logging.getLogger(__name__)
@@ -119,6 +119,13 @@ class StatusView(GenericAPIView):
     # The scheduler is considered offline if its status JSON is older than this threshold
     STATUS_FRESHNESS_THRESHOLD = 12.0  # seconds
 
+    # The scheduler's rate metrics are not part of the status ETag, so the cached status JSON is read again at the
+    # interval the scheduler refreshes them (see scheduler.threads.scheduler_status.STATUS_WRITE_INTERVAL)
+    STATUS_REFRESH_INTERVAL = 15.0  # seconds
+
+    # The ETag and status JSON most recently read from the database by this process, along with when they were read
+    _cached_status = (None, None, None)
+
     def get(self, request):
         """Gets high level status information
 
@@ -144,17 +151,34 @@ class StatusView(GenericAPIView):
         :returns: the HTTP response to send back to the user
         """
 
-        status_dict = Scheduler.objects.get_master().status
+        status_etag, status_updated = Scheduler.objects.get_status_etag()
 
-        if not status_dict:  # Empty dict from model initialization
+        if not status_etag or not status_updated:  # Empty status from model initialization
             raise ServiceUnavailable(unicode('Status is missing. Scheduler may be down.'))
 
-        # If status dict has not been updated recently, assume scheduler is down or slow
-        status_timestamp = parse_datetime(status_dict['timestamp'])
-        if (now() - status_timestamp).total_seconds() > StatusView.STATUS_FRESHNESS_THRESHOLD:
+        # If status has not been updated recently, assume scheduler is down or slow
+        if (now() - status_updated).total_seconds() > StatusView.STATUS_FRESHNESS_THRESHOLD:
             raise ServiceUnavailable(unicode('Status is over %d seconds old' % StatusView.STATUS_FRESHNESS_THRESHOLD))
 
-        return Response(status_dict)
+        # The ETag leaves out the rate metrics and refresh times, so it is a weak validator and is compared weakly
+        etag = 'W/"%s"' % status_etag
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        client_etags = [value.strip() for value in if_none_match.split(',')]
+        if etag in client_etags or etag[2:] in client_etags:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        # Only read the status JSON from the database when it has changed since the last request to this process
+        when = now()
+        cached_etag, status_dict, cached_when = StatusView._cached_status
+        if cached_etag != status_etag or (when - cached_when).total_seconds() >= StatusView.STATUS_REFRESH_INTERVAL:
+            status_dict, status_etag, status_updated = Scheduler.objects.get_status()
+            StatusView._cached_status = (status_etag, status_dict, when)
+            etag = 'W/"%s"' % status_etag
+
+        # The stored timestamp is only updated along with the full status JSON
+        status_dict = dict(status_dict)
+        status_dict['timestamp'] = datetime_to_string(status_updated)
+        return Response(status_dict, headers={'ETag': etag})
 
 
 class VersionView(GenericAPIView):
@@ -7,6 +7,7 @@ import ssl
 import time
 
 from botocore.exceptions import ClientError, NoCredentialsError
+from botocore.exceptions import ConnectionError as BotoConnectionError
 
 import storage.settings as settings
 from storage.brokers.broker import Broker, BrokerVolume
@@ -35,42 +36,60 @@ class S3Broker(Broker):
     def delete_files(self, volume_path, files, update_model=True):
         """See :meth:`storage.brokers.broker.Broker.delete_files`"""
 
+        if not files:
+            return
+
         with S3Client(self._credentials, self._region_name) as client:
             for scale_file in files:
-                s3_object = client.get_object(self._bucket_name, scale_file.file_path)
+                logger.info('Deleting %s', scale_file.file_path)
+            key_names = [scale_file.file_path for scale_file in files]
+            errors = self._retry('delete', lambda: client.delete_objects(self._bucket_name, key_names))
 
-                self._delete_file(s3_object, scale_file)
+        for scale_file in files:
+            if update_model and scale_file.file_path not in errors:
+                # Update model attributes
+                scale_file.set_deleted()
+                scale_file.save()
 
-                if update_model:
-                    # Update model attributes
-                    scale_file.set_deleted()
-                    scale_file.save()
+        if errors:
+            key_name, message = errors.items()[0]
+            raise Exception('Failed to delete %d S3 file(s), first failure %s: %s' % (len(errors), key_name, message))
 
     def download_files(self, volume_path, file_downloads):
         """See :meth:`storage.brokers.broker.Broker.download_files`"""
 
+        s3_downloads = []
+        for file_download in file_downloads:
+            # If file supports partial mount and volume is configured attempt sym-link
+            if file_download.partial and self._volume:
+                logger.debug('Partial S3 file accessed by mounted bucket.')
+                path_to_download = os.path.join(volume_path, file_download.file.file_path)
+
+                logger.info('Checking path %s', path_to_download)
+                if not os.path.exists(path_to_download):
+                    raise MissingFile(file_download.file.file_name)
+
+                # Create symlink to the file in the host mount
+                logger.info('Creating link %s -> %s', file_download.local_path, path_to_download)
+                execute_command_line(['ln', '-s', path_to_download, file_download.local_path])
+            # Fall-back to default S3 file download
+            else:
+                s3_downloads.append(file_download)
+
+        if not s3_downloads:
+            return
+
         with S3Client(self._credentials, self._region_name) as client:
-            for file_download in file_downloads:
-                # If file supports partial mount and volume is configured attempt sym-link
-                if file_download.partial and self._volume:
-                    logger.debug('Partial S3 file accessed by mounted bucket.')
-                    path_to_download = os.path.join(volume_path, file_download.file.file_path)
-
-                    logger.info('Checking path %s', path_to_download)
-                    if not os.path.exists(path_to_download):
-                        raise MissingFile(file_download.file.file_name)
-
-                    # Create symlink to the file in the host mount
-                    logger.info('Creating link %s -> %s', file_download.local_path, path_to_download)
-                    execute_command_line(['ln', '-s', path_to_download, file_download.local_path])
-                # Fall-back to default S3 file download
-                else:
-                    try:
-                        s3_object = client.get_object(self._bucket_name, file_download.file.file_path)
-                    except FileDoesNotExist:
-                        raise MissingFile(file_download.file.file_name)
-
-                    self._download_file(s3_object, file_download.file, file_download.local_path)
+            def download(file_download):
+                scale_file = file_download.file
+                logger.info('Downloading %s -> %s', scale_file.file_path, file_download.local_path)
+                try:
+                    self._retry('download', lambda: client.download_file(self._bucket_name, scale_file.file_path,
+                                                                         file_download.local_path))
+                except FileDoesNotExist:
+                    raise MissingFile(scale_file.file_name)
+
+            client.run_transfers(download, s3_downloads)
 
     def list_files(self, volume_path, recursive):
         """See :meth:`storage.brokers.broker.Broker.list_files`
@@ -95,33 +114,57 @@ class S3Broker(Broker):
             self._volume = volume
 
     def move_files(self, volume_path, file_moves):
-        """See :meth:`storage.brokers.broker.Broker.move_files`"""
+        """See :meth:`storage.brokers.broker.Broker.move_files`
+
+        Note that S3 does not support an atomic move, so the files are copied server-side to their new paths and the
+        original objects are then deleted in batches. If any copy fails, no original object is deleted.
+        """
+
+        if not file_moves:
+            return
 
         with S3Client(self._credentials, self._region_name) as client:
-            for file_move in file_moves:
+            def copy(file_move):
+                scale_file = file_move.file
+                logger.info('Copying %s -> %s', scale_file.file_path, file_move.new_path)
+                options = self._get_object_args(scale_file)
                 try:
-                    s3_object_src = client.get_object(self._bucket_name, file_move.file.file_path)
+                    self._retry('copy', lambda: client.copy_object(self._bucket_name, scale_file.file_path,
+                                                                   file_move.new_path, options))
                 except FileDoesNotExist:
-                    raise MissingFile(file_move.file.file_name)
-                s3_object_dest = client.get_object(self._bucket_name, file_move.new_path, False)
+                    raise MissingFile(scale_file.file_name)
 
-                self._move_file(s3_object_src, s3_object_dest, file_move.file, file_move.new_path)
+            client.run_transfers(copy, file_moves)
 
-                # Update model attributes
-                file_move.file.file_path = file_move.new_path
-                file_move.file.save()
+            key_names = [file_move.file.file_path for file_move in file_moves]
+            errors = self._retry('delete', lambda: client.delete_objects(self._bucket_name, key_names))
+            for key_name, message in errors.items():
+                logger.error('Failed to delete moved S3 file %s: %s', key_name, message)
+
+        for file_move in file_moves:
+            # Update model attributes
+            file_move.file.file_path = file_move.new_path
+            file_move.file.save()
 
     def upload_files(self, volume_path, file_uploads):
         """See :meth:`storage.brokers.broker.Broker.upload_files`"""
 
+        if not file_uploads:
+            return
+
         with S3Client(self._credentials, self._region_name) as client:
-            for file_upload in file_uploads:
-                s3_object = client.get_object(self._bucket_name, file_upload.file.file_path, False)
+            def upload(file_upload):
+                scale_file = file_upload.file
+                logger.info('Uploading %s -> %s', file_upload.local_path, scale_file.file_path)
+                self._retry('upload', lambda: client.upload_file(self._bucket_name, scale_file.file_path,
+                                                                 file_upload.local_path,
+                                                                 self._get_object_args(scale_file)))
 
-                self._upload_file(s3_object, file_upload.file, file_upload.local_path)
+            client.run_transfers(upload, file_uploads)
 
-                # Create new model
-                file_upload.file.save()
+        for file_upload in file_uploads:
+            # Create new model
+            file_upload.file.save()
 
     def validate_configuration(self, config):
         """See :meth:`storage.brokers.broker.Broker.validate_configuration`"""
@@ -143,122 +186,45 @@ class S3Broker(Broker):
 
         return warnings
 
-    def _delete_file(self, s3_object, scale_file, retries=settings.S3_RETRY_COUNT):
-        """Deletes a file from the S3 file system.
+    @staticmethod
+    def _get_object_args(scale_file):
+        """Returns the S3 arguments for a new object holding the given file
 
-        This method will attempt to retry the delete if :class:`ssl.SSLError` is raised up to a number of retries given.
-
-        :param s3_object: The S3 object representing the file to delete.
-        :type s3_object: :class:`boto3.s3.Object`
-        :param scale_file: The model associated with the file to delete.
+        :param scale_file: The model associated with the new object.
         :type scale_file: :class:`storage.models.ScaleFile`
+        :returns: The S3 object arguments
+        :rtype: dict
         """
 
-        logger.info('Deleting %s', scale_file.file_path)
-        for attempt in range(retries):
-            try:
-                s3_object.delete()
-                return
-            except ssl.SSLError:
-                if attempt >= retries:
-                    raise
-                time.sleep(settings.S3_RETRY_DELAY * attempt)
-                logger.exception('Retrying S3 delete attempt: %i', attempt + 1)
-
-    def _download_file(self, s3_object, scale_file, path, retries=settings.S3_RETRY_COUNT):
-        """Downloads a file in S3 storage to the local file system.
-
-        This method will attempt to retry the delete if :class:`ssl.SSLError` is raised up to a number of retries given.
-
-        :param s3_object: The S3 object representing the file to download.
-        :type s3_object: :class:`boto3.s3.Object`
-        :param scale_file: The model associated with the file to download.
-        :type scale_file: :class:`storage.models.ScaleFile`
-        :param path: The destination path for the file download.
-        :type path: string
-        """
-
-        logger.info('Downloading %s -> %s', scale_file.file_path, path)
-        for attempt in range(retries):
-            try:
-                s3_object.download_file(path)
-                return
-            except ssl.SSLError:
-                if attempt >= retries:
-                    raise
-                time.sleep(settings.S3_RETRY_DELAY * attempt)
-                logger.exception('Retrying S3 download attempt: %i', attempt + 1)
-
-    def _move_file(self, s3_object_src, s3_object_dest, scale_file, path, retries=settings.S3_RETRY_COUNT):
-        """Moves a file within the S3 file system.
-
-        Note that S3 does not support an atomic move, so this operation is implemented as a copy and delete.
-
-        This method will attempt to retry the move if :class:`ssl.SSLError` is raised up to a number of retries given.
-        Note that since S3 does not support an atomic move, this method copies the file to the new destination and then
-        attempts to delete the original file content.
-
-        :param s3_object_src: The S3 object representing the source of the file to move.
-        :type s3_object_src: :class:`boto3.s3.Object`
-        :param s3_object_dest: The S3 object representing the destination of the file to move.
-        :type s3_object_dest: :class:`boto3.s3.Object`
-        :param scale_file: The model associated with the file to move.
-        :type scale_file: :class:`storage.models.ScaleFile`
-        :param path: The destination path for the file move.
-        :type path: string
-        """
-
-        logger.info('Copying %s -> %s', scale_file.file_path, path)
         options = dict()
-        options['CopySource'] = {
-            'Bucket': s3_object_src.bucket_name,
-            'Key': s3_object_src.key,
-        }
         options['StorageClass'] = settings.S3_STORAGE_CLASS
         if settings.S3_SERVER_SIDE_ENCRYPTION:
             options['ServerSideEncryption'] = settings.S3_SERVER_SIDE_ENCRYPTION
         if scale_file.media_type:
             options['ContentType'] = scale_file.media_type
-
-        for attempt in range(retries):
-            try:
-                s3_object_dest.copy_from(**options)
-                break
-            except ssl.SSLError:
-                if attempt >= retries:
-                    raise
-                time.sleep(settings.S3_RETRY_DELAY * attempt)
-                logger.exception('Retrying S3 copy attempt: %i', attempt + 1)
-
-        self._delete_file(s3_object_src, scale_file)
-
-    def _upload_file(self, s3_object, scale_file, path, retries=settings.S3_RETRY_COUNT):
-        """Uploads a file in local storage to the S3 remote file system.
-
-        This method will attempt to retry the delete if :class:`ssl.SSLError` is raised up to a number of retries given.
-
-        :param s3_object: The S3 object representing the file to upload.
-        :type s3_object: :class:`boto3.s3.Object`
-        :param scale_file: The model associated with the file to upload.
-        :type scale_file: :class:`storage.models.ScaleFile`
-        :param path: The source path for the file upload.
-        :type path: string
+        return options
+
+    @staticmethod
+    def _retry(action, func, retries=settings.S3_RETRY_COUNT):
+        """Calls the given function, retrying with an exponential backoff if a connection error is raised, up to the
+        given number of attempts
+
+        :param action: The name of the action, used for logging
+        :type action: string
+        :param func: The function to call
+        :type func: function
+        :param retries: The maximum number of attempts
+        :type retries: int
+        :returns: The result of the function
         """
 
-        options = dict()
-        options['StorageClass'] = settings.S3_STORAGE_CLASS
-        if settings.S3_SERVER_SIDE_ENCRYPTION:
-            options['ServerSideEncryption'] = settings.S3_SERVER_SIDE_ENCRYPTION
-        if scale_file.media_type:
-            options['ContentType'] = scale_file.media_type
-
-        logger.info('Uploading %s -> %s', path, scale_file.file_path)
-        for attempt in range(retries):
+        attempt = 1
+        while True:
             try:
-                s3_object.upload_file(path, options)
-                return
-            except ssl.SSLError:
+                return func()
+            except (ssl.SSLError, BotoConnectionError):
                 if attempt >= retries:
                     raise
-                time.sleep(settings.S3_RETRY_DELAY * attempt)
-                logger.exception('Retrying S3 upload attempt: %i', attempt + 1)
+                logger.exception('Retrying S3 %s attempt: %i', action, attempt + 1)
+                time.sleep(settings.S3_RETRY_DELAY * 2 ** (attempt - 1))
+                attempt += 1
@@ -11,7 +11,7 @@ import django.contrib.gis.db.models as models
 import django.contrib.gis.geos as geos
 import django.utils.timezone as timezone
 import django.contrib.postgres.fields
-from django.db import transaction
+from django.db import connection, transaction
 
 import storage.geospatial_utils as geospatial_utils
 from storage.brokers.factory import get_broker
@@ -517,6 +517,33 @@ class ScaleFileManager(models.Manager):
             wp_file_moves = wp_dict[wp_id][1]
             workspace.move_files(wp_file_moves)
 
+    @transaction.atomic
+    def set_countries(self, file_ids):
+        """Clears and recreates the country lists of the given saved files from the CountryData table, using a single
+        spatial join for all of the files. The geometries and dates stored in the database are used, with the same
+        rules as :meth:`storage.models.ScaleFile.set_countries`: the border effective date will use (in order of
+        preference) data_started, data_ended, or created, and files without a geometry will have no countries.
+
+        :param file_ids: The IDs of the files
+        :type file_ids: list
+        """
+
+        if not file_ids:
+            return
+
+        through = ScaleFile.countries.through
+        through.objects.filter(scalefile_id__in=file_ids).delete()
+
+        # Keep the most recent effective border of each country that intersects a file
+        qry = 'INSERT INTO %s (scalefile_id, countrydata_id) ' % through._meta.db_table
+        qry += 'SELECT DISTINCT ON (sf.id, cd.name) sf.id, cd.id FROM scale_file sf '
+        qry += 'JOIN country_data cd ON cd.effective <= COALESCE(sf.data_started, sf.data_ended, sf.created) '
+        qry += 'AND ST_Intersects(cd.border, sf.geometry) '
+        qry += 'WHERE sf.id = ANY(%s) AND sf.geometry IS NOT NULL '
+        qry += 'ORDER BY sf.id, cd.name, cd.effective DESC'
+        with connection.cursor() as cursor:
+            cursor.execute(qry, [list(file_ids)])
+
     def upload_files(self, workspace, file_uploads):
         """Uploads the given files from the given local file system paths into the given workspace. Each ScaleFile model
         should have its file_path field populated with the relative location where the file should be stored within the
@@ -549,11 +576,7 @@ class ScaleFileManager(models.Manager):
         workspace.upload_files(file_uploads)
 
         # Populate the country list for all files that were saved
-        for file_upload in file_uploads:
-            scale_file = file_upload.file
-            if scale_file.pk:
-                scale_file.set_countries()
-                scale_file.save()
+        self.set_countries([scale_file.pk for scale_file in file_list if scale_file.pk])
 
         return file_list
 
@@ -1,16 +1,24 @@
 from __future__ import unicode_literals
 
 import os
+import ssl
 
 import django
 from django.test import TestCase
-from mock import MagicMock, Mock, call, mock_open, patch
+from mock import MagicMock, Mock, call, patch
 
 import storage.test.utils as storage_test_utils
 from storage.brokers.broker import FileDownload, FileMove, FileUpload
 from storage.brokers.exceptions import InvalidBrokerConfiguration
 from storage.brokers.s3_broker import S3Broker
+from storage.exceptions import MissingFile
 from util.aws import S3Client
+from util.exceptions import FileDoesNotExist
+
+
+def run_transfers(func, items):
+    """Runs the transfers of a mocked S3 client sequentially"""
+    return [func(item) for item in items]
 
 
 class TestS3Broker(TestCase):
@@ -33,10 +41,8 @@ class TestS3Broker(TestCase):
     def test_delete_files(self, mock_client_class):
         """Tests deleting files successfully"""
 
-        s3_object_1 = MagicMock()
-        s3_object_2 = MagicMock()
         mock_client = MagicMock(S3Client)
-        mock_client.get_object.side_effect = [s3_object_1, s3_object_2]
+        mock_client.delete_objects.return_value = {}
         mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
 
         file_path_1 = os.path.join('my_dir', 'my_file.txt')
@@ -49,23 +55,40 @@ class TestS3Broker(TestCase):
         self.broker.delete_files(None, [file_1, file_2])
 
         # Check results
-        self.assertTrue(s3_object_1.delete.called)
-        self.assertTrue(s3_object_2.delete.called)
+        mock_client.delete_objects.assert_called_once_with('my_bucket.domain.com', [file_path_1, file_path_2])
         self.assertTrue(file_1.is_deleted)
         self.assertIsNotNone(file_1.deleted)
         self.assertTrue(file_2.is_deleted)
         self.assertIsNotNone(file_2.deleted)
 
+    @patch('storage.brokers.s3_broker.S3Client')
+    def test_delete_files_error(self, mock_client_class):
+        """Tests deleting files when S3 fails to delete one of them"""
+
+        file_path_1 = os.path.join('my_dir', 'my_file.txt')
+        file_path_2 = os.path.join('my_dir', 'my_file.json')
+        mock_client = MagicMock(S3Client)
+        mock_client.delete_objects.return_value = {file_path_2: 'Access Denied'}
+        mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
+
+        file_1 = storage_test_utils.create_file(file_path=file_path_1)
+        file_2 = storage_test_utils.create_file(file_path=file_path_2)
+
+        # Call method to test
+        self.assertRaises(Exception, self.broker.delete_files, None, [file_1, file_2])
+
+        # Check results
+        self.assertTrue(file_1.is_deleted)
+        self.assertFalse(file_2.is_deleted)
+
     @patch('os.path.exists')
     @patch('storage.brokers.s3_broker.S3Client')
     def test_download_files(self, mock_client_class, mock_exists):
         """Tests downloading files successfully"""
 
         mock_exists.return_value = True
-        s3_object_1 = MagicMock()
-        s3_object_2 = MagicMock()
         mock_client = MagicMock(S3Client)
-        mock_client.get_object.side_effect = [s3_object_1, s3_object_2]
+        mock_client.run_transfers.side_effect = run_transfers
         mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
 
         file_name_1 = 'my_file.txt'
@@ -81,13 +104,44 @@ class TestS3Broker(TestCase):
         file_2_dl = FileDownload(file_2, local_path_file_2, False)
 
         # Call method to test
-        mo = mock_open()
-        with patch('__builtin__.open', mo, create=True):
-            self.broker.download_files(None, [file_1_dl, file_2_dl])
+        self.broker.download_files(None, [file_1_dl, file_2_dl])
 
         # Check results
-        self.assertTrue(s3_object_1.download_file.called)
-        self.assertTrue(s3_object_2.download_file.called)
+        two_calls = [call('my_bucket.domain.com', workspace_path_file_1, local_path_file_1),
+                     call('my_bucket.domain.com', workspace_path_file_2, local_path_file_2)]
+        mock_client.download_file.assert_has_calls(two_calls)
+
+    @patch('storage.brokers.s3_broker.S3Client')
+    def test_download_files_missing(self, mock_client_class):
+        """Tests downloading a file that does not exist in S3"""
+
+        mock_client = MagicMock(S3Client)
+        mock_client.run_transfers.side_effect = run_transfers
+        mock_client.download_file.side_effect = FileDoesNotExist('Unable to access remote file')
+        mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
+
+        file_1 = storage_test_utils.create_file(file_path=os.path.join('my_wrk_dir_1', 'my_file.txt'))
+        file_1_dl = FileDownload(file_1, os.path.join('my_dir_1', 'my_file.txt'), False)
+
+        self.assertRaises(MissingFile, self.broker.download_files, None, [file_1_dl])
+
+    @patch('storage.brokers.s3_broker.time.sleep')
+    @patch('storage.brokers.s3_broker.S3Client')
+    def test_download_files_retry(self, mock_client_class, mock_sleep):
+        """Tests retrying a file download that fails with a connection error"""
+
+        mock_client = MagicMock(S3Client)
+        mock_client.run_transfers.side_effect = run_transfers
+        mock_client.download_file.side_effect = [ssl.SSLError(), None]
+        mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
+
+        file_1 = storage_test_utils.create_file(file_path=os.path.join('my_wrk_dir_1', 'my_file.txt'))
+        file_1_dl = FileDownload(file_1, os.path.join('my_dir_1', 'my_file.txt'), False)
+
+        self.broker.download_files(None, [file_1_dl])
+
+        self.assertEqual(mock_client.download_file.call_count, 2)
+        self.assertEqual(mock_sleep.call_count, 1)
 
     # Patching in storage.brokers.s3_broker as opposed to util.aws / util.command because patch must be applied where
     # import is made, not on source
@@ -167,12 +221,9 @@ class TestS3Broker(TestCase):
         """Tests moving files successfully"""
 
         mock_exists.return_value = True
-        s3_object_1a = MagicMock()
-        s3_object_1b = MagicMock()
-        s3_object_2a = MagicMock()
-        s3_object_2b = MagicMock()
         mock_client = MagicMock(S3Client)
-        mock_client.get_object.side_effect = [s3_object_1a, s3_object_1b, s3_object_2a, s3_object_2b]
+        mock_client.run_transfers.side_effect = run_transfers
+        mock_client.delete_objects.return_value = {}
         mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
 
         file_name_1 = 'my_file.txt'
@@ -191,10 +242,13 @@ class TestS3Broker(TestCase):
         self.broker.move_files(None, [file_1_mv, file_2_mv])
 
         # Check results
-        self.assertTrue(s3_object_1b.copy_from.called)
-        self.assertTrue(s3_object_1a.delete.called)
-        self.assertTrue(s3_object_2b.copy_from.called)
-        self.assertTrue(s3_object_2a.delete.called)
+        self.assertEqual(mock_client.copy_object.call_count, 2)
+        self.assertEqual(mock_client.copy_object.call_args_list[0][0][1:3],
+                         (old_workspace_path_1, new_workspace_path_1))
+        self.assertEqual(mock_client.copy_object.call_args_list[1][0][1:3],
+                         (old_workspace_path_2, new_workspace_path_2))
+        mock_client.delete_objects.assert_called_once_with('my_bucket.domain.com',
+                                                           [old_workspace_path_1, old_workspace_path_2])
         self.assertEqual(file_1.file_path, new_workspace_path_1)
         self.assertEqual(file_2.file_path, new_workspace_path_2)
 
@@ -202,10 +256,8 @@ class TestS3Broker(TestCase):
     def test_upload_files(self, mock_client_class):
         """Tests uploading files successfully"""
 
-        s3_object_1 = MagicMock()
-        s3_object_2 = MagicMock()
         mock_client = MagicMock(S3Client)
-        mock_client.get_object.side_effect = [s3_object_1, s3_object_2]
+        mock_client.run_transfers.side_effect = run_transfers
         mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
 
         file_name_1 = 'my_file.txt'
@@ -221,15 +273,12 @@ class TestS3Broker(TestCase):
         file_2_up = FileUpload(file_2, local_path_file_2)
 
         # Call method to test
-        mo = mock_open()
-        with patch('__builtin__.open', mo, create=True):
-            self.broker.upload_files(None, [file_1_up, file_2_up])
+        self.broker.upload_files(None, [file_1_up, file_2_up])
 
         # Check results
-        self.assertTrue(s3_object_1.upload_file.called)
-        self.assertTrue(s3_object_2.upload_file.called)
-        self.assertEqual(s3_object_1.upload_file.call_args[0][1]['ContentType'], 'text/plain')
-        self.assertEqual(s3_object_2.upload_file.call_args[0][1]['ContentType'], 'application/json')
+        self.assertEqual(mock_client.upload_file.call_count, 2)
+        self.assertEqual(mock_client.upload_file.call_args_list[0][0][3]['ContentType'], 'text/plain')
+        self.assertEqual(mock_client.upload_file.call_args_list[1][0][3]['ContentType'], 'application/json')
 
     def test_validate_configuration_roles(self):
         """Tests validating a configuration based on IAM roles successfully"""
@@ -478,6 +478,38 @@ class TestScaleFile(TestCase):
         self.assertIn('TC', tmp)
         self.assertIn('TT', tmp)
 
+    def test_country_data_bulk(self):
+        """Tests setting the countries of many files with ScaleFileManager.set_countries()"""
+        testborder = geos.Polygon(((0, 0), (0, 10), (10, 10), (10, 0), (0, 0)))
+        testborder2 = geos.Polygon(((11, 0), (11, 8), (19, 8), (19, 0), (11, 0)))
+        old_effective = datetime.datetime(2000, 1, 1, 0, 0, 0, tzinfo=utc)
+        new_effective = datetime.datetime(2010, 1, 1, 0, 0, 0, tzinfo=utc)
+        CountryData.objects.create(name='Test Country', fips='TC', gmi='TCY', iso2='TC', iso3='TCY', iso_num=42,
+                                   border=testborder, effective=old_effective)
+        new_border = CountryData.objects.create(name='Test Country', fips='TC', gmi='TCY', iso2='TC', iso3='TCY',
+                                                iso_num=42, border=testborder, effective=new_effective)
+        CountryData.objects.create(name='Test Country 2', fips='TT', gmi='TCT', iso2='TT', iso3='TCT', iso_num=43,
+                                   border=testborder2, effective=old_effective)
+        ws = storage_test_utils.create_workspace(name='test', base_url='http://localhost')
+        geom = geos.Polygon(((5, 5), (5, 10), (12, 10), (12, 5), (5, 5)))
+        file_1 = storage_test_utils.create_file(file_name='test_1.txt', workspace=ws, geometry=geom,
+                                                data_started=datetime.datetime(2015, 1, 1, tzinfo=utc))
+        file_2 = storage_test_utils.create_file(file_name='test_2.txt', workspace=ws, geometry=geom,
+                                                data_started=datetime.datetime(2005, 1, 1, tzinfo=utc))
+        file_3 = storage_test_utils.create_file(file_name='test_3.txt', workspace=ws)
+
+        ScaleFile.objects.set_countries([file_1.id, file_2.id, file_3.id])
+        # Setting the countries again replaces them
+        ScaleFile.objects.set_countries([file_1.id, file_2.id, file_3.id])
+
+        file_1_countries = list(file_1.countries.all())
+        self.assertSetEqual({c.iso2 for c in file_1_countries}, {'TC', 'TT'})
+        self.assertIn(new_border, file_1_countries)
+        file_2_countries = list(file_2.countries.all())
+        self.assertSetEqual({c.iso2 for c in file_2_countries}, {'TC', 'TT'})
+        self.assertNotIn(new_border, file_2_countries)
+        self.assertEqual(file_3.countries.count(), 0)
+
     def test_set_deleted(self):
         """Tests marking a file as deleted."""
         scale_file = storage_test_utils.create_file()
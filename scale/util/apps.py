@@ -10,3 +10,12 @@ class UtilConfig(AppConfig):
     name = 'util'
     label = 'util'
     verbose_name = 'Util'
+
+    def ready(self):
+        """Registers components related to utilities"""
+
+        # Register the table partition maintenance processor with the clock system
+        import job.clock as clock
+        from util.partitions import PartitionsProcessor
+
+        clock.register_processor('scale-partitions', PartitionsProcessor)
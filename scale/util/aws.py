@@ -1,8 +1,12 @@
 """Utility functions for testing AWS credentials and access to required resources"""
 import logging
+import os
+import threading
 from collections import namedtuple
+from multiprocessing.pool import ThreadPool
 
 from boto3 import Session
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from django.conf import settings
@@ -14,6 +18,31 @@ logger = logging.getLogger(__name__)
 
 AWSCredentials = namedtuple('AWSCredentials', ['access_key_id', 'secret_access_key'])
 
+# Maximum number of entries and total payload size (bytes) of a single SQS batch request
+SQS_MAX_BATCH_ENTRIES = 10
+SQS_MAX_BATCH_SIZE = 256 * 1024
+
+# Maximum number of SQS batch requests issued concurrently
+SQS_MAX_CONCURRENT_REQUESTS = 8
+
+# Number of attempts made to send the entries of a batch that SQS reported as failed
+SQS_MAX_SEND_ATTEMPTS = 3
+
+# Maximum number of S3 files transferred concurrently by a single client
+S3_MAX_CONCURRENT_TRANSFERS = getattr(settings, 'S3_MAX_CONCURRENT_TRANSFERS', 8)
+
+# Multipart settings (bytes) and number of parts transferred concurrently for a single S3 file
+S3_MULTIPART_THRESHOLD = getattr(settings, 'S3_MULTIPART_THRESHOLD', 64 * 1024 * 1024)
+S3_MULTIPART_CHUNKSIZE = getattr(settings, 'S3_MULTIPART_CHUNKSIZE', 16 * 1024 * 1024)
+S3_MULTIPART_CONCURRENCY = getattr(settings, 'S3_MULTIPART_CONCURRENCY', 4)
+
+# Maximum number of keys of a single S3 delete_objects request
+S3_MAX_DELETE_BATCH = 1000
+
+_SQS_THREAD_POOL = None
+_SQS_THREAD_POOL_LOCK = threading.Lock()
+_SQS_THREAD_POOL_PID = None
+
 
 class AWSClient(object):
     """Manages automatically creating and destroying clients to AWS services."""
@@ -103,6 +132,36 @@ class SQSClient(AWSClient):
         """
         AWSClient.__init__(self, 'sqs', None, credentials, region_name)
 
+        self._queue_urls = {}
+
+    def change_message_visibility(self, messages, visibility_timeout_seconds):
+        """Changes the visibility timeout of the given messages, using batch requests of up to 10 messages issued
+        concurrently. This method is thread-safe.
+
+        :param messages: The received messages
+        :type messages: [:class:`boto3.sqs.Message`]
+        :param visibility_timeout_seconds: The new visibility timeout, from now
+        :type visibility_timeout_seconds: int
+        """
+
+        def create_entry(message):
+            return {'ReceiptHandle': message.receipt_handle, 'VisibilityTimeout': visibility_timeout_seconds}
+
+        self._batch_messages(messages, self._client.change_message_visibility_batch, create_entry)
+
+    def delete_messages(self, messages):
+        """Deletes the given messages, using batch requests of up to 10 messages issued concurrently. This method is
+        thread-safe.
+
+        :param messages: The received messages
+        :type messages: [:class:`boto3.sqs.Message`]
+        """
+
+        def create_entry(message):
+            return {'ReceiptHandle': message.receipt_handle}
+
+        self._batch_messages(messages, self._client.delete_message_batch, create_entry)
+
     def get_queue_by_name(self, queue_name):
         """Gets a SQS queue by the given name
 
@@ -112,8 +171,8 @@ class SQSClient(AWSClient):
         :rtype: :class:`boto3.sqs.Queue`
         """
 
-        return self._resource.get_queue_by_name(QueueName=queue_name)
-        
+        return self._resource.Queue(self.get_queue_url(queue_name))
+
     def get_queue_size(self, queue_name):
         """Gets the size of the SQS queue by the given name
 
@@ -126,6 +185,19 @@ class SQSClient(AWSClient):
         queue = self.get_queue_by_name(queue_name)
         return queue.attributes["ApproximateNumberOfMessages"]
 
+    def get_queue_url(self, queue_name):
+        """Gets the URL of the SQS queue by the given name. URLs are cached for the lifetime of the client.
+
+        :param queue_name: The unique name of the SQS queue
+        :type queue_name: string
+        :return: The queue URL
+        :rtype: string
+        """
+
+        if queue_name not in self._queue_urls:
+            self._queue_urls[queue_name] = self._client.get_queue_url(QueueName=queue_name)['QueueUrl']
+        return self._queue_urls[queue_name]
+
     def send_message(self, queue_name, message):
         """Send a message to SQS queue.
 
@@ -135,12 +207,11 @@ class SQSClient(AWSClient):
         :type message: string
         """
 
-        queue = self.get_queue_by_name(queue_name)
-
-        queue.send_message(MessageBody=message)
+        self._client.send_message(QueueUrl=self.get_queue_url(queue_name), MessageBody=message)
 
     def send_messages(self, queue_name, messages):
-        """Send a batch of messages to SQS queue.
+        """Send a batch of messages to SQS queue. Messages are sent in batch requests of up to 10 messages (and 256KB)
+        issued concurrently. Messages that SQS fails to accept are retried. This method is thread-safe.
 
         :param queue_name: The unique name of the SQS queue
         :type queue_name: string
@@ -148,12 +219,38 @@ class SQSClient(AWSClient):
         :type messages: [`SendMessageBatchRequestEntry`]
         """
 
-        queue = self.get_queue_by_name(queue_name)
-
-        batches = [messages[i:i + 10] for i in xrange(0, len(messages), 10)]
-
-        for batch in batches:
-            queue.send_messages(Entries=batch)
+        queue_url = self.get_queue_url(queue_name)
+
+        def send_batch(batch):
+            for _ in range(SQS_MAX_SEND_ATTEMPTS):
+                response = self._client.send_message_batch(QueueUrl=queue_url, Entries=batch)
+                retry_ids = set()
+                for failure in response.get('Failed', []):
+                    if failure.get('SenderFault'):
+                        # Entry is invalid and will never be accepted
+                        logger.error('SQS rejected message %s: %s', failure['Id'], failure.get('Message'))
+                    else:
+                        retry_ids.add(failure['Id'])
+                batch = [entry for entry in batch if entry['Id'] in retry_ids]
+                if not batch:
+                    return
+            logger.error('Failed to send %d message(s) to SQS queue %s', len(batch), queue_name)
+
+        batches = []
+        batch = []
+        batch_size = 0
+        for entry in messages:
+            entry_size = len(entry['MessageBody'])
+            if batch and (len(batch) == SQS_MAX_BATCH_ENTRIES or batch_size + entry_size > SQS_MAX_BATCH_SIZE):
+                batches.append(batch)
+                batch = []
+                batch_size = 0
+            batch.append(entry)
+            batch_size += entry_size
+        if batch:
+            batches.append(batch)
+
+        _run_concurrently(send_batch, batches)
 
     def receive_messages(self,
                          queue_name,
@@ -190,6 +287,179 @@ class SQSClient(AWSClient):
             if count % 10 != 0 or not count:
                 break
 
+    def _batch_messages(self, messages, batch_func, create_entry):
+        """Applies the given batch request to the given received messages, in requests of up to 10 messages from the
+        same queue issued concurrently. Entries that fail are logged.
+
+        :param messages: The received messages
+        :type messages: [:class:`boto3.sqs.Message`]
+        :param batch_func: The client batch request function
+        :type batch_func: function
+        :param create_entry: Function that creates the request entry (without an ID) for a message
+        :type create_entry: function
+        """
+
+        batches = []
+        by_queue = {}
+        for message in messages:
+            by_queue.setdefault(message.queue_url, []).append(message)
+        for queue_url, queue_messages in by_queue.items():
+            for i in xrange(0, len(queue_messages), SQS_MAX_BATCH_ENTRIES):
+                entries = []
+                for index, message in enumerate(queue_messages[i:i + SQS_MAX_BATCH_ENTRIES]):
+                    entry = create_entry(message)
+                    entry['Id'] = str(index)
+                    entries.append(entry)
+                batches.append((queue_url, entries))
+
+        def send_batch(batch):
+            response = batch_func(QueueUrl=batch[0], Entries=batch[1])
+            for failure in response.get('Failed', []):
+                logger.error('SQS batch request failed for message: %s', failure.get('Message'))
+
+        _run_concurrently(send_batch, batches)
+
+
+class SQSDeleteBatch(object):
+    """Accumulates received SQS messages that should be deleted so they can be deleted in batch requests"""
+
+    def __init__(self, client):
+        """Constructor
+
+        :param client: The SQS client
+        :type client: :class:`util.aws.SQSClient`
+        """
+
+        self._client = client
+        self._messages = []
+
+    def add(self, message):
+        """Adds a message to be deleted, deleting the accumulated messages once a full batch is reached
+
+        :param message: The received message
+        :type message: :class:`boto3.sqs.Message`
+        """
+
+        self._messages.append(message)
+        if len(self._messages) >= SQS_MAX_BATCH_ENTRIES:
+            self.flush()
+
+    def flush(self):
+        """Deletes all accumulated messages
+        """
+
+        if self._messages:
+            messages = self._messages
+            self._messages = []
+            self._client.delete_messages(messages)
+
+
+class SQSVisibilityHeartbeat(object):
+    """Background thread that periodically extends the visibility timeout of received SQS messages that are still
+    being processed, so that long-running messages are not redelivered while in progress and short visibility timeouts
+    can be used to quickly redeliver messages from failed consumers.
+    """
+
+    def __init__(self, client, visibility_timeout_seconds, interval_seconds):
+        """Constructor
+
+        :param client: The SQS client
+        :type client: :class:`util.aws.SQSClient`
+        :param visibility_timeout_seconds: The visibility timeout each extension sets, from the time of extension
+        :type visibility_timeout_seconds: int
+        :param interval_seconds: The number of seconds between extensions, which must be less than the visibility
+            timeout
+        :type interval_seconds: float
+        """
+
+        self._client = client
+        self._visibility_timeout = visibility_timeout_seconds
+        self._interval = interval_seconds
+
+        self._lock = threading.Lock()
+        self._messages = {}  # {Message ID: message}
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def add(self, message):
+        """Adds a received message whose visibility should be extended until it is removed
+
+        :param message: The received message
+        :type message: :class:`boto3.sqs.Message`
+        """
+
+        with self._lock:
+            self._messages[message.message_id] = message
+
+    def remove(self, message):
+        """Stops extending the visibility of the given message
+
+        :param message: The received message
+        :type message: :class:`boto3.sqs.Message`
+        """
+
+        with self._lock:
+            self._messages.pop(message.message_id, None)
+
+    def start(self):
+        """Starts the heartbeat thread
+        """
+
+        self._thread = threading.Thread(target=self._run, name='SQSVisibilityHeartbeat')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops the heartbeat thread
+        """
+
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        """Extends the visibility of the current messages every interval until stopped
+        """
+
+        while not self._stopped.wait(self._interval):
+            with self._lock:
+                messages = self._messages.values()
+            if not messages:
+                continue
+
+            try:
+                logger.debug('Extending visibility of %d SQS message(s)', len(messages))
+                self._client.change_message_visibility(messages, self._visibility_timeout)
+            except Exception:
+                logger.exception('Failed to extend visibility of SQS messages')
+
+
+def _run_concurrently(func, items):
+    """Calls the given function for each of the given items, concurrently on a shared pool of threads when there is
+    more than one item
+
+    :param func: The function taking a single item
+    :type func: function
+    :param items: The items
+    :type items: list
+    """
+
+    global _SQS_THREAD_POOL, _SQS_THREAD_POOL_PID
+
+    if len(items) <= 1:
+        for item in items:
+            func(item)
+        return
+
+    with _SQS_THREAD_POOL_LOCK:
+        # Threads do not survive a fork, so each process creates its own pool
+        if _SQS_THREAD_POOL is None or _SQS_THREAD_POOL_PID != os.getpid():
+            _SQS_THREAD_POOL = ThreadPool(SQS_MAX_CONCURRENT_REQUESTS)
+            _SQS_THREAD_POOL_PID = os.getpid()
+        thread_pool = _SQS_THREAD_POOL
+
+    thread_pool.map(func, items)
+
 
 class S3Client(AWSClient):
     def __init__(self, credentials=None, region_name=None):
@@ -201,9 +471,133 @@ class S3Client(AWSClient):
         :param region_name: The AWS region the resource resides in.
         :type region_name: string
         """
-        config = Config(s3={'addressing_style': getattr(settings, 'S3_ADDRESSING_STYLE', 'auto')})
+
+        # Every concurrent file transfer may use a connection per part
+        max_connections = max(10, S3_MAX_CONCURRENT_TRANSFERS * S3_MULTIPART_CONCURRENCY)
+        config = Config(s3={'addressing_style': getattr(settings, 'S3_ADDRESSING_STYLE', 'auto')},
+                        max_pool_connections=max_connections)
         AWSClient.__init__(self, 's3', config, credentials, region_name)
 
+        self._transfer_config = TransferConfig(multipart_threshold=S3_MULTIPART_THRESHOLD,
+                                               multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+                                               max_concurrency=S3_MULTIPART_CONCURRENCY)
+        self._thread_pool = None
+
+    def __exit__(self, type, value, traceback):
+        """Callback handles destroying an existing client and its transfer threads."""
+
+        if self._thread_pool:
+            self._thread_pool.close()
+            self._thread_pool.join()
+            self._thread_pool = None
+
+    def copy_object(self, bucket_name, src_key_name, dest_key_name, extra_args=None):
+        """Copies an S3 object to a new key within the same bucket. Large objects are copied server-side in parts.
+
+        :param bucket_name: The unique name of the bucket containing the object.
+        :type bucket_name: string
+        :param src_key_name: The key of the object to copy.
+        :type src_key_name: string
+        :param dest_key_name: The key of the new object.
+        :type dest_key_name: string
+        :param extra_args: Additional arguments for the new object, such as ContentType or StorageClass.
+        :type extra_args: dict
+
+        :raises :class:`botocore.exceptions.ClientError`: If the request is invalid.
+        :raises :class:`storage.exceptions.FileDoesNotExist`: If the source file is not found in the bucket.
+        """
+
+        copy_source = {'Bucket': bucket_name, 'Key': src_key_name}
+        try:
+            self._client.copy(copy_source, bucket_name, dest_key_name, ExtraArgs=extra_args,
+                              Config=self._transfer_config)
+        except ClientError as err:
+            if self._is_not_found(err):
+                raise FileDoesNotExist('Unable to access remote file: %s %s' % (bucket_name, src_key_name))
+            raise
+
+    def delete_objects(self, bucket_name, key_names):
+        """Deletes the S3 objects with the given keys, issuing a single request for every batch of 1000 keys.
+
+        :param bucket_name: The unique name of the bucket containing the objects.
+        :type bucket_name: string
+        :param key_names: The keys of the objects to delete.
+        :type key_names: list
+        :returns: The keys that could not be deleted mapped to their error message.
+        :rtype: dict
+
+        :raises :class:`botocore.exceptions.ClientError`: If a request is invalid.
+        """
+
+        errors = {}
+        for i in range(0, len(key_names), S3_MAX_DELETE_BATCH):
+            batch = key_names[i:i + S3_MAX_DELETE_BATCH]
+            logger.debug('Deleting batch of %d S3 objects', len(batch))
+            response = self._client.delete_objects(Bucket=bucket_name,
+                                                    Delete={'Objects': [{'Key': key} for key in batch],
+                                                            'Quiet': True})
+            for error in response.get('Errors', []):
+                errors[error['Key']] = error.get('Message', error.get('Code'))
+        return errors
+
+    def download_file(self, bucket_name, key_name, path):
+        """Downloads an S3 object to the local file system. Large objects are downloaded in parts.
+
+        :param bucket_name: The unique name of the bucket containing the object.
+        :type bucket_name: string
+        :param key_name: The key of the object to download.
+        :type key_name: string
+        :param path: The destination path for the download.
+        :type path: string
+
+        :raises :class:`botocore.exceptions.ClientError`: If the request is invalid.
+        :raises :class:`storage.exceptions.FileDoesNotExist`: If the file is not found in the bucket.
+        """
+
+        try:
+            self._client.download_file(bucket_name, key_name, path, Config=self._transfer_config)
+        except ClientError as err:
+            if self._is_not_found(err):
+                raise FileDoesNotExist('Unable to access remote file: %s %s' % (bucket_name, key_name))
+            raise
+
+    def run_transfers(self, func, items):
+        """Calls the given function for each of the given items on the bounded pool of transfer threads of this
+        client, returning the results in the order of the items. The first exception raised by a call is re-raised
+        once every call has finished.
+
+        :param func: The function taking a single item
+        :type func: function
+        :param items: The items
+        :type items: list
+        :returns: The results of the calls
+        :rtype: list
+        """
+
+        if len(items) <= 1:
+            return [func(item) for item in items]
+
+        if not self._thread_pool:
+            self._thread_pool = ThreadPool(S3_MAX_CONCURRENT_TRANSFERS)
+        return self._thread_pool.map(func, items)
+
+    def upload_file(self, bucket_name, key_name, path, extra_args=None):
+        """Uploads a local file to an S3 object. Large files are uploaded in parts.
+
+        :param bucket_name: The unique name of the bucket to upload to.
+        :type bucket_name: string
+        :param key_name: The key of the new object.
+        :type key_name: string
+        :param path: The source path for the upload.
+        :type path: string
+        :param extra_args: Additional arguments for the new object, such as ContentType or StorageClass.
+        :type extra_args: dict
+
+        :raises :class:`botocore.exceptions.ClientError`: If the request is invalid.
+        """
+
+        self._client.upload_file(path, bucket_name, key_name, ExtraArgs=extra_args, Config=self._transfer_config)
+
     def get_bucket(self, bucket_name, validate=True):
         """Gets a reference to an S3 bucket with the given identifier.
 
@@ -286,3 +680,15 @@ class S3Client(AWSClient):
                 # Filter out 0 size keys, these are directory keys as S3 objects must be at least 1 Byte
                 if result['Size'] > 0:
                     yield FileDetails(result['Key'], result['Size'])
+
+    @staticmethod
+    def _is_not_found(err):
+        """Indicates whether the given client error was caused by a missing object
+
+        :param err: The client error
+        :type err: :class:`botocore.exceptions.ClientError`
+        :returns: True if the object was not found, False otherwise
+        :rtype: bool
+        """
+
+        return err.response['ResponseMetadata']['HTTPStatusCode'] == 404
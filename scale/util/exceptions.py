@@ -45,6 +45,13 @@ class TerminatedCommand(Exception):
     pass
 
 
+class UnsupportedPartitionedTable(Exception):
+    """Exception indicating a table cannot be converted into a partitioned table without losing one of its uniqueness
+    guarantees"""
+
+    pass
+
+
 class UnbalancedBrackets(Exception):
     """Exception thrown when a string is provided that contains unbalanced curly brackets"""
 
@@ -0,0 +1,58 @@
+"""Defines the command line method for managing the partitions of the time partitioned tables"""
+from __future__ import unicode_literals
+
+import logging
+import sys
+
+from django.core.management.base import BaseCommand
+
+from util import partitions
+from util.exceptions import UnsupportedPartitionedTable
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Command that converts tables into time partitioned tables and maintains their partitions"""
+
+    help = 'Creates the upcoming partitions and drops the expired partitions of the time partitioned tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tables', nargs='*',
+                            help='The tables to manage, defaults to all tables that support partitioning.')
+        parser.add_argument('-c', '--convert', action='store_true',
+                            help='Converts the tables that are not partitioned yet. Requires PostgreSQL 11+.')
+
+    def handle(self, *args, **options):
+        """See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method converts and maintains the partitioned tables.
+        """
+
+        logger.info('Command starting: scale_partitions')
+
+        names = options.get('tables')
+        tables = [t for t in partitions.PARTITIONED_TABLES if not names or t.table in names]
+        unknown = set(names) - {t.table for t in tables}
+        if unknown:
+            logger.error('Tables do not support partitioning: %s', ', '.join(sorted(unknown)))
+            sys.exit(1)
+
+        if options.get('convert'):
+            if not partitions.is_supported():
+                logger.error('Partitioned tables require PostgreSQL 11 or later')
+                sys.exit(1)
+            for partitioned_table in tables:
+                if partitions.is_partitioned(partitioned_table.table):
+                    logger.info('Table %s is already partitioned', partitioned_table.table)
+                else:
+                    try:
+                        partitions.convert_table(partitioned_table)
+                    except UnsupportedPartitionedTable as ex:
+                        logger.error('%s', ex)
+                        sys.exit(1)
+
+        partitions.maintain_tables(tables)
+
+        logger.info('Command completed: scale_partitions')
@@ -0,0 +1,450 @@
+"""Defines the time range partitioning of the high volume tables and the management of their partitions"""
+from __future__ import unicode_literals
+
+import datetime
+import logging
+import re
+
+import django.utils.timezone as timezone
+from django.conf import settings
+from django.db import connection, transaction
+
+from job.clock import ClockEventProcessor
+from util.exceptions import UnsupportedPartitionedTable
+from util.parse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# Minimum PostgreSQL version (server_version_num) required for declarative partitioning with partitioned primary keys,
+# indexes and foreign keys
+MIN_SERVER_VERSION = 110000
+
+# Maximum number of rows removed by each statement when expiring the rows of a table that is not partitioned
+DELETE_BATCH_SIZE = 10000
+
+# Matches the upper bound of a range partition, such as FOR VALUES FROM (MINVALUE) TO ('2019-01-01 00:00:00+00')
+_UPPER_BOUND_REGEX = re.compile(r"TO \('([^']+)'\)")
+
+# Matches the name and table of an index definition
+_INDEX_DEF_REGEX = re.compile(r'^CREATE INDEX \S+ ON \S+ ')
+
+
+class PartitionedTable(object):
+    """Represents a table that is partitioned by ranges of a time column, with one partition per day or per month
+    """
+
+    def __init__(self, table, column, interval):
+        """Constructor
+
+        :param table: The name of the table
+        :type table: string
+        :param column: The name of the time column the table is partitioned by
+        :type column: string
+        :param interval: The time range of each partition, either 'day' or 'month'
+        :type interval: string
+        """
+
+        self.table = table
+        self.column = column
+        self.interval = interval
+
+    @property
+    def retention(self):
+        """The number of days of rows that are kept in the table, possibly None to keep all rows
+
+        :returns: The number of days to keep
+        :rtype: int
+        """
+
+        return settings.PARTITION_RETENTION_DAYS.get(self.table)
+
+    def get_partition_name(self, start):
+        """Returns the name of the partition holding the rows that start at the given time
+
+        :param start: The start of the partition
+        :type start: :class:`datetime.datetime`
+        :returns: The partition name
+        :rtype: string
+        """
+
+        if self.interval == 'day':
+            return '%s_p%s' % (self.table, start.strftime('%Y%m%d'))
+        return '%s_p%s' % (self.table, start.strftime('%Y%m'))
+
+    def get_partition_start(self, when):
+        """Returns the start of the partition holding the rows at the given time
+
+        :param when: The time
+        :type when: :class:`datetime.datetime`
+        :returns: The start of the partition
+        :rtype: :class:`datetime.datetime`
+        """
+
+        when = when.astimezone(timezone.utc)
+        if self.interval == 'day':
+            return datetime.datetime(when.year, when.month, when.day, tzinfo=timezone.utc)
+        return datetime.datetime(when.year, when.month, 1, tzinfo=timezone.utc)
+
+    def get_next_start(self, start):
+        """Returns the start of the partition that follows the partition with the given start
+
+        :param start: The start of the partition
+        :type start: :class:`datetime.datetime`
+        :returns: The start of the next partition
+        :rtype: :class:`datetime.datetime`
+        """
+
+        if self.interval == 'day':
+            return start + datetime.timedelta(days=1)
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1)
+        return start.replace(month=start.month + 1)
+
+
+# job_exe_end and job_exe_output are not included since their primary keys (job_exe_id) and unique (job, exe_num)
+# constraints cannot include the time column without allowing duplicate execution rows
+PARTITIONED_TABLES = [
+    PartitionedTable('task_update', 'created', 'day'),
+    PartitionedTable('job_load', 'measured', 'day'),
+    PartitionedTable('metrics_error', 'occurred', 'month'),
+    PartitionedTable('metrics_ingest', 'occurred', 'month'),
+    PartitionedTable('metrics_job_type', 'occurred', 'month'),
+]
+
+
+class PartitionsProcessor(ClockEventProcessor):
+    """This class periodically creates the upcoming partitions of the partitioned tables and removes the rows that
+    have exceeded their retention."""
+
+    def process_event(self, event, last_event=None):
+        """See :meth:`job.clock.ClockEventProcessor.process_event`.
+
+        Maintains the partitions of every partitioned table.
+        """
+
+        maintain_tables()
+
+
+def convert_table(partitioned_table, when=None):
+    """Converts the given existing table into a table partitioned by its time column. The existing table is renamed to
+    <table>_legacy and attached as the partition holding all of the rows up to the end of the current partition. The
+    primary key of the new table also includes the time column. The legacy partition is dropped once all of its rows
+    have expired. All database changes are made in an atomic transaction which locks the table while its rows are
+    validated and indexed.
+
+    A partitioned table can only enforce uniqueness on column sets that include its time column, so tables with a
+    unique constraint or index that does not include the time column are refused. The only exception is a single
+    column primary key generated by a sequence, which remains unique when the time column is added to it.
+
+    :param partitioned_table: The table to convert
+    :type partitioned_table: :class:`util.partitions.PartitionedTable`
+    :param when: The current time, defaults to now
+    :type when: :class:`datetime.datetime`
+
+    :raises :class:`util.exceptions.UnsupportedPartitionedTable`: If a unique constraint of the table does not include
+        its time column
+    """
+
+    table = partitioned_table.table
+    column = partitioned_table.column
+    legacy_table = '%s_legacy' % table
+    when = when if when else timezone.now()
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('LOCK TABLE %s IN ACCESS EXCLUSIVE MODE' % table)
+
+            unsupported = _get_unsupported_constraints(cursor, table, column)
+            if unsupported:
+                msg = 'Unable to partition %s by %s, the unique constraints %s do not include %s'
+                raise UnsupportedPartitionedTable(msg % (table, column, ', '.join(unsupported), column))
+
+            # Legacy rows must end before the first new partition
+            cursor.execute('SELECT MAX(%s) FROM %s' % (column, table))
+            latest = cursor.fetchone()[0]
+            bound = partitioned_table.get_next_start(partitioned_table.get_partition_start(when))
+            if latest and latest >= bound:
+                bound = partitioned_table.get_next_start(partitioned_table.get_partition_start(latest))
+
+            pk_columns = _get_primary_key_columns(cursor, table)
+            if column not in pk_columns:
+                pk_columns.append(column)
+            cursor.execute('SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN '
+                           '(SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN (\'p\', '
+                           '\'u\')) AND indexdef NOT LIKE \'CREATE UNIQUE%%\'', [table, table])
+            index_defs = [row[0] for row in cursor.fetchall()]
+            cursor.execute('SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass '
+                           'AND contype = \'f\'', [table])
+            foreign_keys = cursor.fetchall()
+            cursor.execute('SELECT a.attname, pg_get_serial_sequence(%s, a.attname) FROM pg_attribute a WHERE '
+                           'a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped', [table, table])
+            sequences = [row for row in cursor.fetchall() if row[1]]
+
+            cursor.execute('ALTER TABLE %s RENAME TO %s' % (table, legacy_table))
+            cursor.execute('CREATE TABLE %s (LIKE %s INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (%s)'
+                           % (table, legacy_table, column))
+            for seq_column, sequence in sequences:
+                # Keep the sequences when the legacy table is dropped
+                cursor.execute('ALTER SEQUENCE %s OWNED BY %s.%s' % (sequence, table, seq_column))
+            cursor.execute('ALTER TABLE %s ADD CONSTRAINT %s_part_pkey PRIMARY KEY (%s)'
+                           % (table, table, ', '.join(pk_columns)))
+            for index_def in index_defs:
+                name = index_def.split(' ')[2]
+                part_name = ('%s_part' % name)[-63:]
+                cursor.execute(_INDEX_DEF_REGEX.sub('CREATE INDEX %s ON %s ' % (part_name, table), index_def))
+            for name, definition in foreign_keys:
+                part_name = ('%s_part' % name)[-63:]
+                cursor.execute('ALTER TABLE %s ADD CONSTRAINT %s %s' % (table, part_name, definition))
+            cursor.execute('ALTER TABLE %s ATTACH PARTITION %s FOR VALUES FROM (MINVALUE) TO (%s)'
+                           % (table, legacy_table, _format_bound(bound)))
+
+    logger.info('Converted %s into a table partitioned by %s, existing rows up to %s are in %s', table, column, bound,
+                legacy_table)
+    create_partitions(partitioned_table, when)
+
+
+def create_partitions(partitioned_table, when=None):
+    """Creates the partitions of the given partitioned table from the current partition through the number of upcoming
+    partitions given by the PARTITION_PREMAKE setting, skipping any range already covered by an existing partition
+
+    :param partitioned_table: The partitioned table
+    :type partitioned_table: :class:`util.partitions.PartitionedTable`
+    :param when: The current time, defaults to now
+    :type when: :class:`datetime.datetime`
+    :returns: The names of the partitions that were created
+    :rtype: :func:`list`
+    """
+
+    when = when if when else timezone.now()
+    start = partitioned_table.get_partition_start(when)
+    end = start
+    for _ in range(settings.PARTITION_PREMAKE + 1):
+        end = partitioned_table.get_next_start(end)
+
+    bounds = [bound for bound in get_partitions(partitioned_table.table).values() if bound]
+    if bounds:
+        start = max(start, max(bounds))
+
+    created = []
+    with connection.cursor() as cursor:
+        while start < end:
+            next_start = partitioned_table.get_next_start(start)
+            name = partitioned_table.get_partition_name(start)
+            cursor.execute('CREATE TABLE %s PARTITION OF %s FOR VALUES FROM (%s) TO (%s)'
+                           % (name, partitioned_table.table, _format_bound(start), _format_bound(next_start)))
+            created.append(name)
+            start = next_start
+
+    if created:
+        logger.info('Created partitions of %s: %s', partitioned_table.table, ', '.join(created))
+    return created
+
+
+def drop_expired_partitions(partitioned_table, when=None):
+    """Detaches and drops the partitions of the given partitioned table whose rows have all exceeded the table's
+    retention
+
+    :param partitioned_table: The partitioned table
+    :type partitioned_table: :class:`util.partitions.PartitionedTable`
+    :param when: The current time, defaults to now
+    :type when: :class:`datetime.datetime`
+    :returns: The names of the partitions that were dropped
+    :rtype: :func:`list`
+    """
+
+    if partitioned_table.retention is None:
+        return []
+
+    when = when if when else timezone.now()
+    expired = when - datetime.timedelta(days=partitioned_table.retention)
+
+    dropped = []
+    for name, bound in sorted(get_partitions(partitioned_table.table).items(), key=lambda item: item[1]):
+        if bound and bound <= expired:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute('ALTER TABLE %s DETACH PARTITION %s' % (partitioned_table.table, name))
+                    cursor.execute('DROP TABLE %s' % name)
+            dropped.append(name)
+
+    if dropped:
+        logger.info('Dropped expired partitions of %s: %s', partitioned_table.table, ', '.join(dropped))
+    return dropped
+
+
+def delete_expired_rows(partitioned_table, when=None):
+    """Deletes the rows of the given table that is not partitioned that have exceeded the table's retention, removing
+    at most DELETE_BATCH_SIZE rows in each statement
+
+    :param partitioned_table: The table
+    :type partitioned_table: :class:`util.partitions.PartitionedTable`
+    :param when: The current time, defaults to now
+    :type when: :class:`datetime.datetime`
+    :returns: The number of deleted rows
+    :rtype: int
+    """
+
+    if partitioned_table.retention is None:
+        return 0
+
+    when = when if when else timezone.now()
+    expired = when - datetime.timedelta(days=partitioned_table.retention)
+
+    qry = 'DELETE FROM {table} WHERE ctid = ANY(ARRAY(SELECT ctid FROM {table} WHERE {column} < %s LIMIT %s))'
+    qry = qry.format(table=partitioned_table.table, column=partitioned_table.column)
+    total = 0
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute(qry, [expired, DELETE_BATCH_SIZE])
+            total += cursor.rowcount
+            if cursor.rowcount < DELETE_BATCH_SIZE:
+                break
+
+    if total:
+        logger.info('Deleted %d expired row(s) of %s', total, partitioned_table.table)
+    return total
+
+
+def get_unsupported_constraints(partitioned_table):
+    """Returns the names of the unique constraints and indexes of the given table that prevent it from being converted
+    into a partitioned table, see :meth:`util.partitions.convert_table`
+
+    :param partitioned_table: The table
+    :type partitioned_table: :class:`util.partitions.PartitionedTable`
+    :returns: The names of the unsupported constraints and indexes
+    :rtype: :func:`list`
+    """
+
+    with connection.cursor() as cursor:
+        return _get_unsupported_constraints(cursor, partitioned_table.table, partitioned_table.column)
+
+
+def get_partitions(table):
+    """Returns the partitions of the given table with the exclusive upper bound of each of their time ranges
+
+    :param table: The name of the table
+    :type table: string
+    :returns: The upper bound of each partition stored by partition name, None for an unbounded partition
+    :rtype: dict
+    """
+
+    qry = 'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i '
+    qry += 'JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s'
+    with connection.cursor() as cursor:
+        cursor.execute(qry, [table])
+        partitions = {}
+        for name, bound_def in cursor.fetchall():
+            match = _UPPER_BOUND_REGEX.search(bound_def or '')
+            partitions[name] = parse_datetime(match.group(1).replace(' ', 'T')) if match else None
+    return partitions
+
+
+def is_partitioned(table):
+    """Indicates whether the given table is a partitioned table
+
+    :param table: The name of the table
+    :type table: string
+    :returns: True if the table is partitioned, False otherwise
+    :rtype: bool
+    """
+
+    if not is_supported():
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid '
+                       'WHERE c.relname = %s', [table])
+        return cursor.fetchone() is not None
+
+
+def is_supported():
+    """Indicates whether the database server supports partitioned tables
+
+    :returns: True if partitioning is supported, False otherwise
+    :rtype: bool
+    """
+
+    return connection.pg_version >= MIN_SERVER_VERSION
+
+
+def maintain_tables(partitioned_tables=None, when=None):
+    """Creates the upcoming partitions and drops the expired partitions of the given partitioned tables. Tables that
+    are not partitioned have their expired rows deleted in batches instead.
+
+    :param partitioned_tables: The tables to maintain, defaults to all of the tables that support partitioning
+    :type partitioned_tables: [:class:`util.partitions.PartitionedTable`]
+    :param when: The current time, defaults to now
+    :type when: :class:`datetime.datetime`
+    """
+
+    if partitioned_tables is None:
+        partitioned_tables = PARTITIONED_TABLES
+
+    for partitioned_table in partitioned_tables:
+        try:
+            if is_partitioned(partitioned_table.table):
+                create_partitions(partitioned_table, when)
+                drop_expired_partitions(partitioned_table, when)
+            else:
+                delete_expired_rows(partitioned_table, when)
+        except Exception:
+            logger.exception('Failed to maintain the partitions of %s', partitioned_table.table)
+
+
+def _format_bound(when):
+    """Formats the given time as a partition bound literal
+
+    :param when: The time
+    :type when: :class:`datetime.datetime`
+    :returns: The bound literal
+    :rtype: string
+    """
+
+    return "'%s'" % when.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S+00')
+
+
+def _get_primary_key_columns(cursor, table):
+    """Returns the primary key columns of the given table
+
+    :param cursor: The database cursor
+    :type cursor: :class:`django.db.backends.utils.CursorWrapper`
+    :param table: The name of the table
+    :type table: string
+    :returns: The primary key columns
+    :rtype: :func:`list`
+    """
+
+    cursor.execute('SELECT a.attname FROM pg_index i JOIN pg_attribute a ON a.attrelid = i.indrelid '
+                   'AND a.attnum = ANY(i.indkey) WHERE i.indrelid = %s::regclass AND i.indisprimary', [table])
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _get_unsupported_constraints(cursor, table, column):
+    """Returns the names of the unique constraints and indexes of the given table that do not include the given time
+    column, excluding a single column primary key generated by a sequence
+
+    :param cursor: The database cursor
+    :type cursor: :class:`django.db.backends.utils.CursorWrapper`
+    :param table: The name of the table
+    :type table: string
+    :param column: The name of the time column
+    :type column: string
+    :returns: The names of the unsupported constraints and indexes
+    :rtype: :func:`list`
+    """
+
+    qry = 'SELECT c.relname, i.indisprimary, array_agg(a.attname::text), '
+    qry += 'bool_or(pg_get_serial_sequence(%s, a.attname) IS NOT NULL) FROM pg_index i '
+    qry += 'JOIN pg_class c ON c.oid = i.indexrelid '
+    qry += 'JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) '
+    qry += 'WHERE i.indrelid = %s::regclass AND i.indisunique GROUP BY c.relname, i.indisprimary ORDER BY c.relname'
+    cursor.execute(qry, [table, table])
+
+    unsupported = []
+    for name, is_primary, columns, is_serial in cursor.fetchall():
+        if column in columns:
+            continue
+        if is_primary and len(columns) == 1 and is_serial:
+            continue
+        unsupported.append(name)
+    return unsupported
@@ -1,10 +1,17 @@
 """Defines utilities for building RESTful APIs."""
 from __future__ import unicode_literals
 
+import base64
 import datetime
+import json
 import uuid
+from collections import OrderedDict
 
 from django.contrib.auth.models import AnonymousUser, User
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import Q
+from django.db.models.query import QuerySet
 from django.template.defaultfilters import slugify
 import django.utils.timezone as timezone
 import rest_framework.pagination as pagination
@@ -15,7 +22,9 @@ from django.conf import settings
 from django.conf.urls import include, url
 from rest_framework import permissions
 from rest_framework.exceptions import APIException
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 import util.parse as parse_util
 
@@ -42,11 +51,202 @@ class ScaleAPIPermissions(permissions.BasePermission):
         return False
 
 class DefaultPagination(pagination.PageNumberPagination):
-    """Default configuration class for the paging system."""
+    """Default configuration class for the paging system. Results are paged by page number unless the request includes
+    the cursor parameter, in which case the results are paged by keyset on their (last_modified, id) or (id) values.
+    Keyset pages are found with an indexed range query instead of an OFFSET and count query, so they are cheap to fetch
+    no matter how deep into the results they are."""
     page_size = 100
     page_size_query_param = 'page_size'
     max_page_size = 1000
 
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    count_choices = ('estimate', 'exact', 'none')
+
+    def __init__(self):
+        """Constructor
+        """
+
+        self.keyset = None
+
+    def get_paginated_response(self, data):
+        """See :meth:`rest_framework.pagination.PageNumberPagination.get_paginated_response`
+        """
+
+        if not self.keyset:
+            return super(DefaultPagination, self).get_paginated_response(data)
+
+        return Response(OrderedDict([
+            ('count', self.keyset.count),
+            ('next', self.keyset.next_link),
+            ('previous', None),
+            ('results', data)
+        ]))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """See :meth:`rest_framework.pagination.PageNumberPagination.paginate_queryset`
+        """
+
+        self.keyset = None
+        if self.cursor_query_param not in request.query_params:
+            return super(DefaultPagination, self).paginate_queryset(queryset, request, view)
+
+        if not isinstance(queryset, QuerySet):
+            raise BadParameter('Cursor pagination is not supported for these results')
+        count_type = request.query_params.get(self.count_query_param, 'estimate')
+        if count_type not in self.count_choices:
+            raise BadParameter('%s must be one of: %s' % (self.count_query_param, ', '.join(self.count_choices)))
+
+        self.request = request
+        self.keyset = KeysetPage(queryset, request.query_params[self.cursor_query_param], self.get_page_size(request))
+        self.keyset.count = self._get_count(self.keyset.queryset, count_type)
+        if self.keyset.next_cursor:
+            url = request.build_absolute_uri()
+            url = remove_query_param(url, self.page_query_param)
+            self.keyset.next_link = replace_query_param(url, self.cursor_query_param, self.keyset.next_cursor)
+        return self.keyset.results
+
+    def _get_count(self, queryset, count_type):
+        """Returns the number of results in the given queryset
+
+        :param queryset: The queryset of all results, without any cursor applied
+        :type queryset: :class:`django.db.models.query.QuerySet`
+        :param count_type: Either estimate, exact, or none
+        :type count_type: string
+        :returns: The number of results, possibly None
+        :rtype: int
+        """
+
+        if count_type == 'exact':
+            return queryset.count()
+        elif count_type == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+
+class KeysetPage(object):
+    """Represents a single page of results that are paged by keyset. The cursor encodes the keyset values of the last
+    result on the previous page and the next page starts immediately after it in the ordering of the results."""
+
+    def __init__(self, queryset, cursor, page_size):
+        """Constructor
+
+        :param queryset: The queryset of all results
+        :type queryset: :class:`django.db.models.query.QuerySet`
+        :param cursor: The cursor for the page, an empty string for the first page
+        :type cursor: string
+        :param page_size: The number of results on each page
+        :type page_size: int
+
+        :raises :class:`util.rest.BadParameter`: If the ordering of the results or the cursor is invalid
+        """
+
+        self.fields, descending = self._get_keyset(queryset)
+        ordering = ['-%s' % field if descending else field for field in self.fields]
+        self.queryset = queryset.order_by(*ordering)
+
+        page_queryset = self.queryset
+        if cursor:
+            page_queryset = self._filter_after(page_queryset, self._decode_cursor(cursor), descending)
+        results = list(page_queryset[:page_size + 1])
+
+        self.count = None
+        self.next_cursor = None
+        self.next_link = None
+        self.results = results[:page_size]
+        if len(results) > page_size:
+            self.next_cursor = self._encode_cursor(self.results[-1])
+
+    def _decode_cursor(self, cursor):
+        """Decodes the keyset values from the given cursor
+
+        :param cursor: The cursor
+        :type cursor: string
+        :returns: The keyset values
+        :rtype: list
+
+        :raises :class:`util.rest.BadParameter`: If the cursor is invalid
+        """
+
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError('Wrong number of cursor values')
+            if self.fields[0] == 'last_modified':
+                values[0] = parse_util.parse_datetime(values[0])
+                if not values[0]:
+                    raise ValueError('Invalid cursor datetime')
+            values[-1] = int(values[-1])
+        except (TypeError, ValueError):
+            raise BadParameter('Invalid cursor: %s' % cursor)
+        return values
+
+    def _encode_cursor(self, model):
+        """Encodes the keyset values of the given model into a cursor
+
+        :param model: The last model on the page
+        :type model: :class:`django.db.models.Model`
+        :returns: The cursor
+        :rtype: string
+        """
+
+        values = [getattr(model, field) for field in self.fields]
+        if self.fields[0] == 'last_modified':
+            values[0] = parse_util.datetime_to_string(values[0])
+        return base64.urlsafe_b64encode(json.dumps(values))
+
+    def _filter_after(self, queryset, values, descending):
+        """Filters the given queryset to the results that come after the given keyset values
+
+        :param queryset: The ordered queryset
+        :type queryset: :class:`django.db.models.query.QuerySet`
+        :param values: The keyset values
+        :type values: list
+        :param descending: Whether the results are in descending order
+        :type descending: bool
+        :returns: The filtered queryset
+        :rtype: :class:`django.db.models.query.QuerySet`
+        """
+
+        op = 'lt' if descending else 'gt'
+        if len(values) == 1:
+            return queryset.filter(**{'id__%s' % op: values[0]})
+
+        # The first filter is a plain range on last_modified so that it can use the index on last_modified
+        last_modified, model_id = values
+        queryset = queryset.filter(**{'last_modified__%se' % op: last_modified})
+        return queryset.filter(Q(**{'last_modified__%s' % op: last_modified}) | Q(**{'id__%s' % op: model_id}))
+
+    def _get_keyset(self, queryset):
+        """Returns the keyset fields and direction for the ordering of the given queryset. Results may be ordered by
+        last_modified or id, and are ordered by last_modified when they do not specify an ordering and have that field.
+
+        :param queryset: The queryset of all results
+        :type queryset: :class:`django.db.models.query.QuerySet`
+        :returns: A tuple of the list of keyset field names and whether the ordering is descending
+        :rtype: tuple
+
+        :raises :class:`util.rest.BadParameter`: If the results are ordered by a field that is not supported
+        """
+
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        if ordering:
+            descending = ordering[0].startswith('-')
+            field = ordering[0].lstrip('-')
+        else:
+            descending = False
+            field = 'last_modified'
+            try:
+                queryset.model._meta.get_field(field)
+            except FieldDoesNotExist:
+                field = 'id'
+
+        if field == 'last_modified':
+            return ['last_modified', 'id'], descending
+        elif field in ('id', 'pk'):
+            return ['id'], descending
+        raise BadParameter('Cursor pagination requires results ordered by last_modified or id, not %s' % field)
+
 
 class ModelIdSerializer(serializers.Serializer):
     """Converts a model to a lightweight place holder object with only an identifier to REST output"""
@@ -170,6 +370,33 @@ def has_params(request, *names):
     return True
 
 
+def estimate_count(queryset):
+    """Returns an estimate of the number of results in the given queryset from the PostgreSQL statistics instead of
+    counting them. Unfiltered querysets use the row count of the table in pg_class and filtered querysets use the row
+    count estimated by the query planner.
+
+    :param queryset: The queryset to count
+    :type queryset: :class:`django.db.models.query.QuerySet`
+    :returns: The estimated number of results
+    :rtype: int
+    """
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            # Tables that have never been analyzed have no row count
+            if row and row[0] >= 0:
+                return int(row[0])
+
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute('EXPLAIN (FORMAT JSON) %s' % sql, params)
+        plan = cursor.fetchone()[0]
+    if not isinstance(plan, list):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
 def get_relative_days(days):
     """Calculates a relative date/time in the past without any time offsets.
 
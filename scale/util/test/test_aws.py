@@ -1,16 +1,17 @@
 from __future__ import unicode_literals
 
+import threading
 from copy import deepcopy
 from datetime import datetime
 
 import django
 from botocore.exceptions import ParamValidationError, ClientError
 from django.test import TestCase
-from mock import call, patch
+from mock import patch
 from mock import MagicMock
 
-from util.aws import AWSClient, AWSCredentials, S3Client, SQSClient
-from util.exceptions import InvalidAWSCredentials
+from util.aws import AWSClient, AWSCredentials, S3Client, SQSClient, SQSDeleteBatch, SQSVisibilityHeartbeat
+from util.exceptions import FileDoesNotExist, InvalidAWSCredentials
 
 
 class TestAws(TestCase):
@@ -143,6 +144,43 @@ class TestS3Client(TestCase):
 
         self.assertEqual(len(list(results)), 2)
 
+    def test_delete_objects_batches(self):
+        keys = ['file_%d' % i for i in range(2500)]
+        mock_client = MagicMock()
+        mock_client.delete_objects.side_effect = [{}, {'Errors': [{'Key': 'file_1500', 'Message': 'Access Denied'}]},
+                                                  {'Deleted': [{'Key': 'file_2499'}]}]
+
+        with S3Client(self.credentials) as client:
+            client._client = mock_client
+            errors = client.delete_objects('sample-bucket', keys)
+
+        self.assertDictEqual(errors, {'file_1500': 'Access Denied'})
+        batch_sizes = [len(c[1]['Delete']['Objects']) for c in mock_client.delete_objects.call_args_list]
+        self.assertListEqual(batch_sizes, [1000, 1000, 500])
+
+    def test_download_file_not_found(self):
+        mock_client = MagicMock()
+        error_response = {'Error': {'Code': '404', 'Message': 'Not Found'}, 'ResponseMetadata': {'HTTPStatusCode': 404}}
+        mock_client.download_file.side_effect = ClientError(error_response, 'HeadObject')
+
+        with self.assertRaises(FileDoesNotExist):
+            with S3Client(self.credentials) as client:
+                client._client = mock_client
+                client.download_file('sample-bucket', 'missing/file', '/tmp/file')
+
+    def test_run_transfers(self):
+        thread_names = set()
+
+        def transfer(item):
+            thread_names.add(threading.current_thread().name)
+            return item * 2
+
+        with S3Client(self.credentials) as client:
+            results = client.run_transfers(transfer, range(20))
+
+        self.assertListEqual(results, [i * 2 for i in range(20)])
+        self.assertNotIn(threading.current_thread().name, thread_names)
+
 
 
 class TestSQSClient(TestCase):
@@ -152,20 +190,95 @@ class TestSQSClient(TestCase):
 
         django.setup()
 
-    @patch('util.aws.SQSClient.get_queue_by_name')
-    def test_send_messages(self, get_queue_by_name):
-        inputs = [x for x in range(0,25)]
-        calls = [call(Entries=[x for x in range(0, 10)]),
-                 call(Entries=[x for x in range(10, 20)]),
-                 call(Entries=[x for x in range(20, 25)])]
+    @patch('util.aws.SQSClient.get_queue_url')
+    def test_send_messages(self, get_queue_url):
+        inputs = [{'Id': str(x), 'MessageBody': 'body'} for x in range(0, 25)]
+        get_queue_url.return_value = 'url'
 
-        send_messages = MagicMock()
-        get_queue_by_name.return_value.send_messages = send_messages
+        with SQSClient(self.credentials, self.region_name) as client:
+            client._client = MagicMock()
+            client._client.send_message_batch.return_value = {'Successful': [], 'Failed': []}
+            client.send_messages('queue', inputs)
+
+        calls = client._client.send_message_batch.call_args_list
+        self.assertEqual(len(calls), 3)
+        sent = sorted([entry for c in calls for entry in c[1]['Entries']], key=lambda entry: int(entry['Id']))
+        self.assertListEqual(sent, inputs)
+        self.assertListEqual(sorted(len(c[1]['Entries']) for c in calls), [5, 10, 10])
+
+    @patch('util.aws.SQS_MAX_BATCH_SIZE', 10)
+    @patch('util.aws.SQSClient.get_queue_url')
+    def test_send_messages_size_limit(self, get_queue_url):
+        inputs = [{'Id': str(x), 'MessageBody': 'body'} for x in range(0, 5)]
+        get_queue_url.return_value = 'url'
+
+        with SQSClient(self.credentials, self.region_name) as client:
+            client._client = MagicMock()
+            client._client.send_message_batch.return_value = {'Successful': [], 'Failed': []}
+            client.send_messages('queue', inputs)
+
+        # Each batch is limited by the total size of its messages
+        self.assertEqual(client._client.send_message_batch.call_count, 3)
+
+    @patch('util.aws.SQSClient.get_queue_url')
+    def test_send_messages_retry_failed(self, get_queue_url):
+        inputs = [{'Id': str(x), 'MessageBody': 'body'} for x in range(0, 3)]
+        get_queue_url.return_value = 'url'
 
         with SQSClient(self.credentials, self.region_name) as client:
+            client._client = MagicMock()
+            client._client.send_message_batch.side_effect = [
+                {'Failed': [{'Id': '1', 'SenderFault': False}, {'Id': '2', 'SenderFault': True}]},
+                {'Failed': []}]
             client.send_messages('queue', inputs)
 
-        send_messages.assert_has_calls(calls)
+        # Only the entry that failed due to SQS is retried
+        client._client.send_message_batch.assert_called_with(QueueUrl='url', Entries=[inputs[1]])
+
+    def test_delete_messages(self):
+        messages = [MagicMock(queue_url='url1', receipt_handle=str(x)) for x in range(0, 12)]
+        messages.append(MagicMock(queue_url='url2', receipt_handle='12'))
+
+        with SQSClient(self.credentials, self.region_name) as client:
+            client._client = MagicMock()
+            client._client.delete_message_batch.return_value = {'Successful': [], 'Failed': []}
+            client.delete_messages(messages)
+
+        calls = client._client.delete_message_batch.call_args_list
+        self.assertEqual(len(calls), 3)
+        deleted = [(c[1]['QueueUrl'], entry['ReceiptHandle']) for c in calls for entry in c[1]['Entries']]
+        self.assertEqual(sorted(deleted), sorted((m.queue_url, m.receipt_handle) for m in messages))
+
+    def test_delete_batch(self):
+        client = MagicMock()
+        delete_batch = SQSDeleteBatch(client)
+        messages = [MagicMock() for _ in range(0, 12)]
+
+        for message in messages:
+            delete_batch.add(message)
+        client.delete_messages.assert_called_once_with(messages[:10])
+
+        delete_batch.flush()
+        client.delete_messages.assert_called_with(messages[10:])
+        delete_batch.flush()
+        self.assertEqual(client.delete_messages.call_count, 2)
+
+    def test_visibility_heartbeat(self):
+        client = MagicMock()
+        message1 = MagicMock(message_id='1')
+        message2 = MagicMock(message_id='2')
+        extended = threading.Event()
+        client.change_message_visibility.side_effect = lambda messages, timeout: extended.set()
+
+        heartbeat = SQSVisibilityHeartbeat(client, 30, 0.01)
+        heartbeat.add(message1)
+        heartbeat.add(message2)
+        heartbeat.remove(message1)
+        heartbeat.start()
+        self.assertTrue(extended.wait(5))
+        heartbeat.stop()
+
+        client.change_message_visibility.assert_called_with([message2], 30)
 
     @patch('util.aws.SQSClient.get_queue_by_name')
     def test_receive_messages_1_batch_size_1(self, get_queue_by_name):
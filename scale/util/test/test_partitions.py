@@ -0,0 +1,103 @@
+from __future__ import unicode_literals
+
+import datetime
+
+import django
+import django.utils.timezone as timezone
+from django.test import TestCase
+from mock import patch
+
+from job.models import JobExecutionEnd
+from queue.models import JobLoad
+from util.exceptions import UnsupportedPartitionedTable
+from util.partitions import PartitionedTable, convert_table, get_unsupported_constraints, maintain_tables
+
+
+class TestPartitionedTable(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_day_partitions(self):
+        """Tests the ranges and names of daily partitions"""
+
+        table = PartitionedTable('task_update', 'created', 'day')
+        start = table.get_partition_start(datetime.datetime(2018, 12, 31, 23, 30, tzinfo=timezone.utc))
+
+        self.assertEqual(start, datetime.datetime(2018, 12, 31, tzinfo=timezone.utc))
+        self.assertEqual(table.get_next_start(start), datetime.datetime(2019, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(table.get_partition_name(start), 'task_update_p20181231')
+
+    def test_month_partitions(self):
+        """Tests the ranges and names of monthly partitions"""
+
+        table = PartitionedTable('metrics_error', 'occurred', 'month')
+        start = table.get_partition_start(datetime.datetime(2018, 12, 31, 23, 30, tzinfo=timezone.utc))
+
+        self.assertEqual(start, datetime.datetime(2018, 12, 1, tzinfo=timezone.utc))
+        self.assertEqual(table.get_next_start(start), datetime.datetime(2019, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(table.get_partition_name(start), 'metrics_error_p201812')
+
+    def test_retention(self):
+        """Tests reading the retention of a table from the settings"""
+
+        table = PartitionedTable('job_load', 'measured', 'day')
+
+        with self.settings(PARTITION_RETENTION_DAYS={'job_load': 7}):
+            self.assertEqual(table.retention, 7)
+        with self.settings(PARTITION_RETENTION_DAYS={}):
+            self.assertIsNone(table.retention)
+
+
+class TestConvertTable(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_serial_primary_key(self):
+        """Tests that a table with only a sequence generated primary key can be converted"""
+
+        table = PartitionedTable('job_load', 'measured', 'day')
+
+        self.assertListEqual(get_unsupported_constraints(table), [])
+
+    def test_unique_constraints_refused(self):
+        """Tests that converting a table whose unique constraints do not include the time column is refused"""
+
+        table = PartitionedTable('job_exe_end', 'created', 'month')
+
+        unsupported = get_unsupported_constraints(table)
+        self.assertEqual(len(unsupported), 2)
+        self.assertIn('job_exe_end_pkey', unsupported)
+        with self.assertRaises(UnsupportedPartitionedTable):
+            convert_table(table)
+
+        # The table and its constraints are left unchanged
+        self.assertEqual(JobExecutionEnd.objects.count(), 0)
+        self.assertListEqual(get_unsupported_constraints(table), unsupported)
+
+
+class TestMaintainTables(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    @patch('util.partitions.DELETE_BATCH_SIZE', 2)
+    def test_delete_expired_rows(self):
+        """Tests deleting the expired rows of a table that is not partitioned in batches"""
+
+        when = datetime.datetime(2018, 1, 31, tzinfo=timezone.utc)
+        for day in range(1, 31):
+            measured = datetime.datetime(2018, 1, day, tzinfo=timezone.utc)
+            JobLoad.objects.create(measured=measured, pending_count=0, queued_count=0, running_count=0, total_count=0)
+        table = PartitionedTable('job_load', 'measured', 'day')
+
+        with self.settings(PARTITION_RETENTION_DAYS={}):
+            maintain_tables([table], when)
+        self.assertEqual(JobLoad.objects.count(), 30)
+
+        with self.settings(PARTITION_RETENTION_DAYS={'job_load': 7}):
+            maintain_tables([table], when)
+        self.assertEqual(JobLoad.objects.count(), 7)
+        self.assertEqual(JobLoad.objects.order_by('measured').first().measured,
+                         datetime.datetime(2018, 1, 24, tzinfo=timezone.utc))
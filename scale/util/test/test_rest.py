@@ -9,9 +9,12 @@ from django.test import TestCase
 from django.utils.timezone import utc
 from mock import MagicMock
 from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
 
+import error.test.utils as error_test_utils
 import util.rest as rest_util
-from util.rest import BadParameter, ReadOnly
+from error.models import Error
+from util.rest import BadParameter, DefaultPagination, ReadOnly
 
 
 class TestRest(TestCase):
@@ -751,4 +754,47 @@ class TestRest(TestCase):
         set = None
         self.assertEqual(rest_util.title_to_name(set, title1), 'boring-normal-title')
         self.assertEqual(rest_util.title_to_name(set, title2), 'underscore-title')
-        self.assertEqual(rest_util.title_to_name(set, title3), 'title-1')
\ No newline at end of file
+        self.assertEqual(rest_util.title_to_name(set, title3), 'title-1')
+
+
+class TestDefaultPagination(TestCase):
+    def setUp(self):
+        django.setup()
+
+        Error.objects.all().delete()
+        self.error_1 = error_test_utils.create_error()
+        self.error_2 = error_test_utils.create_error()
+        self.error_3 = error_test_utils.create_error()
+
+    def _paginate(self, queryset, params):
+        """Paginates the given queryset for a request with the given query parameters."""
+        request = Request(APIRequestFactory().get('/v6/errors/', params))
+        paginator = DefaultPagination()
+        page = paginator.paginate_queryset(queryset, request)
+        return page, paginator.get_paginated_response([model.id for model in page]).data
+
+    def test_page_number(self):
+        """Tests that page number pagination is used without a cursor."""
+        page, data = self._paginate(Error.objects.order_by('id'), {'page': 2, 'page_size': 2})
+        self.assertListEqual(page, [self.error_3])
+        self.assertEqual(data['count'], 3)
+        self.assertIsNone(data['next'])
+
+    def test_cursor_descending(self):
+        """Tests paging through results in descending order with a cursor."""
+        queryset = Error.objects.order_by('-id')
+        page, data = self._paginate(queryset, {'cursor': '', 'page_size': 2, 'count': 'none'})
+        self.assertListEqual(page, [self.error_3, self.error_2])
+        self.assertIsNone(data['count'])
+
+        cursor = data['next'].split('cursor=')[1].split('&')[0]
+        page, data = self._paginate(queryset, {'cursor': cursor, 'page_size': 2})
+        self.assertListEqual(page, [self.error_1])
+        self.assertIsNone(data['next'])
+
+    def test_cursor_invalid(self):
+        """Tests that invalid cursors and orderings are rejected."""
+        self.assertRaises(BadParameter, self._paginate, Error.objects.all(), {'cursor': 'bad'})
+        self.assertRaises(BadParameter, self._paginate, Error.objects.all(), {'cursor': '', 'count': 'bad'})
+        self.assertRaises(BadParameter, self._paginate, Error.objects.order_by('name'), {'cursor': ''})
+        self.assertRaises(BadParameter, self._paginate, [self.error_1], {'cursor': ''})
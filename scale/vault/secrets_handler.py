@@ -1,18 +1,32 @@
 """Handles secret getters and setters for Scale"""
 
 import ast
+import datetime
 import jwt
 import json
 import requests
+from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 
 from django.conf import settings
+from django.utils.timezone import now, utc
 from vault.exceptions import InvalidSecretsAuthorization, InvalidSecretsConfiguration, InvalidSecretsRequest, \
     InvalidSecretsToken, InvalidSecretsValue
 
+# The maximum number of concurrent requests that a handler keeps pooled connections for
+MAX_CONCURRENT_REQUESTS = 8
+
+# How long to use an authentication token that does not include its expiration time
+DEFAULT_TOKEN_LIFETIME = datetime.timedelta(hours=1)
+
+# Tokens are considered expired this long before they actually expire
+TOKEN_EXPIRATION_MARGIN = datetime.timedelta(minutes=5)
+
 
 class SecretsHandler(object):
-    """Represents a secrets handler for setting and retrieving secrets
+    """Represents a secrets handler for setting and retrieving secrets. A handler keeps its authentication token and a
+    pool of connections to the secrets backend, so it should be reused until its token expires. The requests for
+    retrieving secrets may be made concurrently from multiple threads.
     """
 
     def __init__(self):
@@ -40,6 +54,12 @@ class SecretsHandler(object):
         if not self.raise_ssl_warnings:
             requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
+        self.token_expires = None
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=MAX_CONCURRENT_REQUESTS)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
         if not self.secrets_url:
             raise InvalidSecretsConfiguration('A secrets backend is not properly configured with Scale.')
         elif self.service_account:
@@ -50,6 +70,20 @@ class SecretsHandler(object):
 
         self._check_secrets_backend()
 
+    def get_changed_job_type_secrets(self, job_name, etag):
+        """Retrieves the secrets located at the job_name within the backend if they have changed since they were
+        retrieved with the given ETag. Backends that do not provide ETags always return the secrets.
+
+        :param job_name: path within the secrets backend that the secret is stored
+        :type job_name: str
+        :param etag: The ETag from when the secrets were last retrieved, possibly None
+        :type etag: str
+        :return: A tuple of the secret values (None if they have not changed) and their ETag (possibly None)
+        :rtype: tuple
+        """
+
+        return self._get_job_type_secrets(job_name, etag)
+
     def get_job_type_secrets(self, job_name):
         """Retrieves the secrets located at the job_name within the backend
 
@@ -59,6 +93,29 @@ class SecretsHandler(object):
         :rtype: str
         """
 
+        return self._get_job_type_secrets(job_name)[0]
+
+    def is_token_expired(self):
+        """Indicates whether the authentication token of this handler has expired, or is about to, so that a new handler
+        should be created
+
+        :return: True if the token has expired, False otherwise
+        :rtype: bool
+        """
+
+        return self.token_expires is not None and now() >= self.token_expires - TOKEN_EXPIRATION_MARGIN
+
+    def _get_job_type_secrets(self, job_name, etag=None):
+        """Retrieves the secrets located at the job_name within the backend
+
+        :param job_name: path within the secrets backend that the secret is stored
+        :type job_name: str
+        :param etag: The ETag from when the secrets were last retrieved, possibly None
+        :type etag: str
+        :return: A tuple of the secret values (None if they have not changed) and their ETag (possibly None)
+        :rtype: tuple
+        """
+
         url = self.secrets_url
 
         if self.dcos_token:
@@ -67,7 +124,11 @@ class SecretsHandler(object):
                 'Content-Type': 'application/json',
                 'Authorization': self.dcos_token
             }
+            if etag:
+                headers['If-None-Match'] = etag
             get_secret = self._make_request('GET', url, headers=headers)
+            if get_secret.status_code == 304:
+                return None, etag
 
             try:
                 response = get_secret.json()
@@ -81,12 +142,16 @@ class SecretsHandler(object):
                 'Content-Type': 'application/json',
                 'X-Vault-Token': self.secrets_token
             }
+            if etag:
+                headers['If-None-Match'] = etag
             get_secret = self._make_request('GET', url, headers=headers)
+            if get_secret.status_code == 304:
+                return None, etag
 
             response = get_secret.json()
             secret_values = response['data']
 
-        return secret_values
+        return secret_values, get_secret.headers.get('ETag')
 
     def list_job_types(self):
         """Gets the names of all job types that have secrets
@@ -225,9 +290,26 @@ class SecretsHandler(object):
         request_auth = self._make_request('POST', url, data=data)
         self.secrets_url += '/secrets/v1'
         access_token = [k + '=' + v for k, v in request_auth.json().items()][0]
+        self.token_expires = self._get_token_expiration(request_auth.json().get('token'))
 
         return access_token
 
+    def _get_token_expiration(self, token):
+        """Returns when the given DC/OS authentication token expires
+
+        :param token: The authentication token
+        :type token: str
+        :return: When the token expires
+        :rtype: :class:`datetime.datetime`
+        """
+
+        try:
+            # The token is only read for its expiration, it is verified by the backend
+            expiration = jwt.decode(token, verify=False)['exp']
+            return datetime.datetime.utcfromtimestamp(expiration).replace(tzinfo=utc)
+        except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+            return now() + DEFAULT_TOKEN_LIFETIME
+
     def _make_request(self, method, url, headers=None, data=None):
         """Make a request to the secrets backend with the provided variables
 
@@ -241,7 +323,7 @@ class SecretsHandler(object):
         :type data: json
 
         :return: an object containing information from the request
-        :rtype: requests.request
+        :rtype: :class:`requests.Response`
         """
 
         if not headers:
@@ -252,7 +334,7 @@ class SecretsHandler(object):
         if not data:
             data = {}
 
-        r = requests.request(method=method, url=url, headers=headers, data=data, verify=self.raise_ssl_warnings)
+        r = self._session.request(method=method, url=url, headers=headers, data=data, verify=self.raise_ssl_warnings)
 
         if r.status_code in self.secrets_error_codes:
             if r.status_code == 403: